@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DataService.reload 基准测试
+
+生成一个合成目录（默认 10 万设备），分别测量旧的 iterrows 逐行解析与当前向量化解析的
+reload 耗时和 tracemalloc 峰值内存。
+
+用法:
+    python benchmarks/bench_data_reload.py [--devices 100000] [--repeat 3]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.config import get_settings  # noqa: E402
+from src.services.data_service import DataService  # noqa: E402
+
+DEVICE_COLUMNS = ["name", "type", "subType", "command", "area", "view", "aliases", "description"]
+
+
+def write_catalog(directory: str, devices: int, areas: int, media: int) -> dict[str, str]:
+    """写出合成 CSV 目录，返回各文件路径"""
+    rng = random.Random(42)
+    area_names = [f"区域{i}" for i in range(areas)]
+    paths = {name: os.path.join(directory, f"{name}.csv") for name in ("devices", "areas", "media", "doors")}
+
+    with open(paths["devices"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(DEVICE_COLUMNS)
+        for i in range(devices):
+            has_commands = rng.random() < 0.3
+            writer.writerow([
+                f"设备{i}",
+                rng.choice(["player", "control", "light"]),
+                rng.choice(["", "host"]),
+                json.dumps([f"命令{j}" for j in range(rng.randint(1, 4))], ensure_ascii=False) if has_commands else "",
+                rng.choice(area_names),
+                json.dumps(["左", "右"], ensure_ascii=False) if rng.random() < 0.2 else "",
+                f"别名{i}" if rng.random() < 0.5 else "",
+                "一段用于展示的设备描述" if rng.random() < 0.5 else "",
+            ])
+
+    with open(paths["areas"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["name", "aliases", "description"])
+        for name in area_names:
+            writer.writerow([name, "", ""])
+
+    with open(paths["media"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["name", "type", "aliases", "description"])
+        for i in range(media):
+            writer.writerow([f"媒体{i}", "video", "", ""])
+
+    with open(paths["doors"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["name", "type", "area1", "area2", "location"])
+        for i in range(min(areas - 1, 100)):
+            writer.writerow([f"门{i}", "passage", area_names[i], area_names[i + 1], ""])
+
+    return paths
+
+
+def legacy_load_devices(path: str) -> dict:
+    """重构前的设备解析实现（pd.read_csv + iterrows + 逐行 json.loads），仅作对照"""
+    df = pd.read_csv(path)
+    devices = {}
+
+    def get_str_value(row, key, default=""):
+        val = row.get(key, default)
+        if pd.isna(val):
+            return default
+        return str(val).strip()
+
+    def parse_list_field(raw_value):
+        if not raw_value or pd.isna(raw_value):
+            return []
+        parsed = json.loads(raw_value)
+        return parsed if isinstance(parsed, list) else []
+
+    for _, row in df.iterrows():
+        name = get_str_value(row, "name")
+        if not name:
+            continue
+        devices[name] = {
+            "name": name,
+            "type": get_str_value(row, "type"),
+            "subType": get_str_value(row, "subType"),
+            "command": parse_list_field(row.get("command", "")),
+            "area": get_str_value(row, "area"),
+            "view": parse_list_field(row.get("view", "")),
+            "aliases": get_str_value(row, "aliases"),
+            "description": get_str_value(row, "description"),
+        }
+    return devices
+
+
+def current_load_devices(path: str) -> dict:
+    service = DataService()
+    return service._process_devices_data(service._load_csv_file(path))
+
+
+def measure(label: str, func, repeat: int) -> None:
+    """计时与内存分开测量：tracemalloc 会显著拖慢执行，计时轮次不开启"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"{label:<28} best {min(durations):8.3f}s   avg {sum(durations) / len(durations):8.3f}s   "
+          f"peak {peak / 1024 / 1024:8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=100_000)
+    parser.add_argument("--areas", type=int, default=200)
+    parser.add_argument("--media", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_catalog(directory, args.devices, args.areas, args.media)
+        data = get_settings().data
+        data.devices_data_path = paths["devices"]
+        data.areas_data_path = paths["areas"]
+        data.media_data_path = paths["media"]
+        data.doors_data_path = paths["doors"]
+
+        service = DataService()
+        print(f"合成目录: {args.devices} 设备, {args.areas} 区域, {args.media} 媒体 (重复 {args.repeat} 次)")
+        measure("devices (iterrows, before)", lambda: legacy_load_devices(paths["devices"]), args.repeat)
+        measure("devices (vectorized, after)", lambda: current_load_devices(paths["devices"]), args.repeat)
+        measure("DataService.reload (all)", service.reload, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
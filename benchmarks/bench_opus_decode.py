@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opus 上行音频解码基准测试
+
+用 PyAV 的 libopus 编码器把一段录音（或合成的类语音信号）编码为原始 Opus 包，
+再按协议 2 分帧后交给 FrameReceiver（与服务端接收路径相同：每个连接一个解码器 + 抖动缓冲），
+测量每个包的解码耗时、每路流占用的单核 CPU 比例，以及相对 int16 PCM 的上行带宽。
+
+用法:
+    python benchmarks/bench_opus_decode.py [--seconds 60] [--bitrate 24000] [--frame-ms 20]
+    python benchmarks/bench_opus_decode.py --wav data/hall_recording.wav --loss 0.02
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import wave
+
+import av
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.module.input.frame_protocol import (  # noqa: E402
+    AudioEncoding,
+    FrameReceiver,
+    FrameType,
+    StreamFormat,
+    pack_frame,
+)
+
+SAMPLE_RATE = 16000
+
+
+def load_audio(path: str | None, seconds: float) -> np.ndarray:
+    """返回 int16 单声道音频；未指定文件时合成带音节包络的谐波信号 + 底噪"""
+    if path:
+        with wave.open(path, "rb") as f:
+            if f.getframerate() != SAMPLE_RATE or f.getnchannels() != 1 or f.getsampwidth() != 2:
+                raise SystemExit(f"WAV 文件须为 {SAMPLE_RATE}Hz 单声道 16 位 PCM")
+            return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 150 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    audio = 0.1 * voiced * syllables + 0.002 * rng.standard_normal(len(t))
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+
+
+def encode(audio: np.ndarray, bitrate: int, frame_ms: int) -> list[bytes]:
+    """编码为原始 Opus 包（与浏览器 WebCodecs AudioEncoder 的输出相同，无容器）"""
+    encoder = av.CodecContext.create("libopus", "w")
+    encoder.sample_rate = SAMPLE_RATE
+    encoder.layout = "mono"
+    encoder.format = "s16"
+    encoder.bit_rate = bitrate
+    encoder.options = {"frame_duration": str(frame_ms), "application": "voip"}
+    frame_samples = SAMPLE_RATE * frame_ms // 1000
+    packets: list[bytes] = []
+    for offset in range(0, len(audio) - frame_samples + 1, frame_samples):
+        frame = av.AudioFrame.from_ndarray(audio[offset:offset + frame_samples].reshape(1, -1),
+                                           format="s16", layout="mono")
+        frame.sample_rate = SAMPLE_RATE
+        frame.pts = offset
+        packets.extend(bytes(p) for p in encoder.encode(frame))
+    packets.extend(bytes(p) for p in encoder.encode(None))
+    return packets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", default=None, help="16kHz 单声道 PCM16 WAV 录音")
+    parser.add_argument("--seconds", type=float, default=60.0, help="合成音频时长（秒）")
+    parser.add_argument("--bitrate", type=int, default=24000, help="Opus 码率 (bit/s)")
+    parser.add_argument("--frame-ms", type=int, default=20, choices=(10, 20, 40, 60), help="Opus 帧长 (ms)")
+    parser.add_argument("--jitter-ms", type=int, default=60, help="接收端抖动容限 (ms)")
+    parser.add_argument("--loss", type=float, default=0.0, help="模拟丢包率")
+    parser.add_argument("--reorder", type=float, default=0.0, help="模拟相邻包交换顺序的比例")
+    args = parser.parse_args()
+
+    audio = load_audio(args.wav, args.seconds)
+    duration = len(audio) / SAMPLE_RATE
+    packets = encode(audio, args.bitrate, args.frame_ms)
+
+    rng = random.Random(0)
+    frames = [pack_frame(FrameType.AUDIO, seq, seq * args.frame_ms, packet)
+              for seq, packet in enumerate(packets) if rng.random() >= args.loss]
+    for i in range(len(frames) - 1):
+        if rng.random() < args.reorder:
+            frames[i], frames[i + 1] = frames[i + 1], frames[i]
+
+    fmt = StreamFormat(protocol=2, encoding=AudioEncoding.OPUS, sample_rate=SAMPLE_RATE, frame_ms=args.frame_ms)
+    receiver = FrameReceiver(fmt, speech_end_silence_ms=0, max_gap_ms=1000, jitter_ms=args.jitter_ms)
+    pcm_bytes = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for frame in frames:
+        pcm_bytes += sum(map(len, receiver.feed(frame)))
+    pcm_bytes += sum(map(len, receiver.flush()))
+    cpu_seconds, wall_seconds = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    opus_kbps = sum(map(len, frames)) * 8 / duration / 1000
+    pcm_kbps = SAMPLE_RATE * 16 / 1000
+    print(f"音频时长: {duration:.1f}s  Opus 包: {len(packets)} 个，平均 {np.mean(list(map(len, packets))):.0f} 字节")
+    print(f"上行带宽（含 12 字节帧头）: Opus {opus_kbps:.1f}kbit/s  int16 PCM {pcm_kbps:.0f}kbit/s  "
+          f"压缩 {pcm_kbps / opus_kbps:.1f}x")
+    print(f"解码: {wall_seconds / max(len(frames), 1) * 1e6:.1f}µs/包  "
+          f"每路流 CPU {cpu_seconds / duration:.2%}（单核约可承载 {duration / max(cpu_seconds, 1e-9):.0f} 路）")
+    print(f"输出 PCM: {pcm_bytes / 4 / SAMPLE_RATE:.1f}s  帧统计: {receiver.stats()}")
+
+
+if __name__ == "__main__":
+    main()
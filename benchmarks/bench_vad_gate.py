@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静音门限回放基准测试
+
+把一段录音（或合成的展厅环境声 + 间隔出现的语音指令）按 200ms 块回放给 VADProcessor，
+分别在关闭/开启静音门限时测量 VAD 总耗时、每秒音频的 VAD 成本和跳过比例，
+并对比两次检测出的语音段，确认跳过静音块没有改变语音段的时间戳。
+
+需要本地可加载的 VAD 模型（与服务使用相同的 [vad] 配置）。
+
+用法:
+    python benchmarks/bench_vad_gate.py [--minutes 5] [--speech-every 20]
+    python benchmarks/bench_vad_gate.py --wav data/hall_recording.wav
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.config import get_settings  # noqa: E402
+from src.module.vad.energy_gate import chunk_energy_db, EnergyGate  # noqa: E402
+from src.module.vad.vad_core import VADCore  # noqa: E402
+from src.module.vad.vad_processor import VADProcessor  # noqa: E402
+
+
+def load_audio(path: str | None, minutes: float, speech_every: float, sample_rate: int) -> np.ndarray:
+    """返回 float32 单声道音频；未指定文件时合成环境噪声 + 每隔 speech_every 秒一句 2 秒的类语音信号"""
+    if path:
+        with wave.open(path, "rb") as f:
+            if f.getframerate() != sample_rate or f.getnchannels() != 1 or f.getsampwidth() != 2:
+                raise SystemExit(f"WAV 文件须为 {sample_rate}Hz 单声道 16 位 PCM")
+            return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16).astype(np.float32) / 32767.0
+
+    rng = np.random.default_rng(0)
+    total = int(minutes * 60 * sample_rate)
+    # 环境声：低频为主的噪声，约 -55dBFS
+    ambient = np.cumsum(rng.standard_normal(total)) * 0.002
+    ambient -= np.convolve(ambient, np.ones(400) / 400, mode="same")
+    audio = ambient / (np.sqrt(np.mean(ambient ** 2)) + 1e-12) * 10 ** (-55 / 20)
+
+    t = np.arange(2 * sample_rate) / sample_rate
+    pitch = 150 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)  # 每秒 4 个音节的包络
+    utterance = 0.1 * voiced * syllables
+    step = int(speech_every * sample_rate)
+    for start in range(step // 2, total - len(utterance), step):
+        audio[start:start + len(utterance)] += utterance
+    return audio.astype(np.float32)
+
+
+async def replay(vad_core: VADCore, audio: np.ndarray, energy_gate: bool) -> dict:
+    """按块回放一遍音频，返回耗时、跳过比例与检测到的语音段"""
+    settings = get_settings().vad.model_copy(update={"energy_gate": energy_gate, "save_audio_segments": False})
+    processor = VADProcessor(vad_core, settings)
+    chunk = processor.chunk_size_samples
+    segments, vad_seconds = [], 0.0
+    for offset in range(0, len(audio) - chunk + 1, chunk):
+        await processor.append_audio(audio[offset:offset + chunk])
+        while not processor.chunk_queue.empty():
+            result = await processor.process_chunk()
+            vad_seconds += processor.last_inference_seconds
+            segments.extend((start, end) for start, end, _, _ in processor.process_result(result))
+    return {
+        "vad_seconds": vad_seconds,
+        "segments": segments,
+        "skip_ratio": processor.gate.stats()["skip_ratio"] if processor.gate else 0.0,
+    }
+
+
+def compare_segments(baseline: list[tuple[int, int]], gated: list[tuple[int, int]]) -> str:
+    if len(baseline) != len(gated):
+        return f"语音段数量不同: {len(baseline)} vs {len(gated)}"
+    if not baseline:
+        return "两次都没有检测到语音段"
+    drift = max(max(abs(a[0] - b[0]), abs(a[1] - b[1])) for a, b in zip(baseline, gated))
+    return f"{len(baseline)} 个语音段，时间戳最大偏差 {drift}ms"
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    settings = get_settings().vad
+    audio = load_audio(args.wav, args.minutes, args.speech_every, settings.sample_rate)
+    duration = len(audio) / settings.sample_rate
+
+    gate = EnergyGate(settings, settings.chunk_size)
+    chunk = int(settings.chunk_size * settings.sample_rate / 1000)
+    start = time.perf_counter()
+    for offset in range(0, len(audio) - chunk + 1, chunk):
+        gate.should_skip(audio[offset:offset + chunk])
+    gate_us = (time.perf_counter() - start) / max(gate.chunks, 1) * 1e6
+    levels = [chunk_energy_db(audio[i:i + chunk]) for i in range(0, len(audio) - chunk + 1, chunk)]
+
+    vad_core = VADCore(settings)
+    await vad_core.initialize()
+
+    print(f"音频时长: {duration:.1f}s  块: {gate.chunks}  能量中位数: {np.median(levels):.1f}dBFS  "
+          f"门限: {gate.threshold_db:.1f}dBFS")
+    print(f"门限判定开销: {gate_us:.1f}µs/块")
+    results = {}
+    for energy_gate in (False, True):
+        results[energy_gate] = await replay(vad_core, audio, energy_gate)
+        r = results[energy_gate]
+        print(f"静音门限{'开启' if energy_gate else '关闭'}: VAD 总耗时 {r['vad_seconds']:.2f}s  "
+              f"每秒音频 {r['vad_seconds'] / duration * 1000:.2f}ms  跳过 {r['skip_ratio']:.1%}")
+    speedup = results[False]["vad_seconds"] / max(results[True]["vad_seconds"], 1e-9)
+    print(f"VAD CPU 降低: {speedup:.1f}x")
+    print(f"语音段对比: {compare_segments(results[False]['segments'], results[True]['segments'])}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", default=None, help="16kHz 单声道 PCM16 WAV 录音")
+    parser.add_argument("--minutes", type=float, default=5.0, help="合成音频时长（分钟）")
+    parser.add_argument("--speech-every", type=float, default=20.0, help="合成音频中每隔多少秒出现一句语音")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发会话压测 - 验证准入控制与容量规划
+
+按给定速率建立 N 个 /api/audio/ws 会话，每个会话以实时速率推送 16kHz PCM16 音频
+（WAV 文件循环播放，或合成的“语音段 + 静音”交替信号），统计：
+- 会话结果: 立即接入 / 排队后接入 / 被拒绝（1013）/ 出错
+- ASR 延迟: 每段语音推送结束到收到 asr_result 的时间
+- 流控: 收到的 flow_control pause 次数
+结束后读取 /api/monitoring/capacity，核对接入会话数没有超过服务端给出的容量。
+
+用法:
+    python benchmarks/load_test_sessions.py --url ws://localhost:8000 --sessions 50 --ramp 10 --duration 60
+    python benchmarks/load_test_sessions.py --sessions 20 --wav data/sample.wav
+"""
+import argparse
+import asyncio
+import json
+import math
+import statistics
+import time
+import wave
+from dataclasses import dataclass, field
+
+import httpx
+import numpy as np
+import websockets
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class SessionResult:
+    client_id: str
+    outcome: str = "pending"  # accepted / queued / rejected / error
+    queued_seconds: float = 0.0
+    asr_latencies: list[float] = field(default_factory=list)
+    pauses: int = 0
+    error: str | None = None
+
+
+def load_audio(path: str | None, seconds: float) -> np.ndarray:
+    """返回 PCM16 单声道音频；未指定文件时合成 1.5 秒语音 + 1.5 秒静音交替的信号"""
+    if path:
+        with wave.open(path, "rb") as f:
+            if f.getframerate() != SAMPLE_RATE or f.getnchannels() != 1 or f.getsampwidth() != 2:
+                raise SystemExit("WAV 文件须为 16kHz 单声道 16 位 PCM")
+            return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    rng = np.random.default_rng(0)
+    period = int(3.0 * SAMPLE_RATE)
+    t = np.arange(period) / SAMPLE_RATE
+    burst = (0.3 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+             + 0.05 * rng.standard_normal(period))
+    burst[period // 2:] = 0.002 * rng.standard_normal(period - period // 2)
+    repeats = math.ceil(seconds * SAMPLE_RATE / period)
+    return (np.tile(burst, repeats) * 32767).astype(np.int16)
+
+
+async def run_session(url: str, client_id: str, audio: np.ndarray, duration: float, chunk_ms: int) -> SessionResult:
+    result = SessionResult(client_id)
+    chunk = int(SAMPLE_RATE * chunk_ms / 1000)
+    speech_end_times: list[float] = []
+    admitted = asyncio.Event()
+    connected_at = time.perf_counter()
+
+    try:
+        async with websockets.connect(f"{url}/api/audio/ws/{client_id}", max_size=None) as ws:
+            await ws.send(json.dumps({"type": "config", "format": "pcm", "sampleRate": SAMPLE_RATE,
+                                      "sampleSize": 16, "channelCount": 1}))
+
+            async def receive() -> None:
+                async for message in ws:
+                    data = json.loads(message)
+                    if data.get("type") == "admission" and data.get("status") == "queued":
+                        result.outcome = "queued"
+                    elif data.get("type") == "admission" and data.get("status") == "admitted":
+                        result.queued_seconds = time.perf_counter() - connected_at
+                        admitted.set()
+                    elif data.get("type") == "flow_control" and data.get("action") == "pause":
+                        result.pauses += 1
+                    elif data.get("type") == "asr_result" and speech_end_times:
+                        result.asr_latencies.append(time.perf_counter() - speech_end_times.pop(0))
+
+            receiver = asyncio.create_task(receive())
+            start = time.perf_counter()
+            position, sent = 0, 0.0
+            in_speech = False
+            while sent < duration and not receiver.done():
+                if result.outcome == "queued" and not admitted.is_set():
+                    # 排队期间服务端不读取音频，等分配到名额后再按实时速率推送
+                    await admitted.wait()
+                    start = time.perf_counter() - sent
+                frame = audio[position:position + chunk]
+                position = (position + chunk) % max(len(audio) - chunk, 1)
+                speaking = float(np.abs(frame).mean()) > 500
+                if in_speech and not speaking:
+                    speech_end_times.append(time.perf_counter())
+                in_speech = speaking
+                await ws.send(frame.tobytes())
+                sent += chunk_ms / 1000
+                await asyncio.sleep(max(0.0, start + sent - time.perf_counter()))
+            if receiver.done() and receiver.exception() is not None:
+                raise receiver.exception()
+            receiver.cancel()
+            if result.outcome == "pending":
+                result.outcome = "accepted"
+    except websockets.ConnectionClosed as e:
+        if e.rcvd is not None and e.rcvd.code == 1013:
+            result.outcome = "rejected"
+            result.error = e.rcvd.reason
+        elif result.outcome == "pending":
+            result.outcome = "error"
+            result.error = str(e)
+    except Exception as e:
+        result.outcome = "error"
+        result.error = repr(e)
+    return result
+
+
+def percentile(values: list[float], percent: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(percent / 100 * len(values)) - 1))]
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    audio = load_audio(args.wav, args.duration)
+    interval = args.ramp / max(args.sessions - 1, 1)
+    tasks = []
+    for i in range(args.sessions):
+        tasks.append(asyncio.create_task(run_session(args.url, f"load-{i}", audio, args.duration, args.chunk_ms)))
+        await asyncio.sleep(interval)
+
+    async with httpx.AsyncClient(base_url=args.url.replace("ws://", "http://").replace("wss://", "https://")) as client:
+        # 所有会话建立后采样一次服务端容量与活跃会话
+        capacity = (await client.get("/api/monitoring/capacity")).json()
+        results = await asyncio.gather(*tasks)
+        final_capacity = (await client.get("/api/monitoring/capacity")).json()
+
+    outcomes = {name: sum(1 for r in results if r.outcome == name) for name in ("accepted", "queued", "rejected", "error")}
+    latencies = [latency for r in results for latency in r.asr_latencies]
+    print(f"会话: {args.sessions}  时长: {args.duration}s  爬坡: {args.ramp}s")
+    print("结果: " + "  ".join(f"{name}={count}" for name, count in outcomes.items()))
+    print(f"服务端容量: {capacity['capacity']} (估算 {capacity['estimated_capacity']}, "
+          f"单会话 {capacity['session_cost_cores']} 核, 已实测={capacity['measured']})")
+    print(f"压测中活跃/排队: {capacity['active_sessions']}/{capacity['queued_sessions']}  "
+          f"结束后估算容量: {final_capacity['estimated_capacity']}")
+    if latencies:
+        print(f"ASR 延迟: n={len(latencies)}  p50={percentile(latencies, 50):.3f}s  "
+              f"p95={percentile(latencies, 95):.3f}s  max={max(latencies):.3f}s  "
+              f"mean={statistics.mean(latencies):.3f}s")
+    queued = [r.queued_seconds for r in results if r.outcome == "queued" and r.queued_seconds]
+    if queued:
+        print(f"排队等待: n={len(queued)}  p50={percentile(queued, 50):.2f}s  max={max(queued):.2f}s")
+    print(f"流控暂停次数: {sum(r.pauses for r in results)}")
+    for r in results:
+        if r.outcome == "error":
+            print(f"  {r.client_id}: {r.error}")
+
+    failed = False
+    if capacity["active_sessions"] > capacity["capacity"]:
+        print(f"失败: 活跃会话 {capacity['active_sessions']} 超过容量 {capacity['capacity']}")
+        failed = True
+    if args.max_p95 and latencies and percentile(latencies, 95) > args.max_p95:
+        print(f"失败: ASR p95 延迟超过 {args.max_p95}s")
+        failed = True
+    return 1 if failed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:8000", help="服务地址（ws:// 或 wss://）")
+    parser.add_argument("--sessions", type=int, default=20, help="并发会话数")
+    parser.add_argument("--ramp", type=float, default=5.0, help="在多少秒内建立全部会话")
+    parser.add_argument("--duration", type=float, default=30.0, help="每个会话推送音频的秒数")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="每帧音频时长（毫秒）")
+    parser.add_argument("--wav", default=None, help="16kHz 单声道 PCM16 WAV 文件，循环推送")
+    parser.add_argument("--max-p95", type=float, default=0.0, help="ASR p95 延迟上限（秒），超过则返回非零")
+    raise SystemExit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,7 @@ class AIAssistantWidget {
     this.isConnected = false;
     this.isReconnecting = false;
     this.socket = null;
+    this.flowPaused = false;
     this.audioContext = null;
     this.mediaStream = null;
     this.workletNode = null;
@@ -427,6 +428,7 @@ class AIAssistantWidget {
         console.log('[AIAssistant] Connected');
         this.isConnected = true;
         this.isReconnecting = false;
+        this.flowPaused = false;
         this.updateStatus('', 'connected');
 
         // Send metadata
@@ -479,6 +481,12 @@ class AIAssistantWidget {
   }
 
   handleMessage(data) {
+    if (data.type === 'flow_control') {
+      // Server-side backpressure: stop sending audio until resumed
+      this.flowPaused = data.action === 'pause';
+      return;
+    }
+
     this.resultPanel.style.display = 'flex';
     const txtEl = this.resultPanel.querySelector('.result-text');
 
@@ -559,7 +567,7 @@ class AIAssistantWidget {
       this.workletNode = new AudioWorkletNode(this.audioContext, 'audio-processor');
 
       this.workletNode.port.onmessage = (e) => {
-        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+        if (this.socket && this.socket.readyState === WebSocket.OPEN && !this.flowPaused) {
           if (this.isRecording) {
             this.socket.send(e.data);
           } else if (this.isTrailingSilence) {
@@ -0,0 +1,231 @@
+// 音频 WebSocket 协议 2 客户端：二进制分帧 + 浏览器端轻量 VAD + 可选 Opus 编码（WebCodecs）
+// 帧格式与服务端 src/module/input/frame_protocol.py 一致（小端）:
+//   | version u8 | type u8 | flags u16 | seq u32 | timestamp_ms u32 | payload |
+
+export const PROTOCOL_VERSION = 2;
+const HEADER_SIZE = 12;
+
+export const FrameType = {
+  AUDIO: 1,
+  SPEECH_START: 2,
+  SPEECH_END: 3,
+};
+
+// 浏览器是否可以编码 Opus（WebCodecs AudioEncoder）
+export const supportsOpus = () => typeof window !== 'undefined' && typeof window.AudioEncoder === 'function';
+
+// 发给服务端的 config 消息；默认在支持时请求 Opus，服务端不支持时 config_ack 会回退为 int16
+export const buildConfig = ({ frameMs = 20, clientVad = true, encoding = supportsOpus() ? 'opus' : 'int16' } = {}) => ({
+  type: 'config',
+  format: 'pcm',
+  protocol: PROTOCOL_VERSION,
+  encoding,
+  sampleRate: 16000,
+  sampleSize: 16,
+  channelCount: 1,
+  frameMs,
+  clientVad,
+});
+
+export class AudioFrameEncoder {
+  /**
+   * @param {object} ack 服务端 config_ack（决定编码、帧长、是否启用客户端 VAD）
+   * @param {object} options VAD 与 Opus 参数
+   * @param {function} sink 接收待发送的帧；Opus 编码是异步的，协商为 Opus 时必须提供
+   * @param {function} onEncoderError Opus 编码器失败后调用；会话已协商为 Opus，调用方应以 int16 重新连接
+   */
+  constructor(ack, {
+    energyFloorDb = -50,   // 低于此能量总是视为静音
+    marginDb = 12,         // 语音判定门限 = 噪声底 + 余量
+    prerollMs = 300,       // 语音开始前补发的帧
+    hangoverMs = 500,      // 最后一个语音帧后继续发送的时长
+    opusBitrate = 24000,   // Opus 码率 (bit/s)
+  } = {}, sink = null, onEncoderError = null) {
+    this.sampleRate = ack.sampleRate || 16000;
+    this.frameSamples = Math.round(this.sampleRate * (ack.frameMs || 20) / 1000);
+    this.clientVad = !!ack.clientVad;
+    this.energyFloorDb = energyFloorDb;
+    this.marginDb = marginDb;
+    this.prerollFrames = Math.ceil(prerollMs / (ack.frameMs || 20));
+    this.hangoverFrames = Math.ceil(hangoverMs / (ack.frameMs || 20));
+
+    this.pending = new Int16Array(0);
+    this.seq = 0;
+    this.samples = 0;          // 已切分的采样数，用于帧时间戳
+    this.noiseFloorDb = energyFloorDb - marginDb;
+    this.inSpeech = false;
+    this.quietFrames = 0;
+    this.preroll = [];
+    this.sentFrames = 0;
+    this.skippedFrames = 0;
+
+    this.sink = sink;
+    this.onEncoderError = onEncoderError;
+    // 待输出的帧，按 seq 排列；Opus 音频帧在编码完成前占位，保证语音标记不会超到音频前面
+    this.outbox = [];
+    this.opusEncoder = null;
+    this.opusFailed = false;
+    if (ack.encoding === 'opus') {
+      this.opusEncoder = new window.AudioEncoder({
+        output: chunk => this.onOpusPacket(chunk),
+        error: e => this.onOpusError(e),
+      });
+      this.opusEncoder.configure({
+        codec: 'opus',
+        sampleRate: this.sampleRate,
+        numberOfChannels: 1,
+        bitrate: opusBitrate,
+        opus: { frameDuration: (ack.frameMs || 20) * 1000 },
+      });
+    }
+  }
+
+  frame(type, timestampMs, payload, seq = null) {
+    const body = payload ? new Uint8Array(payload.buffer, payload.byteOffset, payload.byteLength) : null;
+    const buffer = new ArrayBuffer(HEADER_SIZE + (body ? body.byteLength : 0));
+    const view = new DataView(buffer);
+    view.setUint8(0, PROTOCOL_VERSION);
+    view.setUint8(1, type);
+    view.setUint16(2, 0, true);
+    view.setUint32(4, (seq ?? this.seq) >>> 0, true);
+    view.setUint32(8, timestampMs >>> 0, true);
+    if (body) new Uint8Array(buffer, HEADER_SIZE).set(body);
+    if (seq === null) this.seq += 1;
+    this.sentFrames += 1;
+    return buffer;
+  }
+
+  energyDb(samples) {
+    let sum = 0;
+    for (let i = 0; i < samples.length; i++) {
+      const v = samples[i] / 32768;
+      sum += v * v;
+    }
+    return 10 * Math.log10(sum / samples.length + 1e-10);
+  }
+
+  isVoiced(samples) {
+    const db = this.energyDb(samples);
+    // 噪声底：下降立即跟随，上升很慢
+    this.noiseFloorDb = db < this.noiseFloorDb ? db : this.noiseFloorDb + 0.005 * (db - this.noiseFloorDb);
+    return db >= Math.max(this.energyFloorDb, this.noiseFloorDb + this.marginDb);
+  }
+
+  /**
+   * 加入 AudioWorklet 输出的 int16 采样，返回需要发送的二进制帧（设置了 sink 时交给 sink，返回空数组）
+   * @param {ArrayBuffer} buffer
+   * @returns {ArrayBuffer[]}
+   */
+  push(buffer) {
+    const input = new Int16Array(buffer);
+    const merged = new Int16Array(this.pending.length + input.length);
+    merged.set(this.pending);
+    merged.set(input, this.pending.length);
+
+    const out = [];
+    let offset = 0;
+    for (; offset + this.frameSamples <= merged.length; offset += this.frameSamples) {
+      const samples = merged.slice(offset, offset + this.frameSamples);
+      const timestampMs = Math.round(this.samples * 1000 / this.sampleRate);
+      this.samples += this.frameSamples;
+      this.encodeFrame(samples, timestampMs, out);
+    }
+    this.pending = merged.slice(offset);
+    const frames = out.filter(Boolean);
+    if (!this.sink) return frames;
+    this.outbox.push(...frames);
+    this.drain();
+    return [];
+  }
+
+  audioFrame(timestampMs, samples) {
+    // 会话已协商为 Opus，编码器失败后不能改发 PCM，只丢弃音频（语音标记照常发送）
+    if (this.opusFailed) return null;
+    if (!this.opusEncoder) return this.frame(FrameType.AUDIO, timestampMs, samples);
+    // 先占住 seq，编码完成后在 onOpusPacket 中补上数据包
+    const placeholder = { seq: this.seq, timestampMs, buffer: null };
+    this.seq += 1;
+    const data = new window.AudioData({
+      format: 's16',
+      sampleRate: this.sampleRate,
+      numberOfFrames: samples.length,
+      numberOfChannels: 1,
+      timestamp: timestampMs * 1000,
+      data: samples,
+    });
+    this.opusEncoder.encode(data);
+    data.close();
+    return placeholder;
+  }
+
+  onOpusPacket(chunk) {
+    const placeholder = this.outbox.find(item => item.buffer === null);
+    if (!placeholder) return;
+    const packet = new Uint8Array(chunk.byteLength);
+    chunk.copyTo(packet);
+    placeholder.buffer = this.frame(FrameType.AUDIO, placeholder.timestampMs, packet, placeholder.seq);
+    this.drain();
+  }
+
+  onOpusError(e) {
+    // 编码器出错后进入 closed 状态，已提交的帧不会再有输出：丢弃未填充的占位，
+    // 否则 drain 会一直停在第一个占位上；缺失的 seq 由服务端按丢帧补静音
+    console.error('Opus 编码失败，停止发送音频:', e);
+    this.opusFailed = true;
+    this.opusEncoder = null;
+    this.outbox = this.outbox.filter(item => item instanceof ArrayBuffer || item.buffer);
+    this.drain();
+    if (this.onEncoderError) this.onEncoderError(e);
+  }
+
+  drain() {
+    while (this.outbox.length) {
+      const item = this.outbox[0];
+      const buffer = item instanceof ArrayBuffer ? item : item.buffer;
+      if (!buffer) break;
+      this.outbox.shift();
+      this.sink(buffer);
+    }
+  }
+
+  close() {
+    if (this.opusEncoder && this.opusEncoder.state !== 'closed') this.opusEncoder.close();
+    this.opusEncoder = null;
+    this.outbox = [];
+  }
+
+  encodeFrame(samples, timestampMs, out) {
+    if (!this.clientVad) {
+      out.push(this.audioFrame(timestampMs, samples));
+      return;
+    }
+
+    const voiced = this.isVoiced(samples);
+    if (!this.inSpeech) {
+      if (!voiced) {
+        // 空闲时只保留最近的前导帧，不发送
+        this.preroll.push([samples, timestampMs]);
+        if (this.preroll.length > this.prerollFrames) {
+          this.preroll.shift();
+          this.skippedFrames += 1;
+        }
+        return;
+      }
+      this.inSpeech = true;
+      this.quietFrames = 0;
+      const startMs = this.preroll.length ? this.preroll[0][1] : timestampMs;
+      out.push(this.frame(FrameType.SPEECH_START, startMs));
+      for (const [preSamples, preTimestamp] of this.preroll) {
+        out.push(this.audioFrame(preTimestamp, preSamples));
+      }
+      this.preroll = [];
+    }
+
+    out.push(this.audioFrame(timestampMs, samples));
+    this.quietFrames = voiced ? 0 : this.quietFrames + 1;
+    if (this.quietFrames >= this.hangoverFrames) {
+      this.inSpeech = false;
+      out.push(this.frame(FrameType.SPEECH_END, timestampMs + Math.round(this.frameSamples * 1000 / this.sampleRate)));
+    }
+  }
+}
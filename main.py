@@ -17,6 +17,7 @@ from src.api.routers import vad
 from src.api.routers import monitoring
 from src.api.routers import tool
 from src.api.routers import pipeline
+from src.api.routers import prometheus
 from src.api.schemas import HealthResponse
 from src.config.logging_config import setup_logging
 from src.core.lifespan import lifespan
@@ -65,6 +66,9 @@ async def root() -> HealthResponse:
 # Include the global API router into the app
 app.include_router(api_router)
 
+# Prometheus 抓取端点位于根路径 /metrics
+app.include_router(prometheus.router)
+
 
 @app.get("/")
 async def app_root():
@@ -81,13 +85,44 @@ def run_api(host: str = '0.0.0.0', port: int = 8000) -> None:
     uvicorn.run(app, host=host, port=port, reload=False, log_config=None)
 
 
+def run_multi_worker(host: str = '0.0.0.0', port: int = 8000, workers: int = 2) -> None:
+    """
+    多进程模式：一个共享推理服务进程承载 VAD/ASR 模型，N 个 API 工作进程只负责 I/O 和会话，
+    通过 Unix socket 调用推理服务，模型内存不随工作进程数倍增。
+    """
+    import subprocess
+    import uvicorn
+    # 工作进程由 uvicorn 重新导入 main，读取此环境变量后以 remote 模式创建 VAD/ASR/RAG
+    os.environ["INFERENCE_MODE"] = "remote"
+    # 每个工作进程各自做容量规划，按进程数平分整机的核数和会话上限
+    os.environ["CAPACITY_WORKERS"] = str(workers)
+    inference_server = subprocess.Popen(
+        [sys.executable, "-m", "src.module.inference.server"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    logger.info("共享推理服务进程已启动: pid={pid}", pid=inference_server.pid)
+    try:
+        uvicorn.run("main:app", host=host, port=port, workers=workers, reload=False, log_config=None)
+    finally:
+        inference_server.terminate()
+        try:
+            inference_server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            inference_server.kill()
+
+
 if __name__ == '__main__':
     import argparse
 
     parser = argparse.ArgumentParser(description='API Service')
     parser.add_argument('--host', default='0.0.0.0', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8000, help='Port to bind to')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='API worker processes; >1 starts a shared inference server for VAD/ASR/RAG')
     args = parser.parse_args()
 
     logger.info("启动API服务: http://{host}:{port}", host=args.host, port=args.port)
-    run_api(host=args.host, port=args.port)
+    if args.workers > 1:
+        run_multi_worker(host=args.host, port=args.port, workers=args.workers)
+    else:
+        run_api(host=args.host, port=args.port)
@@ -1,50 +1,94 @@
 import asyncio
-from typing import Any
-
-import numpy as np
-import numpy.typing as npt
 
 from src.config.config import get_settings
+from src.core.backpressure import ByteBoundedQueue, OverflowPolicy
+from src.core.hot_swap import HotSwapSlot
+from src.module.input.frame_protocol import FrameReceiver, StreamFormat
 from src.module.input.stream_decoder import StreamDecoder
 from src.module.vad.vad_core import VADCore
 from src.module.vad.vad_processor import VADProcessor
-from src.module.llm.tool.definitions import ExhibitionCommand
+from src.services.tracing import TracedItem
 
 
 class Context:
     """
     封装了单个用户连接所需的所有状态和缓冲区。
+
+    音频队列（原始音频、VAD 音频块、语音段）按内存限额，溢出按 backpressure.policy 处理；
+    降级会话（准入控制判定系统繁忙时接入）的限额按 degraded_memory_factor 缩小并改用 degraded_policy。
     """
     
     # 队列大小限制配置
-    AUDIO_INPUT_QUEUE_SIZE = 10000  # 原始音频数据队列
-    AUDIO_NP_QUEUE_SIZE = 10000     # 解码后的音频队列
     AUDIO_SEGMENT_QUEUE_SIZE = 50 # VAD 分割后的语音段队列
     ASR_OUTPUT_QUEUE_SIZE = 20    # ASR 识别结果队列
     COMMAND_QUEUE_SIZE = 20       # 命令队列
 
-    def __init__(self, context_id: str, decoder: StreamDecoder, vad_core: VADCore):
+    def __init__(self, context_id: str, decoder: StreamDecoder, vad_core: VADCore, degraded: bool = False,
+                 stream_format: StreamFormat | None = None, vad_slot: HotSwapSlot[VADCore] | None = None):
         self.context_id: str = context_id
-        vad_settings = get_settings().vad
+        settings = get_settings()
+        vad_settings = settings.vad
+        bp = settings.backpressure
+        self.degraded = degraded
+        factor = bp.degraded_memory_factor if degraded else 1.0
+        policy = OverflowPolicy(bp.degraded_policy if degraded else bp.policy)
+        # 任一音频队列的暂停/恢复状态变化时置位，由流控任务通知客户端
+        self.pressure_changed = asyncio.Event()
+
+        def bounded(name: str, max_bytes: int, max_items: int = 0) -> ByteBoundedQueue:
+            return ByteBoundedQueue(
+                name, int(max_bytes * factor), policy, max_items,
+                bp.high_watermark, bp.low_watermark, self._on_pressure,
+            )
+
         self.decoder: StreamDecoder = decoder
-        self.audio_input_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=self.AUDIO_INPUT_QUEUE_SIZE)
-        self.audio_np_queue: asyncio.Queue[npt.NDArray[np.float32]] = asyncio.Queue(maxsize=self.AUDIO_NP_QUEUE_SIZE)
-        self.VADProcessor: VADProcessor = VADProcessor(vad_core, vad_settings)
-        self.audio_segment_queue: asyncio.Queue[npt.NDArray[np.float32]] = asyncio.Queue(maxsize=self.AUDIO_SEGMENT_QUEUE_SIZE)
-        self.asr_output_queue: asyncio.Queue[str] = asyncio.Queue(maxsize=self.ASR_OUTPUT_QUEUE_SIZE)
-        self.command_queue: asyncio.Queue[list[ExhibitionCommand]] = asyncio.Queue(maxsize=self.COMMAND_QUEUE_SIZE)
+        # 协商后的音频格式；协议 2 的二进制帧由 frame_receiver 解析为连续音频
+        self.stream_format: StreamFormat = stream_format or StreamFormat(sample_rate=vad_settings.sample_rate)
+        self.frame_receiver: FrameReceiver | None = None
+        if self.stream_format.protocol >= 2:
+            self.frame_receiver = FrameReceiver(
+                self.stream_format, settings.server.ws_speech_end_silence_ms, settings.server.ws_max_gap_ms,
+                jitter_ms=settings.server.ws_jitter_ms,
+            )
+        self.audio_input_queue: ByteBoundedQueue = bounded("audio_input", bp.audio_input_max_bytes)
+        self.VADProcessor: VADProcessor = VADProcessor(
+            vad_core, vad_settings,
+            chunk_queue=bounded("vad_chunk", bp.vad_chunk_max_bytes, vad_settings.chunk_queue_maxsize),
+            slot=vad_slot,
+        )
+        # 以下队列的元素为 TracedItem(数据, 链路)，链路随语音段贯穿整个管道
+        self.audio_segment_queue: ByteBoundedQueue = bounded(
+            "audio_segment", bp.audio_segment_max_bytes, self.AUDIO_SEGMENT_QUEUE_SIZE
+        )
+        self.asr_output_queue: asyncio.Queue[TracedItem] = asyncio.Queue(maxsize=self.ASR_OUTPUT_QUEUE_SIZE)
+        self.command_queue: asyncio.Queue[TracedItem] = asyncio.Queue(maxsize=self.COMMAND_QUEUE_SIZE)
         self.location: str = "5G先锋体验区"  # 默认初始位置
         self.chat_history: list = []  # 聊天历史消息列表，存储 LangChain Message 对象
         self.last_device_name: str | None = None  # 最近控制的设备名称（来自AEP响应）
     
+    @property
+    def byte_queues(self) -> list[ByteBoundedQueue]:
+        return [self.audio_input_queue, self.VADProcessor.chunk_queue, self.audio_segment_queue]
+
+    def _on_pressure(self, queue_name: str, paused: bool) -> None:
+        self.pressure_changed.set()
+
+    def throttled_queues(self) -> list[str]:
+        """当前超过高水位、要求客户端暂停发送的队列"""
+        return [queue.name for queue in self.byte_queues if queue.paused]
+
+    def queued_bytes(self) -> int:
+        """本连接各音频队列当前占用的字节数"""
+        return sum(queue.nbytes for queue in self.byte_queues)
+
     def get_queue_stats(self) -> dict:
         """获取当前队列状态统计"""
         return {
             "context_id": self.context_id,
-            "audio_input": {"current": self.audio_input_queue.qsize(), "max": self.AUDIO_INPUT_QUEUE_SIZE},
-            "audio_np": {"current": self.audio_np_queue.qsize(), "max": self.AUDIO_NP_QUEUE_SIZE},
-            "audio_segment": {"current": self.audio_segment_queue.qsize(), "max": self.AUDIO_SEGMENT_QUEUE_SIZE},
+            "degraded": self.degraded,
+            "audio_input": self.audio_input_queue.stats(),
+            "audio_segment": self.audio_segment_queue.stats(),
             "asr_output": {"current": self.asr_output_queue.qsize(), "max": self.ASR_OUTPUT_QUEUE_SIZE},
             "command": {"current": self.command_queue.qsize(), "max": self.COMMAND_QUEUE_SIZE},
-            "vad_chunk": {"current": self.VADProcessor.chunk_queue.qsize(), "max": self.VADProcessor.chunk_queue.maxsize or 0}
+            "vad_chunk": self.VADProcessor.chunk_queue.stats(),
         }
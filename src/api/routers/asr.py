@@ -9,24 +9,35 @@ router = APIRouter(
 )
 
 @router.post("/restart")
-async def restart_asr():
-    """Restart ASR processor with latest hotwords."""
-    logger.info("Received request to restart ASR")
+async def restart_asr(reload: bool = False):
+    """Apply the latest hotwords to the ASR processor.
+
+    Hotwords are swapped on the live model without reloading it. With `reload=true`
+    a new processor is built and smoke-tested in the background and swapped in; the
+    current one keeps serving requests until then.
+    """
+    logger.info(f"Received request to restart ASR (reload={reload})")
     try:
         # Get hotwords from DataService
         hotwords = dependencies.data_service.get_all_hotwords()
         logger.info(f"Loaded {len(hotwords)} hotwords from data service")
         
         if dependencies.asr_processor:
-             # Update settings
-            dependencies.asr_processor.settings.hotwords = hotwords
-            
-            # Re-initialize
-            await dependencies.asr_processor.initialize()
-            
+            changed = dependencies.asr_processor.update_hotwords(hotwords)
+
+            if reload or not dependencies.asr_processor.is_ready():
+                slot = dependencies.component_slots.get("asr")
+                if slot is not None:
+                    await slot.swap()
+                else:
+                    await dependencies.asr_processor.initialize()
+                message = f"ASR restarted successfully with {len(hotwords)} hotwords"
+            else:
+                message = f"ASR hotwords {'updated' if changed else 'unchanged'} ({len(hotwords)} hotwords)"
+
             return {
                 "success": True, 
-                "message": f"ASR restarted successfully with {len(hotwords)} hotwords",
+                "message": message,
                 "hotwords_count": len(hotwords)
             }
         else:
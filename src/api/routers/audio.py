@@ -7,10 +7,15 @@ from pydantic import ValidationError
 
 from src.api.context import Context
 from src.api.schemas import WebSocketConfig
+from src.config.config import get_settings
 from src.config.logging_config import request_id_var
 from src.core import dependencies
+from src.core.admission import AdmissionDecision, get_admission_controller
+from src.core.capacity import get_capacity_planner
+from src.core.startup import component_status, wait_until_ready
+from src.module.input.frame_protocol import negotiate
 from src.module.input.stream_decoder import StreamDecoder
-from src.services.audio_pipeline import run_vad_processor, run_decode_vad_appender, run_asr_processor, run_llm_rag_processor, receive_loop, run_command_executor
+from src.services.audio_pipeline import run_vad_processor, run_decode_vad_appender, run_asr_processor, run_llm_rag_processor, receive_loop, run_command_executor, run_flow_control
 
 router = APIRouter(
     prefix="/audio",
@@ -20,7 +25,46 @@ router = APIRouter(
 
 @router.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str) -> None:
+    # 冷启动期间先等待所需组件就绪，超时仍未就绪则以 1013 (Try Again Later) 拒绝
+    server_settings = get_settings().server
+    if not await wait_until_ready(server_settings.ws_required_components, server_settings.ws_ready_timeout):
+        not_ready = [name for name in server_settings.ws_required_components if not component_status(name)["ready"]]
+        logger.warning(f"组件未就绪，拒绝客户端 {client_id}: {not_ready}")
+        await websocket.accept()
+        await websocket.close(code=1013, reason=f"服务尚未就绪: {', '.join(not_ready)}")
+        return
+
+    # 系统繁忙时拒绝新会话或以降级模式接入
+    decision = get_admission_controller().admit(client_id)
+    if decision == AdmissionDecision.REJECT:
+        await websocket.accept()
+        await websocket.close(code=1013, reason="服务繁忙，请稍后重试")
+        return
+
     await websocket.accept()
+
+    # 超出会话容量时排队等待空位（期间通知客户端排队位置）或拒绝
+    queued = False
+
+    async def notify_queued(position: int) -> None:
+        nonlocal queued
+        queued = True
+        await websocket.send_text(json.dumps({"type": "admission", "status": "queued", "position": position}))
+
+    planner = get_capacity_planner()
+    try:
+        admitted = await planner.acquire(client_id, notify_queued)
+        if not admitted:
+            await websocket.close(code=1013, reason="会话已满，请稍后重试")
+            return
+        if queued:
+            await websocket.send_text(json.dumps({"type": "admission", "status": "admitted"}))
+    except WebSocketDisconnect:
+        planner.release(client_id)
+        return
+
+    if dependencies.startup_graph is not None:
+        dependencies.startup_graph.mark_session_accepted()
     token = request_id_var.set(client_id)
     logger.info("客户端已连接")
 
@@ -41,10 +85,20 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str) -> None:
 
         logger.info("收到配置: {config}", config=config_data)
 
+        # 协议 2 的客户端按 config_ack 中服务端确认的参数发送分帧音频
+        stream_format = negotiate(config, server_settings, get_settings().vad.sample_rate)
+        if stream_format.protocol >= 2:
+            await websocket.send_text(json.dumps(stream_format.ack()))
+            logger.info("音频协议协商完成: {ack}", ack=stream_format.ack())
+
         # 根据前端配置初始化解码器
         decoder = StreamDecoder()
         # 初始化与配置
-        context = Context(context_id=client_id, decoder=decoder, vad_core=dependencies.vad_core)
+        context = Context(
+            context_id=client_id, decoder=decoder, vad_core=dependencies.vad_core,
+            degraded=decision == AdmissionDecision.DEGRADE, stream_format=stream_format,
+            vad_slot=dependencies.component_slots.get("vad"),
+        )
         dependencies.active_contexts[client_id] = context
 
         # 启动处理管道
@@ -54,7 +108,8 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str) -> None:
             asyncio.create_task(run_vad_processor(context)),
             asyncio.create_task(run_asr_processor(context, websocket)),
             asyncio.create_task(run_llm_rag_processor(context, websocket)),
-            asyncio.create_task(run_command_executor(context, websocket))
+            asyncio.create_task(run_command_executor(context, websocket)),
+            asyncio.create_task(run_flow_control(context, websocket)),
         ]
 
         done, pending = await asyncio.wait(all_tasks, return_when=asyncio.FIRST_COMPLETED)
@@ -84,6 +139,11 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str) -> None:
 
         if client_id in dependencies.active_contexts:
             del dependencies.active_contexts[client_id]
+        if context is not None:
+            await context.VADProcessor.close()
+            if context.frame_receiver is not None:
+                logger.info("音频帧统计: {stats}", stats=context.frame_receiver.stats())
+        planner.release(client_id)
 
         logger.info("资源已清理")
         request_id_var.reset(token)
@@ -1,5 +1,5 @@
 import os
-from typing import Any
+from typing import Any, Literal
 
 from fastapi import APIRouter, HTTPException, status
 from loguru import logger
@@ -265,3 +265,104 @@ async def update_user_location(request: LocationUpdateRequest) -> StatusResponse
         data={"client_id": client_id, "location": location},
         message=message
     )
+
+
+# --- 单条更新/删除、检索与CSV导入导出 ---
+
+Section = Literal["devices", "areas", "media", "doors"]
+
+# section -> (校验模型, RAG文档类型, RAG批量添加方法名)
+_SECTION_MODELS = {
+    "devices": (DeviceItem, "device", "batch_add_devices"),
+    "areas": (AreaItem, "area", "batch_add_areas"),
+    "media": (MediaItem, "media", "batch_add_media"),
+    "doors": (DoorItem, "door", "batch_add_doors"),
+}
+
+
+@router.put("/{section}", response_model=UploadResponse)
+async def upsert_items(section: Section, items: list[dict]) -> UploadResponse:
+    """按名称新增或更新数据，已存在的同名条目被覆盖"""
+    logger.info(f"收到更新{section}数据请求，数量: {len(items)}")
+    model, doc_type, batch_add = _SECTION_MODELS[section]
+
+    validated_items = []
+    for i, item in enumerate(items):
+        try:
+            validated_items.append(model(**item))
+        except ValidationError as e:
+            error_msg = f"第 {i+1} 条数据校验不通过: {e.errors()}, 源数据: {item}"
+            logger.error(error_msg)
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=error_msg)
+
+    if dependencies.data_service is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="DataService未初始化")
+
+    try:
+        await dependencies.data_service.upsert_items(section, validated_items)
+        if dependencies.rag_processor:
+            await dependencies.rag_processor.delete_by_names(doc_type, [item.name for item in validated_items])
+            await getattr(dependencies.rag_processor, batch_add)(validated_items)
+        message = f"{section}数据已更新 {len(validated_items)} 条"
+        logger.info(message)
+        return UploadResponse(status="success", message=message)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"更新{section}数据失败: {str(e)}")
+
+
+@router.delete("/{section}/{name}", response_model=UploadResponse)
+async def delete_item(section: Section, name: str) -> UploadResponse:
+    """按名称删除单条数据"""
+    logger.info(f"收到删除{section}数据请求: {name}")
+    if dependencies.data_service is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="DataService未初始化")
+
+    try:
+        deleted = await dependencies.data_service.delete_items(section, [name])
+        if deleted and dependencies.rag_processor:
+            await dependencies.rag_processor.delete_by_names(_SECTION_MODELS[section][1], deleted)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"删除{section}数据失败: {str(e)}")
+
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"未找到{section}数据: {name}")
+    logger.info(f"{section}数据已删除: {name}")
+    return UploadResponse(status="success", message=f"{section}数据已删除: {name}")
+
+
+@router.get("/{section}/search", response_model=list[dict[str, Any]])
+async def search_items(section: Section, q: str, limit: int = 20) -> list[dict[str, Any]]:
+    """按名称、别名和描述全文检索数据"""
+    if dependencies.data_service is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="DataService未初始化")
+    return dependencies.data_service.search(q, section, limit)
+
+
+@router.post("/import", response_model=StatusResponse)
+async def import_csv() -> StatusResponse:
+    """将配置的CSV文件导入SQLite存储（覆盖现有数据），并重建RAG向量库"""
+    if dependencies.data_service is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="DataService未初始化")
+    if dependencies.data_service.backend != "sqlite":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="仅 sqlite 存储后端支持CSV导入")
+
+    try:
+        counts = await dependencies.data_service.import_csv()
+        if dependencies.rag_processor:
+            await dependencies.rag_processor.refresh_database()
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"CSV导入失败: {str(e)}")
+    return StatusResponse(status="success", data=counts, message="CSV数据已导入")
+
+
+@router.post("/export", response_model=StatusResponse)
+async def export_csv() -> StatusResponse:
+    """将当前数据导出为CSV文件，写回配置的CSV路径"""
+    if dependencies.data_service is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="DataService未初始化")
+
+    try:
+        written = await dependencies.data_service.export_csv()
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"CSV导出失败: {str(e)}")
+    return StatusResponse(status="success", data=written, message="数据已导出为CSV")
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, status
 from loguru import logger
 
-from src.api.schemas import LLMHealthResponse
+from src.api.schemas import LLMHealthResponse, StatusResponse
 from src.core import dependencies
+from src.module.llm.llm_router import LLMRouter
 
 router = APIRouter(
     prefix="/llm",
@@ -42,4 +43,84 @@ async def llm_health() -> LLMHealthResponse:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"检查LLM健康状态时发生错误: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/router", response_model=StatusResponse)
+async def llm_router_status(limit: int = 20) -> StatusResponse:
+    """
+    获取LLM路由器的提供方评分和最近的路由决策。
+
+    Args:
+        limit: 返回的最近决策数量
+    """
+    processor = dependencies.llm_processor
+    if processor is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="LLM服务当前不可用，尚未初始化"
+        )
+    if not isinstance(processor, LLMRouter):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="当前未启用LLM路由器（llm.provider 不是 router）"
+        )
+
+    return StatusResponse(
+        status="success",
+        message="LLM路由器状态",
+        data={
+            "providers": processor.get_provider_stats(),
+            "decisions": processor.get_decisions(limit)
+        }
+    )
+
+
+@router.get("/prompt/stats", response_model=StatusResponse)
+async def llm_prompt_stats() -> StatusResponse:
+    """
+    获取最近Prompt上下文组装的各段落token估算与保留文档数，用于调整 top_k 和 token 预算。
+    """
+    processor = dependencies.llm_processor
+    if processor is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="LLM服务当前不可用，尚未初始化"
+        )
+
+    return StatusResponse(
+        status="success",
+        message="Prompt组装统计",
+        data=processor.prompt_assembler.get_stats()
+    )
+
+
+@router.post("/reinitialize", response_model=StatusResponse)
+async def llm_reinitialize() -> StatusResponse:
+    """
+    重新初始化LLM处理器。
+    新实例在后台创建、初始化并通过探测后才替换当前实例，进行中的请求在旧实例上完成。
+    """
+    slot = dependencies.component_slots.get("llm")
+    if dependencies.llm_processor is None or slot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="LLM服务当前不可用，尚未初始化"
+        )
+    if slot.swapping:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="LLM处理器正在重新初始化")
+
+    try:
+        await slot.swap()
+    except Exception as e:
+        logger.exception("重新初始化LLM处理器失败")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"重新初始化LLM处理器失败，继续使用当前实例: {str(e)}"
+        )
+
+    return StatusResponse(
+        status="success",
+        message="LLM处理器重新初始化完成",
+        data={"current_status": dependencies.llm_processor.status.value, **slot.get_status()}
+    )
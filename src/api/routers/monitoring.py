@@ -5,13 +5,20 @@
 """
 import asyncio
 import json
+import os
 from datetime import datetime
 
-from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from loguru import logger
 
 from src.core import dependencies
+from src.core.admission import get_admission_controller
+from src.core.capacity import get_capacity_planner
+from src.core.executors import get_executors
+from src.core.model_cache import get_model_cache
+from src.core.startup import COMPONENTS, component_status
+from src.services.worker_stats import gather_worker_stats
 
 router = APIRouter(
     prefix="/monitoring",
@@ -29,6 +36,41 @@ async def health_check():
     }
 
 
+@router.get("/ready")
+async def readiness_check():
+    """就绪检查接口：所有组件就绪返回 200，否则返回 503，附带各组件状态和启动阶段耗时"""
+    components = {name: component_status(name) for name in COMPONENTS}
+    ready = all(component["ready"] for component in components.values())
+    graph = dependencies.startup_graph
+    return JSONResponse(status_code=200 if ready else 503, content={
+        "ready": ready,
+        "timestamp": datetime.now().isoformat(),
+        "components": components,
+        "startup": graph.get_status() if graph is not None else None,
+    })
+
+
+@router.get("/ready/{component}")
+async def component_readiness_check(component: str):
+    """单个组件的就绪检查接口，就绪返回 200，否则返回 503"""
+    if component not in COMPONENTS:
+        raise HTTPException(status_code=404, detail=f"未知组件: {component}")
+    status = component_status(component)
+    graph = dependencies.startup_graph
+    stage = graph.stages.get(component) if graph is not None else None
+    return JSONResponse(status_code=200 if status["ready"] else 503, content={
+        "component": component,
+        **status,
+        "startup": stage.to_dict() if stage is not None else None,
+    })
+
+
+@router.get("/models")
+async def get_model_load_stats():
+    """模型权重缓存状态及各模型的加载来源和耗时"""
+    return get_model_cache().get_status()
+
+
 @router.get("/queues")
 async def get_queue_stats():
     """获取所有活跃连接的队列状态快照"""
@@ -46,6 +88,56 @@ async def get_queue_stats():
     }
 
 
+@router.get("/admission")
+async def get_admission_status():
+    """
+    获取准入控制状态
+
+    Returns:
+        新会话当前会得到的决定（accept/degrade/reject）及原因、全局排队字节数、CPU 占用、阈值和历史决定计数；
+        多工作进程部署时另含 workers（进程号 -> 该进程的准入状态），worker 为处理本次请求的进程
+    """
+    status = get_admission_controller().get_status()
+    workers = await gather_worker_stats()
+    if workers is None:
+        return status
+    return {**status, "worker": str(os.getpid()),
+            "workers": {pid: stats["admission"] for pid, stats in workers.items()}}
+
+
+@router.get("/capacity")
+async def get_session_capacity():
+    """
+    获取会话容量规划
+
+    Returns:
+        生效容量与估算容量、活跃/排队会话数、实测的单会话成本（核）及其组成：
+        VAD 每音频秒耗时、ASR 每语音秒耗时、语音占比；多工作进程部署时另含 workers（各进程的容量状态）
+        和 host（整机合计的容量、活跃和排队会话数）
+    """
+    status = get_capacity_planner().get_status()
+    workers = await gather_worker_stats()
+    if workers is None:
+        return status
+    capacities = {pid: stats["capacity"] for pid, stats in workers.items()}
+    return {**status, "worker": str(os.getpid()), "workers": capacities, "host": {
+        key: sum(capacity[key] for capacity in capacities.values())
+        for key in ("capacity", "active_sessions", "queued_sessions")
+    }}
+
+
+@router.get("/executors")
+async def get_executor_stats():
+    """
+    获取各负载类别线程池的使用情况
+
+    Returns:
+        每个类别（realtime/asr/io/maintenance）的线程数、运行中/排队任务数、排队等待时间，
+        以及维护任务因活跃会话降速的批次数
+    """
+    return get_executors().get_status()
+
+
 @router.get("/queues/stream")
 async def stream_queue_stats():
     """
@@ -129,7 +221,7 @@ async def get_performance_stats():
     获取性能指标统计摘要
     
     Returns:
-        各处理阶段的平均值、最大值、最小值、计数等统计信息
+        各处理阶段的计数、平均值、最大值、最小值、p50/p90/p99/p999 分位数和吞吐量
     """
     return {
         "timestamp": datetime.now().isoformat(),
@@ -137,6 +229,23 @@ async def get_performance_stats():
     }
 
 
+@router.get("/metrics/contexts")
+async def get_context_performance_stats(context_id: str | None = None):
+    """
+    获取按连接拆分的性能指标统计
+    
+    Args:
+        context_id: 指定连接ID，不指定时返回所有连接
+        
+    Returns:
+        各连接各处理阶段的计数、分位数和吞吐量
+    """
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "contexts": dependencies.metrics_manager.get_context_stats(context_id)
+    }
+
+
 @router.get("/metrics/stream")
 async def stream_performance_metrics():
     """
@@ -174,3 +283,142 @@ async def stream_performance_metrics():
         }
     )
 
+
+
+# ==================== 事件循环 API ====================
+
+@router.get("/loop")
+async def get_loop_lag():
+    """
+    获取事件循环调度延迟统计
+
+    Returns:
+        最近一次采样值，以及最近5分钟的 p50/p99/p999 和最大值；延迟升高说明有同步调用阻塞了事件循环
+    """
+    if dependencies.loop_monitor is None:
+        return {"running": False}
+    return dependencies.loop_monitor.get_status()
+
+
+@router.get("/blocking")
+async def get_blocking_calls(limit: int = 20):
+    """
+    获取阻塞检测结果（调试模式）
+
+    Args:
+        limit: 返回最近多少条阻塞报告（含调用栈）
+
+    Returns:
+        按调用位置累计的阻塞次数和时长（按总时长降序），以及最近的阻塞报告
+    """
+    if dependencies.blocking_detector is None:
+        return {"running": False, "locations": [], "reports": []}
+    return dependencies.blocking_detector.get_status(limit)
+
+
+@router.post("/blocking/start")
+async def start_blocking_detector(threshold: float = 0.1):
+    """
+    开启阻塞检测并清空之前的结果
+
+    Args:
+        threshold: 阻塞阈值（秒），事件循环超过该时长未能调度回调即记录调用栈
+    """
+    from src.core.loop_monitor import BlockingDetector
+
+    if threshold <= 0:
+        raise HTTPException(status_code=400, detail="threshold 必须大于0")
+    if dependencies.blocking_detector is not None:
+        await asyncio.to_thread(dependencies.blocking_detector.stop)
+    dependencies.blocking_detector = BlockingDetector(threshold)
+    dependencies.blocking_detector.start()
+    return dependencies.blocking_detector.get_status()
+
+
+@router.post("/blocking/reset")
+async def reset_blocking_calls():
+    """清空已记录的阻塞结果，检测保持当前状态（例如修复一处阻塞后重新观察）"""
+    if dependencies.blocking_detector is None:
+        return {"running": False, "locations": [], "reports": []}
+    dependencies.blocking_detector.clear()
+    return dependencies.blocking_detector.get_status()
+
+
+@router.post("/blocking/stop")
+async def stop_blocking_detector():
+    """停止阻塞检测，已记录的结果保留可查"""
+    if dependencies.blocking_detector is not None:
+        await asyncio.to_thread(dependencies.blocking_detector.stop)
+    return {"running": False}
+
+
+# ==================== 链路追踪 API ====================
+
+@router.get("/traces")
+async def get_recent_traces(limit: int = 50):
+    """
+    获取最近完成的单句语音链路摘要
+
+    Args:
+        limit: 返回条数，默认50
+
+    Returns:
+        各链路的状态、端到端耗时和按阶段（含队列等待）汇总的耗时；多工作进程部署时合并所有进程的链路，
+        每条带 worker（进程号），完整 span 只能从该进程的 /traces/{trace_id} 获取
+    """
+    summaries = await _trace_summaries()
+    if summaries is None:
+        summaries = [trace.summary() for trace in dependencies.trace_store.get_recent(limit)]
+    else:
+        summaries = sorted(summaries, key=lambda s: s["start_time"], reverse=True)[:limit]
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "traces": summaries
+    }
+
+
+@router.get("/traces/slowest")
+async def get_slowest_traces(n: int = 10, context_id: str | None = None):
+    """
+    获取端到端耗时最长的 N 条链路
+
+    Args:
+        n: 返回条数，默认10
+        context_id: 指定连接ID，不指定时在所有连接中查找
+    """
+    summaries = await _trace_summaries()
+    if summaries is None:
+        summaries = [trace.summary() for trace in dependencies.trace_store.get_slowest(n, context_id)]
+    else:
+        # 多进程时只能在各进程上报的最近链路中查找
+        summaries = sorted(
+            (s for s in summaries if context_id is None or s["attributes"].get("context_id") == context_id),
+            key=lambda s: s["duration"], reverse=True
+        )[:n]
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "traces": summaries
+    }
+
+
+async def _trace_summaries() -> list[dict] | None:
+    """所有工作进程上报的链路摘要（带 worker 字段）；单进程部署时返回 None"""
+    workers = await gather_worker_stats()
+    if workers is None:
+        return None
+    return [{**summary, "worker": pid} for pid, stats in workers.items() for summary in stats["traces"]]
+
+
+@router.get("/traces/export")
+async def export_traces(limit: int = 100):
+    """导出最近的链路为 OTLP/JSON，可直接提交到 OpenTelemetry Collector 的 /v1/traces"""
+    return dependencies.trace_store.export_otlp(dependencies.trace_store.get_recent(limit))
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """获取单条链路的完整 span 列表（OTLP/JSON）"""
+    trace = dependencies.trace_store.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"链路 {trace_id} 不存在或已被淘汰")
+    return dependencies.trace_store.export_otlp([trace])
@@ -0,0 +1,32 @@
+"""
+Prometheus 指标路由
+
+以 Prometheus 文本格式导出阶段耗时直方图、队列深度、连接数、组件状态、缓存命中和事件循环延迟。
+多工作进程部署时任一进程都返回所有进程的指标，样本以 worker 标签区分。
+"""
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from src.services.prometheus_exporter import CONTENT_TYPE, render_metrics
+from src.services.worker_stats import gather_worker_stats
+
+router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/metrics")
+async def prometheus_metrics() -> Response:
+    """
+    Prometheus 抓取端点
+
+    抓取配置示例:
+    ```yaml
+    scrape_configs:
+      - job_name: cmcc
+        static_configs:
+          - targets: ["host:8000"]
+    ```
+    """
+    workers = await gather_worker_stats()
+    if workers is not None:
+        workers = {pid: stats["metrics"] for pid, stats in workers.items()}
+    return Response(content=render_metrics(workers), media_type=CONTENT_TYPE)
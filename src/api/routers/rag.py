@@ -14,9 +14,13 @@ router = APIRouter(
 
 
 async def reinitialize_task():
-    """后台任务，用于重新初始化。"""
+    """后台任务，用于重新初始化。新实例就绪后才替换当前实例，检索不中断。"""
     try:
-        await dependencies.rag_processor.initialize()
+        slot = dependencies.component_slots.get("rag")
+        if slot is not None:
+            await slot.swap()
+        else:
+            await dependencies.rag_processor.initialize()
     except Exception as e:
         logger.exception("后台RAG重新初始化任务失败")
 
@@ -28,7 +32,8 @@ async def reinitialize_rag(background_tasks: BackgroundTasks):
     这在解决外部依赖（如Ollama服务或数据文件）问题后非常有用。
     立即返回202 Accepted，初始化在后台进行。
     """
-    if dependencies.rag_processor.status == RAGStatus.INITIALIZING:
+    slot = dependencies.component_slots.get("rag")
+    if dependencies.rag_processor.status == RAGStatus.INITIALIZING or (slot is not None and slot.swapping):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Reinitialization is already in progress."
@@ -99,3 +104,11 @@ async def query_rag(request: QueryRequest) -> QueryResponse:
         return QueryResponse(status="success", data=data)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"查询RAG数据库时发生异常: {str(e)}")
+
+
+@router.get("/retrieval/stats", response_model=StatusResponse)
+async def rag_retrieval_stats(minutes: int = 5) -> StatusResponse:
+    """返回最近 N 分钟各类型检索的候选数与自适应 top_k 保留的文档数。"""
+    if dependencies.rag_processor is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="RAG服务当前不可用，尚未初始化")
+    return StatusResponse(status="success", data=await dependencies.rag_processor.aget_retrieval_stats(minutes))
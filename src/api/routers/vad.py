@@ -39,12 +39,17 @@ async def vad_status() -> StatusResponse:
 async def vad_reinitialize() -> StatusResponse:
     """
     重新初始化VAD处理器，可用于从任何状态恢复。
+    新实例在后台创建并通过冒烟测试后才替换当前实例，在线会话不受影响。
     """
     try:
         if dependencies.vad_core is None:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="VAD服务当前不可用，尚未初始化")
 
-        await dependencies.vad_core.initialize()
+        slot = dependencies.component_slots.get("vad")
+        if slot is not None:
+            await slot.swap()
+        else:
+            await dependencies.vad_core.initialize()
 
         return StatusResponse(
             status="success",
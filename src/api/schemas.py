@@ -45,6 +45,11 @@ class WebSocketConfig(BaseModel):
     sampleSize: int | None = None
     channelCount: int | None = None
     mimeType: str | None = None
+    # 协议 2 协商字段，旧客户端不发送
+    protocol: int | None = None
+    encoding: str | None = None  # int16 / float32 / opus
+    frameMs: int | None = None
+    clientVad: bool | None = None
 
 
 class LLMHealthResponse(BaseModel):
@@ -110,6 +110,9 @@ USER_CONTEXT_TEMPLATE = """
 "doors_info":{DOORS_INFO}
 "media":{VIDEOS_INFO}
 
+说明：以上每类信息是条目列表；条目较多时可能写成 {{"common": {{...}}, "items": [...]}} 的形式，
+其中 common 是该类所有条目取值相同的字段，items 中每个条目只列出其余字段，每个条目的完整信息为 common 加上该条目自身的字段。
+
 ## 当前状态
 *   **用户当前位置**: {USER_LOCATION}
 *   **当前活跃设备**: {ACTIVE_DEVICE}（仅当用户指令中**未包含**明确的设备名称时，才使用此设备。如果用户指定了新设备，必须优先使用新设备）
@@ -312,10 +315,17 @@ class VADSettings(BaseSettings):
     max_single_segment_time: int = 20000  # 最大切割音频时长(ms)
     save_audio_segments: bool = True  # 是否保存切割出来的音频片段
     history_buffer_duration_sec: int = 30  # 历史缓冲区最大时长(秒)
-    chunk_queue_maxsize: int = 10000  # 音频块队列最大容量
+    chunk_queue_maxsize: int = 0  # 音频块队列条数上限（0 表示只按 backpressure.vad_chunk_max_bytes 限额）
     safety_margin_sec: int = 5  # 提取音频后保留的安全边界(秒)
     speech_noise_thres: float = 0.6  # 语音/噪声阈值，越高越难触发VAD(排除噪声)
     decibel_thres: float = -100.0  # 绝对语音/静音分贝阈值，低于此值强制判定为静音
+    # 静音门限：能量/过零率判定为明显静音的块跳过 VAD 推理
+    energy_gate: bool = True
+    gate_energy_db: float = -50.0  # 门限下限(dBFS)，低于此能量总是视为静音
+    gate_max_energy_db: float = -35.0  # 门限上限(dBFS)，噪声底再高也不超过此值
+    gate_noise_margin_db: float = 10.0  # 门限 = 噪声底 + 余量
+    gate_zcr_threshold: float = 0.3  # 过零率高于此值的低能量块视为清辅音，不跳过
+    gate_hangover_ms: int = 600  # 最后一个有声块后继续推理的时长(ms)
 
 
 class FunASRSettings(BaseSettings):
@@ -345,6 +355,14 @@ class DataSettings(BaseSettings):
     areas_data_path: str = os.path.join(data_dir, "areas.csv")
     doors_data_path: str = os.path.join(data_dir, "doors.csv")
     dynamic_tools_path: str = os.path.join(data_dir, "dynamic_tools.json")
+    # 存储后端: "csv"（默认，直接读写上面的CSV文件）或 "sqlite"（CSV仅用于首次导入和导出）
+    backend: str = "csv"
+    sqlite_path: str = os.path.join(data_dir, "catalog.db")
+    # CSV 文件监听：文件变化后按去抖窗口合并，只把差异同步到数据快照、RAG 和 ASR 热词（仅 csv 后端）
+    watch_enabled: bool = True
+    watch_debounce_ms: int = 500
+    watch_force_polling: bool = False  # 强制使用轮询（如网络文件系统上 inotify 不可用）
+    watch_poll_interval: float = 1.0  # 轮询间隔（秒）
 
 
 class RAGSettings(BaseSettings):
@@ -360,6 +378,13 @@ class RAGSettings(BaseSettings):
     door_top_k: int = 30  # 门类型文档检索数量
     media_top_k: int = 30  # 媒体类型文档检索数量
     device_top_k: int = 30  # 设备类型文档检索数量
+    # 自适应 top_k：上面的 top_k 作为上限，丢弃与最佳命中距离差超过阈值的文档
+    adaptive_top_k: bool = True
+    adaptive_distance_gap: float = 0.25  # 与最佳命中的距离差阈值（Chroma 距离，越小越相似）
+    adaptive_min_k: int = 3  # 至少保留的文档数
+    # 按位置预过滤：设备检索先限定在用户所在区域，置信度不足或提及其他区域时扩大到全部区域
+    location_prefilter: bool = True
+    location_confidence_distance: float = 0.9  # 区域内最佳命中距离不超过该值时视为置信
 
     # Ollama-specific settings
     ollama_embedding_model: str = "qwen3-embedding:0.6b"
@@ -387,7 +412,7 @@ class LLMSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="LLM_")
     system_prompt_template: str = SYSTEM_PROMPT_TEMPLATE
     user_context_template: str = USER_CONTEXT_TEMPLATE
-    # LLM Provider selection: "ollama", "modelscope", or "dashscope"
+    # LLM Provider selection: "ollama", "modelscope", "dashscope", or "router"
     provider: str = "modelscope"
 
     # ollama specific settings
@@ -409,6 +434,29 @@ class LLMSettings(BaseSettings):
     # Network timeout settings
     request_timeout: int = DEFAULT_REQUEST_TIMEOUT  # Request timeout in seconds
     connection_timeout: int = DEFAULT_CONNECTION_TIMEOUT  # Connection timeout in seconds
+    # Prompt assembly settings (RAG context in the prompt)
+    prompt_token_budget: int = 3000  # Estimated token budget for RAG context sections, 0 disables
+    prompt_description_max_chars: int = 80  # Longer descriptions are truncated, 0 disables
+    prompt_min_items_per_section: int = 1  # Documents always kept per section when over budget
+    prompt_stats_history: int = 200  # Number of assemblies kept for /llm/prompt/stats
+    # Connection pool settings (shared httpx.AsyncClient per provider base_url)
+    http2: bool = True  # Requires the h2 package, falls back to HTTP/1.1 otherwise
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 120.0  # Seconds an idle pooled connection is kept open
+    warmup_connections: int = 2  # Connections opened by each warmup round
+    keepalive_interval: float = 60.0  # Re-warm connections after this many idle seconds, 0 disables
+
+    # Router settings (used when provider = "router")
+    router_providers: list[str] = ["modelscope", "dashscope"]  # Candidate providers
+    router_provider_weights: dict[str, float] = {}  # Static preference, higher is preferred (default 1.0)
+    router_p50_weight: float = 1.0  # Score weight of median latency (seconds)
+    router_p95_weight: float = 0.5  # Score weight of tail latency (seconds)
+    router_error_penalty: float = 10.0  # Seconds of penalty per unit of error rate
+    router_stats_window_minutes: int = 5  # Sliding window for provider statistics
+    router_min_samples: int = 3  # Providers below this sample count are explored first
+    router_max_attempts: int = 3  # Max providers tried per call before giving up
+    router_decision_history: int = 200  # Number of routing decisions kept for inspection
 
 
 class AEPSettings(BaseSettings):
@@ -420,6 +468,120 @@ class AEPSettings(BaseSettings):
     request_timeout: int = 10  # 请求超时时间(秒)
 
 
+class ModelCacheSettings(BaseSettings):
+    """本地模型权重缓存配置"""
+    model_config = SettingsConfigDict(env_prefix="MODEL_CACHE_")
+
+    enabled: bool = True
+    # 转换后的检查点目录，同一主机上的多个工作进程共享此目录以共享内存页
+    cache_dir: str = os.path.join(project_dir, "model_cache")
+
+
+class InferenceSettings(BaseSettings):
+    """共享推理服务配置（多工作进程部署）"""
+    model_config = SettingsConfigDict(env_prefix="INFERENCE_")
+
+    # local: 模型在本进程加载；remote: 通过 Unix socket 使用共享推理服务进程
+    mode: str = "local"
+    socket_path: str = "/tmp/cmcc_inference.sock"
+    request_timeout: float = 30.0  # 单次推理请求超时（秒）
+    connect_timeout: float = 300.0  # 等待推理服务启动并加载模型的最长秒数
+    vad_session_ttl: float = 600.0  # 推理服务端 VAD 会话缓存的空闲过期时间（秒）
+
+
+class ServerSettings(BaseSettings):
+    """服务启动与会话接入配置"""
+    model_config = SettingsConfigDict(env_prefix="SERVER_")
+
+    # 接受 WebSocket 会话前必须就绪的组件（data, vad, asr, rag, llm）
+    ws_required_components: list[str] = ["vad", "asr", "rag", "llm"]
+    # 组件未就绪时等待的最长秒数，超时以 1013 (Try Again Later) 关闭连接
+    ws_ready_timeout: float = 30.0
+    # 协议 2（二进制分帧）：客户端未指定时的帧长(ms)，是否允许浏览器端 VAD 只发送语音帧
+    ws_frame_ms: int = 20
+    ws_client_vad: bool = True
+    # 收到客户端 VAD 的语音结束标记后补入的静音(ms)，让服务端 VAD 判定语音段结束
+    ws_speech_end_silence_ms: int = 1000
+    # 丢帧时最多补入的静音(ms)
+    ws_max_gap_ms: int = 1000
+    # 是否接受 Opus 编码的上行音频（需要 PyAV 带有 libopus）
+    ws_opus: bool = True
+    # 抖动容限(ms)：seq 不连续时等待迟到帧的时长，超过后按丢帧处理
+    ws_jitter_ms: int = 60
+
+
+class BackpressureSettings(BaseSettings):
+    """会话队列内存限额、溢出策略与全局准入控制"""
+    model_config = SettingsConfigDict(env_prefix="BACKPRESSURE_")
+
+    # 溢出策略: drop_oldest（丢弃最旧）、drop_newest（丢弃最新）、signal（通知客户端暂停并阻塞写入）
+    policy: str = "signal"
+    # 每个连接各队列的内存上限（字节），16kHz 单声道下 PCM16 为 32KB/s、float32 为 64KB/s
+    audio_input_max_bytes: int = 2 * 1024 * 1024
+    vad_chunk_max_bytes: int = 4 * 1024 * 1024
+    audio_segment_max_bytes: int = 8 * 1024 * 1024
+    # signal 策略的暂停/恢复水位（占上限的比例）
+    high_watermark: float = 0.8
+    low_watermark: float = 0.5
+
+    # 全局准入：所有连接排队字节数或 CPU 占用（0~1，占全部核心）超过阈值时降级或拒绝新会话
+    degrade_queue_bytes: int = 128 * 1024 * 1024
+    reject_queue_bytes: int = 256 * 1024 * 1024
+    degrade_cpu: float = 0.75
+    reject_cpu: float = 0.95
+    # 降级会话的队列上限倍率与溢出策略
+    degraded_memory_factor: float = 0.5
+    degraded_policy: str = "drop_oldest"
+
+
+class CapacitySettings(BaseSettings):
+    """会话容量规划配置"""
+    model_config = SettingsConfigDict(env_prefix="CAPACITY_")
+
+    # 并发会话上限；0 表示按实测的单会话计算成本自动估算
+    max_sessions: int = 0
+    # 可用于语音处理的 CPU 核数；0 表示使用本机全部核心
+    cpu_cores: float = 0
+    # API 工作进程数，cpu_cores 与 max_sessions 按此平分（main.py --workers 启动时自动设置）
+    workers: int = 1
+    # 估算容量时的目标 CPU 利用率，留出余量应对突发
+    target_utilization: float = 0.7
+    # 样本不足（累计处理音频少于 min_audio_seconds）时假设的单会话成本（核）
+    default_session_cost: float = 0.1
+    min_audio_seconds: float = 30.0
+    # 超出容量的新会话: queue（排队等待空位）或 reject（立即以 1013 拒绝）
+    overflow: str = "queue"
+    queue_timeout: float = 30.0  # 排队最长等待秒数
+    max_queued: int = 20  # 排队会话数上限，超出直接拒绝
+
+
+class ExecutorSettings(BaseSettings):
+    """按负载类别划分的线程池配置"""
+    model_config = SettingsConfigDict(env_prefix="EXECUTOR_")
+
+    # 各类别线程数：实时音频（解码）、ASR 推理、数据读写、后台维护（向量库重建、批量导入）
+    realtime_workers: int = 4
+    asr_workers: int = 2
+    io_workers: int = 4
+    maintenance_workers: int = 1
+    # 维护任务按批执行，有活跃会话时每批之间暂停的秒数（0 表示不降速）
+    maintenance_batch_size: int = 64
+    maintenance_pause: float = 0.5
+
+
+class MonitoringSettings(BaseSettings):
+    """运行时监控配置"""
+    model_config = SettingsConfigDict(env_prefix="MONITORING_")
+
+    # 事件循环调度延迟的采样间隔（秒）
+    loop_lag_interval: float = 0.5
+    # 调试模式：启动时开启阻塞检测，记录阻塞事件循环超过阈值（秒）的调用栈
+    blocking_detector: bool = False
+    blocking_threshold: float = 0.1
+    # 多工作进程部署时各进程向推理服务上报监控快照的间隔（秒），也是其他进程数据的最大滞后
+    worker_stats_interval: float = 5.0
+
+
 class AppSettings(BaseSettings):
     model_config = SettingsConfigDict(
         env_nested_delimiter='_',
@@ -433,6 +595,13 @@ class AppSettings(BaseSettings):
     rag: RAGSettings = RAGSettings()
     llm: LLMSettings = LLMSettings()
     aep: AEPSettings = AEPSettings()
+    server: ServerSettings = ServerSettings()
+    model_cache: ModelCacheSettings = ModelCacheSettings()
+    inference: InferenceSettings = InferenceSettings()
+    monitoring: MonitoringSettings = MonitoringSettings()
+    backpressure: BackpressureSettings = BackpressureSettings()
+    capacity: CapacitySettings = CapacitySettings()
+    executor: ExecutorSettings = ExecutorSettings()
 
     def __init__(self, **kwargs):
         # 加载 TOML 配置 (自动检测优先级)
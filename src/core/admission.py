@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全局会话准入控制。
+
+新的音频会话接入前评估系统负载：所有连接排队中的音频字节数与 CPU 占用。
+超过降级阈值时以降级模式接入（队列限额缩小、溢出改为丢弃最旧数据），超过拒绝阈值时
+以 1013 (Try Again Later) 拒绝，避免所有会话的延迟一起崩溃。
+"""
+import os
+import threading
+import time
+from enum import Enum
+
+from loguru import logger
+
+from src.config.config import BackpressureSettings, get_settings
+from src.core import dependencies
+
+
+class AdmissionDecision(str, Enum):
+    ACCEPT = "accept"
+    DEGRADE = "degrade"
+    REJECT = "reject"
+
+
+class CpuSampler:
+    """
+    CPU 占用（0~1，占全部核心）。
+
+    安装了 psutil 时取整机占用；否则取本进程 CPU 时间的增量，两次采样间隔不足
+    min_interval 秒时返回上一次的结果。
+    """
+
+    def __init__(self, min_interval: float = 1.0) -> None:
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._cpu_count = os.cpu_count() or 1
+        self._last_wall = time.monotonic()
+        self._last_cpu = time.process_time()
+        self.value = 0.0
+        try:
+            import psutil
+            psutil.cpu_percent(interval=None)  # 首次调用建立基准
+            self._psutil = psutil
+        except ImportError:
+            self._psutil = None
+
+    @property
+    def source(self) -> str:
+        return "system" if self._psutil is not None else "process"
+
+    def sample(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_wall
+            if elapsed < self.min_interval:
+                return self.value
+            if self._psutil is not None:
+                self.value = self._psutil.cpu_percent(interval=None) / 100
+            else:
+                cpu = time.process_time()
+                self.value = min(1.0, (cpu - self._last_cpu) / elapsed / self._cpu_count)
+                self._last_cpu = cpu
+            self._last_wall = now
+            return self.value
+
+
+class AdmissionController:
+    """按全局排队字节数和 CPU 占用决定新会话接入、降级或拒绝"""
+
+    def __init__(self, settings: BackpressureSettings) -> None:
+        self.settings = settings
+        self.cpu = CpuSampler()
+        self.decisions: dict[str, int] = {decision.value: 0 for decision in AdmissionDecision}
+        self.last_reason: str | None = None
+
+    @staticmethod
+    def total_queue_bytes() -> int:
+        return sum(context.queued_bytes() for context in list(dependencies.active_contexts.values()))
+
+    def evaluate(self) -> tuple[AdmissionDecision, str | None]:
+        """评估当前负载，返回 (决定, 原因)；不计入统计"""
+        queued = self.total_queue_bytes()
+        cpu = self.cpu.sample()
+        s = self.settings
+        if queued >= s.reject_queue_bytes:
+            return AdmissionDecision.REJECT, f"排队音频 {queued // 1024}KB 超过拒绝阈值"
+        if cpu >= s.reject_cpu:
+            return AdmissionDecision.REJECT, f"CPU 占用 {cpu:.0%} 超过拒绝阈值"
+        if queued >= s.degrade_queue_bytes:
+            return AdmissionDecision.DEGRADE, f"排队音频 {queued // 1024}KB 超过降级阈值"
+        if cpu >= s.degrade_cpu:
+            return AdmissionDecision.DEGRADE, f"CPU 占用 {cpu:.0%} 超过降级阈值"
+        return AdmissionDecision.ACCEPT, None
+
+    def admit(self, client_id: str) -> AdmissionDecision:
+        """为新会话做出准入决定并记录"""
+        decision, reason = self.evaluate()
+        self.decisions[decision.value] += 1
+        if decision != AdmissionDecision.ACCEPT:
+            self.last_reason = reason
+            logger.warning(f"准入控制: 客户端 {client_id} {decision.value}，原因: {reason}")
+        return decision
+
+    def get_status(self) -> dict:
+        decision, reason = self.evaluate()
+        return {
+            "decision": decision.value,
+            "reason": reason,
+            "active_sessions": len(dependencies.active_contexts),
+            "degraded_sessions": sum(1 for c in list(dependencies.active_contexts.values()) if c.degraded),
+            "queued_bytes": self.total_queue_bytes(),
+            "cpu": round(self.cpu.value, 4),
+            "cpu_source": self.cpu.source,
+            "thresholds": {
+                "degrade_queue_bytes": self.settings.degrade_queue_bytes,
+                "reject_queue_bytes": self.settings.reject_queue_bytes,
+                "degrade_cpu": self.settings.degrade_cpu,
+                "reject_cpu": self.settings.reject_cpu,
+            },
+            "decisions": dict(self.decisions),
+            "last_reason": self.last_reason,
+        }
+
+
+_admission_controller: AdmissionController | None = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController(get_settings().backpressure)
+    return _admission_controller
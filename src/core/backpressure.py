@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按字节限额的会话队列与溢出策略。
+
+每个连接的音频队列按占用内存（而非条数）限额，满时按策略处理：
+- drop_oldest: 丢弃最旧的数据为新数据腾出空间（实时性优先）
+- drop_newest: 丢弃新到的数据（保留已排队的数据）
+- signal: 超过高水位时通知客户端暂停发送，低于低水位时通知恢复；队列满时写入方等待，
+  压力沿管道逐级传回 WebSocket 接收循环，不再读取套接字。
+"""
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import Any, Callable
+
+import numpy as np
+
+from src.services.tracing import TracedItem
+
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    SIGNAL = "signal"
+
+
+def item_nbytes(item: Any) -> int:
+    """队列元素占用的字节数（音频数组、原始字节或携带链路的数据）"""
+    if isinstance(item, TracedItem):
+        item = item.payload
+    if isinstance(item, np.ndarray):
+        return item.nbytes
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return len(item)
+    return 0
+
+
+class ByteBoundedQueue:
+    """
+    按字节限额的异步队列，接口与 asyncio.Queue 的 put/get/qsize 兼容。
+
+    Args:
+        name: 队列名称，用于统计和流控消息
+        max_bytes: 字节上限
+        policy: 溢出策略
+        max_items: 条数上限（0 表示只按字节限额）
+        high_watermark: signal 策略下触发暂停的占用比例
+        low_watermark: signal 策略下恢复的占用比例
+        on_pressure: 暂停/恢复状态变化时调用，参数为 (队列名, 是否暂停)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int,
+        policy: OverflowPolicy = OverflowPolicy.SIGNAL,
+        max_items: int = 0,
+        high_watermark: float = 0.8,
+        low_watermark: float = 0.5,
+        on_pressure: Callable[[str, bool], None] | None = None,
+    ) -> None:
+        self.name = name
+        self.max_bytes = max_bytes
+        self.policy = OverflowPolicy(policy)
+        self.max_items = max_items
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.on_pressure = on_pressure
+        self._items: deque[tuple[Any, int]] = deque()
+        self._bytes = 0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self.paused = False
+        self.dropped_items = 0
+        self.dropped_bytes = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self.max_items
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def _fits(self, size: int) -> bool:
+        if not self._items:
+            return True  # 单个超限元素也允许进入空队列，避免永久阻塞
+        if self.max_items and len(self._items) >= self.max_items:
+            return False
+        return self._bytes + size <= self.max_bytes
+
+    def _drop(self, item: Any, size: int) -> None:
+        self.dropped_items += 1
+        self.dropped_bytes += size
+        if isinstance(item, TracedItem):
+            item.trace.finish("dropped")
+
+    def _append(self, item: Any, size: int) -> None:
+        self._items.append((item, size))
+        self._bytes += size
+        self._not_empty.set()
+        if not self._fits(0):
+            self._not_full.clear()
+        self._update_pressure()
+
+    def _update_pressure(self) -> None:
+        if self.policy != OverflowPolicy.SIGNAL:
+            return
+        fill = self._bytes / self.max_bytes if self.max_bytes else 0.0
+        if self.max_items:
+            fill = max(fill, len(self._items) / self.max_items)
+        if not self.paused and fill >= self.high_watermark:
+            self.paused = True
+        elif self.paused and fill <= self.low_watermark:
+            self.paused = False
+        else:
+            return
+        if self.on_pressure is not None:
+            self.on_pressure(self.name, self.paused)
+
+    def put_nowait(self, item: Any) -> bool:
+        """
+        不等待地写入；空间不足时按策略丢弃（signal 策略此时丢弃新数据）。
+
+        Returns:
+            新数据是否入队
+        """
+        size = item_nbytes(item)
+        if not self._fits(size):
+            if self.policy != OverflowPolicy.DROP_OLDEST:
+                self._drop(item, size)
+                return False
+            while not self._fits(size):
+                old_item, old_size = self._items.popleft()
+                self._bytes -= old_size
+                self._drop(old_item, old_size)
+        self._append(item, size)
+        return True
+
+    async def put(self, item: Any) -> bool:
+        """写入；signal 策略下空间不足时等待消费者腾出空间"""
+        if self.policy == OverflowPolicy.SIGNAL:
+            size = item_nbytes(item)
+            while not self._fits(size):
+                self._not_full.clear()
+                await self._not_full.wait()
+            self._append(item, size)
+            return True
+        return self.put_nowait(item)
+
+    def get_nowait(self) -> Any:
+        if not self._items:
+            raise asyncio.QueueEmpty
+        item, size = self._items.popleft()
+        self._bytes -= size
+        if not self._items:
+            self._not_empty.clear()
+        self._not_full.set()
+        self._update_pressure()
+        return item
+
+    async def get(self) -> Any:
+        while not self._items:
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._bytes = 0
+        self._not_empty.clear()
+        self._not_full.set()
+        self._update_pressure()
+
+    def stats(self) -> dict:
+        return {
+            "current": len(self._items),
+            "max": self.max_items,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "policy": self.policy.value,
+            "paused": self.paused,
+            "dropped_items": self.dropped_items,
+            "dropped_bytes": self.dropped_bytes,
+        }
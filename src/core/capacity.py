@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话容量规划。
+
+每个会话持续以实时速率推送音频：VAD 处理全部音频，ASR 只处理其中的语音段。
+管道记录 VAD/ASR 每次调用的计算耗时和对应的音频时长（按半衰期衰减的累计值），
+由此得到单会话成本（核）= (VAD 耗时 + ASR 耗时) / 推送的音频时长，
+容量 = 可用核数 × 目标利用率 / 单会话成本。
+
+计算耗时只统计模型 generate 本身（见 compute_section），不含等待租约、推理锁和执行器排队的时间，
+否则负载升高时排队变长 → 成本虚高 → 容量下调，形成正反馈。耗时按 CPU 时间计：调用线程的
+thread_time 乘以 torch 的 intra-op 线程数。这是假设 intra-op 线程与调用线程同样繁忙的近似值
+（偏保守的上界），状态接口中的 compute_basis 说明了这一点。
+
+容量规划在每个 API 工作进程中各自进行；多进程部署时可用核数和会话上限按工作进程数平分，
+整机接纳的会话总数不超过单进程估算的容量。连接在工作进程间分配不均时，个别进程可能先满。
+
+超出容量的新会话按配置排队等待空位（先到先得，超时拒绝）或立即拒绝。
+"""
+import asyncio
+import contextvars
+import math
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator
+
+from loguru import logger
+
+from src.config.config import CapacitySettings, get_settings
+
+
+_compute_seconds: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar(
+    "compute_seconds", default=None)
+
+
+@contextmanager
+def measure_compute() -> Iterator[list[float]]:
+    """收集本上下文（含 run_in 复制出的工作线程上下文）内 compute_section 的累计耗时，结果在 holder[0]"""
+    holder = [0.0]
+    token = _compute_seconds.set(holder)
+    try:
+        yield holder
+    finally:
+        _compute_seconds.reset(token)
+
+
+def add_compute(seconds: float) -> None:
+    """把一段计算耗时计入当前 measure_compute（远端推理由服务端回报耗时时使用）"""
+    holder = _compute_seconds.get()
+    if holder is not None:
+        holder[0] += seconds
+
+
+def intra_op_threads() -> int:
+    """模型推理使用的 intra-op 线程数；未加载 torch 时为 1（不为此导入 torch）"""
+    torch = sys.modules.get("torch")
+    return max(1, torch.get_num_threads()) if torch is not None else 1
+
+
+@contextmanager
+def compute_section() -> Iterator[None]:
+    """按 CPU 时间计量包裹的模型调用并计入当前 measure_compute；调用方须在取得锁之后进入"""
+    start = time.thread_time()
+    try:
+        yield
+    finally:
+        add_compute((time.thread_time() - start) * intra_op_threads())
+
+
+class DecayedCost:
+    """按半衰期指数衰减的计算耗时与音频时长累计"""
+
+    HALF_LIFE = 300.0
+
+    def __init__(self) -> None:
+        self.compute_seconds = 0.0
+        self.audio_seconds = 0.0
+        self._updated = time.monotonic()
+
+    def _decay(self, now: float) -> None:
+        factor = 0.5 ** ((now - self._updated) / self.HALF_LIFE)
+        self.compute_seconds *= factor
+        self.audio_seconds *= factor
+        self._updated = now
+
+    def add(self, compute_seconds: float, audio_seconds: float, now: float | None = None) -> None:
+        self._decay(time.monotonic() if now is None else now)
+        self.compute_seconds += compute_seconds
+        self.audio_seconds += audio_seconds
+
+
+class CapacityPlanner:
+    """估算并发会话容量，并为新会话分配或排队等待会话名额"""
+
+    def __init__(self, settings: CapacitySettings) -> None:
+        self.settings = settings
+        self.workers = max(1, settings.workers)
+        self.cpu_cores = (settings.cpu_cores or float(os.cpu_count() or 1)) / self.workers
+        # 配置的会话上限是整机的，每个工作进程分得一份
+        self.max_sessions = math.ceil(settings.max_sessions / self.workers) if settings.max_sessions else 0
+        self.vad = DecayedCost()
+        self.asr = DecayedCost()
+        self.active: set[str] = set()
+        self._waiters: deque[tuple[str, asyncio.Future]] = deque()
+        self.rejected = 0
+        self.queued_total = 0
+
+    # ---------------- 成本估算 ----------------
+
+    def record_vad(self, compute_seconds: float, audio_seconds: float) -> None:
+        self.vad.add(compute_seconds, audio_seconds)
+
+    def record_asr(self, compute_seconds: float, audio_seconds: float) -> None:
+        self.asr.add(compute_seconds, audio_seconds)
+
+    @property
+    def measured(self) -> bool:
+        return self.vad.audio_seconds >= self.settings.min_audio_seconds
+
+    def session_cost(self) -> float:
+        """单会话的计算成本（核），样本不足时取配置的默认值"""
+        if not self.measured:
+            return self.settings.default_session_cost
+        return (self.vad.compute_seconds + self.asr.compute_seconds) / self.vad.audio_seconds
+
+    def estimated_capacity(self) -> int:
+        cost = self.session_cost()
+        if cost <= 0:
+            return self.max_sessions or 1
+        return max(1, math.floor(self.cpu_cores * self.settings.target_utilization / cost))
+
+    def capacity(self) -> int:
+        """生效的容量：配置了上限时使用配置值，否则使用估算值"""
+        return self.max_sessions or self.estimated_capacity()
+
+    # ---------------- 会话名额 ----------------
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _wake(self) -> None:
+        capacity = self.capacity()
+        while self._waiters and len(self.active) < capacity:
+            client_id, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.active.add(client_id)
+            future.set_result(True)
+
+    async def acquire(self, client_id: str, on_queued: Callable[[int], Awaitable[None]] | None = None) -> bool:
+        """
+        为会话获取名额；容量已满时按配置排队或拒绝。
+
+        Args:
+            client_id: 会话ID
+            on_queued: 进入排队时调用，参数为排队位置（从 1 开始）
+
+        Returns:
+            是否获得名额
+        """
+        if not self._waiters and len(self.active) < self.capacity():
+            self.active.add(client_id)
+            return True
+        if self.settings.overflow != "queue" or len(self._waiters) >= self.settings.max_queued:
+            self.rejected += 1
+            logger.warning(f"会话容量已满 ({len(self.active)}/{self.capacity()})，拒绝客户端 {client_id}")
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((client_id, future))
+        self.queued_total += 1
+        logger.info(f"会话容量已满，客户端 {client_id} 排队等待，位置 {len(self._waiters)}")
+        try:
+            if on_queued is not None:
+                await on_queued(len(self._waiters))
+            await asyncio.wait_for(asyncio.shield(future), self.settings.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"客户端 {client_id} 排队超时")
+            self._abandon(client_id, future)
+            return False
+        except BaseException:
+            # 连接断开或任务取消
+            self._abandon(client_id, future)
+            raise
+
+    def _abandon(self, client_id: str, future: asyncio.Future) -> None:
+        """放弃排队；名额已分配时归还"""
+        if future.done() and not future.cancelled():
+            self.release(client_id)
+        else:
+            future.cancel()
+        self._waiters = deque(w for w in self._waiters if w[1] is not future)
+        self.rejected += 1
+
+    def release(self, client_id: str) -> None:
+        self.active.discard(client_id)
+        self._wake()
+
+    def get_status(self) -> dict:
+        self._wake()  # 估算容量可能已增大
+        return {
+            "capacity": self.capacity(),
+            "estimated_capacity": self.estimated_capacity(),
+            "max_sessions": self.max_sessions,
+            "workers": self.workers,
+            "active_sessions": len(self.active),
+            "queued_sessions": self.queued,
+            "overflow": self.settings.overflow,
+            "cpu_cores": self.cpu_cores,
+            "target_utilization": self.settings.target_utilization,
+            "compute_basis": "thread_cpu_x_intra_op_threads",
+            "intra_op_threads": intra_op_threads(),
+            "session_cost_cores": round(self.session_cost(), 4),
+            "measured": self.measured,
+            "vad_cost_per_audio_second": round(self.vad.compute_seconds / self.vad.audio_seconds, 4)
+            if self.vad.audio_seconds else None,
+            "asr_cost_per_speech_second": round(self.asr.compute_seconds / self.asr.audio_seconds, 4)
+            if self.asr.audio_seconds else None,
+            "speech_ratio": round(self.asr.audio_seconds / self.vad.audio_seconds, 4)
+            if self.vad.audio_seconds else None,
+            "queued_total": self.queued_total,
+            "rejected": self.rejected,
+        }
+
+
+_capacity_planner: CapacityPlanner | None = None
+
+
+def get_capacity_planner() -> CapacityPlanner:
+    global _capacity_planner
+    if _capacity_planner is None:
+        _capacity_planner = CapacityPlanner(get_settings().capacity)
+    return _capacity_planner
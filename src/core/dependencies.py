@@ -4,23 +4,48 @@ from typing import TYPE_CHECKING, Any
 from src.api.context import Context
 from src.services.data_service import DataService
 from src.services.performance_metrics_manager import PerformanceMetricsManager
+from src.services.tracing import TraceStore
 
 # 使用 TYPE_CHECKING 避免循环导入
 if TYPE_CHECKING:
     from src.module.vad.base_vad_processor import BaseVADProcessor
     from src.module.asr.base_asr_processor import BaseASRProcessor
     from src.module.rag.base_rag_processor import BaseRAGProcessor
-    from src.module.llm.base_llm_handler import BaseLLMHandler
+    from src.module.llm.base_llm_handler import BaseConversationHandler
+    from src.services.catalog_watcher import CatalogWatcher
+    from src.core.hot_swap import HotSwapSlot
+    from src.core.startup import StartupGraph
+    from src.module.inference.client import InferenceClient
+    from src.core.loop_monitor import BlockingDetector, LoopLagMonitor
 
 # 这里只声明变量，初始化将在lifespan事件中
 vad_core: BaseVADProcessor | None = None
 asr_processor: BaseASRProcessor | None = None
 rag_processor: BaseRAGProcessor | None = None
-llm_processor: BaseLLMHandler | None = None
+llm_processor: BaseConversationHandler | None = None
 data_service: DataService | None = None
+catalog_watcher: CatalogWatcher | None = None
+
+# 共享推理服务连接，仅在 inference.mode = "remote" 时创建
+inference_client: InferenceClient | None = None
+
+# 组件蓝绿切换槽 {"vad"|"asr"|"rag"|"llm": HotSwapSlot}，由 lifespan 创建
+component_slots: dict[str, HotSwapSlot] = {}
+
+# 启动依赖图，记录各组件初始化阶段的状态和耗时
+startup_graph: StartupGraph | None = None
 
 # 性能指标管理器
 metrics_manager: PerformanceMetricsManager = PerformanceMetricsManager()
 
+# 事件循环调度延迟采样，由 lifespan 启动
+loop_monitor: LoopLagMonitor | None = None
+
+# 事件循环阻塞检测（调试模式），配置开启或运行时通过监控接口开启
+blocking_detector: BlockingDetector | None = None
+
+# 单句语音端到端链路存储
+trace_store: TraceStore = TraceStore()
+
 # 存储活跃的WebSocket连接上下文
 active_contexts: dict[str, Context] = {}
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按负载类别划分的线程池。
+
+所有阻塞调用原本共用 asyncio.to_thread 的默认线程池，RAG 重建或批量上传占满线程后，
+实时会话的解码和 ASR 只能排在后面。这里按类别各自使用固定大小的线程池，类别之间只做线程池隔离，
+不做优先调度：
+- realtime: 音频解码、VAD 等随实时音频流持续到来的小任务
+- asr: 语音识别推理
+- io: 数据文件/数据库读写
+- maintenance: 向量库重建、批量导入、数据文件热更新等后台任务
+
+维护任务还会在有活跃会话、或 realtime/asr 线程池有排队任务时降速：按批提交，批次之间暂停，
+把 CPU 让给实时会话。推理服务进程中没有会话对象，只能依据排队任务判断。
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Awaitable, Callable, Sequence, TypeVar
+
+from loguru import logger
+
+from src.config.config import ExecutorSettings, get_settings
+
+T = TypeVar("T")
+
+
+class WorkloadClass(str, Enum):
+    """负载类别，每类使用独立线程池；定义顺序仅表示重要程度，不参与调度"""
+    REALTIME = "realtime"
+    ASR = "asr"
+    IO = "io"
+    MAINTENANCE = "maintenance"
+
+
+class _ClassStats:
+    """单个类别的任务计数与排队等待时间，工作线程与事件循环都会更新"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def started(self, wait: float) -> None:
+        with self.lock:
+            self.running += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+    def finished(self, ok: bool) -> None:
+        with self.lock:
+            self.running -= 1
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            started = self.completed + self.failed + self.running
+            return {
+                "submitted": self.submitted,
+                "running": self.running,
+                "queued": self.submitted - started,
+                "completed": self.completed,
+                "failed": self.failed,
+                "wait_seconds_total": round(self.wait_seconds, 4),
+                "avg_wait_ms": round(self.wait_seconds / started * 1000, 3) if started else None,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+class WorkloadExecutors:
+    """
+    各负载类别的线程池与维护任务降速。
+
+    Args:
+        settings: 线程池配置
+        live_sessions: 返回当前活跃会话数，默认取 dependencies.active_contexts
+    """
+
+    def __init__(self, settings: ExecutorSettings, live_sessions: Callable[[], int] | None = None) -> None:
+        self.settings = settings
+        self._live_sessions = live_sessions
+        workers = {
+            WorkloadClass.REALTIME: settings.realtime_workers,
+            WorkloadClass.ASR: settings.asr_workers,
+            WorkloadClass.IO: settings.io_workers,
+            WorkloadClass.MAINTENANCE: settings.maintenance_workers,
+        }
+        self.workers = {workload: max(1, count) for workload, count in workers.items()}
+        self._executors = {
+            workload: ThreadPoolExecutor(max_workers=count, thread_name_prefix=f"cmcc-{workload.value}")
+            for workload, count in self.workers.items()
+        }
+        self.stats = {workload: _ClassStats() for workload in WorkloadClass}
+        self.throttled_batches = 0
+        self.throttled_seconds = 0.0
+
+    def live_sessions(self) -> int:
+        if self._live_sessions is not None:
+            return self._live_sessions()
+        from src.core import dependencies  # 延迟导入，避免 data_service -> executors -> dependencies 循环
+        return len(dependencies.active_contexts)
+
+    async def run(self, workload: WorkloadClass, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在对应类别的线程池中执行阻塞调用，用法同 asyncio.to_thread（同样传递 contextvars）"""
+        stats = self.stats[workload]
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        submitted = time.perf_counter()
+        with stats.lock:
+            stats.submitted += 1
+
+        def worker() -> T:
+            stats.started(time.perf_counter() - submitted)
+            ok = False
+            try:
+                result = call()
+                ok = True
+                return result
+            finally:
+                stats.finished(ok)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executors[workload], worker)
+
+    def live_backlog(self) -> int:
+        """realtime 和 asr 线程池中排队等待执行的任务数"""
+        backlog = 0
+        for workload in (WorkloadClass.REALTIME, WorkloadClass.ASR):
+            stats = self.stats[workload]
+            with stats.lock:
+                backlog += stats.submitted - stats.completed - stats.failed - stats.running
+        return backlog
+
+    async def yield_to_live(self) -> None:
+        """
+        维护任务在批次之间调用：有活跃会话时暂停一段时间；实时任务仍在排队时继续暂停，
+        直到排队清空后再提交下一批。
+        """
+        pause = self.settings.maintenance_pause
+        if pause <= 0 or not (self.live_sessions() or self.live_backlog()):
+            return
+        self.throttled_batches += 1
+        while True:
+            self.throttled_seconds += pause
+            await asyncio.sleep(pause)
+            if not self.live_backlog():
+                return
+
+    async def run_batched(self, func: Callable[[Sequence[Any]], Any], items: Sequence[Any],
+                          batch_size: int | None = None) -> None:
+        """
+        把大批量的维护任务拆成小批在 maintenance 线程池中依次执行，批次之间让位给实时会话。
+
+        Args:
+            func: 处理一批数据的阻塞函数，如 vector_store.add_documents
+            items: 全部数据
+            batch_size: 每批条数，默认取配置
+        """
+        batch_size = batch_size or self.settings.maintenance_batch_size
+        for offset in range(0, len(items), batch_size):
+            if offset:
+                await self.yield_to_live()
+            await self.run(WorkloadClass.MAINTENANCE, func, items[offset:offset + batch_size])
+
+    def get_status(self) -> dict:
+        return {
+            "classes": {
+                workload.value: {"workers": self.workers[workload], **self.stats[workload].snapshot()}
+                for workload in WorkloadClass
+            },
+            "live_sessions": self.live_sessions(),
+            "live_backlog": self.live_backlog(),
+            "maintenance": {
+                "batch_size": self.settings.maintenance_batch_size,
+                "pause_seconds": self.settings.maintenance_pause,
+                "throttled_batches": self.throttled_batches,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+            },
+        }
+
+    def shutdown(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_executors: WorkloadExecutors | None = None
+
+
+def get_executors() -> WorkloadExecutors:
+    global _executors
+    if _executors is None:
+        _executors = WorkloadExecutors(get_settings().executor)
+        logger.info(f"负载线程池已创建: {', '.join(f'{w.value}={n}' for w, n in _executors.workers.items())}")
+    return _executors
+
+
+def run_in(workload: WorkloadClass, func: Callable[..., T], *args: Any, **kwargs: Any) -> Awaitable[T]:
+    """get_executors().run 的简写"""
+    return get_executors().run(workload, func, *args, **kwargs)
+
+
+def shutdown_executors() -> None:
+    global _executors
+    if _executors is not None:
+        _executors.shutdown()
+        _executors = None
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+组件蓝绿切换 - 重新初始化时不中断在线会话。
+
+HotSwapSlot 持有一个组件（VAD、ASR、RAG、LLM）的当前实例。切换时在旁边创建并初始化
+新实例、执行冒烟测试，通过后以一次引用赋值发布，再等旧实例上进行中的调用结束后关闭它。
+在此期间旧实例始终保持 READY，调用方不会看到“未就绪”。
+"""
+import asyncio
+import inspect
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Generic, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class SwapError(RuntimeError):
+    """新实例初始化或冒烟测试失败，当前实例保持不变"""
+
+
+class HotSwapSlot(Generic[T]):
+    """
+    双缓冲组件槽。
+
+    Args:
+        name: 组件名称，用于日志
+        factory: 创建一个未初始化的新实例
+        publish: 新实例通过检查后调用，把它发布到全局引用（如 dependencies.asr_processor）
+        drain_timeout: 等待旧实例上进行中调用结束的最长秒数，超时后仍会关闭
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], T],
+        publish: Callable[[T], None],
+        current: T | None = None,
+        drain_timeout: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.factory = factory
+        self.publish = publish
+        self.drain_timeout = drain_timeout
+        self._current = current
+        self._swap_lock = asyncio.Lock()
+        self._in_flight: dict[int, int] = defaultdict(int)
+        self._drain_tasks: set[asyncio.Task] = set()
+        self.last_swap: dict | None = None
+
+    @property
+    def current(self) -> T | None:
+        return self._current
+
+    @property
+    def swapping(self) -> bool:
+        return self._swap_lock.locked()
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[T]:
+        """借用当前实例完成一次调用；切换后旧实例会等所有借用归还后才关闭"""
+        instance = self._current
+        key = id(instance)
+        self._in_flight[key] += 1
+        try:
+            yield instance
+        finally:
+            self._in_flight[key] -= 1
+            if self._in_flight[key] <= 0:
+                del self._in_flight[key]
+
+    def install(self, instance: T) -> T:
+        """直接设置并发布初始实例（启动时使用，不做切换检查）"""
+        self._current = instance
+        self.publish(instance)
+        return instance
+
+    def in_flight(self, instance: T | None = None) -> int:
+        return self._in_flight.get(id(self._current if instance is None else instance), 0)
+
+    async def swap(self) -> T:
+        """
+        创建、初始化并冒烟测试新实例，成功后原子替换当前实例。
+
+        Raises:
+            SwapError: 新实例不可用；当前实例不受影响
+        """
+        async with self._swap_lock:
+            start = time.perf_counter()
+            logger.info(f"{self.name}: 正在后台创建新实例...")
+            candidate = self.factory()
+            try:
+                await candidate.initialize()
+                if not await self._smoke_test(candidate):
+                    raise SwapError(f"{self.name} 新实例冒烟测试未通过")
+            except Exception as e:
+                await self._close(candidate)
+                self.last_swap = {"success": False, "error": str(e), "at": time.time()}
+                logger.exception(f"{self.name}: 新实例不可用，继续使用当前实例: {e}")
+                if isinstance(e, SwapError):
+                    raise
+                raise SwapError(f"{self.name} 新实例初始化失败: {e}") from e
+
+            old, self._current = self._current, candidate
+            self.publish(candidate)
+            duration = time.perf_counter() - start
+            self.last_swap = {"success": True, "duration_s": round(duration, 3), "at": time.time()}
+            logger.success(f"{self.name}: 新实例已切换上线，耗时 {duration:.2f}s")
+
+            if old is not None and old is not candidate:
+                task = asyncio.create_task(self._drain(old))
+                self._drain_tasks.add(task)
+                task.add_done_callback(self._drain_tasks.discard)
+            return candidate
+
+    @staticmethod
+    async def _smoke_test(instance: T) -> bool:
+        smoke_test = getattr(instance, "smoke_test", None)
+        if smoke_test is None:
+            return True
+        result = smoke_test()
+        if inspect.isawaitable(result):
+            result = await result
+        return bool(result)
+
+    async def _drain(self, old: T) -> None:
+        """等待旧实例上进行中的调用归还，然后释放资源"""
+        deadline = time.monotonic() + self.drain_timeout
+        while self.in_flight(old) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self.in_flight(old):
+            logger.warning(f"{self.name}: 旧实例仍有 {self.in_flight(old)} 个调用未完成，超时后关闭")
+        await self._close(old)
+        logger.info(f"{self.name}: 旧实例已释放")
+
+    async def _close(self, instance: T) -> None:
+        close = getattr(instance, "close", None)
+        if close is None:
+            return
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning(f"{self.name}: 关闭实例失败: {e}")
+
+    def get_status(self) -> dict:
+        return {
+            "swapping": self.swapping,
+            "in_flight": self.in_flight(),
+            "draining": len(self._drain_tasks),
+            "last_swap": self.last_swap,
+        }
+
+
+@asynccontextmanager
+async def lease(slot: HotSwapSlot[T] | None, instance: T) -> AsyncIterator[T]:
+    """通过槽借用组件；没有槽（如未经 lifespan 启动的测试）时直接使用给定实例"""
+    if slot is None:
+        yield instance
+        return
+    async with slot.lease() as current:
+        yield current
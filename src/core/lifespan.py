@@ -4,14 +4,86 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from loguru import logger
 
-from src.config.config import get_settings
+from src.config.config import get_settings, FunASRSettings, LLMSettings, RAGSettings, VADSettings
 from src.core import dependencies
+from src.core.executors import WorkloadClass, run_in, shutdown_executors
 from src.core.feature_flags import FeatureFlags
+from src.core.hot_swap import HotSwapSlot
+from src.core.startup import StartupGraph
 from src.module.asr.asr_processor import ASRProcessor
 from src.module.vad.vad_core import VADCore
 from src.services.data_service import DataService
 
 
+def _create_llm_handler(provider: str, llm_config: LLMSettings):
+    """根据提供商名称创建 LLM 处理器，"router" 会为每个候选提供商递归创建处理器"""
+    llm_provider = provider.lower()
+    if llm_provider == "modelscope":
+        from src.module.llm.modelscope_llm_handler import ModelScopeLLMHandler
+        logger.info("使用ModelScope LLM处理器")
+        return ModelScopeLLMHandler(llm_config)
+    elif llm_provider == "dashscope":
+        from src.module.llm.dashscope_llm_handler import DashScopeLLMHandler
+        logger.info("使用DashScope LLM处理器")
+        return DashScopeLLMHandler(llm_config)
+    elif llm_provider == "ollama":
+        # 验证 Ollama 功能是否启用
+        FeatureFlags.validate_ollama_config()
+        from src.module.llm.ollama_llm_handler import OllamaLLMHandler
+        logger.info("使用Ollama LLM处理器")
+        return OllamaLLMHandler(llm_config)
+    elif llm_provider == "router":
+        from src.module.llm.llm_router import LLMRouter
+        handlers = {
+            name.lower(): _create_llm_handler(name, llm_config)
+            for name in llm_config.router_providers
+            if name.lower() != "router"
+        }
+        logger.info("使用LLM路由器，候选提供商: {providers}", providers=list(handlers))
+        return LLMRouter(llm_config, handlers)
+    else:
+        raise RuntimeError(f"未知的 LLM provider: {llm_provider}")
+
+
+def _get_inference_client():
+    """remote 模式下各远程处理器共享的推理服务连接"""
+    if dependencies.inference_client is None:
+        from src.module.inference.client import InferenceClient
+        dependencies.inference_client = InferenceClient(get_settings().inference)
+    return dependencies.inference_client
+
+
+def _create_vad_core(vad_config: VADSettings):
+    """根据推理模式创建本地 VAD 或通过共享推理服务的远程 VAD"""
+    if get_settings().inference.mode == "remote":
+        from src.module.inference.client import RemoteVADCore
+        return RemoteVADCore(vad_config, _get_inference_client())
+    return VADCore(vad_config)
+
+
+def _create_rag_processor(rag_config: RAGSettings):
+    """根据推理模式创建本地 RAG 或通过共享推理服务的远程 RAG；多进程下向量库只由推理服务打开"""
+    if get_settings().inference.mode == "remote":
+        from src.module.inference.client import RemoteRAGProcessor
+        return RemoteRAGProcessor(rag_config, _get_inference_client())
+    from src.module.rag import create_rag_processor
+    return create_rag_processor(rag_config)
+
+
+async def _reload_catalog_sections(event: dict) -> None:
+    """推理服务发布目录变更后重新加载本进程的快照"""
+    if dependencies.data_service is not None:
+        await run_in(WorkloadClass.MAINTENANCE, dependencies.data_service.reload, event.get("sections"))
+
+
+def _create_asr_processor(asr_config: FunASRSettings):
+    """根据推理模式创建本地 ASR 或通过共享推理服务的远程 ASR"""
+    if get_settings().inference.mode == "remote":
+        from src.module.inference.client import RemoteASRProcessor
+        return RemoteASRProcessor(asr_config, _get_inference_client())
+    return ASRProcessor(asr_config, device="cpu")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- 应用启动时执行 ---
@@ -26,62 +98,75 @@ async def lifespan(app: FastAPI):
     rag_config = settings.rag
     llm_config = settings.llm
 
+    from src.core.loop_monitor import BlockingDetector, LoopLagMonitor
+    dependencies.loop_monitor = LoopLagMonitor(settings.monitoring.loop_lag_interval)
+    dependencies.loop_monitor.start()
+    if settings.monitoring.blocking_detector:
+        dependencies.blocking_detector = BlockingDetector(settings.monitoring.blocking_threshold)
+        dependencies.blocking_detector.start()
+    # 多进程部署：定期上报本进程的监控快照，任一进程都能返回所有进程的指标
+    stats_task = None
+    if settings.inference.mode == "remote":
+        from src.services.worker_stats import publish_worker_stats
+        stats_task = asyncio.create_task(publish_worker_stats())
+
     try:
-        dependencies.data_service = DataService()
-        
-        # Load all hotwords (static + dynamic) for ASR
-        all_hot_words = dependencies.data_service.get_all_hotwords()
-        asr_config.hotwords = all_hot_words
-        logger.info(f"Loaded {len(all_hot_words)} hot words for ASR initialization")
-
-        dependencies.vad_core = VADCore(vad_config)
-        dependencies.asr_processor = ASRProcessor(asr_config, device="cpu")
-
-        # Initialize RAG processor based on provider configuration
-        rag_provider = rag_config.provider.lower()
-        if rag_provider == "modelscope":
-            from src.module.rag.modelscope_rag_processor import ModelScopeRAGProcessor
-            dependencies.rag_processor = ModelScopeRAGProcessor(rag_config)
-            logger.info("使用ModelScope RAG处理器")
-        elif rag_provider == "dashscope":
-            from src.module.rag.dashscope_rag_processor import DashScopeRAGProcessor
-            dependencies.rag_processor = DashScopeRAGProcessor(rag_config)
-            logger.info("使用百炼RAG处理器")
-        elif rag_provider == "ollama":
-            # 验证 Ollama 功能是否启用
-            FeatureFlags.validate_ollama_config()
-            from src.module.rag.ollama_rag_processor import OllamaRAGProcessor
-            dependencies.rag_processor = OllamaRAGProcessor(rag_config)
-            logger.info("使用Ollama RAG处理器")
-        else:
-            raise RuntimeError(f"未知的 RAG provider: {rag_provider}")
-
-        # Initialize LLM processor based on provider configuration
-        llm_provider = llm_config.provider.lower()
-        if llm_provider == "modelscope":
-            from src.module.llm.modelscope_llm_handler import ModelScopeLLMHandler
-            dependencies.llm_processor = ModelScopeLLMHandler(llm_config)
-            logger.info("使用ModelScope LLM处理器")
-        elif llm_provider == "dashscope":
-            from src.module.llm.dashscope_llm_handler import DashScopeLLMHandler
-            dependencies.llm_processor = DashScopeLLMHandler(llm_config)
-            logger.info("使用DashScope LLM处理器")
-        elif llm_provider == "ollama":
-            # 验证 Ollama 功能是否启用
-            FeatureFlags.validate_ollama_config()
-            from src.module.llm.ollama_llm_handler import OllamaLLMHandler
-            dependencies.llm_processor = OllamaLLMHandler(llm_config)
-            logger.info("使用Ollama LLM处理器")
-        else:
-            raise RuntimeError(f"未知的 LLM provider: {llm_provider}")
-
-        # Start async initialization for VAD, RAG, LLM and ASR processors
-        asyncio.create_task(dependencies.rag_processor.initialize())
-        asyncio.create_task(dependencies.llm_processor.initialize())
-        asyncio.create_task(dependencies.vad_core.initialize())
-        asyncio.create_task(dependencies.asr_processor.initialize())
-
-        logger.info("应用启动序列已开始，VAD、RAG和LLM处理器正在后台初始化。")
+        # 蓝绿切换槽：/reinitialize 在旁边创建新实例，就绪后再替换，在线会话不中断
+        slots = dependencies.component_slots = {
+            "vad": HotSwapSlot("VAD", lambda: _create_vad_core(vad_config),
+                               lambda c: setattr(dependencies, "vad_core", c)),
+            "asr": HotSwapSlot("ASR", lambda: _create_asr_processor(asr_config),
+                               lambda c: setattr(dependencies, "asr_processor", c)),
+            "rag": HotSwapSlot("RAG", lambda: _create_rag_processor(rag_config),
+                               lambda c: setattr(dependencies, "rag_processor", c)),
+            "llm": HotSwapSlot("LLM", lambda: _create_llm_handler(llm_config.provider, llm_config),
+                               lambda c: setattr(dependencies, "llm_processor", c)),
+        }
+
+        async def init_data() -> None:
+            dependencies.data_service = await asyncio.to_thread(DataService)
+            if settings.inference.mode == "remote":
+                # 多进程部署：目录监听和向量库写入只在推理服务进程中进行，这里只接收其发布的变更
+                _get_inference_client().add_event_listener("catalog", _reload_catalog_sections)
+            # CSV 后端下监听数据文件，变化增量同步到快照、RAG 和 ASR 热词
+            elif settings.data.watch_enabled and dependencies.data_service.backend == "csv":
+                from src.services.catalog_watcher import CatalogWatcher
+                dependencies.catalog_watcher = CatalogWatcher(dependencies.data_service, settings.data)
+                dependencies.catalog_watcher.start()
+
+        async def init_vad() -> None:
+            vad_core = slots["vad"].install(_create_vad_core(vad_config))
+            await vad_core.initialize()
+
+        async def init_asr() -> None:
+            # Load all hotwords (static + dynamic) for ASR
+            all_hot_words = dependencies.data_service.get_all_hotwords()
+            asr_config.hotwords = all_hot_words
+            logger.info(f"Loaded {len(all_hot_words)} hot words for ASR initialization")
+            asr_processor = slots["asr"].install(_create_asr_processor(asr_config))
+            await asr_processor.initialize()
+
+        async def init_rag() -> None:
+            # 提供商模块（langchain 等）在工作线程中导入
+            rag_processor = slots["rag"].install(await asyncio.to_thread(_create_rag_processor, rag_config))
+            await rag_processor.initialize()
+
+        async def init_llm() -> None:
+            llm_processor = slots["llm"].install(
+                await asyncio.to_thread(_create_llm_handler, llm_config.provider, llm_config)
+            )
+            await llm_processor.initialize()
+
+        # 依赖图：互不依赖的阶段并行执行，ASR 热词和 RAG 文档依赖数据服务
+        graph = dependencies.startup_graph = StartupGraph()
+        graph.add("data", init_data)
+        graph.add("vad", init_vad)
+        graph.add("llm", init_llm)
+        graph.add("asr", init_asr, depends_on=("data",))
+        graph.add("rag", init_rag, depends_on=("data",))
+        graph.start()
+
+        logger.info("应用启动序列已开始，数据、VAD、ASR、RAG和LLM正在按依赖并行初始化。")
     except Exception as e:
         logger.exception(f"错误: 处理器初始化失败: {e}")
         # 在这里可以选择是否要阻止应用启动
@@ -91,5 +176,24 @@ async def lifespan(app: FastAPI):
     # --- 应用关闭时执行 ---
     logger.info("应用关闭... 正在清理资源...")
     dependencies.active_contexts.clear()
+    if dependencies.startup_graph is not None:
+        await dependencies.startup_graph.close()
+    if stats_task is not None:
+        stats_task.cancel()
+    if dependencies.catalog_watcher is not None:
+        await dependencies.catalog_watcher.stop()
+    if dependencies.llm_processor is not None:
+        await dependencies.llm_processor.close()
+    from src.module.llm.http_client import close_async_http_clients
+    await close_async_http_clients()
+    if dependencies.data_service is not None:
+        dependencies.data_service.close()
+    if dependencies.inference_client is not None:
+        await dependencies.inference_client.close()
+    if dependencies.loop_monitor is not None:
+        await dependencies.loop_monitor.stop()
+    if dependencies.blocking_detector is not None:
+        await asyncio.to_thread(dependencies.blocking_detector.stop)
+    shutdown_executors()
     logger.info("资源清理完毕.")
 
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件循环调度延迟采样与阻塞调用检测。
+
+LoopLagMonitor: 后台任务每隔 interval 秒休眠一次，实际唤醒时间与预期时间之差即为调度延迟：
+事件循环上有同步阻塞（模型推理、文件 IO、大量日志格式化等）时，延迟随之升高。
+采样写入滚动直方图，可查询分位数，也作为 Prometheus 直方图导出。
+
+BlockingDetector（调试模式）: 看门狗线程定期向事件循环投递回调，超过阈值仍未执行时抓取
+事件循环线程当前的调用栈，即正在阻塞的同步调用；按调用位置累计次数与阻塞时长。
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from loguru import logger
+
+from src.services.performance_metrics_manager import RollingHistogram
+
+
+class LoopLagMonitor:
+    """事件循环调度延迟监控"""
+
+    SLOT_SECONDS = 5
+    RETENTION_MINUTES = 5
+
+    def __init__(self, interval: float = 0.5) -> None:
+        self.interval = interval
+        self.histogram = RollingHistogram(self.SLOT_SECONDS, self.RETENTION_MINUTES * 60 // self.SLOT_SECONDS + 1)
+        self.latest = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - expected))
+
+    def record(self, lag: float) -> None:
+        self.latest = lag
+        self.histogram.record(lag)
+
+    def get_status(self) -> dict:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "latest": round(self.latest, 4),
+            **self.histogram.summary(self.RETENTION_MINUTES * 60, (50, 99, 99.9)),
+        }
+
+
+class BlockingDetector:
+    """
+    事件循环阻塞检测（调试模式）
+
+    Args:
+        threshold: 回调超过该秒数仍未被调度即视为阻塞
+        max_reports: 保留的最近阻塞报告条数
+    """
+
+    MAX_REPORTS = 100
+    STACK_DEPTH = 25
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    def __init__(self, threshold: float = 0.1, max_reports: int = MAX_REPORTS) -> None:
+        self.threshold = threshold
+        self.reports: deque[dict] = deque(maxlen=max_reports)
+        # 调用位置 -> {"count", "total_seconds", "max_seconds"}
+        self.locations: dict[str, dict] = {}
+        self.blocked_count = 0
+        self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """在事件循环线程中调用"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="blocking-detector", daemon=True)
+        self._thread.start()
+        logger.info(f"事件循环阻塞检测已启动，阈值 {self.threshold * 1000:.0f}ms")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def clear(self) -> None:
+        """清空已记录的阻塞报告和统计，检测继续运行"""
+        with self._lock:
+            self.reports.clear()
+            self.locations.clear()
+            self.blocked_count = 0
+            self.blocked_seconds = 0.0
+
+    def _watch(self) -> None:
+        poll_interval = self.threshold / 2
+        while not self._stop.wait(poll_interval):
+            answered = threading.Event()
+            sent_at = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                return  # 事件循环已关闭
+            if answered.wait(self.threshold):
+                continue
+            # 阻塞中：抓取事件循环线程此刻的调用栈
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = traceback.extract_stack(frame)[-self.STACK_DEPTH:] if frame is not None else []
+            del frame
+            while not answered.wait(0.05):
+                if self._stop.is_set():
+                    return
+            self._record(stack, time.monotonic() - sent_at)
+
+    def _location(self, stack: traceback.StackSummary) -> str:
+        """优先取最内层的项目代码帧，其次最内层帧"""
+        for frame in reversed(stack):
+            if frame.filename.startswith(self.PROJECT_ROOT) and "site-packages" not in frame.filename:
+                return f"{os.path.relpath(frame.filename, self.PROJECT_ROOT)}:{frame.lineno} {frame.name}"
+        if stack:
+            frame = stack[-1]
+            return f"{frame.filename}:{frame.lineno} {frame.name}"
+        return "<unknown>"
+
+    def _record(self, stack: traceback.StackSummary, duration: float) -> None:
+        location = self._location(stack)
+        report = {
+            "at": time.time(),
+            "duration": round(duration, 4),
+            "location": location,
+            "stack": [line.rstrip() for line in traceback.format_list(stack)],
+        }
+        with self._lock:
+            self.reports.append(report)
+            self.blocked_count += 1
+            self.blocked_seconds += duration
+            stats = self.locations.setdefault(location, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stats["count"] += 1
+            stats["total_seconds"] += duration
+            stats["max_seconds"] = max(stats["max_seconds"], duration)
+        logger.warning(f"事件循环阻塞 {duration * 1000:.0f}ms: {location}")
+
+    def get_status(self, limit: int = 20) -> dict:
+        with self._lock:
+            reports = list(self.reports)[-limit:][::-1]
+            locations = sorted(self.locations.items(), key=lambda item: item[1]["total_seconds"], reverse=True)
+            return {
+                "running": self.running,
+                "threshold": self.threshold,
+                "blocked_count": self.blocked_count,
+                "blocked_seconds": round(self.blocked_seconds, 4),
+                "locations": [
+                    {
+                        "location": location,
+                        "count": stats["count"],
+                        "total_seconds": round(stats["total_seconds"], 4),
+                        "max_seconds": round(stats["max_seconds"], 4),
+                    }
+                    for location, stats in locations
+                ],
+                "reports": reports,
+            }
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模型权重缓存 - 一次转换，之后 mmap 加载。
+
+FunASR 的 AutoModel 每次启动都会向模型仓库确认版本，再用 torch.load 完整反序列化
+model.pt 并深拷贝一份。缓存层在第一次正常加载后，把已经对齐到模型结构的 state_dict
+保存为 torch 的 zip 检查点（张量连续存储、无需键名映射），并记录模型的本地目录。
+之后的启动直接使用本地目录（跳过仓库查询），并以 mmap 方式加载检查点、assign 到模型参数，
+CPU 上的权重页由操作系统页缓存承载，同一主机上的多个工作进程共享同一份物理内存。
+
+源 model.pt 变化（大小或修改时间）时缓存自动失效并重新转换。
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Any
+
+from loguru import logger
+
+from src.config.config import ModelCacheSettings, get_settings
+
+CHECKPOINT_SUFFIX = ".mmap.pt"
+MANIFEST_NAME = "manifest.json"
+
+_loader_lock = threading.Lock()
+_loader_installed = False
+
+
+def load_mmap_checkpoint(path: str, model: Any) -> None:
+    """以 mmap 方式加载缓存检查点，参数直接引用映射的存储而不复制"""
+    import torch
+    state = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    result = model.load_state_dict(state, strict=False, assign=True)
+    if result.missing_keys or result.unexpected_keys:
+        logger.warning(
+            f"缓存检查点与模型结构不完全一致: missing={len(result.missing_keys)}, "
+            f"unexpected={len(result.unexpected_keys)} ({path})"
+        )
+
+
+def _install_mmap_loader() -> None:
+    """让 AutoModel 遇到缓存检查点时走 mmap 加载，其余路径保持 FunASR 原有逻辑"""
+    global _loader_installed
+    with _loader_lock:
+        if _loader_installed:
+            return
+        import funasr.auto.auto_model as auto_model_module
+        original = auto_model_module.load_pretrained_model
+
+        def load_pretrained_model(path: str, model: Any, **kwargs: Any) -> None:
+            if str(path).endswith(CHECKPOINT_SUFFIX):
+                return load_mmap_checkpoint(path, model)
+            return original(path=path, model=model, **kwargs)
+
+        auto_model_module.load_pretrained_model = load_pretrained_model
+        _loader_installed = True
+
+
+class ModelCache:
+    """模型检查点缓存，按模型 ID（含版本）分目录存放转换后的权重和清单"""
+
+    def __init__(self, settings: ModelCacheSettings) -> None:
+        self.settings = settings
+        self.cache_dir = settings.cache_dir
+        self.load_times: dict[str, dict] = {}
+        # 缓存命中（mmap 加载）与未命中（从模型仓库加载并转换）次数
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_dir(self, model_key: str) -> str:
+        return os.path.join(self.cache_dir, re.sub(r"[^0-9A-Za-z._-]+", "_", model_key))
+
+    def get_entry(self, model_key: str) -> dict | None:
+        """返回有效的缓存条目；源文件或检查点变化、缺失时返回 None"""
+        manifest_path = os.path.join(self._entry_dir(model_key), MANIFEST_NAME)
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                entry = json.load(f)
+            source = os.stat(entry["source"])
+        except (OSError, ValueError, KeyError):
+            return None
+        if (source.st_size, source.st_mtime_ns) != (entry.get("source_size"), entry.get("source_mtime_ns")):
+            logger.info(f"模型 {model_key} 的源权重已变化，缓存失效")
+            return None
+        if not os.path.isdir(entry.get("model_path", "")) or not os.path.exists(entry.get("checkpoint", "")):
+            return None
+        return entry
+
+    def store(self, model_key: str, model_path: str, source: str, module: Any) -> dict:
+        """把已加载模型的 state_dict 保存为可 mmap 的检查点并写入清单（原子替换，多进程安全）"""
+        import torch
+        entry_dir = self._entry_dir(model_key)
+        os.makedirs(entry_dir, exist_ok=True)
+        checkpoint = os.path.join(entry_dir, "model" + CHECKPOINT_SUFFIX)
+        state = {key: tensor.detach().cpu().contiguous() for key, tensor in module.state_dict().items()}
+        tmp_path = f"{checkpoint}.{os.getpid()}.tmp"
+        torch.save(state, tmp_path)
+        os.replace(tmp_path, checkpoint)
+
+        stat = os.stat(source)
+        entry = {
+            "model": model_key,
+            "model_path": os.path.abspath(model_path),
+            "source": os.path.abspath(source),
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "checkpoint": checkpoint,
+            "created_at": time.time(),
+        }
+        manifest_path = os.path.join(entry_dir, MANIFEST_NAME)
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+        return entry
+
+    def load_auto_model(self, name: str, **kwargs: Any) -> Any:
+        """
+        通过缓存构建 FunASR AutoModel，参数与 AutoModel 相同。
+
+        Args:
+            name: 组件名称，用于日志和加载耗时统计（如 "vad"、"asr"）
+        """
+        from funasr import AutoModel
+
+        model_key = f"{kwargs['model']}@{kwargs.get('model_revision') or 'default'}"
+        entry = self.get_entry(model_key) if self.settings.enabled else None
+        if entry is not None:
+            _install_mmap_loader()
+            kwargs = {**kwargs, "model": entry["model_path"], "init_param": entry["checkpoint"]}
+
+        start = time.perf_counter()
+        auto_model = AutoModel(**kwargs)
+        duration = time.perf_counter() - start
+        source = "mmap" if entry is not None else "hub"
+        if self.settings.enabled:
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if self.settings.enabled and entry is None:
+            model_path = auto_model.kwargs.get("model_path")
+            weights = os.path.join(model_path, "model.pt") if model_path else None
+            if weights and os.path.exists(weights):
+                try:
+                    self.store(model_key, model_path, weights, auto_model.model)
+                    logger.info(f"模型 {name} 的权重已转换为 mmap 检查点，下次启动直接映射加载")
+                except Exception as e:
+                    logger.warning(f"模型 {name} 的权重缓存写入失败，不影响本次加载: {e}")
+
+        self.load_times[name] = {"model": model_key, "source": source, "duration_s": round(duration, 3)}
+        logger.info(f"模型 {name} ({model_key}) 加载完成，来源: {source}，耗时 {duration:.2f}s")
+        return auto_model
+
+    def get_status(self) -> dict:
+        return {
+            "enabled": self.settings.enabled,
+            "cache_dir": self.cache_dir,
+            "hits": self.hits,
+            "misses": self.misses,
+            "models": self.load_times,
+        }
+
+
+_model_cache: ModelCache | None = None
+
+
+def get_model_cache() -> ModelCache:
+    global _model_cache
+    if _model_cache is None:
+        _model_cache = ModelCache(get_settings().model_cache)
+    return _model_cache
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动依赖图 - 按依赖关系并行初始化各组件并记录每个阶段的耗时。
+
+每个阶段在其依赖全部成功后立即启动，互不依赖的阶段并行执行；依赖失败的阶段
+标记为 skipped。各阶段的完成事件供就绪检查和 WebSocket 接入等待使用。
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from src.core import dependencies
+
+
+class StageStatus(Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    READY = "READY"
+    FAILED = "FAILED"
+    SKIPPED = "SKIPPED"
+
+
+@dataclass
+class StartupStage:
+    """启动图中的一个阶段"""
+    name: str
+    func: Callable[[], Awaitable[None]]
+    depends_on: tuple[str, ...] = ()
+    status: StageStatus = StageStatus.PENDING
+    started_at: float | None = None  # 相对启动开始的秒数
+    duration: float | None = None
+    error: str | None = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status.value,
+            "depends_on": list(self.depends_on),
+            "started_at_s": None if self.started_at is None else round(self.started_at, 3),
+            "duration_s": None if self.duration is None else round(self.duration, 3),
+            "error": self.error,
+        }
+
+
+class StartupGraph:
+    """依赖感知的并行启动图"""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, StartupStage] = {}
+        self._t0: float | None = None
+        self.finished_at: float | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._report_task: asyncio.Task | None = None
+        self.first_session_at: float | None = None
+
+    def add(self, name: str, func: Callable[[], Awaitable[None]], depends_on: tuple[str, ...] = ()) -> None:
+        if name in self.stages:
+            raise ValueError(f"启动阶段重复: {name}")
+        self.stages[name] = StartupStage(name=name, func=func, depends_on=tuple(depends_on))
+
+    def start(self) -> None:
+        """在后台启动所有阶段，立即返回"""
+        for stage in self.stages.values():
+            unknown = [dep for dep in stage.depends_on if dep not in self.stages]
+            if unknown:
+                raise ValueError(f"启动阶段 {stage.name} 依赖未知阶段: {unknown}")
+        self._t0 = time.perf_counter()
+        self._tasks = [asyncio.create_task(self._run_stage(stage)) for stage in self.stages.values()]
+        self._report_task = asyncio.create_task(self._report())
+
+    async def run(self) -> None:
+        """启动并等待所有阶段结束"""
+        self.start()
+        await asyncio.gather(*self._tasks)
+
+    async def close(self) -> None:
+        """取消仍在运行的阶段和启动汇总任务（启动未完成时关闭应用）"""
+        tasks = [*self._tasks, *([self._report_task] if self._report_task is not None else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._report_task = None
+
+    async def _run_stage(self, stage: StartupStage) -> None:
+        try:
+            for dep in stage.depends_on:
+                await self.stages[dep].done.wait()
+            failed = [dep for dep in stage.depends_on if self.stages[dep].status != StageStatus.READY]
+            if failed:
+                stage.status = StageStatus.SKIPPED
+                stage.error = f"依赖未就绪: {failed}"
+                logger.error(f"启动阶段 {stage.name} 已跳过，{stage.error}")
+                return
+
+            stage.status = StageStatus.RUNNING
+            stage.started_at = time.perf_counter() - self._t0
+            start = time.perf_counter()
+            try:
+                await stage.func()
+                stage.status = StageStatus.READY
+            except Exception as e:
+                stage.status = StageStatus.FAILED
+                stage.error = str(e)
+                logger.exception(f"启动阶段 {stage.name} 失败: {e}")
+            finally:
+                stage.duration = time.perf_counter() - start
+            if stage.status == StageStatus.READY:
+                logger.info(f"启动阶段 {stage.name} 完成，耗时 {stage.duration:.2f}s")
+        finally:
+            stage.done.set()
+
+    async def _report(self) -> None:
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.finished_at = time.perf_counter() - self._t0
+        logger.info("启动完成，总耗时 {total:.2f}s: {stages}", total=self.finished_at, stages={
+            name: f"{stage.status.value} {stage.duration or 0:.2f}s" for name, stage in self.stages.items()
+        })
+
+    async def wait_for(self, names: list[str], timeout: float) -> bool:
+        """等待指定阶段结束，返回它们是否全部成功"""
+        stages = [self.stages[name] for name in names if name in self.stages]
+        try:
+            await asyncio.wait_for(asyncio.gather(*(stage.done.wait() for stage in stages)), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return all(stage.status == StageStatus.READY for stage in stages)
+
+    def mark_session_accepted(self) -> None:
+        """记录第一个会话被接受的时间（冷启动到可服务的实测耗时）"""
+        if self.first_session_at is None and self._t0 is not None:
+            self.first_session_at = time.perf_counter() - self._t0
+            logger.info(f"启动后首个会话已接入，距启动 {self.first_session_at:.2f}s")
+
+    def get_status(self) -> dict:
+        return {
+            "elapsed_s": None if self._t0 is None else round(time.perf_counter() - self._t0, 3),
+            "finished_at_s": None if self.finished_at is None else round(self.finished_at, 3),
+            "first_session_at_s": None if self.first_session_at is None else round(self.first_session_at, 3),
+            "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+        }
+
+
+# 组件名 -> dependencies 中的全局引用
+COMPONENTS = {
+    "data": "data_service",
+    "vad": "vad_core",
+    "asr": "asr_processor",
+    "rag": "rag_processor",
+    "llm": "llm_processor",
+}
+
+
+def component_status(name: str) -> dict:
+    """组件当前的实际就绪状态（热切换后同样适用，不只是启动阶段的结果）"""
+    instance = getattr(dependencies, COMPONENTS[name], None)
+    if instance is None:
+        return {"ready": False, "status": "UNINITIALIZED", "error": None}
+    status = getattr(instance, "status", None)
+    if status is None:
+        # 数据服务构造完成即可用
+        return {"ready": True, "status": "READY", "error": None}
+    return {
+        "ready": status.value == "READY",
+        "status": status.value,
+        "error": getattr(instance, "error_message", None),
+    }
+
+
+async def wait_until_ready(components: list[str], timeout: float) -> bool:
+    """等待组件的启动阶段结束，返回它们当前是否全部就绪"""
+    graph = dependencies.startup_graph
+    if graph is not None:
+        await graph.wait_for(components, timeout)
+    return all(component_status(name)["ready"] for name in components)
@@ -1,20 +1,25 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import asyncio
+from typing import Any
 
 import numpy as np
 import numpy.typing as npt
-import torch
-from enum import Enum
-from funasr import AutoModel
-from funasr.utils.postprocess_utils import rich_transcription_postprocess
 from loguru import logger
 
 from src.config.config import FunASRSettings
+from src.core.capacity import compute_section
+from src.core.model_cache import get_model_cache
 
 
 from src.module.asr.base_asr_processor import ASRStatus, BaseASRProcessor
 
+def rich_transcription_postprocess(text: str) -> str:
+    """延迟导入 funasr 的后处理函数。"""
+    from funasr.utils.postprocess_utils import rich_transcription_postprocess as postprocess
+    return postprocess(text)
+
+
 class ASRProcessor(BaseASRProcessor):
     """实时语音识别处理器。"""
 
@@ -23,33 +28,17 @@ class ASRProcessor(BaseASRProcessor):
         super().__init__(device=device)
         self.settings = settings
         
-    async def initialize(self) -> None:
-        """异步初始化FunASR语音识别模型，支持重新初始化。"""
-        async with self._init_lock:
-            if self.status == ASRStatus.INITIALIZING:
-                logger.warning("ASR处理器正在初始化中，请等待。")
-                return
-            
-            self.status = ASRStatus.INITIALIZING
-            self.error_message = None
-            
-            try:
-                logger.info("ASR处理器正在加载语音识别模型...")
-                self.model = AutoModel(
-                    model=self.settings.model,
-                    trust_remote_code=False,
-                    # vad_model=self.settings.VAD_MODEL,
-                    # vad_kwargs=self.settings.VAD_KWARGS,
-                    ban_emo_unk=True,  # 禁止输出感情标签
-                    device=self.device,
-                )
-                self.status = ASRStatus.READY
-                logger.info("ASR处理器语音识别模型加载完成。")
-            except Exception as e:
-                self.status = ASRStatus.ERROR
-                self.error_message = f"ASR处理器初始化失败: {str(e)}"
-                logger.exception(self.error_message)
-                raise
+    def _load_model(self) -> Any:
+        """加载FunASR语音识别模型。funasr 在此处延迟导入，不拖慢应用启动；权重经本地缓存 mmap 加载。"""
+        return get_model_cache().load_auto_model(
+            "asr",
+            model=self.settings.model,
+            trust_remote_code=False,
+            # vad_model=self.settings.VAD_MODEL,
+            # vad_kwargs=self.settings.VAD_KWARGS,
+            ban_emo_unk=True,  # 禁止输出感情标签
+            device=self.device,
+        )
 
     def process_audio_data(self, audio_data: npt.NDArray[np.float32]) -> str | None:
         """处理音频数据并返回识别结果。"""
@@ -74,7 +63,8 @@ class ASRProcessor(BaseASRProcessor):
         if hasattr(self.settings, "hotwords") and self.settings.hotwords:
             generate_kwargs["hotwords"] = self.settings.hotwords
 
-        res = self.model.generate(**generate_kwargs)
+        with compute_section():
+            res = self.model.generate(**generate_kwargs)
 
         if res and res[0].get("text"):
             recognized_text = rich_transcription_postprocess(res[0]["text"])
@@ -104,7 +94,8 @@ class ASRProcessor(BaseASRProcessor):
         if hasattr(self.settings, "hotwords") and self.settings.hotwords:
             generate_kwargs["hotwords"] = self.settings.hotwords
 
-        model_results = self.model.generate(**generate_kwargs)
+        with compute_section():
+            model_results = self.model.generate(**generate_kwargs)
 
         results = []
         if model_results:
@@ -135,7 +126,8 @@ class ASRProcessor(BaseASRProcessor):
         if hasattr(self.settings, "hotwords") and self.settings.hotwords:
             generate_kwargs["hotwords"] = self.settings.hotwords
 
-        res = self.model.generate(**generate_kwargs)
+        with compute_section():
+            res = self.model.generate(**generate_kwargs)
 
         if res and res[0].get("text"):
             recognized_text = rich_transcription_postprocess(res[0]["text"])
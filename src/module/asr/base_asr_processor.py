@@ -9,7 +9,6 @@ from typing import Any
 
 import numpy as np
 import numpy.typing as npt
-import torch
 from loguru import logger
 
 
@@ -52,19 +51,78 @@ class BaseASRProcessor(ABC):
             device: 推理设备配置。
         """
         if device == "auto":
+            import torch  # 延迟导入，避免应用启动时加载 torch
             self.device = "cuda:0" if torch.cuda.is_available() else "cpu"
         else:
             self.device = device
         logger.info("ASR处理器使用 {device} 进行推理...", device=self.device)
 
-    @abstractmethod
     async def initialize(self) -> None:
-        """异步初始化ASR模型。
-        
+        """异步加载ASR模型，支持重新初始化。
+
+        首次加载时状态为 INITIALIZING。已就绪时重新初始化会在后台线程加载一个备用实例，
+        加载期间旧模型继续处理请求，完成后以一次引用赋值替换，调用方不会看到“未就绪”。
+        """
+        async with self._init_lock:
+            if self.status == ASRStatus.INITIALIZING:
+                logger.warning(f"{self.__class__.__name__}正在初始化中，请等待。")
+                return
+
+            reloading = self.model is not None and self.status == ASRStatus.READY
+            if not reloading:
+                self.status = ASRStatus.INITIALIZING
+                self.error_message = None
+
+            try:
+                logger.info(f"{self.__class__.__name__}正在{'后台加载备用' if reloading else '加载'}语音识别模型...")
+                model = await asyncio.to_thread(self._load_model)
+                self.model = model
+                self.status = ASRStatus.READY
+                self.error_message = None
+                logger.info(f"{self.__class__.__name__}语音识别模型{'已替换' if reloading else '加载完成'}。")
+            except Exception as e:
+                if reloading:
+                    logger.exception(f"备用模型加载失败，继续使用当前模型: {e}")
+                    raise
+                self.status = ASRStatus.ERROR
+                self.error_message = f"{self.__class__.__name__}初始化失败: {str(e)}"
+                logger.exception(self.error_message)
+                raise
+
+    @abstractmethod
+    def _load_model(self) -> Any:
+        """同步加载并返回模型实例（在工作线程中调用）。
+
         子类必须实现此方法来加载具体的模型。
         """
         pass
 
+    async def smoke_test(self) -> bool:
+        """切换实例前的冒烟测试：识别半秒静音，不抛出异常即通过。"""
+        if not self.is_ready():
+            return False
+        await asyncio.to_thread(self.process_audio_data, np.zeros(8000, dtype=np.float32))
+        return True
+
+    def update_hotwords(self, hotwords: list[str]) -> bool:
+        """热替换热词列表，不重新加载模型。
+
+        热词在每次识别时随 generate 参数传入，因此只需用新列表整体替换 settings.hotwords，
+        进行中的识别继续使用它已读取的旧列表。
+
+        Args:
+            hotwords: 新的热词列表。
+
+        Returns:
+            热词是否发生变化。
+        """
+        new_hotwords = list(dict.fromkeys(w.strip() for w in hotwords if w and w.strip()))
+        if set(new_hotwords) == set(self.settings.hotwords):
+            return False
+        self.settings.hotwords = new_hotwords
+        logger.info(f"{self.__class__.__name__}热词已更新为 {len(new_hotwords)} 个。")
+        return True
+
     @abstractmethod
     def process_audio_data(self, audio_data: npt.NDArray[np.float32]) -> str | None:
         """处理单个音频数据并返回识别结果。
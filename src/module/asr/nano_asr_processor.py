@@ -3,12 +3,13 @@
 """Fun-ASR-Nano ASR处理器实现。"""
 
 from dataclasses import dataclass, field
+from typing import Any
 
 import numpy as np
 import numpy.typing as npt
-from funasr import AutoModel
 from loguru import logger
 
+from src.core.model_cache import get_model_cache
 from src.module.asr.base_asr_processor import ASRStatus, BaseASRProcessor
 
 
@@ -59,45 +60,29 @@ class NanoASRProcessor(BaseASRProcessor):
         super().__init__(device=device)
         self.settings = settings or NanoASRSettings()
 
-    async def initialize(self) -> None:
-        """异步初始化Fun-ASR-Nano语音识别模型。"""
-        async with self._init_lock:
-            if self.status == ASRStatus.INITIALIZING:
-                logger.warning("Nano ASR处理器正在初始化中，请等待。")
-                return
-            
-            self.status = ASRStatus.INITIALIZING
-            self.error_message = None
-            
-            try:
-                logger.info(f"Nano ASR处理器正在加载模型: {self.settings.model}...")
-                
-                if self.settings.use_vad:
-                    # 使用VAD模式初始化
-                    self.model = AutoModel(
-                        model=self.settings.model,
-                        trust_remote_code=True,
-                        remote_code="./model.py",
-                        vad_model=self.settings.vad_model,
-                        vad_kwargs={"max_single_segment_time": self.settings.vad_max_single_segment_time},
-                        device=self.device,
-                    )
-                else:
-                    # 标准模式初始化
-                    self.model = AutoModel(
-                        model=self.settings.model,
-                        trust_remote_code=True,
-                        remote_code="./model.py",
-                        device=self.device,
-                    )
-                
-                self.status = ASRStatus.READY
-                logger.info("Nano ASR处理器模型加载完成。")
-            except Exception as e:
-                self.status = ASRStatus.ERROR
-                self.error_message = f"Nano ASR处理器初始化失败: {str(e)}"
-                logger.exception(self.error_message)
-                raise
+    def _load_model(self) -> Any:
+        """加载Fun-ASR-Nano语音识别模型。"""
+        logger.info(f"Nano ASR处理器正在加载模型: {self.settings.model}...")
+
+        if self.settings.use_vad:
+            # 使用VAD模式初始化
+            return get_model_cache().load_auto_model(
+                "asr",
+                model=self.settings.model,
+                trust_remote_code=True,
+                remote_code="./model.py",
+                vad_model=self.settings.vad_model,
+                vad_kwargs={"max_single_segment_time": self.settings.vad_max_single_segment_time},
+                device=self.device,
+            )
+        # 标准模式初始化
+        return get_model_cache().load_auto_model(
+            "asr",
+            model=self.settings.model,
+            trust_remote_code=True,
+            remote_code="./model.py",
+            device=self.device,
+        )
 
     def process_audio_data(self, audio_data: npt.NDArray[np.float32]) -> str | None:
         """处理音频数据并返回识别结果。
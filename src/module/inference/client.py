@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理服务客户端，以及在 API 工作进程中替代本地组件的远程 VAD/ASR/RAG 处理器。
+
+每个工作进程与推理服务保持一条 Unix socket 连接，请求按 id 多路复用；不带 id 的帧是
+服务端推送的事件（如目录变更）。远程处理器实现与本地处理器相同的接口，管道、热切换槽
+和就绪检查无需区分本地或远程。
+"""
+import asyncio
+import inspect
+import itertools
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+
+from langchain_core.documents import Document
+
+from src.config.config import FunASRSettings, InferenceSettings, RAGSettings, VADSettings
+from src.core.capacity import add_compute
+from src.module.asr.base_asr_processor import ASRStatus, BaseASRProcessor
+from src.module.inference.protocol import audio_to_bytes, encode_frame, read_frame
+from src.module.rag.base_rag_processor import MetadataType, RAGStatus
+from src.module.vad.base_vad_processor import BaseVADProcessor, VADStatus
+from src.services.catalog_watcher import SECTION_DOC_TYPES
+
+
+EventListener = Callable[[dict], Awaitable[None] | None]
+
+# RAG 文档类型 -> 数据分区
+DOC_TYPE_SECTIONS = {doc_type: section for section, doc_type in SECTION_DOC_TYPES.items()}
+
+
+class InferenceError(RuntimeError):
+    """推理服务返回错误或连接不可用"""
+
+
+class InferenceClient:
+    """与推理服务的多路复用连接，断开后在下一次请求时自动重连"""
+
+    def __init__(self, settings: InferenceSettings) -> None:
+        self.settings = settings
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._read_task: asyncio.Task | None = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._event_listeners: dict[str, list[EventListener]] = {}
+        self._event_tasks: set[asyncio.Task] = set()
+
+    def add_event_listener(self, event: str, listener: EventListener) -> None:
+        """注册服务端推送事件的监听器，参数为事件帧头"""
+        self._event_listeners.setdefault(event, []).append(listener)
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self, timeout: float | None = None) -> None:
+        """连接推理服务，服务尚未启动时重试直到超时"""
+        async with self._connect_lock:
+            if self.connected:
+                return
+            deadline = time.monotonic() + (timeout if timeout is not None else self.settings.connect_timeout)
+            while True:
+                try:
+                    self._reader, self._writer = await asyncio.open_unix_connection(self.settings.socket_path)
+                    break
+                except (FileNotFoundError, ConnectionRefusedError) as e:
+                    if time.monotonic() >= deadline:
+                        raise InferenceError(f"无法连接推理服务 {self.settings.socket_path}: {e}") from e
+                    await asyncio.sleep(0.5)
+            self._read_task = asyncio.create_task(self._read_loop(self._reader))
+            logger.info(f"已连接推理服务: {self.settings.socket_path}")
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None:
+            self._read_task.cancel()
+        self._fail_pending(InferenceError("推理服务连接已关闭"))
+        self._reader = self._writer = self._read_task = None
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                header, payload = await read_frame(reader)
+                if "event" in header:
+                    self._dispatch_event(header)
+                    continue
+                future = self._pending.pop(header.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if header.get("ok"):
+                    future.set_result((header.get("result"), payload, header.get("compute", 0.0)))
+                else:
+                    future.set_exception(InferenceError(header.get("error") or "推理服务返回错误"))
+        except (asyncio.IncompleteReadError, ConnectionResetError) as e:
+            logger.warning(f"推理服务连接断开: {e}")
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+            self._writer = None
+            self._fail_pending(InferenceError("推理服务连接断开"))
+
+    def _dispatch_event(self, header: dict) -> None:
+        for listener in self._event_listeners.get(header["event"], []):
+            try:
+                result = listener(header)
+            except Exception as e:
+                logger.exception(f"推理服务事件 {header['event']} 处理失败: {e}")
+                continue
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self._event_tasks.add(task)
+                task.add_done_callback(self._event_done)
+
+    def _event_done(self, task: asyncio.Task) -> None:
+        self._event_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"推理服务事件处理失败: {task.exception()}")
+
+    def _fail_pending(self, error: Exception) -> None:
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def request(self, op: str, payload: bytes = b"", **fields: Any) -> Any:
+        """发送一个请求并等待结果"""
+        if not self.connected:
+            await self.connect()
+        writer = self._writer
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            async with self._write_lock:
+                writer.write(encode_frame({"id": request_id, "op": op, **fields}, payload))
+                await writer.drain()
+            result, _, compute_seconds = await asyncio.wait_for(future, self.settings.request_timeout)
+            # 服务端回报的模型计算耗时计入调用方的 measure_compute，容量估算不含往返与排队
+            add_compute(compute_seconds)
+            return result
+        except ConnectionError as e:
+            raise InferenceError(f"推理请求 {op} 发送失败: {e}") from e
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def wait_ready(self, component: str) -> dict:
+        """等待推理服务中的组件就绪，返回服务状态"""
+        deadline = time.monotonic() + self.settings.connect_timeout
+        while True:
+            status = await self.request("status")
+            if status[component] == "READY":
+                return status
+            if status[component] == "ERROR":
+                raise InferenceError(f"推理服务 {component} 加载失败: {status.get(f'{component}_error')}")
+            if time.monotonic() >= deadline:
+                raise InferenceError(f"等待推理服务 {component} 就绪超时，当前状态: {status[component]}")
+            await asyncio.sleep(1.0)
+
+
+class RemoteVADCore(BaseVADProcessor):
+    """通过推理服务执行 VAD；流式缓存保存在服务端，本地缓存只记录会话 ID"""
+
+    def __init__(self, settings: VADSettings, client: InferenceClient) -> None:
+        super().__init__(settings)
+        self.client = client
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def initialize(self) -> None:
+        async with self._init_lock:
+            if self.status == VADStatus.READY:
+                return
+            self.status = VADStatus.INITIALIZING
+            self.error_message = None
+            try:
+                self._loop = asyncio.get_running_loop()
+                await self.client.connect()
+                await self.client.wait_ready("vad")
+                self.status = VADStatus.READY
+                logger.success("远程VAD处理器已连接推理服务，状态: READY。")
+            except Exception as e:
+                self.status = VADStatus.ERROR
+                self.error_message = f"远程VAD初始化失败: {e}"
+                logger.exception(self.error_message)
+                raise
+
+    @staticmethod
+    def _session(cache: dict[str, Any]) -> str:
+        return cache.setdefault("remote_session", uuid.uuid4().hex)
+
+    async def aprocess_chunk(self, chunk: npt.NDArray, cache: dict[str, Any]) -> list:
+        if self.status != VADStatus.READY:
+            raise RuntimeError(f"VAD处理器未准备就绪，当前状态: {self.status}")
+        segments = await self.client.request("vad", audio_to_bytes(chunk), session=self._session(cache))
+        return [tuple(segment) for segment in segments]
+
+    def process_chunk(self, chunk: npt.NDArray, cache: dict[str, Any]) -> list:
+        """同步接口，只能在工作线程中调用（如冒烟测试）"""
+        return asyncio.run_coroutine_threadsafe(self.aprocess_chunk(chunk, cache), self._loop).result()
+
+    async def release_cache(self, cache: dict[str, Any]) -> None:
+        session = cache.get("remote_session")
+        if session is not None and self.client.connected:
+            await self.client.request("vad_release", session=session)
+
+
+class RemoteASRProcessor(BaseASRProcessor):
+    """通过推理服务执行 ASR；同步接口由管道在工作线程中调用，再转发到事件循环"""
+
+    def __init__(self, settings: FunASRSettings, client: InferenceClient) -> None:
+        super().__init__(device="remote")
+        self.settings = settings
+        self.client = client
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def initialize(self) -> None:
+        async with self._init_lock:
+            if self.status == ASRStatus.INITIALIZING:
+                return
+            self.status = ASRStatus.INITIALIZING
+            self.error_message = None
+            try:
+                self._loop = asyncio.get_running_loop()
+                await self.client.connect()
+                await self.client.wait_ready("asr")
+                await self.client.request("hotwords", hotwords=self.settings.hotwords)
+                self.model = self.client
+                self.status = ASRStatus.READY
+                logger.success("远程ASR处理器已连接推理服务，状态: READY。")
+            except Exception as e:
+                self.status = ASRStatus.ERROR
+                self.error_message = f"远程ASR初始化失败: {e}"
+                logger.exception(self.error_message)
+                raise
+
+    def _load_model(self) -> Any:
+        return self.client
+
+    def _call(self, op: str, payload: bytes = b"", **fields: Any) -> Any:
+        future = asyncio.run_coroutine_threadsafe(self.client.request(op, payload, **fields), self._loop)
+        return future.result()
+
+    def update_hotwords(self, hotwords: list[str]) -> bool:
+        changed = super().update_hotwords(hotwords)
+        if changed and self._loop is not None:
+            future = asyncio.run_coroutine_threadsafe(
+                self.client.request("hotwords", hotwords=self.settings.hotwords), self._loop
+            )
+            future.add_done_callback(self._log_hotword_sync)
+        return changed
+
+    @staticmethod
+    def _log_hotword_sync(future) -> None:
+        if future.exception() is not None:
+            logger.error(f"推理服务热词同步失败: {future.exception()}")
+
+    def process_audio_data(self, audio_data: npt.NDArray[np.float32]) -> str | None:
+        if not self.is_ready():
+            logger.error("ASR处理器未就绪，无法处理音频数据。")
+            return None
+        return self._call("asr", audio_to_bytes(self._convert_audio_dtype(audio_data)))
+
+    def process_audio(self, audio_data: list[npt.NDArray[np.float32]]) -> list[str]:
+        if not self.is_ready():
+            logger.error("ASR处理器未就绪，无法处理音频数据。")
+            return []
+        audio_data = [self._convert_audio_dtype(data) for data in audio_data]
+        payload = b"".join(audio_to_bytes(data) for data in audio_data)
+        return self._call("asr_batch", payload, lengths=[len(data) for data in audio_data])
+
+    def process_audio_file(self, file_path: str) -> str | None:
+        if not self.is_ready():
+            logger.error("ASR处理器未就绪，无法处理音频数据。")
+            return None
+        return self._call("asr_file", path=os.path.abspath(file_path))
+
+
+class RemoteRAGProcessor:
+    """
+    通过推理服务检索。Chroma 持久化客户端不能在多个进程间共享，向量库只在推理服务进程中打开，
+    重建和增量写入也都在那里执行。目录写入接口调用的 batch_add_* / delete_* 只通知推理服务
+    重新加载对应分区，由它按目录差异增量更新向量并把变更发布给所有工作进程。
+    """
+
+    def __init__(self, settings: RAGSettings, client: InferenceClient) -> None:
+        self.settings = settings
+        self.chroma_db_dir = settings.chroma_db_dir
+        self.client = client
+        self.status = RAGStatus.UNINITIALIZED
+        self.error_message: str | None = None
+        self._init_lock = asyncio.Lock()
+
+    async def initialize(self) -> None:
+        async with self._init_lock:
+            if self.status == RAGStatus.READY:
+                return
+            self.status = RAGStatus.INITIALIZING
+            self.error_message = None
+            try:
+                await self.client.connect()
+                await self.client.wait_ready("rag")
+                self.status = RAGStatus.READY
+                logger.success("远程RAG处理器已连接推理服务，状态: READY。")
+            except Exception as e:
+                self.status = RAGStatus.ERROR
+                self.error_message = f"远程RAG初始化失败: {e}"
+                logger.exception(self.error_message)
+                raise
+
+    async def close(self) -> None:
+        pass
+
+    async def smoke_test(self) -> bool:
+        status = await self.client.request("status")
+        return status["rag"] == RAGStatus.READY.value
+
+    def _check_ready(self) -> None:
+        if self.status != RAGStatus.READY:
+            raise RuntimeError(f"RAG处理器未准备就绪，当前状态: {self.status}")
+
+    @staticmethod
+    def _documents(items: list[dict]) -> list[Document]:
+        return [Document(page_content=item["page_content"], metadata=item["metadata"]) for item in items]
+
+    async def retrieve_context(
+        self,
+        query: str,
+        metadata_types: list[MetadataType] | None = None,
+        top_k: int | None = None,
+        adaptive: bool | None = None,
+        where: dict | None = None
+    ) -> list[Document]:
+        self._check_ready()
+        types = None if metadata_types is None else [t.value for t in metadata_types]
+        return self._documents(await self.client.request(
+            "rag_retrieve", query=query, types=types, top_k=top_k, adaptive=adaptive, where=where
+        ))
+
+    async def retrieve_devices_for_location(self, query: str, location: str | None,
+                                            top_k: int | None = None) -> list[Document]:
+        self._check_ready()
+        return self._documents(await self.client.request(
+            "rag_devices", query=query, location=location, top_k=top_k
+        ))
+
+    async def aget_retrieval_stats(self, minutes: int = 5) -> dict:
+        return await self.client.request("rag_stats", minutes=minutes)
+
+    async def refresh_database(self) -> bool:
+        return await self.client.request("rag_refresh")
+
+    async def _sync_sections(self, *doc_types: str) -> None:
+        await self.client.request("catalog_changed", sections=[DOC_TYPE_SECTIONS[t] for t in doc_types])
+
+    async def batch_add_doors(self, items: list) -> None:
+        await self._sync_sections("door")
+
+    async def batch_add_media(self, items: list) -> None:
+        await self._sync_sections("media")
+
+    async def batch_add_devices(self, items: list) -> None:
+        await self._sync_sections("device")
+
+    async def batch_add_areas(self, items: list) -> None:
+        await self._sync_sections("area")
+
+    async def delete_by_names(self, doc_type: str, names: list[str]) -> None:
+        await self._sync_sections(doc_type)
+
+    async def delete_by_type(self, doc_type: str) -> None:
+        await self._sync_sections(doc_type)
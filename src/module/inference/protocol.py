@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理服务帧协议。
+
+每帧为 8 字节头（两个大端 uint32：JSON 头长度、二进制负载长度）+ UTF-8 JSON 头 + 负载。
+请求头包含 id 和 op，响应头带回相同 id 以及 ok/result 或 ok/error；音频以 float32
+原始字节作为负载传输，避免 JSON 编码。
+"""
+import asyncio
+import json
+import struct
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+PREFIX = struct.Struct("!II")
+MAX_HEADER_BYTES = 1 << 20
+MAX_PAYLOAD_BYTES = 64 << 20
+
+
+class ProtocolError(RuntimeError):
+    """帧格式错误或超出大小限制"""
+
+
+def encode_frame(header: dict[str, Any], payload: bytes = b"") -> bytes:
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return PREFIX.pack(len(header_bytes), len(payload)) + header_bytes + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[dict[str, Any], bytes]:
+    """读取一帧；连接在帧边界关闭时抛出 asyncio.IncompleteReadError"""
+    header_len, payload_len = PREFIX.unpack(await reader.readexactly(PREFIX.size))
+    if header_len > MAX_HEADER_BYTES or payload_len > MAX_PAYLOAD_BYTES:
+        raise ProtocolError(f"帧过大: header={header_len}, payload={payload_len}")
+    header = json.loads(await reader.readexactly(header_len))
+    payload = await reader.readexactly(payload_len) if payload_len else b""
+    return header, payload
+
+
+def audio_to_bytes(audio: npt.NDArray) -> bytes:
+    return np.ascontiguousarray(audio, dtype=np.float32).tobytes()
+
+
+def bytes_to_audio(payload: bytes) -> npt.NDArray[np.float32]:
+    return np.frombuffer(payload, dtype=np.float32)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享推理服务进程。
+
+在一个进程中加载 VAD 和 ASR 模型，通过本地 Unix socket 为多个 API 工作进程提供推理。
+会话状态（音频缓冲、分段、WebSocket）留在各自的工作进程中，服务端只保存每个会话的
+VAD 流式缓存（按会话 ID，空闲超时后清理）。模型调用在线程中执行，事件循环只负责收发。
+
+RAG 向量库也只在本进程中打开：Chroma 持久化客户端不能在多个进程间共享。目录文件监听、
+向量库重建和增量同步都在这里执行，工作进程写入目录后发送 catalog_changed，本进程按差异
+更新向量和 ASR 热词，再向所有工作进程推送 catalog 事件，让它们重新加载各自的目录快照。
+
+独立运行: python -m src.module.inference.server
+"""
+import asyncio
+import os
+import time
+from typing import Any, Iterable
+
+from loguru import logger
+
+from src.config.config import AppSettings, get_settings
+from src.core.capacity import measure_compute
+from src.core.executors import WorkloadClass, run_in
+from src.module.asr.asr_processor import ASRProcessor
+from src.module.inference.protocol import (
+    ProtocolError,
+    bytes_to_audio,
+    encode_frame,
+    read_frame,
+)
+from src.module.vad.vad_core import VADCore
+
+
+class InferenceServer:
+    """承载 VAD/ASR 模型的 Unix socket 推理服务"""
+
+    def __init__(self, settings: AppSettings) -> None:
+        self.settings = settings
+        self.socket_path = settings.inference.socket_path
+        self.vad_core = VADCore(settings.vad)
+        self.asr_processor = ASRProcessor(settings.asr, device="cpu")
+        # 会话 ID -> (VAD 流式缓存, 最近访问时间)
+        self._vad_sessions: dict[str, tuple[dict[str, Any], float]] = {}
+        self._server: asyncio.AbstractServer | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.connections = 0
+        # 目录与 RAG 在 _load_models 中创建（RAG 提供商按配置选择）
+        self.data_service = None
+        self.rag_processor = None
+        self.rag_error: str | None = None
+        self.catalog_watcher = None
+        # 连接 -> 写锁，推送事件与响应共用
+        self._writers: dict[asyncio.StreamWriter, asyncio.Lock] = {}
+        # 工作进程号 -> (上报时间, 监控快照)，见 src/services/worker_stats.py
+        self._worker_stats: dict[str, tuple[float, dict]] = {}
+
+    async def start(self) -> None:
+        """加载模型并开始监听；模型加载期间即可连接，status 返回各组件状态"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # 上次异常退出遗留的 socket 文件
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        logger.info(f"推理服务已监听: {self.socket_path}")
+
+        self._spawn(self._load_models())
+        self._spawn(self._evict_idle_sessions())
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        if self.catalog_watcher is not None:
+            await self.catalog_watcher.stop()
+        if self.rag_processor is not None:
+            await self.rag_processor.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_models(self) -> None:
+        from src.core import dependencies
+        from src.module.rag import create_rag_processor
+        from src.services.catalog_watcher import CatalogWatcher
+        from src.services.data_service import DataService
+
+        self.data_service = await asyncio.to_thread(DataService)
+        self.asr_processor.settings.hotwords = self.data_service.get_all_hotwords()
+        initializers = [self.vad_core.initialize(), self.asr_processor.initialize()]
+        try:
+            self.rag_processor = await asyncio.to_thread(create_rag_processor, self.settings.rag)
+            initializers.append(self.rag_processor.initialize())
+        except Exception as e:
+            self.rag_error = str(e)
+            logger.error(f"推理服务 RAG 创建失败: {e}")
+
+        # CatalogWatcher 通过 dependencies 找到要同步的 RAG 和 ASR
+        dependencies.data_service = self.data_service
+        dependencies.asr_processor = self.asr_processor
+        dependencies.rag_processor = self.rag_processor
+        self.catalog_watcher = CatalogWatcher(self.data_service, self.settings.data)
+        self.catalog_watcher.add_listener(self._publish_catalog)
+        if self.settings.data.watch_enabled and self.data_service.backend == "csv":
+            self.catalog_watcher.start()
+
+        results = await asyncio.gather(*initializers, return_exceptions=True)
+        for name, result in zip(("VAD", "ASR", "RAG"), results):
+            if isinstance(result, Exception):
+                logger.error(f"推理服务 {name} 模型加载失败: {result}")
+        logger.info("推理服务模型加载结束: {status}", status=self.get_status())
+
+    async def _evict_idle_sessions(self) -> None:
+        ttl = self.settings.inference.vad_session_ttl
+        while True:
+            await asyncio.sleep(min(ttl, 60.0))
+            cutoff = time.monotonic() - ttl
+            expired = [sid for sid, (_, last) in self._vad_sessions.items() if last < cutoff]
+            for sid in expired:
+                del self._vad_sessions[sid]
+            if expired:
+                logger.info(f"清理 {len(expired)} 个空闲 VAD 会话缓存")
+
+    def get_status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "vad": self.vad_core.status.value,
+            "asr": self.asr_processor.status.value,
+            "rag": self.rag_processor.status.value if self.rag_processor is not None
+            else ("ERROR" if self.rag_error else "UNINITIALIZED"),
+            "vad_error": self.vad_core.error_message,
+            "asr_error": self.asr_processor.error_message,
+            "rag_error": self.rag_processor.error_message if self.rag_processor is not None else self.rag_error,
+            "vad_sessions": len(self._vad_sessions),
+            "connections": self.connections,
+        }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """一个工作进程一条连接；请求并发处理，响应按完成顺序带 id 写回"""
+        self.connections += 1
+        write_lock = self._writers[writer] = asyncio.Lock()
+        pending: set[asyncio.Task] = set()
+
+        async def respond(header: dict, payload: bytes) -> None:
+            request_id = header.get("id")
+            try:
+                with measure_compute() as compute:
+                    result, out_payload = await self.dispatch(header, payload)
+                frame = encode_frame({"id": request_id, "ok": True, "result": result, "compute": compute[0]},
+                                     out_payload)
+            except Exception as e:
+                logger.exception(f"推理请求 {header.get('op')} 失败: {e}")
+                frame = encode_frame({"id": request_id, "ok": False, "error": str(e)})
+            async with write_lock:
+                writer.write(frame)
+                await writer.drain()
+
+        try:
+            while True:
+                header, payload = await read_frame(reader)
+                task = asyncio.create_task(respond(header, payload))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        except ProtocolError as e:
+            logger.error(f"推理连接协议错误，断开: {e}")
+        finally:
+            self.connections -= 1
+            self._writers.pop(writer, None)
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+    async def dispatch(self, header: dict, payload: bytes) -> tuple[Any, bytes]:
+        """执行一个请求，返回 (JSON 结果, 二进制负载)"""
+        op = header.get("op")
+        if op == "status":
+            return self.get_status(), b""
+
+        if op == "vad":
+            session = header["session"]
+            cache, _ = self._vad_sessions.get(session, ({}, 0.0))
+            self._vad_sessions[session] = (cache, time.monotonic())
+            segments = await run_in(WorkloadClass.REALTIME, self.vad_core.process_chunk, bytes_to_audio(payload), cache)
+            return [list(segment) for segment in segments], b""
+
+        if op == "vad_release":
+            self._vad_sessions.pop(header["session"], None)
+            return True, b""
+
+        if op == "asr":
+            return await run_in(WorkloadClass.ASR, self.asr_processor.process_audio_data, bytes_to_audio(payload)), b""
+
+        if op == "asr_batch":
+            audio = bytes_to_audio(payload)
+            lengths = header["lengths"]
+            batch, start = [], 0
+            for length in lengths:
+                batch.append(audio[start:start + length])
+                start += length
+            return await run_in(WorkloadClass.ASR, self.asr_processor.process_audio, batch), b""
+
+        if op == "asr_file":
+            # 同一主机部署，直接按路径读取工作进程保存的文件
+            return await run_in(WorkloadClass.ASR, self.asr_processor.process_audio_file, header["path"]), b""
+
+        if op == "hotwords":
+            return self.asr_processor.update_hotwords(header["hotwords"]), b""
+
+        if op == "rag_retrieve":
+            from src.module.rag.base_rag_processor import MetadataType
+            types = header.get("types")
+            docs = await self._rag().retrieve_context(
+                header["query"], None if types is None else [MetadataType(t) for t in types],
+                top_k=header.get("top_k"), adaptive=header.get("adaptive"), where=header.get("where"),
+            )
+            return self._documents(docs), b""
+
+        if op == "rag_devices":
+            docs = await self._rag().retrieve_devices_for_location(
+                header["query"], header.get("location"), top_k=header.get("top_k"))
+            return self._documents(docs), b""
+
+        if op == "rag_stats":
+            return await self._rag().aget_retrieval_stats(header.get("minutes", 5)), b""
+
+        if op == "rag_refresh":
+            # 工作进程可能刚导入或重写了目录：先重新加载并通知各工作进程，再按最新目录重建
+            await run_in(WorkloadClass.MAINTENANCE, self.data_service.reload)
+            await self._publish_catalog(self.data_service.section_paths())
+            return await self._rag().refresh_database(), b""
+
+        if op == "worker_stats":
+            self._worker_stats[header["pid"]] = (time.monotonic(), header["stats"])
+            return None, b""
+
+        if op == "cluster_stats":
+            # 超过三个上报周期未更新的进程视为已退出
+            cutoff = time.monotonic() - 3 * self.settings.monitoring.worker_stats_interval
+            self._worker_stats = {pid: entry for pid, entry in self._worker_stats.items() if entry[0] >= cutoff}
+            return {pid: stats for pid, (_, stats) in self._worker_stats.items()}, b""
+
+        if op == "catalog_changed":
+            # 工作进程写入了目录（SQLite 没有文件通知），重新加载这些分区并按差异同步
+            deltas = await self.catalog_watcher.handle_change(header["sections"])
+            return sorted(deltas), b""
+
+        raise ValueError(f"未知的推理操作: {op}")
+
+    def _rag(self):
+        if self.rag_processor is None:
+            raise RuntimeError(f"推理服务 RAG 未加载: {self.rag_error}")
+        return self.rag_processor
+
+    @staticmethod
+    def _documents(docs) -> list[dict]:
+        return [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs]
+
+    async def _publish_catalog(self, sections: Iterable[str]) -> None:
+        """向所有工作进程推送目录变更（CatalogWatcher 监听器，参数为 {分区: 差异} 或分区名）"""
+        frame = encode_frame({"event": "catalog", "sections": sorted(sections)})
+        for writer, write_lock in list(self._writers.items()):
+            try:
+                async with write_lock:
+                    writer.write(frame)
+                    await writer.drain()
+            except ConnectionError as e:
+                logger.warning(f"向工作进程推送目录变更失败: {e}")
+
+
+async def _main() -> None:
+    server = InferenceServer(get_settings())
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    from src.config.logging_config import setup_logging
+
+    setup_logging()
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        logger.info("推理服务已停止")
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音频 WebSocket 的协商与二进制分帧协议。
+
+协议 1（旧客户端，config 中不带 protocol）: 连接后持续发送裸 int16 PCM，没有帧头。
+
+协议 2: 客户端在 config 中声明 protocol=2 以及希望的编码、帧长和是否在浏览器端做 VAD，
+服务端回复 config_ack 给出实际采用的参数，之后每条二进制消息是一帧：
+
+    | version u8 | type u8 | flags u16 | seq u32 | timestamp_ms u32 | payload ... |   (小端)
+
+- AUDIO: payload 为按协商编码的音频（int16/float32 PCM，或一个原始 Opus 数据包）
+- SPEECH_START / SPEECH_END: 浏览器端 VAD 的语音开始/结束标记，无 payload
+  开启客户端 VAD 时只发送语音段内的帧（含少量前导帧）和标记，空闲时不产生任何流量。
+- seq 每帧递增。服务端按 seq 重排，在抖动容限内等待迟到的帧；超出容限仍缺的帧按帧长补静音
+  保持时间轴，之后才到的帧和重复帧丢弃。容限按到达时间计，连接空闲时也会到期（见 FrameReceiver.expire）。
+"""
+import struct
+import time
+from dataclasses import dataclass
+from enum import Enum, IntEnum
+
+from loguru import logger
+
+from src.api.schemas import WebSocketConfig
+from src.config.config import ServerSettings
+from src.module.input.stream_decoder import OpusPacketDecoder, opus_available
+
+PROTOCOL_VERSION = 2
+HEADER = struct.Struct("<BBHII")
+
+
+class FrameType(IntEnum):
+    AUDIO = 1
+    SPEECH_START = 2
+    SPEECH_END = 3
+
+
+class AudioEncoding(str, Enum):
+    INT16 = "int16"
+    FLOAT32 = "float32"
+    OPUS = "opus"
+
+
+BYTES_PER_SAMPLE = {AudioEncoding.INT16: 2, AudioEncoding.FLOAT32: 4}
+# Opus 数据包的合法帧长(ms)，协商时其他值改为 20
+OPUS_FRAME_MS = (10, 20, 40, 60)
+
+
+class FrameProtocolError(ValueError):
+    """二进制帧格式错误"""
+
+
+@dataclass
+class Frame:
+    type: FrameType
+    seq: int
+    timestamp_ms: int
+    payload: bytes = b""
+
+
+def pack_frame(frame_type: FrameType, seq: int, timestamp_ms: int, payload: bytes = b"") -> bytes:
+    """组装一帧（客户端与测试使用）"""
+    return HEADER.pack(PROTOCOL_VERSION, frame_type, 0, seq & 0xFFFFFFFF, timestamp_ms & 0xFFFFFFFF) + payload
+
+
+def parse_frame(data: bytes) -> Frame:
+    if len(data) < HEADER.size:
+        raise FrameProtocolError(f"帧长度 {len(data)} 小于帧头长度 {HEADER.size}")
+    version, frame_type, _flags, seq, timestamp_ms = HEADER.unpack_from(data)
+    if version != PROTOCOL_VERSION:
+        raise FrameProtocolError(f"不支持的帧版本: {version}")
+    try:
+        frame_type = FrameType(frame_type)
+    except ValueError:
+        raise FrameProtocolError(f"未知的帧类型: {frame_type}") from None
+    return Frame(frame_type, seq, timestamp_ms, bytes(data[HEADER.size:]))
+
+
+@dataclass
+class StreamFormat:
+    """协商后的会话音频格式"""
+    protocol: int = 1
+    encoding: AudioEncoding = AudioEncoding.INT16
+    sample_rate: int = 16000
+    frame_ms: int = 0
+    client_vad: bool = False
+
+    @property
+    def pcm_encoding(self) -> AudioEncoding:
+        """送入音频队列的 PCM 编码：Opus 在接收时解码为 float32"""
+        return AudioEncoding.FLOAT32 if self.encoding == AudioEncoding.OPUS else self.encoding
+
+    @property
+    def frame_bytes(self) -> int:
+        """一帧解码后的 PCM 字节数（帧长未知时为 0）"""
+        return len(self.silence(self.frame_ms)) if self.frame_ms else 0
+
+    def silence(self, duration_ms: int) -> bytes:
+        """按 PCM 编码的静音（int16 与 float32 的零值都是全零字节）"""
+        return bytes(self.sample_rate * duration_ms // 1000 * BYTES_PER_SAMPLE[self.pcm_encoding])
+
+    def ack(self) -> dict:
+        return {
+            "type": "config_ack",
+            "protocol": self.protocol,
+            "encoding": self.encoding.value,
+            "sampleRate": self.sample_rate,
+            "frameMs": self.frame_ms,
+            "clientVad": self.client_vad,
+        }
+
+
+def supported_encodings(settings: ServerSettings) -> tuple[AudioEncoding, ...]:
+    """服务端可以解码的编码；Opus 需要配置开启且 PyAV 带有 libopus"""
+    if settings.ws_opus and opus_available():
+        return AudioEncoding.INT16, AudioEncoding.FLOAT32, AudioEncoding.OPUS
+    return AudioEncoding.INT16, AudioEncoding.FLOAT32
+
+
+def negotiate(config: WebSocketConfig, settings: ServerSettings, sample_rate: int) -> StreamFormat:
+    """
+    根据客户端 config 与服务端能力确定会话格式。
+
+    服务端不对 PCM 重采样，采样率总是 VAD 的采样率；客户端须按 config_ack 中的参数发送。
+    """
+    if (config.protocol or 1) < PROTOCOL_VERSION:
+        return StreamFormat(sample_rate=sample_rate)
+
+    try:
+        encoding = AudioEncoding(config.encoding or AudioEncoding.INT16)
+    except ValueError:
+        encoding = AudioEncoding.INT16
+    if encoding not in supported_encodings(settings):
+        logger.info(f"客户端请求的编码 {encoding.value} 不受支持，回退为 int16")
+        encoding = AudioEncoding.INT16
+    frame_ms = min(max(config.frameMs or settings.ws_frame_ms, 10), 200)
+    if encoding == AudioEncoding.OPUS and frame_ms not in OPUS_FRAME_MS:
+        frame_ms = 20
+    return StreamFormat(
+        protocol=PROTOCOL_VERSION,
+        encoding=encoding,
+        sample_rate=sample_rate,
+        frame_ms=frame_ms,
+        client_vad=bool(config.clientVad) and settings.ws_client_vad,
+    )
+
+
+class FrameReceiver:
+    """
+    把协议 2 的二进制帧转换为连续的 PCM 字节（编码见 StreamFormat.pcm_encoding）。
+
+    - 抖动缓冲: seq 不连续时先缓存后续帧，等待缺失的帧最多 jitter_ms（按缓存帧的到达时间，
+      或缓存的帧已跨过 jitter_ms 对应的帧数）；仍未到达则视为丢失，按帧长补静音（最多 max_gap_ms）
+      保持 VAD 时间轴连续。缓存中有 SPEECH_END 时不再等待，语音段尾部不会因客户端随后静默而滞留
+    - 重复帧或等待期过后才到的帧: 丢弃
+    - SPEECH_END: 追加 speech_end_silence_ms 的静音，让服务端 VAD 在下一段语音到来前判定语音段结束
+    - Opus: 每个连接一个解码器，按 seq 顺序解码（丢失的包不送入解码器）
+    """
+
+    def __init__(self, stream_format: StreamFormat, speech_end_silence_ms: int, max_gap_ms: int,
+                 jitter_ms: int = 0) -> None:
+        self.format = stream_format
+        self.speech_end_silence = stream_format.silence(speech_end_silence_ms)
+        frame_ms = stream_format.frame_ms
+        self.max_gap_frames = max_gap_ms // frame_ms if frame_ms else 0
+        self.jitter_frames = jitter_ms // frame_ms if frame_ms else 0
+        self.jitter_seconds = jitter_ms / 1000 if self.jitter_frames else 0.0
+        self.decoder = OpusPacketDecoder(stream_format.sample_rate) if stream_format.encoding == AudioEncoding.OPUS else None
+        self._next_seq: int | None = None
+        self._held: dict[int, tuple[Frame, float]] = {}  # seq -> (帧, 到达时间)
+        self.frames = 0
+        self.audio_bytes = 0
+        self.lost_frames = 0
+        self.discarded_frames = 0
+        self.reordered_frames = 0
+        self.utterances = 0
+
+    @property
+    def decodes(self) -> bool:
+        """是否需要解码（Opus），此时 feed 应在工作线程中调用"""
+        return self.decoder is not None
+
+    def feed(self, data: bytes, now: float | None = None) -> list[bytes]:
+        """处理一帧，返回需要按顺序送入音频队列的 PCM 数据（可能为空）"""
+        frame = parse_frame(data)
+        sample_bytes = BYTES_PER_SAMPLE.get(self.format.encoding)
+        if frame.type == FrameType.AUDIO and sample_bytes and len(frame.payload) % sample_bytes:
+            raise FrameProtocolError(f"音频负载长度 {len(frame.payload)} 不是 {self.format.encoding.value} 采样的整数倍")
+        if self._next_seq is None:
+            self._next_seq = frame.seq
+        if frame.seq < self._next_seq or frame.seq in self._held:
+            self.discarded_frames += 1
+            return []
+        if frame.seq == self._next_seq and self._held:
+            self.reordered_frames += 1  # 迟到但仍在抖动容限内
+        now = time.monotonic() if now is None else now
+        self._held[frame.seq] = (frame, now)
+        return self._drain(now)
+
+    def expire(self, now: float | None = None) -> list[bytes]:
+        """没有新帧到达时由接收循环定时调用：等待超过抖动容限的缺失帧按丢失处理，输出其后缓存的帧"""
+        return self._drain(time.monotonic() if now is None else now)
+
+    def expire_in(self, now: float | None = None) -> float | None:
+        """距最早缓存的帧等待到期还有多少秒；没有缓存的帧时为 None"""
+        if not self._held:
+            return None
+        now = time.monotonic() if now is None else now
+        oldest = min(arrived for _, arrived in self._held.values())
+        return max(0.0, oldest + self.jitter_seconds - now)
+
+    def flush(self) -> list[bytes]:
+        """连接结束时输出抖动缓冲中剩余的帧（缺失的帧按丢失处理）"""
+        chunks: list[bytes] = []
+        for seq in sorted(self._held):
+            if seq > self._next_seq:
+                chunks.extend(self._skip_to(seq))
+            chunks.extend(self._process(self._held.pop(seq)[0]))
+            self._next_seq = seq + 1
+        return [chunk for chunk in chunks if chunk]
+
+    def _drain(self, now: float) -> list[bytes]:
+        """按 seq 输出连续的缓存帧，缺失的帧等待到期后跳过"""
+        chunks: list[bytes] = []
+        while self._held:
+            if self._next_seq in self._held:
+                chunks.extend(self._process(self._held.pop(self._next_seq)[0]))
+                self._next_seq += 1
+                continue
+            if not self._gap_expired(now):
+                break  # 仍在抖动容限内，等待缺失的帧
+            chunks.extend(self._skip_to(min(self._held)))
+        return [chunk for chunk in chunks if chunk]
+
+    def _gap_expired(self, now: float) -> bool:
+        if max(self._held) - self._next_seq >= self.jitter_frames:
+            return True
+        if any(frame.type == FrameType.SPEECH_END for frame, _ in self._held.values()):
+            return True
+        return now - min(arrived for _, arrived in self._held.values()) >= self.jitter_seconds
+
+    def _skip_to(self, seq: int) -> list[bytes]:
+        """放弃等待 seq 之前缺失的帧，按帧长补静音"""
+        missing = seq - self._next_seq
+        self.lost_frames += missing
+        self._next_seq = seq
+        filled = min(missing, self.max_gap_frames)
+        return [bytes(self.format.frame_bytes * filled)] if filled and self.format.frame_bytes else []
+
+    def _process(self, frame: Frame) -> list[bytes]:
+        self.frames += 1
+        if frame.type == FrameType.AUDIO:
+            self.audio_bytes += len(frame.payload)
+            if self.decoder is not None:
+                return [self.decoder.decode(frame.payload).tobytes()]
+            return [frame.payload]
+        if frame.type == FrameType.SPEECH_START:
+            self.utterances += 1
+        elif frame.type == FrameType.SPEECH_END:
+            return [self.speech_end_silence]
+        return []
+
+    def stats(self) -> dict:
+        stats = {
+            "frames": self.frames,
+            "audio_bytes": self.audio_bytes,
+            "lost_frames": self.lost_frames,
+            "discarded_frames": self.discarded_frames,
+            "reordered_frames": self.reordered_frames,
+            "utterances": self.utterances,
+        }
+        if self.decoder is not None:
+            stats["decode_errors"] = self.decoder.errors
+        return stats
@@ -1,14 +1,13 @@
-import asyncio
 import io
 import subprocess
 import threading
 import queue
 
-import av
 import numpy as np
-from av.audio.resampler import AudioResampler
 from loguru import logger
 
+from src.core.executors import WorkloadClass, run_in
+
 
 class StreamDecoder:
     def __init__(self, target_sample_rate: int = 16000, target_layout: str = "mono", target_format: str = "fltp") -> None:
@@ -19,6 +18,8 @@ class StreamDecoder:
             target_layout: 声道布局 ("mono" 或 "stereo")
             target_format: 样本格式 ("s16" 或 "fltp")
         """
+        # PyAV 只在创建解码器时导入，避免拖慢应用启动
+        from av.audio.resampler import AudioResampler
         self.resampler = AudioResampler(
             format=target_format,
             layout=target_layout,
@@ -34,6 +35,8 @@ class StreamDecoder:
         Returns:
             解码后的音频帧列表，错误时返回空列表
         """
+        import av
+
         decoded_frames = []
         try:
             with av.open(io.BytesIO(encoded_chunk), mode='r') as container:
@@ -59,7 +62,7 @@ class StreamDecoder:
         Returns:
             解码后的音频数组，形状为(channels, samples)，无数据时返回None
         """
-        frames = await asyncio.to_thread(self._decode_and_resample_sync, encoded_chunk)
+        frames = await run_in(WorkloadClass.REALTIME, self._decode_and_resample_sync, encoded_chunk)
 
         if not frames:
             return None
@@ -67,6 +70,55 @@ class StreamDecoder:
         return np.concatenate(frames, axis=1)
 
 
+def opus_available() -> bool:
+    """PyAV 是否带有 libopus 解码器"""
+    try:
+        import av
+        av.codec.Codec("libopus", "r")
+        return True
+    except Exception:
+        return False
+
+
+class OpusPacketDecoder:
+    """
+    逐包解码原始 Opus 数据包（无容器，如浏览器 WebCodecs AudioEncoder 的输出）。
+
+    每个连接持有一个解码器，跨包保留 libopus 的解码状态；libopus 总是输出 48kHz s16，
+    再经重采样器转换为目标采样率的 float32。
+    """
+
+    def __init__(self, target_sample_rate: int = 16000) -> None:
+        import av
+        from av.audio.resampler import AudioResampler
+
+        self.codec = av.CodecContext.create("libopus", "r")
+        # 未指定时 libopus 按立体声输出，下混会把单声道信号放大约 3dB
+        self.codec.layout = "mono"
+        self.resampler = AudioResampler(format="flt", layout="mono", rate=target_sample_rate)
+        self.packets = 0
+        self.errors = 0
+
+    def decode(self, packet: bytes) -> np.ndarray:
+        """解码一个数据包，返回 float32 单声道采样（解码失败时为空数组）"""
+        import av
+
+        self.packets += 1
+        samples: list[np.ndarray] = []
+        try:
+            for frame in self.codec.decode(av.Packet(packet)):
+                for resampled in self.resampler.resample(frame):
+                    samples.append(resampled.to_ndarray().reshape(-1))
+        except av.error.FFmpegError as e:
+            self.errors += 1
+            if self.errors % 100 == 1:
+                logger.warning(f"Opus 数据包解码失败（累计 {self.errors} 次）: {e}")
+            return np.zeros(0, dtype=np.float32)
+        if not samples:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(samples) if len(samples) > 1 else samples[0]
+
+
 class FFmpegStreamDecoder:
     def __init__(self, target_sample_rate: int = 16000, target_layout: str = "mono", target_format: str = "fltp") -> None:
         """初始化FFmpeg流式解码器。
@@ -194,7 +246,7 @@ class FFmpegStreamDecoder:
     def _decode_stream_sync(self, encoded_chunk: bytes) -> np.ndarray | None:
         """
         【同步方法】向流式FFmpeg进程写入数据并读取输出。
-        这个方法会被 `asyncio.to_thread` 在一个独立的线程中运行。
+        这个方法会在 realtime 线程池中运行。
         """
         if not encoded_chunk:
             return None
@@ -266,9 +318,9 @@ class FFmpegStreamDecoder:
         if not encoded_chunk:
             return None
 
-        audio_data = await asyncio.to_thread(self._decode_stream_sync, encoded_chunk)
+        audio_data = await run_in(WorkloadClass.REALTIME, self._decode_stream_sync, encoded_chunk)
         return audio_data
 
     async def close(self):
         """关闭解码器并清理资源"""
-        await asyncio.to_thread(self._cleanup_process)
+        await run_in(WorkloadClass.REALTIME, self._cleanup_process)
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import asyncio
+import time
 from abc import ABC, abstractmethod
 from enum import Enum
 from typing import Any
@@ -17,7 +18,7 @@ from src.config.config import LLMSettings, DEFAULT_MAX_VALIDATION_RETRIES
 from src.core import dependencies
 from src.module.llm.tool.definitions import get_tools, ExhibitionCommand, CommandAction
 from src.module.llm.tool.dynamic_tool_manager import DynamicToolManager
-from src.module.llm.helper import DocumentFormatter
+from src.module.llm.prompt_assembler import PromptAssembler
 
 
 class LLMStatus(Enum):
@@ -28,129 +29,101 @@ class LLMStatus(Enum):
     ERROR = "ERROR"
 
 
-class BaseLLMHandler(ABC):
+class BaseConversationHandler(ABC):
     """
-    LLM处理器基类，定义了与大语言模型交互的通用流程。
-    
-    子类只需实现 _create_model() 方法来返回具体的模型实例。
+    LLM对话流程基类：提示词组装、聊天历史裁剪、工具调用与错误重试循环。
+
+    不持有模型，单次模型调用由子类的 _invoke_chain() 提供：
+    BaseLLMHandler 调用自己创建的模型，LLMRouter 把调用转发给多个提供方处理器。
     """
-    
+
     def __init__(self, settings: LLMSettings) -> None:
         """
-        初始化LLM处理器基类。
+        初始化对话流程。
 
         Args:
             settings (LLMSettings): LLM参数
         """
         self.settings = settings
-        self.model: BaseChatModel | None = None
-        self.model_with_tools = None
-        self.chain: RunnableSerializable[dict, Any] | None = None
 
         # 状态管理
         self.status = LLMStatus.UNINITIALIZED
         self.error_message: str | None = None
         self._init_lock = asyncio.Lock()
 
-        # 初始化动态工具管理器并注册更新回调
+        # 初始化动态工具管理器并注册更新回调（close() 时注销）
         self._dynamic_manager = DynamicToolManager()
         self._dynamic_manager.on_update(self._on_tools_updated)
-        
+
         # 合并原生工具和动态工具
         self._native_tools = get_tools()
         self.tools = self._native_tools + self._dynamic_manager.get_langchain_tools()
         self._tool_map = {tool.name: tool for tool in self.tools}
 
-        # 使用ChatPromptTemplate构建提示词
-        self.prompt_template = ChatPromptTemplate.from_messages([
-            ("system", settings.system_prompt_template),
-            MessagesPlaceholder(variable_name="chat_history", optional=True),
-            ("user", settings.user_context_template)
-        ])
+        # 按 token 预算组装 RAG 上下文
+        self.prompt_assembler = PromptAssembler(settings)
 
         # 消息轮数限制（5轮对话）
         self.max_chat_rounds = 5
 
-        logger.info(f"{self.__class__.__name__}已创建，状态: UNINITIALIZED，工具数: {len(self.tools)} (原生: {len(self._native_tools)}, 动态: {len(self._dynamic_manager.get_langchain_tools())})")
+    @abstractmethod
+    async def initialize(self) -> None:
+        """异步初始化，完成后 status 为 READY。"""
 
     @abstractmethod
-    def _create_model(self) -> BaseChatModel:
+    async def _invoke_chain(self, chain_input: dict[str, Any]) -> AIMessage:
         """
-        创建并返回具体的LLM模型实例。
-        
-        子类必须实现此方法以返回对应的模型（如 ChatOpenAI, ChatOllama 等）。
-        
-        Returns:
-            BaseChatModel: 初始化后的模型实例
-        """
-        pass
+        获取一次模型输出，所有对模型的调用都经过此方法。
 
-    def _build_chain(self) -> None:
-        """
-        构建处理链：绑定工具并创建运行链。
-        
-        在子类的 initialize() 方法创建模型后调用此方法。
+        Args:
+            chain_input: 由 _prepare_chain_input 构建的链输入
+
+        Returns:
+            AIMessage: 模型返回的消息
         """
-        if self.model is None:
-            raise ValueError("Model must be created before building chain")
-        
-        # 将工具绑定到模型
-        self.model_with_tools = self.model.bind_tools(self.tools)
-        
-        # 构建处理链
-        self.chain = self.prompt_template | self.model_with_tools
-        
-        logger.debug("处理链构建完成")
 
     def _on_tools_updated(self) -> None:
         """
-        工具更新回调 - 当动态工具发生变化时重建工具列表和处理链。
-        
+        工具更新回调 - 当动态工具发生变化时重建工具列表。
+
         此方法由 DynamicToolManager 在工具增删时自动调用。
         """
-        # 重新合并工具列表
         self.tools = self._native_tools + self._dynamic_manager.get_langchain_tools()
         self._tool_map = {tool.name: tool for tool in self.tools}
+
+    async def warmup(self) -> None:
+        """
+        预热到模型服务的连接（DNS解析、TCP/TLS握手），使首个请求不承担建连开销。
         
-        # 如果模型已初始化，重建处理链
-        if self.model is not None:
-            self.model_with_tools = self.model.bind_tools(self.tools)
-            self.chain = self.prompt_template | self.model_with_tools
-            logger.info("LLM工具热重载完成，当前工具数: {} (原生: {}, 动态: {})",
-                        len(self.tools), len(self._native_tools),
-                        len(self._dynamic_manager.get_langchain_tools()))
-        else:
-            logger.debug("工具列表已更新，但模型尚未初始化，跳过重建处理链")
+        默认不做任何操作，使用连接池的子类覆盖此方法。
+        """
+        pass
 
-    async def initialize(self) -> None:
+    async def probe(self) -> bool:
         """
-        异步初始化模型和处理链，支持重新初始化，线程安全。
+        探测模型服务是否可用。
         
-        子类可以覆盖此方法以添加额外的初始化逻辑，但应调用 super().initialize()。
+        默认执行一次完整的链调用，子类可覆盖为不消耗生成额度的轻量探测。
         """
-        async with self._init_lock:
-            if self.status == LLMStatus.INITIALIZING:
-                logger.warning("LLM处理器正在初始化中，请等待。")
-                return
-            
-            self.status = LLMStatus.INITIALIZING
-            self.error_message = None
-            logger.info(f"开始初始化{self.__class__.__name__}...")
+        health_check_input = {
+            "DEVICES_INFO": "",
+            "DOORS_INFO": "",
+            "AREAS_INFO": "",
+            "VIDEOS_INFO": "",
+            "USER_INPUT": "健康检查",
+            "USER_LOCATION": "",
+            "ACTIVE_DEVICE": ""
+        }
+        await asyncio.wait_for(self._invoke_chain(health_check_input), timeout=5.0)
+        return True
 
-            try:
-                # 创建模型（由子类实现）
-                self.model = self._create_model()
-                
-                # 构建处理链
-                self._build_chain()
-                
-                self.status = LLMStatus.READY
-                logger.success(f"{self.__class__.__name__}初始化完成，状态: READY。")
-            except Exception as e:
-                self.status = LLMStatus.ERROR
-                self.error_message = f"{self.__class__.__name__}初始化失败: {str(e)}"
-                logger.exception(self.error_message)
-                raise
+    async def close(self) -> None:
+        """注销工具更新回调，被替换或停止的处理器不再响应工具变更"""
+        self._dynamic_manager.off_update(self._on_tools_updated)
+
+    async def smoke_test(self) -> bool:
+        """切换实例前的冒烟测试：已就绪且探测成功。"""
+        return self.status == LLMStatus.READY and await self.probe()
 
     async def check_health(self) -> bool:
         """
@@ -160,20 +133,7 @@ class BaseLLMHandler(ABC):
             if self.status != LLMStatus.READY:
                 await self.initialize()
 
-            health_check_input = {
-                "DEVICES_INFO": "",
-                "DOORS_INFO": "",
-                "AREAS_INFO": "",
-                "VIDEOS_INFO": "",
-                "USER_INPUT": "健康检查",
-                "USER_LOCATION": "",
-                "ACTIVE_DEVICE": ""
-            }
-
-            import asyncio
-            await asyncio.wait_for(self.chain.ainvoke(health_check_input), timeout=5.0)
-
-            return True
+            return await self.probe()
         except Exception as e:
             logger.warning(f"LLM健康检查失败: {e}")
             return False
@@ -198,7 +158,7 @@ class BaseLLMHandler(ABC):
 
         try:
             chain_input = self._prepare_chain_input(user_input, rag_docs, user_location, chat_history)
-            response = await self.chain.ainvoke(chain_input)
+            response = await self._invoke_chain(chain_input)
             return self._format_response(response)
         except Exception as api_error:
             logger.exception("调用LLM API时出错: {error}", error=str(api_error))
@@ -234,7 +194,7 @@ class BaseLLMHandler(ABC):
         ai_msg = None
         for initial_attempt in range(max_retries):
             try:
-                ai_msg = await self.chain.ainvoke(chain_input)
+                ai_msg = await self._invoke_chain(chain_input)
                 break  # 成功则退出循环
             except Exception as e:
                 error_str = str(e)
@@ -331,7 +291,7 @@ class BaseLLMHandler(ABC):
             logger.info(f"Retry attempt {attempt + 1}/{max_retries} due to tool errors.")
             
             try:
-                ai_msg = await self.chain.ainvoke(chain_input)
+                ai_msg = await self._invoke_chain(chain_input)
                 messages.append(ai_msg)
             except Exception as e:
                 logger.error(f"LLM retry call failed: {e}")
@@ -432,14 +392,8 @@ class BaseLLMHandler(ABC):
         """
         准备Prompt的输入变量，并裁剪聊天历史。
         """
-        video_docs = rag_docs.get("video", [])
-        door_docs = rag_docs.get("door", [])
-        device_docs = rag_docs.get("device", [])
-        
-        videos_info = DocumentFormatter.format_media_documents(video_docs)
-        doors_info = DocumentFormatter.format_door_documents(door_docs)
-        devices_info = DocumentFormatter.format_device_documents(device_docs)
-        areas_info = DocumentFormatter.format_area_info(self.data_service.get_all_areas_data())
+        assembly = self.prompt_assembler.assemble(rag_docs, self.data_service.get_all_areas_data())
+        sections = assembly.sections
 
         # 应用自定义 trimmer 裁剪聊天历史
         trimmed_history = self._trim_chat_history(chat_history)
@@ -449,10 +403,10 @@ class BaseLLMHandler(ABC):
         active_device_info = active_device if active_device else ""
 
         return {
-            "DEVICES_INFO": devices_info,
-            "DOORS_INFO": doors_info,
-            "AREAS_INFO": areas_info,
-            "VIDEOS_INFO": videos_info,
+            "DEVICES_INFO": sections["DEVICES_INFO"],
+            "DOORS_INFO": sections["DOORS_INFO"],
+            "AREAS_INFO": sections["AREAS_INFO"],
+            "VIDEOS_INFO": sections["VIDEOS_INFO"],
             "USER_INPUT": user_input,
             "USER_LOCATION": user_location,
             "ACTIVE_DEVICE": active_device_info,
@@ -538,3 +492,151 @@ class BaseLLMHandler(ABC):
             value=error_value
         )
         return [error_command]
+
+
+class BaseLLMHandler(BaseConversationHandler):
+    """
+    持有单个模型的LLM处理器基类，定义了与大语言模型交互的通用流程。
+    
+    子类只需实现 _create_model() 方法来返回具体的模型实例。
+    """
+    
+    def __init__(self, settings: LLMSettings) -> None:
+        """
+        初始化LLM处理器基类。
+
+        Args:
+            settings (LLMSettings): LLM参数
+        """
+        super().__init__(settings)
+        self.model: BaseChatModel | None = None
+        self.model_with_tools = None
+        self.chain: RunnableSerializable[dict, Any] | None = None
+
+        # 连接保活：记录最近一次模型调用时间，空闲超过间隔时由后台任务预热连接
+        self._last_activity = 0.0
+        self._keepalive_task: asyncio.Task | None = None
+
+        # 使用ChatPromptTemplate构建提示词
+        self.prompt_template = ChatPromptTemplate.from_messages([
+            ("system", settings.system_prompt_template),
+            MessagesPlaceholder(variable_name="chat_history", optional=True),
+            ("user", settings.user_context_template)
+        ])
+
+        logger.info(f"{self.__class__.__name__}已创建，状态: UNINITIALIZED，工具数: {len(self.tools)} (原生: {len(self._native_tools)}, 动态: {len(self._dynamic_manager.get_langchain_tools())})")
+
+    @abstractmethod
+    def _create_model(self) -> BaseChatModel:
+        """
+        创建并返回具体的LLM模型实例。
+        
+        子类必须实现此方法以返回对应的模型（如 ChatOpenAI, ChatOllama 等）。
+        
+        Returns:
+            BaseChatModel: 初始化后的模型实例
+        """
+        pass
+
+    def _build_chain(self) -> None:
+        """
+        构建处理链：绑定工具并创建运行链。
+        
+        在子类的 initialize() 方法创建模型后调用此方法。
+        """
+        if self.model is None:
+            raise ValueError("Model must be created before building chain")
+        
+        # 将工具绑定到模型
+        self.model_with_tools = self.model.bind_tools(self.tools)
+        
+        # 构建处理链
+        self.chain = self.prompt_template | self.model_with_tools
+        
+        logger.debug("处理链构建完成")
+
+    def _on_tools_updated(self) -> None:
+        """
+        工具更新回调 - 当动态工具发生变化时重建工具列表和处理链。
+        """
+        super()._on_tools_updated()
+        
+        # 如果模型已初始化，重建处理链
+        if self.model is not None:
+            self.model_with_tools = self.model.bind_tools(self.tools)
+            self.chain = self.prompt_template | self.model_with_tools
+            logger.info("LLM工具热重载完成，当前工具数: {} (原生: {}, 动态: {})",
+                        len(self.tools), len(self._native_tools),
+                        len(self._dynamic_manager.get_langchain_tools()))
+        else:
+            logger.debug("工具列表已更新，但模型尚未初始化，跳过重建处理链")
+
+    async def initialize(self) -> None:
+        """
+        异步初始化模型和处理链，支持重新初始化，线程安全。
+        
+        子类可以覆盖此方法以添加额外的初始化逻辑，但应调用 super().initialize()。
+        """
+        async with self._init_lock:
+            if self.status == LLMStatus.INITIALIZING:
+                logger.warning("LLM处理器正在初始化中，请等待。")
+                return
+            
+            self.status = LLMStatus.INITIALIZING
+            self.error_message = None
+            logger.info(f"开始初始化{self.__class__.__name__}...")
+
+            try:
+                # 创建模型（由子类实现）
+                self.model = self._create_model()
+                
+                # 构建处理链
+                self._build_chain()
+                
+                self.status = LLMStatus.READY
+                logger.success(f"{self.__class__.__name__}初始化完成，状态: READY。")
+                self._start_keepalive()
+            except Exception as e:
+                self.status = LLMStatus.ERROR
+                self.error_message = f"{self.__class__.__name__}初始化失败: {str(e)}"
+                logger.exception(self.error_message)
+                raise
+
+    async def _invoke_chain(self, chain_input: dict[str, Any]) -> AIMessage:
+        """
+        调用处理链获取一次模型输出。
+        
+        Args:
+            chain_input: 由 _prepare_chain_input 构建的链输入
+            
+        Returns:
+            AIMessage: 模型返回的消息
+        """
+        if self.chain is None:
+            raise ValueError("处理链尚未构建，请先初始化LLM处理器。")
+        self._last_activity = time.monotonic()
+        return await self.chain.ainvoke(chain_input)
+
+    def _start_keepalive(self) -> None:
+        """启动后台连接保活任务（已在运行或未配置间隔时跳过）"""
+        interval = getattr(self.settings, "keepalive_interval", 0)
+        if interval <= 0 or (self._keepalive_task is not None and not self._keepalive_task.done()):
+            return
+        self._keepalive_task = asyncio.create_task(self._keepalive_loop(interval))
+
+    async def _keepalive_loop(self, interval: float) -> None:
+        """启动时立即预热一次，之后在连接空闲超过 interval 秒时再次预热"""
+        while True:
+            if time.monotonic() - self._last_activity >= interval:
+                try:
+                    await self.warmup()
+                except Exception as e:
+                    logger.warning(f"{self.__class__.__name__}连接预热失败: {e}")
+            await asyncio.sleep(interval)
+
+    async def close(self) -> None:
+        """停止后台保活任务并注销工具更新回调"""
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        await super().close()
@@ -4,12 +4,13 @@
 from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from loguru import logger
+from pydantic import SecretStr
 
 from src.config.config import LLMSettings
-from src.module.llm.base_llm_handler import BaseLLMHandler
+from src.module.llm.openai_compatible_llm_handler import OpenAICompatibleLLMHandler
 
 
-class DashScopeLLMHandler(BaseLLMHandler):
+class DashScopeLLMHandler(OpenAICompatibleLLMHandler):
     """
     使用 DashScope (阿里云百炼平台) API 的 LLM 处理器。
     
@@ -26,6 +27,14 @@ class DashScopeLLMHandler(BaseLLMHandler):
         super().__init__(settings)
         logger.info("DashScope大语言模型处理器已创建，等待异步初始化...")
 
+    @property
+    def base_url(self) -> str:
+        return self.settings.dashscope_base_url
+
+    @property
+    def api_key(self) -> SecretStr:
+        return self.settings.dashscope_api_key
+
     def _create_model(self) -> BaseChatModel:
         """
         创建 DashScope ChatOpenAI 模型实例。
@@ -44,6 +53,7 @@ class DashScopeLLMHandler(BaseLLMHandler):
                 top_p=0.8,
                 timeout=self.settings.request_timeout,
                 max_retries=0,
+                http_async_client=self.http_async_client,
             )
             logger.info("DashScope模型创建成功，使用模型: {model}", model=self.settings.dashscope_model)
             return model
@@ -4,15 +4,25 @@ import json
 from langchain_core.documents import Document
 
 
+def _parse_json_list(value) -> list:
+    """解析 metadata 中以 JSON 字符串保存的列表字段（Chroma 不支持列表类型的 metadata）"""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+    except (TypeError, ValueError):
+        return [value]
+    return parsed if isinstance(parsed, list) else [parsed]
+
+
 class DocumentFormatter:
     """将检索到的 Document 转换为 LLM Prompt 字符串"""
 
     @staticmethod
-    def format_media_documents(docs: list[Document]) -> str:
-        """格式化媒体文档列表"""
-        if not docs:
-            return "[]"
-        
+    def build_media_items(docs: list[Document]) -> list[dict]:
+        """构建媒体条目列表"""
         result = []
         for doc in docs:
             meta = doc.metadata
@@ -20,19 +30,16 @@ class DocumentFormatter:
                 "name": meta.get("name", ""),
                 "description": meta.get("description", ""),
             })
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return result
 
     @staticmethod
-    def format_door_documents(docs: list[Document]) -> str:
-        """格式化门文档列表"""
-        if not docs:
-            return "[]"
-        
+    def build_door_items(docs: list[Document]) -> list[dict]:
+        """构建门条目列表"""
         result = []
         for doc in docs:
             meta = doc.metadata
             door_type = meta.get("door_type", "")
-            
+
             if door_type == "passage":
                 area1 = meta.get("area1", "")
                 area2 = meta.get("area2", "")
@@ -42,50 +49,46 @@ class DocumentFormatter:
                 description = f"位于{location}的独立门"
             else:
                 description = "门"
-            
+
             result.append({
                 "name": meta.get("name", ""),
                 "type": door_type,
                 "description": description
             })
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return result
 
     @staticmethod
-    def format_device_documents(docs: list[Document]) -> str:
-        """格式化设备文档列表"""
-        if not docs:
-            return "[]"
-        
+    def build_device_items(docs: list[Document]) -> list[dict]:
+        """构建设备条目列表，command/view 还原为列表"""
         result = []
         for doc in docs:
             meta = doc.metadata
-            
+
             device_info = {
                 "name": meta.get("name", ""),
                 "type": meta.get("device_type", ""),
                 "area": meta.get("area", ""),
             }
-            
+
             if meta.get("sub_type"):
                 device_info["subType"] = meta.get("sub_type")
-            if meta.get("command"):
-                device_info["command"] = meta.get("command")
-            if meta.get("view"):
-                device_info["view"] = meta.get("view")
+            command = _parse_json_list(meta.get("command"))
+            if command:
+                device_info["command"] = command
+            view = _parse_json_list(meta.get("view"))
+            if view:
+                device_info["view"] = view
             if meta.get("aliases"):
                 device_info["aliases"] = meta.get("aliases")
             if meta.get("description"):
                 device_info["description"] = meta.get("description")
-                
+
             result.append(device_info)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return result
 
     @staticmethod
-    def format_area_info(areas: list[dict]) -> str:
-        """格式化区域信息列表"""
-        if not areas:
-            return "[]"
-
+    def build_area_items(areas: list[dict]) -> list[dict]:
+        """构建区域条目列表"""
         result = []
         for area_info in areas:
             if area_info:
@@ -97,4 +100,32 @@ class DocumentFormatter:
                     "name": name,
                     "description": f"{description_str}，也称为{aliases}"
                 })
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return result
+
+    @staticmethod
+    def format_media_documents(docs: list[Document]) -> str:
+        """格式化媒体文档列表"""
+        if not docs:
+            return "[]"
+        return json.dumps(DocumentFormatter.build_media_items(docs), ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def format_door_documents(docs: list[Document]) -> str:
+        """格式化门文档列表"""
+        if not docs:
+            return "[]"
+        return json.dumps(DocumentFormatter.build_door_items(docs), ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def format_device_documents(docs: list[Document]) -> str:
+        """格式化设备文档列表"""
+        if not docs:
+            return "[]"
+        return json.dumps(DocumentFormatter.build_device_items(docs), ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def format_area_info(areas: list[dict]) -> str:
+        """格式化区域信息列表"""
+        if not areas:
+            return "[]"
+        return json.dumps(DocumentFormatter.build_area_items(areas), ensure_ascii=False, indent=2)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 提供方共享的 HTTP 连接池
+
+同一个 base_url 的所有模型实例共用一个 httpx.AsyncClient，
+避免每次重建模型（如工具热重载、重新初始化）都重新建立 TCP/TLS 连接。
+"""
+import importlib.util
+
+import httpx
+from loguru import logger
+
+from src.config.config import LLMSettings
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_async_http_client(base_url: str, settings: LLMSettings) -> httpx.AsyncClient:
+    """
+    获取指定 base_url 的共享异步 HTTP 客户端，不存在或已关闭时创建。
+
+    Args:
+        base_url: 提供方 API 地址
+        settings: LLM参数（连接池配置）
+
+    Returns:
+        httpx.AsyncClient: 共享客户端
+    """
+    client = _clients.get(base_url)
+    if client is not None and not client.is_closed:
+        return client
+
+    http2 = settings.http2
+    if http2 and not _http2_available():
+        logger.warning("未安装 h2，{base_url} 回退到 HTTP/1.1（pip install 'httpx[http2]'）", base_url=base_url)
+        http2 = False
+
+    client = httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.request_timeout, connect=settings.connection_timeout),
+    )
+    _clients[base_url] = client
+    logger.info("已创建LLM连接池: {base_url} (HTTP/2: {http2}, 最大连接数: {max_conn})",
+                base_url=base_url, http2=http2, max_conn=settings.http_max_connections)
+    return client
+
+
+async def close_async_http_clients() -> None:
+    """关闭所有共享客户端（应用关闭时调用）"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"关闭LLM连接池失败: {e}")
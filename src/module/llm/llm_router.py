@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage
+from loguru import logger
+
+from src.config.config import LLMSettings
+from src.core import dependencies
+from src.module.llm.base_llm_handler import BaseConversationHandler, BaseLLMHandler, LLMStatus
+from src.services.performance_metrics_manager import MetricType
+
+# 视为提供方临时故障、可切换到下一个提供方的 HTTP 状态码
+TRANSIENT_STATUS_CODES = {408, 409, 425, 429}
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    判断异常是否为可通过切换提供方恢复的临时故障（超时、连接失败、限流、5xx）。
+
+    请求内容本身的问题（如 400 参数错误、工具调用历史不完整）不属于临时故障，
+    换一个提供方大概率同样失败，应直接抛给上层处理。
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in TRANSIENT_STATUS_CODES or status_code >= 500
+    return False
+
+
+@dataclass
+class ProviderScore:
+    """单个提供方在一次路由决策时的评分快照"""
+    provider: str
+    score: float
+    ready: bool
+    weight: float
+    samples: int
+    p50: float | None
+    p95: float | None
+    error_rate: float
+
+
+@dataclass
+class RoutingDecision:
+    """一次路由决策及其实际尝试记录"""
+    timestamp: datetime
+    ranking: list[ProviderScore]
+    attempts: list[dict[str, Any]] = field(default_factory=list)
+    selected: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "ranking": [asdict(score) for score in self.ranking],
+            "attempts": list(self.attempts),
+            "selected": self.selected,
+        }
+
+
+class LLMRouter(BaseConversationHandler):
+    """
+    多提供方 LLM 路由器。
+
+    不持有模型，而是持有多个具体的 LLM 处理器，每次调用模型时根据各提供方最近的延迟分位数和错误率
+    选择当前最优的提供方；遇到超时、限流或服务端错误时自动切换到下一个提供方。
+    工具调用循环、历史修剪等逻辑仍由对话流程基类完成，路由只作用于单次模型调用。
+    """
+
+    def __init__(self, settings: LLMSettings, handlers: dict[str, BaseLLMHandler]) -> None:
+        """
+        初始化 LLM 路由器。
+
+        Args:
+            settings (LLMSettings): LLM参数（包含 router_* 路由配置）
+            handlers: 提供方名称到具体处理器的映射
+        """
+        if not handlers:
+            raise ValueError("LLM路由器至少需要一个提供方")
+        super().__init__(settings)
+        self.handlers = handlers
+        self._decisions: deque[RoutingDecision] = deque(maxlen=max(1, settings.router_decision_history))
+        logger.info("LLM路由器已创建，候选提供方: {providers}", providers=list(handlers))
+
+    async def initialize(self) -> None:
+        """
+        并发初始化所有提供方，只要有一个提供方就绪即视为路由器就绪。
+        """
+        async with self._init_lock:
+            if self.status == LLMStatus.INITIALIZING:
+                logger.warning("LLM路由器正在初始化中，请等待。")
+                return
+
+            self.status = LLMStatus.INITIALIZING
+            self.error_message = None
+            logger.info("开始初始化LLM路由器...")
+
+            results = await asyncio.gather(
+                *(handler.initialize() for handler in self.handlers.values()),
+                return_exceptions=True
+            )
+            for name, result in zip(self.handlers, results):
+                if isinstance(result, Exception):
+                    logger.warning("LLM提供方 {name} 初始化失败: {error}", name=name, error=result)
+
+            ready = [name for name, handler in self.handlers.items() if handler.status == LLMStatus.READY]
+            if not ready:
+                self.status = LLMStatus.ERROR
+                self.error_message = "LLM路由器初始化失败: 没有可用的提供方"
+                logger.error(self.error_message)
+                raise RuntimeError(self.error_message)
+
+            self.status = LLMStatus.READY
+            logger.success("LLM路由器初始化完成，状态: READY，可用提供方: {ready}", ready=ready)
+
+    async def check_health(self) -> bool:
+        """任一提供方健康即认为路由器健康。"""
+        if self.status != LLMStatus.READY:
+            try:
+                await self.initialize()
+            except Exception as e:
+                logger.warning(f"LLM健康检查失败: {e}")
+                return False
+        results = await asyncio.gather(*(handler.check_health() for handler in self.handlers.values()))
+        return any(results)
+
+    async def warmup(self) -> None:
+        """预热所有已就绪提供方的连接。"""
+        await asyncio.gather(
+            *(handler.warmup() for handler in self.handlers.values() if handler.status == LLMStatus.READY),
+            return_exceptions=True
+        )
+
+    async def close(self) -> None:
+        """停止所有提供方的后台保活任务。"""
+        for handler in self.handlers.values():
+            await handler.close()
+        await super().close()
+
+    def rank_providers(self) -> list[ProviderScore]:
+        """
+        按评分从优到劣排列提供方，未就绪的提供方排在最后。
+
+        评分 = (p50 * p50权重 + p95 * p95权重 + 错误率 * 错误惩罚) / 静态权重，越小越好。
+        样本数不足 router_min_samples 的提供方不计延迟项，以便优先被探测。
+        """
+        settings = self.settings
+        scores = []
+        for name, handler in self.handlers.items():
+            stats = dependencies.metrics_manager.get_source_stats(
+                MetricType.LLM_GENERATE, name, minutes=settings.router_stats_window_minutes
+            )
+            weight = max(settings.router_provider_weights.get(name, 1.0), 1e-6)
+            latency = 0.0
+            if stats["count"] >= settings.router_min_samples and stats["p50"] is not None:
+                latency = stats["p50"] * settings.router_p50_weight + stats["p95"] * settings.router_p95_weight
+            score = (latency + stats["error_rate"] * settings.router_error_penalty) / weight
+            scores.append(ProviderScore(
+                provider=name,
+                score=round(score, 4),
+                ready=handler.status == LLMStatus.READY,
+                weight=weight,
+                samples=stats["count"],
+                p50=stats["p50"],
+                p95=stats["p95"],
+                error_rate=stats["error_rate"],
+            ))
+        scores.sort(key=lambda s: (not s.ready, s.score))
+        return scores
+
+    async def _invoke_chain(self, chain_input: dict[str, Any]) -> AIMessage:
+        """
+        按评分顺序调用提供方，临时故障时切换到下一个提供方。
+        """
+        ranking = self.rank_providers()
+        decision = RoutingDecision(timestamp=datetime.now(), ranking=ranking)
+        self._decisions.append(decision)
+
+        candidates = [s.provider for s in ranking if s.ready][:max(1, self.settings.router_max_attempts)]
+        if not candidates:
+            raise RuntimeError("LLM路由器没有可用的提供方")
+
+        last_error: Exception | None = None
+        for provider in candidates:
+            start_time = time.perf_counter()
+            try:
+                result = await self.handlers[provider]._invoke_chain(chain_input)
+            except Exception as e:
+                duration = time.perf_counter() - start_time
+                transient = is_transient_error(e)
+                decision.attempts.append({
+                    "provider": provider,
+                    "duration": round(duration, 4),
+                    "success": False,
+                    "error": f"{type(e).__name__}: {e}",
+                })
+                if not transient:
+                    # 非临时故障与提供方无关，不计入其错误率
+                    raise
+                dependencies.metrics_manager.record(MetricType.LLM_GENERATE, duration, source=provider, success=False)
+                logger.warning("LLM提供方 {provider} 调用失败（{duration:.2f}s），尝试切换: {error}",
+                               provider=provider, duration=duration, error=e)
+                last_error = e
+                continue
+
+            duration = time.perf_counter() - start_time
+            dependencies.metrics_manager.record(MetricType.LLM_GENERATE, duration, source=provider)
+            decision.attempts.append({"provider": provider, "duration": round(duration, 4), "success": True, "error": None})
+            decision.selected = provider
+            logger.debug("LLM路由选择 {provider}，耗时 {duration:.2f}s", provider=provider, duration=duration)
+            return result
+
+        raise last_error
+
+    def get_provider_stats(self) -> list[dict[str, Any]]:
+        """返回当前各提供方的评分快照（按优先级排序）"""
+        return [asdict(score) for score in self.rank_providers()]
+
+    def get_decisions(self, limit: int = 20) -> list[dict[str, Any]]:
+        """返回最近的路由决策，最新的在前"""
+        decisions = list(self._decisions)[-limit:] if limit > 0 else []
+        return [decision.to_dict() for decision in reversed(decisions)]
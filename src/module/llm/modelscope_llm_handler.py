@@ -4,12 +4,13 @@
 from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from loguru import logger
+from pydantic import SecretStr
 
 from src.config.config import LLMSettings
-from src.module.llm.base_llm_handler import BaseLLMHandler
+from src.module.llm.openai_compatible_llm_handler import OpenAICompatibleLLMHandler
 
 
-class ModelScopeLLMHandler(BaseLLMHandler):
+class ModelScopeLLMHandler(OpenAICompatibleLLMHandler):
     """
     使用 ModelScope API 的 LLM 处理器。
     """
@@ -24,6 +25,14 @@ class ModelScopeLLMHandler(BaseLLMHandler):
         super().__init__(settings)
         logger.info("ModelScope大语言模型处理器已创建，等待异步初始化...")
 
+    @property
+    def base_url(self) -> str:
+        return self.settings.modelscope_base_url
+
+    @property
+    def api_key(self) -> SecretStr:
+        return self.settings.modelscope_api_key
+
     def _create_model(self) -> BaseChatModel:
         """
         创建 ModelScope ChatOpenAI 模型实例。
@@ -40,6 +49,7 @@ class ModelScopeLLMHandler(BaseLLMHandler):
                 top_p=0.8,
                 timeout=self.settings.request_timeout,
                 max_retries=0,
+                http_async_client=self.http_async_client,
                 extra_body={
                     "top_k": 20,
                     "min_p": 0,
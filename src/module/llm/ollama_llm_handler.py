@@ -7,6 +7,7 @@ from loguru import logger
 
 from src.config.config import LLMSettings
 from src.module.llm.base_llm_handler import BaseLLMHandler
+from src.module.llm.http_client import get_async_http_client
 
 
 class OllamaLLMHandler(BaseLLMHandler):
@@ -40,4 +41,30 @@ class OllamaLLMHandler(BaseLLMHandler):
             return model
         except Exception:
             logger.exception("初始化ChatOllama客户端失败，请确保Ollama服务正在运行。")
-            raise
\ No newline at end of file
+            raise
+
+    async def warmup(self) -> None:
+        """
+        通过 ChatOllama 自身的客户端生成 1 个 token，预热实际请求使用的连接，并让 Ollama 把模型加载到内存中。
+
+        model_copy 不重新创建 ChatOllama 的内部客户端，只覆盖本次调用的生成长度和模型驻留时长。
+        """
+        if self.model is None:
+            return
+        warm_model = self.model.model_copy(update={
+            "num_predict": 1,
+            "keep_alive": f"{int(self.settings.keepalive_interval * 2)}s",
+        })
+        await warm_model.ainvoke("ping")
+        logger.debug("Ollama模型预热完成: {model}", model=self.settings.ollama_model)
+
+    async def probe(self) -> bool:
+        """
+        通过 GET /api/tags 探测 Ollama 服务，不触发生成。
+        """
+        client = get_async_http_client(self.settings.ollama_base_url, self.settings)
+        response = await client.get(
+            f"{self.settings.ollama_base_url.rstrip('/')}/api/tags",
+            timeout=self.settings.connection_timeout,
+        )
+        return response.status_code < 400
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+from abc import abstractmethod
+
+import httpx
+from loguru import logger
+from pydantic import SecretStr
+
+from src.module.llm.base_llm_handler import BaseLLMHandler
+from src.module.llm.http_client import get_async_http_client
+
+
+class OpenAICompatibleLLMHandler(BaseLLMHandler):
+    """
+    OpenAI 兼容接口提供方的公共基类。
+
+    所有模型实例共用按 base_url 缓存的 httpx 连接池，并通过 GET /models
+    完成连接预热和健康探测，不消耗生成额度。
+    """
+
+    @property
+    @abstractmethod
+    def base_url(self) -> str:
+        """提供方 API 地址"""
+
+    @property
+    @abstractmethod
+    def api_key(self) -> SecretStr:
+        """提供方 API 密钥"""
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        """该提供方的共享异步 HTTP 客户端（传给 ChatOpenAI 的 http_async_client）"""
+        return get_async_http_client(self.base_url, self.settings)
+
+    async def _get_models(self) -> httpx.Response:
+        return await self.http_async_client.get(
+            f"{self.base_url.rstrip('/')}/models",
+            headers={"Authorization": f"Bearer {self.api_key.get_secret_value()}"},
+            timeout=self.settings.connection_timeout,
+        )
+
+    async def warmup(self) -> None:
+        """
+        并发发起若干轻量请求，在连接池中建立并保持可复用的连接。
+        """
+        count = max(1, self.settings.warmup_connections)
+        results = await asyncio.gather(*(self._get_models() for _ in range(count)), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if len(errors) == count:
+            raise errors[0]
+        logger.debug("{name}连接预热完成: {ok}/{count}", name=self.__class__.__name__, ok=count - len(errors), count=count)
+
+    async def probe(self) -> bool:
+        """
+        通过 GET /models 探测服务可达性和鉴权。
+
+        404/405 表示服务可达但未实现该接口，同样视为健康。
+        """
+        response = await self._get_models()
+        if response.status_code < 400 or response.status_code in (404, 405):
+            return True
+        logger.warning("{name}健康探测失败: HTTP {code}", name=self.__class__.__name__, code=response.status_code)
+        return False
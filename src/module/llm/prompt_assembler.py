@@ -0,0 +1,214 @@
+"""
+Prompt 组装器
+
+在 token 预算内把 RAG 检索结果组装成 Prompt 中的上下文段落：
+紧凑 JSON、截断过长描述、提取各条目共有字段，超出预算时优先丢弃排名靠后的文档。
+"""
+import json
+import math
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict, field
+from typing import Any
+
+from langchain_core.documents import Document
+from loguru import logger
+
+from src.config.config import LLMSettings
+from src.module.llm.helper import DocumentFormatter
+
+# CJK 统一表意文字、中文标点及全角字符，按 1 字 ≈ 1 token 估算
+_CJK_PATTERN = re.compile(r"[　-〿㐀-䶿一-鿿＀-￯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的 token 数：中文字符按 1 token，其余字符按 4 字符 ≈ 1 token。
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+@dataclass
+class SectionStats:
+    """单个上下文段落的组装统计"""
+    items_total: int = 0
+    items_kept: int = 0
+    truncated: int = 0  # 被截断描述的条目数
+    tokens: int = 0
+
+
+@dataclass
+class PromptAssembly:
+    """一次组装的结果：各段落文本（键与 Prompt 模板变量一致）及统计"""
+    sections: dict[str, str]
+    stats: dict[str, SectionStats] = field(default_factory=dict)
+    total_tokens: int = 0
+    budget: int = 0
+
+
+class PromptAssembler:
+    """
+    按 token 预算组装 Prompt 上下文段落。
+
+    区域信息始终完整保留；设备、门、媒体三类文档按相关度（metadata["distance"]，越小越相关）排列，
+    超出预算时从各段落中相对排名最靠后的条目开始丢弃，每段至少保留 min_items_per_section 条。
+    """
+
+    # Prompt 模板变量 -> rag_docs 键与条目构建函数
+    DOC_SECTIONS = {
+        "DEVICES_INFO": ("device", DocumentFormatter.build_device_items),
+        "DOORS_INFO": ("door", DocumentFormatter.build_door_items),
+        "VIDEOS_INFO": ("video", DocumentFormatter.build_media_items),
+    }
+
+    def __init__(self, settings: LLMSettings) -> None:
+        self.token_budget = settings.prompt_token_budget
+        self.description_max_chars = settings.prompt_description_max_chars
+        self.min_items_per_section = settings.prompt_min_items_per_section
+        self._history: deque[PromptAssembly] = deque(maxlen=max(1, settings.prompt_stats_history))
+        self._lock = threading.Lock()
+
+    def assemble(self, rag_docs: dict[str, list[Document]], areas: list[dict]) -> PromptAssembly:
+        """
+        组装上下文段落。
+
+        Args:
+            rag_docs: 按类型分类的RAG文档字典 {"door": [...], "video": [...], "device": [...]}
+            areas: 区域数据列表
+
+        Returns:
+            PromptAssembly: 各段落文本及统计
+        """
+        stats: dict[str, SectionStats] = {}
+        section_items: dict[str, list[dict]] = {}
+        for key, (doc_type, build_items) in self.DOC_SECTIONS.items():
+            items = build_items(self._rank_by_relevance(rag_docs.get(doc_type, [])))
+            truncated = sum(self._truncate_description(item) for item in items)
+            section_items[key] = items
+            stats[key] = SectionStats(items_total=len(items), truncated=truncated)
+
+        areas_text = _dumps(DocumentFormatter.build_area_items(areas))
+        stats["AREAS_INFO"] = SectionStats(items_total=len(areas), items_kept=len(areas), tokens=estimate_tokens(areas_text))
+
+        if self.token_budget > 0:
+            self._fit_budget(section_items, stats["AREAS_INFO"].tokens)
+
+        sections = {"AREAS_INFO": areas_text}
+        for key, items in section_items.items():
+            text = _dumps(self._hoist_common_fields(items))
+            sections[key] = text
+            stats[key].items_kept = len(items)
+            stats[key].tokens = estimate_tokens(text)
+
+        assembly = PromptAssembly(
+            sections=sections,
+            stats=stats,
+            total_tokens=sum(s.tokens for s in stats.values()),
+            budget=self.token_budget
+        )
+        with self._lock:
+            self._history.append(assembly)
+
+        logger.debug("Prompt上下文组装完成，估算 {total} tokens（预算 {budget}）: {detail}",
+                     total=assembly.total_tokens, budget=self.token_budget,
+                     detail={k: f"{s.items_kept}/{s.items_total}条 {s.tokens}t" for k, s in stats.items()})
+        return assembly
+
+    @staticmethod
+    def _rank_by_relevance(docs: list[Document]) -> list[Document]:
+        """按检索距离升序排列（稳定排序，没有距离的文档保持原顺序并排在最后）"""
+        return sorted(docs, key=lambda doc: doc.metadata.get("distance", math.inf))
+
+    def _truncate_description(self, item: dict) -> bool:
+        """截断过长的描述，返回是否发生截断"""
+        description = item.get("description")
+        limit = self.description_max_chars
+        if limit > 0 and isinstance(description, str) and len(description) > limit:
+            item["description"] = description[:limit] + "…"
+            return True
+        return False
+
+    def _fit_budget(self, section_items: dict[str, list[dict]], fixed_tokens: int) -> None:
+        """就地丢弃条目直到估算 token 数不超过预算"""
+        costs = {key: [estimate_tokens(_dumps(item)) + 1 for item in items] for key, items in section_items.items()}
+        totals = {key: len(items) for key, items in section_items.items()}
+        total = fixed_tokens + sum(sum(c) + 2 for c in costs.values())
+
+        while total > self.token_budget:
+            # 选择相对排名最靠后的可丢弃条目（同排名时丢弃更长的条目）
+            candidates = [
+                ((len(items) - 1) / totals[key], costs[key][-1], key)
+                for key, items in section_items.items()
+                if len(items) > self.min_items_per_section
+            ]
+            if not candidates:
+                break
+            _, cost, key = max(candidates)
+            section_items[key].pop()
+            costs[key].pop()
+            total -= cost
+
+    @staticmethod
+    def _hoist_common_fields(items: list[dict]) -> list[dict] | dict:
+        """
+        提取所有条目取值相同的字段（名称除外），输出为 {"common": {...}, "items": [...]}。
+        没有共有字段时原样返回列表。
+        """
+        if len(items) < 2:
+            return items
+        first, rest = items[0], items[1:]
+        common = {
+            k: v for k, v in first.items()
+            if k != "name" and all(k in item and item[k] == v for item in rest)
+        }
+        if not common:
+            return items
+        return {
+            "common": common,
+            "items": [{k: v for k, v in item.items() if k not in common} for item in items]
+        }
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        汇总最近若干次组装的各段落 token 数与保留条目数，用于调整 top_k 和预算。
+        """
+        with self._lock:
+            history = list(self._history)
+
+        if not history:
+            return {"count": 0, "budget": self.token_budget, "sections": {}, "last": None}
+
+        sections = {}
+        for key in history[-1].stats:
+            tokens = [a.stats[key].tokens for a in history]
+            kept = [a.stats[key].items_kept for a in history]
+            total = [a.stats[key].items_total for a in history]
+            sections[key] = {
+                "avg_tokens": round(sum(tokens) / len(tokens), 1),
+                "max_tokens": max(tokens),
+                "avg_items_kept": round(sum(kept) / len(kept), 1),
+                "avg_items_total": round(sum(total) / len(total), 1),
+            }
+
+        totals = [a.total_tokens for a in history]
+        last = history[-1]
+        return {
+            "count": len(history),
+            "budget": self.token_budget,
+            "avg_total_tokens": round(sum(totals) / len(totals), 1),
+            "max_total_tokens": max(totals),
+            "over_budget": sum(1 for t in totals if self.token_budget > 0 and t > self.token_budget),
+            "sections": sections,
+            "last": {
+                "total_tokens": last.total_tokens,
+                "sections": {k: asdict(s) for k, s in last.stats.items()}
+            }
+        }
@@ -159,6 +159,17 @@ class DynamicToolManager:
         """
         self._callbacks.append(callback)
         logger.debug("已注册工具更新回调，当前回调数: {}", len(self._callbacks))
+
+    def off_update(self, callback: Callable[[], None]) -> None:
+        """
+        注销工具更新回调（未注册时忽略）
+
+        Args:
+            callback: 之前通过 on_update 注册的回调
+        """
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+            logger.debug("已注销工具更新回调，当前回调数: {}", len(self._callbacks))
     
     def reload(self) -> None:
         """重新从文件加载工具"""
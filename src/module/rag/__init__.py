@@ -0,0 +1,25 @@
+from loguru import logger
+
+from src.config.config import RAGSettings
+from src.core.feature_flags import FeatureFlags
+
+
+def create_rag_processor(rag_config: RAGSettings):
+    """根据配置创建本地 RAG 处理器（打开 Chroma 向量库的进程只能有一个）"""
+    rag_provider = rag_config.provider.lower()
+    if rag_provider == "modelscope":
+        from src.module.rag.modelscope_rag_processor import ModelScopeRAGProcessor
+        logger.info("使用ModelScope RAG处理器")
+        return ModelScopeRAGProcessor(rag_config)
+    elif rag_provider == "dashscope":
+        from src.module.rag.dashscope_rag_processor import DashScopeRAGProcessor
+        logger.info("使用百炼RAG处理器")
+        return DashScopeRAGProcessor(rag_config)
+    elif rag_provider == "ollama":
+        # 验证 Ollama 功能是否启用
+        FeatureFlags.validate_ollama_config()
+        from src.module.rag.ollama_rag_processor import OllamaRAGProcessor
+        logger.info("使用Ollama RAG处理器")
+        return OllamaRAGProcessor(rag_config)
+    else:
+        raise RuntimeError(f"未知的 RAG provider: {rag_provider}")
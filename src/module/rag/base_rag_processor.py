@@ -4,16 +4,22 @@
 import asyncio
 import functools
 import os
+import threading
+import uuid
 from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from enum import Enum
+from typing import TYPE_CHECKING, Any
 
-from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from loguru import logger
 
 from src.api.schemas import AreaItem, DeviceItem, DoorItem, MediaItem
 from src.config.config import RAGSettings
+from src.core.executors import WorkloadClass, get_executors, run_in
 from src.module.rag.helper import (
     convert_areas_to_documents,
     convert_devices_to_documents,
@@ -22,6 +28,17 @@ from src.module.rag.helper import (
 )
 from src.services.data_service import DataService
 
+# chromadb 导入耗时较长，只在打开向量库时加载
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+_DOCUMENT_CONVERTERS = {
+    "door": convert_doors_to_documents,
+    "media": convert_media_to_documents,
+    "device": convert_devices_to_documents,
+    "area": convert_areas_to_documents,
+}
+
 
 class RAGStatus(Enum):
     UNINITIALIZED = "UNINITIALIZED"
@@ -36,6 +53,16 @@ class MetadataType(Enum):
     DEVICE = "device"
 
 
+@dataclass
+class RetrievalRecord:
+    """单次检索的文档保留情况"""
+    timestamp: datetime
+    types: str
+    candidates: int  # 向量库返回的候选数（即 top_k 上限内的命中数）
+    kept: int  # 自适应截断后保留的文档数
+    best_distance: float | None
+
+
 class BaseRAGProcessor(ABC):
     """RAG处理器基类，提供通用的初始化、检索和数据库操作方法。
     
@@ -45,12 +72,17 @@ class BaseRAGProcessor(ABC):
     def __init__(self, settings: RAGSettings) -> None:
         self.settings = settings
         self.chroma_db_dir = settings.chroma_db_dir
-        self.vector_store: Chroma | None = None
+        self.vector_store: "Chroma | None" = None
         self.retriever = None
         self.embedding_model: Embeddings | None = None
         self.status = RAGStatus.UNINITIALIZED
         self.error_message: str | None = None
         self._init_lock = asyncio.Lock()
+        # 串行化所有向量库写入（重建、增量同步、批量添加和删除）：重建期间写入旧集合的变更会随集合替换丢失
+        self._write_lock = asyncio.Lock()
+        # 最近的检索记录，用于统计自适应 top_k 每次保留的文档数
+        self._retrieval_records: deque[RetrievalRecord] = deque(maxlen=1000)
+        self._records_lock = threading.Lock()
         logger.info("{class_name}已创建", class_name=self.__class__.__name__)
 
     @abstractmethod
@@ -96,6 +128,7 @@ class BaseRAGProcessor(ABC):
                     await self._create_and_persist_db(self.embedding_model)
                 else:
                     logger.info("正在从本地加载向量数据库...")
+                    from langchain_chroma import Chroma
                     self.vector_store = await asyncio.to_thread(
                         Chroma,
                         persist_directory=self.settings.chroma_db_dir,
@@ -121,14 +154,20 @@ class BaseRAGProcessor(ABC):
         self,
         query: str,
         metadata_types: list[MetadataType] | None = None,
-        top_k: int | None = None
+        top_k: int | None = None,
+        adaptive: bool | None = None,
+        where: dict | None = None
     ) -> list[Document]:
         """根据用户查询异步检索相关上下文。
         
+        返回的文档按距离升序排列，距离保存在 metadata["distance"] 中（越小越相似）。
+        
         Args:
             query: 查询文本
             metadata_types: 可选的元数据类型过滤列表，为None时检索所有类型
-            top_k: 返回的文档数量，为None时使用配置默认值
+            top_k: 返回的文档数量上限，为None时使用配置默认值
+            adaptive: 是否按与最佳命中的距离差截断结果，为None时使用配置 adaptive_top_k
+            where: 附加的 metadata 过滤条件（Chroma where 语法），与类型过滤取交集
             
         Returns:
             检索到的Document列表
@@ -140,21 +179,31 @@ class BaseRAGProcessor(ABC):
             raise RuntimeError(f"RAG处理器未准备就绪，当前状态: {self.status}")
         
         k = top_k if top_k is not None else self.settings.top_k_results
+        use_adaptive = self.settings.adaptive_top_k if adaptive is None else adaptive
         logger.info("正在为查询检索上下文: '{query}', 类型过滤: {types}, top_k: {k}", 
                     query=query, types=metadata_types, k=k)
         
-        if metadata_types is None:
+        # 构建metadata过滤条件
+        conditions = []
+        if metadata_types is not None:
+            conditions.append({"type": {"$in": [t.value for t in metadata_types]}})
+        if where:
+            conditions.append(where)
+        if not conditions:
             # 无过滤
             docs_with_scores = await self.vector_store.asimilarity_search_with_score(query, k=k)
         else:
-            # 使用metadata过滤
-            type_values = [t.value for t in metadata_types]
-            filter_dict = {"type": {"$in": type_values}}
+            filter_dict = conditions[0] if len(conditions) == 1 else {"$and": conditions}
             docs_with_scores = await self.vector_store.asimilarity_search_with_score(
                 query, k=k, filter=filter_dict
             )
         
-        logger.info("检索到 {num_docs} 个相关文档。", num_docs=len(docs_with_scores))
+        candidates = len(docs_with_scores)
+        if use_adaptive:
+            docs_with_scores = self._adaptive_cutoff(docs_with_scores)
+        
+        logger.info("检索到 {num_docs} 个相关文档（候选 {candidates} 个）。",
+                    num_docs=len(docs_with_scores), candidates=candidates)
         
         # 输出检索结果关键信息
         if docs_with_scores:
@@ -181,10 +230,127 @@ class BaseRAGProcessor(ABC):
             
             logger.info("=" * 60)
         
-        # 只返回文档，不返回得分
-        docs = [doc for doc, _ in docs_with_scores]
+        self._record_retrieval(metadata_types, candidates, docs_with_scores, scoped=bool(where))
+        
+        # 距离随文档一起返回，供下游按相关度取舍
+        docs = []
+        for doc, score in docs_with_scores:
+            doc.metadata["distance"] = round(float(score), 6)
+            docs.append(doc)
         return docs
 
+    async def retrieve_devices_for_location(
+        self,
+        query: str,
+        location: str | None,
+        top_k: int | None = None
+    ) -> list[Document]:
+        """按用户所在区域优先检索设备。
+        
+        先只在当前区域的设备中检索；当区域内最佳命中的距离超过 location_confidence_distance、
+        区域内没有结果，或语句中提到了其他区域时，扩大到全部区域检索。
+        
+        Args:
+            query: 查询文本
+            location: 用户当前所在区域（名称或别名）
+            top_k: 返回的文档数量上限，为None时使用 device_top_k
+            
+        Returns:
+            检索到的设备Document列表
+        """
+        k = top_k if top_k is not None else self.settings.device_top_k
+        if self.settings.location_prefilter:
+            data_service = DataService()
+            area = data_service.resolve_area(location)
+            mentioned = data_service.find_areas_in_text(query)
+            if area and all(m == area for m in mentioned):
+                area_values = sorted({d["area"] for d in data_service.get_devices_in_area(area)})
+                if area_values:
+                    docs = await self.retrieve_context(
+                        query, [MetadataType.DEVICE], top_k=k, where={"area": {"$in": area_values}}
+                    )
+                    if docs and docs[0].metadata["distance"] <= self.settings.location_confidence_distance:
+                        logger.info("在当前区域 {area} 内检索到 {count} 个设备", area=area, count=len(docs))
+                        return docs
+                    logger.info("当前区域 {area} 内检索置信度不足，扩大到全部区域", area=area)
+            elif mentioned:
+                logger.info("语句中提及区域 {mentioned}，检索全部区域的设备", mentioned=mentioned)
+        return await self.retrieve_context(query, [MetadataType.DEVICE], top_k=k)
+
+    def _adaptive_cutoff(self, docs_with_scores: list[tuple[Document, float]]) -> list[tuple[Document, float]]:
+        """按与最佳命中的距离差截断检索结果，至少保留 adaptive_min_k 个。
+        
+        结果已按距离升序排列，遇到第一个超出阈值的文档即可停止。
+        """
+        if not docs_with_scores:
+            return docs_with_scores
+        best = docs_with_scores[0][1]
+        min_k = self.settings.adaptive_min_k
+        gap = self.settings.adaptive_distance_gap
+        for idx, (_, score) in enumerate(docs_with_scores):
+            if idx >= min_k and score - best > gap:
+                return docs_with_scores[:idx]
+        return docs_with_scores
+
+    def _record_retrieval(
+        self,
+        metadata_types: list[MetadataType] | None,
+        candidates: int,
+        docs_with_scores: list[tuple[Document, float]],
+        scoped: bool = False
+    ) -> None:
+        types = ",".join(t.value for t in metadata_types) if metadata_types else "all"
+        record = RetrievalRecord(
+            timestamp=datetime.now(),
+            types=f"{types}@scoped" if scoped else types,
+            candidates=candidates,
+            kept=len(docs_with_scores),
+            best_distance=round(float(docs_with_scores[0][1]), 6) if docs_with_scores else None
+        )
+        with self._records_lock:
+            self._retrieval_records.append(record)
+
+    def get_retrieval_stats(self, minutes: int = 5) -> dict:
+        """获取最近 N 分钟按类型汇总的检索统计（候选数、保留数、最佳距离）。"""
+        cutoff_time = datetime.now() - timedelta(minutes=minutes)
+        with self._records_lock:
+            records = [r for r in self._retrieval_records if r.timestamp >= cutoff_time]
+
+        by_type: dict[str, list[RetrievalRecord]] = {}
+        for record in records:
+            by_type.setdefault(record.types, []).append(record)
+
+        stats = {}
+        for types, items in by_type.items():
+            kept = sorted(r.kept for r in items)
+            distances = [r.best_distance for r in items if r.best_distance is not None]
+            stats[types] = {
+                "queries": len(items),
+                "avg_candidates": round(sum(r.candidates for r in items) / len(items), 2),
+                "avg_kept": round(sum(kept) / len(kept), 2),
+                "p50_kept": kept[len(kept) // 2],
+                "max_kept": kept[-1],
+                "avg_best_distance": round(sum(distances) / len(distances), 4) if distances else None,
+            }
+        return {
+            "adaptive_top_k": self.settings.adaptive_top_k,
+            "adaptive_distance_gap": self.settings.adaptive_distance_gap,
+            "adaptive_min_k": self.settings.adaptive_min_k,
+            "window_minutes": minutes,
+            "types": stats,
+        }
+
+    async def aget_retrieval_stats(self, minutes: int = 5) -> dict:
+        """异步接口，远程处理器从推理服务获取统计"""
+        return self.get_retrieval_stats(minutes)
+
+    async def smoke_test(self) -> bool:
+        """切换实例前的冒烟测试：向量库已加载且可以读取。"""
+        if self.status != RAGStatus.READY or self.vector_store is None:
+            return False
+        await asyncio.to_thread(self.vector_store._collection.count)
+        return True
+
     @abstractmethod
     async def close(self) -> None:
         """关闭RAG处理器资源，由子类实现。"""
@@ -205,7 +371,12 @@ class BaseRAGProcessor(ABC):
         return documents
 
     async def refresh_database(self) -> bool:
-        """刷新数据库，重新加载CSV数据并重建向量数据库"""
+        """刷新数据库，重新加载CSV数据并重建向量数据库。
+
+        新索引先在暂存集合中分批构建（maintenance 线程池，有活跃会话时降速），完成后再替换当前集合，
+        构建期间检索继续使用旧索引；构建失败时旧索引保持不变。增量同步、批量添加和删除在重建完成后
+        才写入（写到新集合），并发的刷新依次执行。
+        """
         logger.info("正在刷新RAG数据库...")
 
         if self.vector_store is None:
@@ -214,23 +385,56 @@ class BaseRAGProcessor(ABC):
             self.error_message = "向量存储未初始化"
             return False
 
+        async with self._write_lock:
+            return await self._rebuild_collection()
+
+    async def _rebuild_collection(self) -> bool:
+        executors = get_executors()
+        staging: "Chroma | None" = None
         try:
-            self.status = RAGStatus.INITIALIZING
-            await asyncio.to_thread(self.vector_store.reset_collection)
-            documents = self._load_all_documents()
-            await asyncio.to_thread(self.vector_store.add_documents, documents)
-            self.status = RAGStatus.READY
-            self.error_message = None
-            logger.info("RAG数据库刷新完成")
-            return True
+            documents = await executors.run(WorkloadClass.MAINTENANCE, self._load_all_documents)
+            staging = await executors.run(WorkloadClass.MAINTENANCE, self._create_staging_store)
+            await executors.run_batched(staging.add_documents, documents)
         except Exception as e:
-            logger.exception("刷新数据库失败: {error}", error=str(e))
-            self.status = RAGStatus.ERROR
-            self.error_message = str(e)
+            logger.exception("刷新数据库失败，继续使用原有索引: {error}", error=str(e))
+            if staging is not None:
+                await executors.run(WorkloadClass.MAINTENANCE, staging.delete_collection)
             return False
 
+        previous = self.vector_store
+        self.vector_store = staging
+        self.retriever = staging.as_retriever(search_kwargs={"k": self.settings.top_k_results})
+        await executors.run(WorkloadClass.MAINTENANCE, self._replace_collection, previous, staging)
+        self.status = RAGStatus.READY
+        self.error_message = None
+        logger.info("RAG数据库刷新完成")
+        return True
+
+    def _create_staging_store(self) -> "Chroma":
+        """在同一个 Chroma 客户端中创建本次重建专用的暂存集合，并清理之前中断的刷新留下的暂存集合"""
+        from langchain_chroma import Chroma
+        client = self.vector_store._client
+        prefix = f"{self.vector_store._collection_name}_staging_"
+        for collection in client.list_collections():
+            if collection.name.startswith(prefix):
+                client.delete_collection(collection.name)
+        return Chroma(
+            client=client,
+            collection_name=f"{prefix}{uuid.uuid4().hex[:12]}",
+            embedding_function=self.embedding_model
+        )
+
+    @staticmethod
+    def _replace_collection(previous: "Chroma", staging: "Chroma") -> None:
+        """删除旧集合并把暂存集合改为原名称，重启后按默认名称加载的仍是新索引"""
+        name = previous._collection_name
+        previous.delete_collection()
+        staging._collection.modify(name=name)
+        staging._collection_name = name
+
     async def _create_and_persist_db(self, embedding_model: Embeddings) -> None:
         """从CSV加载文档，创建向量数据库并持久化到磁盘"""
+        from langchain_chroma import Chroma
         try:
             documents = self._load_all_documents()
             logger.info("正在创建向量嵌入...")
@@ -245,12 +449,16 @@ class BaseRAGProcessor(ABC):
         except (FileNotFoundError, ValueError) as e:
             raise IOError(f"创建数据库失败: {e}") from e
 
+    async def _add_documents(self, documents: list[Document]) -> None:
+        async with self._write_lock:
+            await get_executors().run_batched(self.vector_store.add_documents, documents)
+
     async def batch_add_doors(self, items: list[DoorItem]) -> None:
         """批量添加门数据"""
         if not items or self.vector_store is None:
             return
         documents = convert_doors_to_documents([item.model_dump() for item in items])
-        await asyncio.to_thread(self.vector_store.add_documents, documents)
+        await self._add_documents(documents)
         logger.info("已添加 {count} 个门文档", count=len(documents))
 
     async def batch_add_media(self, items: list[MediaItem]) -> None:
@@ -258,7 +466,7 @@ class BaseRAGProcessor(ABC):
         if not items or self.vector_store is None:
             return
         documents = convert_media_to_documents([item.model_dump() for item in items])
-        await asyncio.to_thread(self.vector_store.add_documents, documents)
+        await self._add_documents(documents)
         logger.info("已添加 {count} 个媒体文档", count=len(documents))
 
     async def batch_add_devices(self, items: list[DeviceItem]) -> None:
@@ -266,7 +474,7 @@ class BaseRAGProcessor(ABC):
         if not items or self.vector_store is None:
             return
         documents = convert_devices_to_documents([item.model_dump() for item in items])
-        await asyncio.to_thread(self.vector_store.add_documents, documents)
+        await self._add_documents(documents)
         logger.info("已添加 {count} 个设备文档", count=len(documents))
 
     async def batch_add_areas(self, items: list[AreaItem]) -> None:
@@ -274,9 +482,59 @@ class BaseRAGProcessor(ABC):
         if not items or self.vector_store is None:
             return
         documents = convert_areas_to_documents([item.model_dump() for item in items])
-        await asyncio.to_thread(self.vector_store.add_documents, documents)
+        await self._add_documents(documents)
         logger.info("已添加 {count} 个区域文档", count=len(documents))
 
+    async def apply_delta(self, doc_type: str, upserted: list[dict[str, Any]], deleted: list[str]) -> None:
+        """增量同步一个类型的文档：先为新增和修改的条目写入新向量，再删除被删除条目和被修改条目的旧向量
+
+        先写后删，同步期间检索不会缺少被修改的条目；改动量小，不分批降速。
+
+        Args:
+            doc_type: 文档类型，如 "door", "media", "device", "area"
+            upserted: 新增或修改的数据条目
+            deleted: 被删除的条目名称
+        """
+        if self.vector_store is None:
+            return
+        converter = _DOCUMENT_CONVERTERS[doc_type]
+        names = [*deleted, *(item["name"] for item in upserted)]
+        documents = converter(upserted)
+        async with self._write_lock:
+            collection = self.vector_store._collection
+            stale_ids = []
+            if names:
+                stale = await run_in(
+                    WorkloadClass.MAINTENANCE,
+                    collection.get,
+                    where={"$and": [{"type": doc_type}, {"name": {"$in": names}}]},
+                    include=[]
+                )
+                stale_ids = stale["ids"]
+            if documents:
+                await run_in(WorkloadClass.MAINTENANCE, self.vector_store.add_documents, documents)
+            if stale_ids:
+                await run_in(WorkloadClass.MAINTENANCE, collection.delete, ids=stale_ids)
+        logger.info("已增量同步类型为 '{type}' 的文档: 更新 {upserted} 个, 删除 {deleted} 个",
+                    type=doc_type, upserted=len(documents), deleted=len(deleted))
+
+    async def delete_by_names(self, doc_type: str, names: list[str]) -> None:
+        """按名称删除指定类型的文档，用于单条更新和删除
+
+        Args:
+            doc_type: 文档类型，如 "door", "media", "device", "area"
+            names: 要删除的文档名称列表
+        """
+        if not names or self.vector_store is None:
+            return
+        async with self._write_lock:
+            await run_in(
+                WorkloadClass.MAINTENANCE,
+                self.vector_store._collection.delete,
+                where={"$and": [{"type": doc_type}, {"name": {"$in": list(names)}}]}
+            )
+        logger.info("已删除 {count} 个类型为 '{type}' 的文档", count=len(names), type=doc_type)
+
     async def delete_by_type(self, doc_type: str) -> None:
         """按类型删除文档，不影响其他类型的数据
         
@@ -288,11 +546,12 @@ class BaseRAGProcessor(ABC):
             return
         
         try:
-            collection = self.vector_store._collection
-            await asyncio.to_thread(
-                collection.delete,
-                where={"type": doc_type}
-            )
+            async with self._write_lock:
+                await run_in(
+                    WorkloadClass.MAINTENANCE,
+                    self.vector_store._collection.delete,
+                    where={"type": doc_type}
+                )
             logger.info("已删除所有类型为 '{type}' 的文档", type=doc_type)
         except Exception as e:
             logger.exception("删除类型为 '{type}' 的文档失败: {error}", type=doc_type, error=str(e))
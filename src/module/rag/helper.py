@@ -80,12 +80,12 @@ def convert_devices_to_documents(devices_data: list[dict[str, Any]]) -> list[Doc
         
         # 视窗区域
         views = device.get('view', [])
-        if isinstance(views, list) and views:
+        if isinstance(views, (list, tuple)) and views:
             content_parts.append(f"包含{'、'.join(views)}视窗view")
         
         # 支持的命令
         commands = device.get('command', [])
-        if isinstance(commands, list) and commands:
+        if isinstance(commands, (list, tuple)) and commands:
             content_parts.append(f"支持的操作包括：{'、'.join(commands)}")
         
         # 连接：前面是基础属性，用逗号连接
@@ -99,10 +99,10 @@ def convert_devices_to_documents(devices_data: list[dict[str, Any]]) -> list[Doc
         
         # 构建metadata
         command_list = device.get("command", [])
-        command_json = json.dumps(command_list if isinstance(command_list, list) else [], ensure_ascii=False)
+        command_json = json.dumps(list(command_list) if isinstance(command_list, (list, tuple)) else [], ensure_ascii=False)
         
         view_list = device.get("view", [])
-        view_json = json.dumps(view_list if isinstance(view_list, list) else [], ensure_ascii=False)
+        view_json = json.dumps(list(view_list) if isinstance(view_list, (list, tuple)) else [], ensure_ascii=False)
         
         metadata = {
             "type": "device",
@@ -6,6 +6,7 @@ from abc import ABC, abstractmethod
 from enum import Enum
 from typing import Any
 
+import numpy as np
 import numpy.typing as npt
 from loguru import logger
 
@@ -44,4 +45,18 @@ class BaseVADProcessor(ABC):
     @abstractmethod
     def process_chunk(self, chunk: npt.NDArray, cache: dict[str, Any]) -> list:
         """处理音频块并返回语音活动检测结果。"""
-        pass
\ No newline at end of file
+        pass
+
+    async def aprocess_chunk(self, chunk: npt.NDArray, cache: dict[str, Any]) -> list:
+        """异步处理音频块。默认直接调用 process_chunk，本地模型在 realtime 线程池中执行，远程实现经推理服务处理。"""
+        return self.process_chunk(chunk, cache)
+
+    async def release_cache(self, cache: dict[str, Any]) -> None:
+        """会话结束时释放与缓存关联的资源，本地缓存随会话回收，无需处理。"""
+
+    async def smoke_test(self) -> bool:
+        """切换实例前的冒烟测试：用独立缓存检测一块静音。"""
+        if self.status != VADStatus.READY:
+            return False
+        await asyncio.to_thread(self.process_chunk, np.zeros(self.chunk_stride, dtype=np.float32), {})
+        return True
\ No newline at end of file
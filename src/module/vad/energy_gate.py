@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VAD 前的静音门限。
+
+展厅里大部分时间只有环境声，逐块送入 FSMN-VAD 做神经网络推理是主要的 VAD 开销。
+这里对每个音频块先算一次短时能量和过零率（向量化，约几微秒），明显静音的块不再送入模型。
+
+判定规则：
+- 能量低于门限时视为静音，门限 = 噪声底 + 余量，限制在 [energy_db, max_energy_db] 之间；
+  噪声底是块能量的最小值跟踪（下降立即跟随、上升很慢），适应不同展厅的环境噪声
+- 能量低但过零率高的块可能是清辅音（s、sh 等），不视为静音，除非能量比门限再低 10dB
+- 最后一个有声块之后保持 hangover 时长继续送入模型，让模型完成语音段的结束判定
+"""
+import numpy as np
+import numpy.typing as npt
+
+from src.config.config import VADSettings
+
+_EPS = 1e-10
+# 过零率判定只在门限以下这个范围内生效，更低的能量一律视为静音
+_ZCR_RANGE_DB = 10.0
+# 噪声底上升的平滑系数（每块，200ms 块约 40 秒时间常数），下降时立即跟随
+_FLOOR_RISE = 0.005
+
+
+def chunk_energy_db(chunk: npt.NDArray[np.float32]) -> float:
+    """音频块的均方能量（dBFS，满幅正弦约 -3dB）"""
+    return float(10.0 * np.log10(np.mean(np.square(chunk, dtype=np.float64)) + _EPS))
+
+
+def zero_crossing_rate(chunk: npt.NDArray[np.float32]) -> float:
+    """相邻采样符号变化的比例"""
+    if len(chunk) < 2:
+        return 0.0
+    signs = np.signbit(chunk)
+    return float(np.count_nonzero(signs[1:] != signs[:-1]) / (len(chunk) - 1))
+
+
+class EnergyGate:
+    """
+    按能量和过零率判定音频块是否可以跳过 VAD 推理。
+
+    Args:
+        settings: VAD 配置（gate_* 参数）
+        chunk_ms: 每个音频块的时长（毫秒），用于把 hangover 换算为块数
+    """
+
+    def __init__(self, settings: VADSettings, chunk_ms: int) -> None:
+        self.energy_db = settings.gate_energy_db
+        self.max_energy_db = settings.gate_max_energy_db
+        self.margin_db = settings.gate_noise_margin_db
+        self.zcr_threshold = settings.gate_zcr_threshold
+        self.hangover_chunks = max(0, -(-settings.gate_hangover_ms // chunk_ms))
+        self.noise_floor_db = self.energy_db - self.margin_db
+        self._quiet_run = self.hangover_chunks  # 会话开始时允许直接跳过
+        self.chunks = 0
+        self.skipped = 0
+
+    @property
+    def threshold_db(self) -> float:
+        return min(self.max_energy_db, max(self.energy_db, self.noise_floor_db + self.margin_db))
+
+    def is_silent(self, chunk: npt.NDArray[np.float32]) -> bool:
+        """该块本身是否为明显静音（不考虑 hangover）"""
+        energy = chunk_energy_db(chunk)
+        threshold = self.threshold_db
+        if energy < self.noise_floor_db:
+            self.noise_floor_db = energy
+        else:
+            self.noise_floor_db += _FLOOR_RISE * (energy - self.noise_floor_db)
+        if energy >= threshold:
+            return False
+        if energy >= threshold - _ZCR_RANGE_DB and zero_crossing_rate(chunk) >= self.zcr_threshold:
+            return False
+        return True
+
+    def should_skip(self, chunk: npt.NDArray[np.float32], in_speech: bool = False) -> bool:
+        """
+        该块是否可以跳过 VAD 推理：本身静音，且距上一个有声块已超过 hangover。
+
+        Args:
+            chunk: 音频块
+            in_speech: 模型报告的语音段尚未结束，此时必须继续推理，并重新开始计算 hangover
+        """
+        self.chunks += 1
+        if not self.is_silent(chunk) or in_speech:
+            self._quiet_run = 0
+            return False
+        self._quiet_run += 1
+        if self._quiet_run <= self.hangover_chunks:
+            return False
+        self.skipped += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / self.chunks, 4) if self.chunks else 0.0,
+            "threshold_db": round(self.threshold_db, 2),
+            "noise_floor_db": round(self.noise_floor_db, 2),
+        }
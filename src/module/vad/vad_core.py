@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import asyncio
+import threading
 from typing import Any
 
 import numpy.typing as npt
 from loguru import logger
 
 from src.config.config import VADSettings
+from src.core.capacity import compute_section
+from src.core.executors import WorkloadClass, run_in
+from src.core.model_cache import get_model_cache
 from src.module.vad.base_vad_processor import BaseVADProcessor, VADStatus
 
 
@@ -24,6 +29,9 @@ class VADCore(BaseVADProcessor):
         """
         super().__init__(settings)
         self.model = None
+        # AutoModel.generate 会把调用方的 cache 写入模型共享的 kwargs，并发调用会串用彼此的流式状态，
+        # 因此同一模型上的推理必须串行（多个会话在工作线程中并发调用时尤其如此）
+        self._generate_lock = threading.Lock()
         logger.info("VAD处理器已创建，等待异步初始化...")
 
     async def initialize(self) -> None:
@@ -41,15 +49,8 @@ class VADCore(BaseVADProcessor):
             try:
                 # 初始化VAD模型
                 logger.info("正在加载VAD模型...")
-                from funasr import AutoModel
-                self.model = AutoModel(
-                    model=self.settings.model,
-                    model_revision="v2.0.4",
-                    disable_pbar=True,
-                    disable_update=True,
-                    speech_noise_thres=self.settings.speech_noise_thres,
-                    decibel_thres=self.settings.decibel_thres,
-                )
+                # 在工作线程中加载，不阻塞事件循环上并行进行的其他初始化
+                self.model = await asyncio.to_thread(self._load_model)
                 logger.info("VAD模型加载完成。")
 
                 self.status = VADStatus.READY
@@ -60,6 +61,17 @@ class VADCore(BaseVADProcessor):
                 logger.exception(self.error_message)
                 raise
 
+    def _load_model(self) -> Any:
+        return get_model_cache().load_auto_model(
+            "vad",
+            model=self.settings.model,
+            model_revision="v2.0.4",
+            disable_pbar=True,
+            disable_update=True,
+            speech_noise_thres=self.settings.speech_noise_thres,
+            decibel_thres=self.settings.decibel_thres,
+        )
+
     def process_chunk(self, chunk: npt.NDArray, cache: dict[str, Any]) -> list:
         """
         处理音频块并返回语音活动检测结果。
@@ -67,14 +79,21 @@ class VADCore(BaseVADProcessor):
         if self.status != VADStatus.READY:
             raise RuntimeError(f"VAD处理器未准备就绪，当前状态: {self.status}")
 
-        segments = self.model.generate(
-            input=chunk,
-            cache=cache,
-            is_final=False,
-            chunk_size=self.chunk_size,
-            **self.kwargs
-        )
+        with self._generate_lock, compute_section():
+            segments = self.model.generate(
+                input=chunk,
+                cache=cache,
+                is_final=False,
+                chunk_size=self.chunk_size,
+                **self.kwargs
+            )
 
         if segments and segments[0].get("value"):
             return segments[0].get("value")
         return []
+
+    async def aprocess_chunk(self, chunk: npt.NDArray, cache: dict[str, Any]) -> list:
+        """
+        在 realtime 线程池中处理音频块：推理不占用事件循环，等待模型锁（如冒烟测试持有时）也不会阻塞其他会话。
+        """
+        return await run_in(WorkloadClass.REALTIME, self.process_chunk, chunk, cache)
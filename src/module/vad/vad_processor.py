@@ -1,25 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import asyncio
+import bisect
 import os
 from typing import Any
 
 import numpy as np
 import numpy.typing as npt
 from loguru import logger
-from scipy.io import wavfile
 
 from src.config.config import VADSettings
+from src.core.backpressure import ByteBoundedQueue, OverflowPolicy
+from src.core.capacity import measure_compute
+from src.core.hot_swap import HotSwapSlot, lease
+from src.module.vad.energy_gate import EnergyGate
 from src.module.vad.vad_core import VADCore
+from src.services.tracing import Trace
 
-# 类型别名
-type AudioSegment = tuple[int, int, npt.NDArray[np.float32]]
+# 类型别名：(开始ms, 结束ms, 音频, 该语音段的链路)
+type AudioSegment = tuple[int, int, npt.NDArray[np.float32], Trace]
 type VADCache = dict[str, Any]
 
 
 class VADProcessor:
-    def __init__(self, vad_core: VADCore, settings: VADSettings) -> None:
+    DEFAULT_CHUNK_QUEUE_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, vad_core: VADCore, settings: VADSettings, chunk_queue: ByteBoundedQueue | None = None,
+                 slot: HotSwapSlot[VADCore] | None = None) -> None:
         self.vad_core = vad_core
+        # 每次推理通过槽借用当前 VAD 实例，切换期间旧实例等推理归还后才关闭
+        self.slot = slot
         self.settings = settings
         self.sample_rate = vad_core.sample_rate
         self.chunk_size_samples = int(self.vad_core.chunk_size * self.sample_rate / 1000)
@@ -31,9 +40,18 @@ class VADProcessor:
         self.last_start_time: int | None = None  # 上一segment的开始时间戳（累积）
         self.last_end_time: int | None = None  # 上一segment的结束时间戳（累积）
         self.total_samples_processed = 0  # A running counter of all samples seen so far
-        self.chunk_queue: asyncio.Queue[npt.NDArray] = asyncio.Queue(maxsize=settings.chunk_queue_maxsize)
+        # 静音门限跳过的块不送入模型，模型内部时间轴因此落后于音频流时间轴
+        self.gate: EnergyGate | None = EnergyGate(settings, vad_core.chunk_size) if settings.energy_gate else None
+        self.model_samples = 0  # 实际送入模型的采样数
+        self._skips: list[tuple[int, int]] = []  # (模型时间轴位置ms, 该位置之后累计跳过的ms)
+        self._preroll: npt.NDArray[np.float32] | None = None  # 最后一个被跳过的块
+        self.last_inference_seconds = 0.0  # 最近一个 chunk 的模型计算耗时（不含租约、推理锁与排队等待），供容量估算
+        self.chunk_queue: ByteBoundedQueue = chunk_queue or ByteBoundedQueue(
+            "vad_chunk", self.DEFAULT_CHUNK_QUEUE_BYTES, OverflowPolicy.DROP_OLDEST, settings.chunk_queue_maxsize
+        )
 
-    def append_audio(self, data: npt.NDArray[np.float32]) -> None:
+    async def append_audio(self, data: npt.NDArray[np.float32]) -> None:
+        """加入音频并切分为 chunk；chunk 队列满时按其溢出策略丢弃或等待"""
         # 加入缓冲区
         data_flat = data.flatten()
         self.input_buffer = np.concatenate([self.input_buffer, data_flat])
@@ -50,17 +68,97 @@ class VADProcessor:
         while len(self.input_buffer) >= self.chunk_size_samples:
             chunk_np = self.input_buffer[:self.chunk_size_samples]
             self.input_buffer = self.input_buffer[self.chunk_size_samples:]
-            try:
-                self.chunk_queue.put_nowait(chunk_np)
-            except asyncio.QueueFull:
-                logger.warning("chunk_queue已满，处理速度跟不上输入速度。")
+            dropped = self.chunk_queue.dropped_items
+            await self.chunk_queue.put(chunk_np)
+            if self.chunk_queue.dropped_items != dropped and dropped % 100 == 0:
+                logger.warning(
+                    "chunk_queue已满，VAD处理跟不上输入速度，按 {policy} 策略已丢弃 {count} 个音频块",
+                    policy=self.chunk_queue.policy.value, count=self.chunk_queue.dropped_items,
+                )
 
     async def process_chunk(self) -> list[tuple[int, int]]:
+        """处理一个音频块，返回音频流时间轴上的语音段时间戳；明显静音的块跳过模型推理"""
         chunk = await self.chunk_queue.get()
-        segments = self.vad_core.process_chunk(chunk, self.cache)
         self.total_samples_processed += len(chunk)
+        with measure_compute() as compute:
+            if self.gate is not None and self.gate.should_skip(chunk, in_speech=self.last_start_time is not None):
+                self._skip(chunk)
+                segments = []
+            else:
+                segments = []
+                if self._preroll is not None:
+                    # 恢复推理时先补上最后一个被跳过的块，避免截掉恰好在块末尾开始的语音
+                    preroll, self._preroll = self._preroll, None
+                    self._unskip(len(preroll))
+                    segments.extend(await self._infer(preroll))
+                segments.extend(await self._infer(chunk))
+        self.last_inference_seconds = compute[0]
         return segments
 
+    async def _infer(self, chunk: npt.NDArray[np.float32]) -> list[tuple[int, int]]:
+        async with lease(self.slot, self.vad_core) as vad_core:
+            if vad_core is not self.vad_core:
+                await self._switch_core(vad_core)
+            segments = await vad_core.aprocess_chunk(chunk, self.cache)
+        self.model_samples += len(chunk)
+        return [(self._to_stream_ms(start_ms), self._to_stream_ms(end_ms)) for start_ms, end_ms in segments]
+
+    async def _switch_core(self, vad_core: VADCore) -> None:
+        """
+        VAD 实例已被切换：改用新实例和新的流式缓存。新模型的时间轴从 0 开始，
+        把它对齐到音频流的当前位置；进行中的语音段由新模型的下一个语音开始补全。
+        """
+        old_core, old_cache = self.vad_core, self.cache
+        stream_ms = self._to_stream_ms(self._samples_to_ms(self.model_samples))
+        self.vad_core, self.cache = vad_core, {}
+        self.model_samples = 0
+        self._skips = [(0, stream_ms)]
+        logger.info("VAD实例已切换，会话在 {ms}ms 处改用新实例", ms=stream_ms)
+        try:
+            await old_core.release_cache(old_cache)
+        except Exception as e:
+            logger.warning(f"释放旧VAD实例缓存失败: {e}")
+
+    def _samples_to_ms(self, samples: int) -> int:
+        return samples * 1000 // self.sample_rate
+
+    def _skip(self, chunk: npt.NDArray[np.float32]) -> None:
+        """记录跳过的块：模型时间轴停在当前位置，之后的时间戳需加上累计跳过的时长"""
+        model_ms = self._samples_to_ms(self.model_samples)
+        offset = (self._skips[-1][1] if self._skips else 0) + self._samples_to_ms(len(chunk))
+        if self._skips and self._skips[-1][0] == model_ms:
+            self._skips[-1] = (model_ms, offset)
+        else:
+            self._skips.append((model_ms, offset))
+            # 只需覆盖历史缓冲区范围内的时间戳
+            cutoff = model_ms - self.settings.history_buffer_duration_sec * 1000
+            while len(self._skips) > 1 and self._skips[1][0] < cutoff:
+                self._skips.pop(0)
+        self._preroll = chunk
+
+    def _unskip(self, samples: int) -> None:
+        """最后一个被跳过的块重新送入模型时，撤销它的跳过时长"""
+        model_ms, offset = self._skips[-1]
+        self._skips[-1] = (model_ms, offset - self._samples_to_ms(samples))
+        if self.gate is not None:
+            self.gate.skipped -= 1
+
+    def _to_stream_ms(self, model_ms: int) -> int:
+        """模型时间轴的时间戳换算到音频流时间轴（-1 表示未定，保持不变）"""
+        if model_ms == -1 or not self._skips:
+            return model_ms
+        index = bisect.bisect_right(self._skips, (model_ms, float("inf")))
+        return model_ms + (self._skips[index - 1][1] if index else 0)
+
+    async def close(self) -> None:
+        """会话结束时释放 VAD 缓存（远程模式下清理推理服务端的会话状态）"""
+        try:
+            await self.vad_core.release_cache(self.cache)
+        except Exception as e:
+            logger.warning(f"释放VAD缓存失败: {e}")
+        if self.gate is not None and self.gate.chunks:
+            logger.info("静音门限跳过了 {skipped}/{chunks} 个音频块的VAD推理", **self.gate.stats())
+
     def _complete_pending_segment(self, end_ms: int) -> AudioSegment | None:
         """
         完成之前未结束的语音段。
@@ -69,7 +167,7 @@ class VADProcessor:
             end_ms: 语音段结束时间（毫秒）
             
         Returns:
-            完成的语音段 (start_ms, end_ms, audio)，如果无法提取则返回 None
+            完成的语音段 (start_ms, end_ms, audio, trace)，如果无法提取则返回 None
         """
         if self.last_start_time is None:
             return None
@@ -78,7 +176,7 @@ class VADProcessor:
                       start=self.last_start_time, end=end_ms)
         audio = self._extract_audio(self.last_start_time, end_ms)
         if audio is not None:
-            result = (self.last_start_time, end_ms, audio)
+            result = (self.last_start_time, end_ms, audio, self._new_trace(self.last_start_time, end_ms, audio))
             if self.settings.save_audio_segments:
                 self._save_audio_segment(audio, self.last_start_time, end_ms)
             return result
@@ -93,15 +191,23 @@ class VADProcessor:
             end_ms: 语音段结束时间（毫秒）
             
         Returns:
-            完成的语音段 (start_ms, end_ms, audio)，如果无法提取则返回 None
+            完成的语音段 (start_ms, end_ms, audio, trace)，如果无法提取则返回 None
         """
         audio = self._extract_audio(start_ms, end_ms)
         if audio is not None:
             if self.settings.save_audio_segments:
                 self._save_audio_segment(audio, start_ms, end_ms)
-            return (start_ms, end_ms, audio)
+            return (start_ms, end_ms, audio, self._new_trace(start_ms, end_ms, audio))
         return None
 
+    def _new_trace(self, start_ms: int, end_ms: int, audio: npt.NDArray[np.float32]) -> Trace:
+        """语音段完成时创建端到端链路，后续各阶段在其上记录 span"""
+        return Trace(attributes={
+            "segment.start_ms": start_ms,
+            "segment.end_ms": end_ms,
+            "audio.duration_s": round(len(audio) / self.sample_rate, 3),
+        })
+
     def process_result(self, segments: list[tuple[int, int]]) -> list[AudioSegment]:
         completed_segments: list[AudioSegment] = []
         
@@ -182,6 +288,7 @@ class VADProcessor:
             # 保存为WAV文件（需要将float32转换为int16）
             # 假设音频数据在-1到1之间，乘以32767转换为int16
             audio_int16 = (audio_data * 32767).astype(np.int16)
+            from scipy.io import wavfile
             wavfile.write(filepath, self.sample_rate, audio_int16)
 
             logger.info(f"音频片段已保存: {filepath}")
@@ -1,5 +1,7 @@
 import asyncio
 import json
+import time
+from typing import Any, Callable
 
 import numpy as np
 import numpy.typing as npt
@@ -9,20 +11,53 @@ from langchain_core.messages import HumanMessage
 
 from src.api.context import Context
 from src.core import dependencies
+from src.core.capacity import get_capacity_planner, measure_compute
+from src.core.executors import WorkloadClass, run_in
+from src.core.hot_swap import lease
+from src.module.input.frame_protocol import AudioEncoding, FrameProtocolError, FrameReceiver
 from src.module.llm.tool.definitions import ExhibitionCommand, CommandAction
 from src.services.performance_metrics_manager import MetricType
 from src.services.aep_client import get_aep_client
+from src.services.rag_retrieval import retrieve_docs_by_type
+from src.services.tracing import Trace, get_traced, put_traced
+
+
+async def _run_receiver(receiver: FrameReceiver, func: Callable[..., list[bytes]], *args: Any) -> list[bytes]:
+    """调用 FrameReceiver 的方法；Opus 需要解码，在实时线程池中执行"""
+    if receiver.decodes:
+        return await run_in(WorkloadClass.REALTIME, func, *args)
+    return func(*args)
 
 
 async def receive_loop(websocket: WebSocket, context: Context) -> None:
     logger.info("WebSocket接收已启动")
+    receiver = context.frame_receiver
     while True:
         try:
-            data_bytes = await websocket.receive_bytes()
+            # 抖动缓冲中有等待缺失帧的缓存帧时，最多等到容限到期，连接随后静默也能输出
+            timeout = receiver.expire_in() if receiver is not None else None
+            try:
+                data_bytes = await asyncio.wait_for(websocket.receive_bytes(), timeout)
+            except asyncio.TimeoutError:
+                for chunk in await _run_receiver(receiver, receiver.expire):
+                    await context.audio_input_queue.put(chunk)
+                continue
             logger.trace("WebSocket receive bytes size {size}", size=len(data_bytes))
-            await context.audio_input_queue.put(data_bytes)
-            logger.trace("WebSocket put audio_input_queue size {size}", size=len(data_bytes))
+            if receiver is None:
+                await context.audio_input_queue.put(data_bytes)
+                continue
+            # 协议 2: 解析帧头，按 seq 重排，丢帧补静音，语音结束标记补入尾部静音；Opus 在实时线程池中解码
+            try:
+                chunks = await _run_receiver(receiver, receiver.feed, data_bytes)
+            except FrameProtocolError as e:
+                logger.warning("丢弃无效的音频帧: {e}", e=e)
+                continue
+            for chunk in chunks:
+                await context.audio_input_queue.put(chunk)
         except WebSocketDisconnect as e:
+            if receiver is not None:
+                for chunk in await _run_receiver(receiver, receiver.flush):
+                    await context.audio_input_queue.put(chunk)
             if e.code in [1000, 1005]:
                 logger.info(f"WebSocket连接正常关闭 (code={e.code})")
             else:
@@ -33,6 +68,26 @@ async def receive_loop(websocket: WebSocket, context: Context) -> None:
             break
 
 
+async def run_flow_control(context: Context, websocket: WebSocket) -> None:
+    """队列越过高/低水位时通知客户端暂停或恢复发送音频（signal 策略）"""
+    throttled: list[str] = []
+    while True:
+        await context.pressure_changed.wait()
+        context.pressure_changed.clear()
+        current = context.throttled_queues()
+        if bool(current) == bool(throttled):
+            throttled = current
+            continue
+        throttled = current
+        action = "pause" if current else "resume"
+        logger.info("[流控] 通知客户端{action}发送音频: {queues}", action="暂停" if current else "恢复", queues=current)
+        await websocket.send_text(json.dumps({
+            "type": "flow_control",
+            "action": action,
+            "queues": current,
+        }, ensure_ascii=False))
+
+
 async def run_decode_vad_appender(context: Context) -> None:
     """负责解码并直接推送到VAD处理器，合并了之前的decode_loop和vad_appender"""
     logger.info("解码与VAD输入处理器已启动")
@@ -43,9 +98,12 @@ async def run_decode_vad_appender(context: Context) -> None:
             # 开始计时 - 音频解码
             decode_start_time = asyncio.get_running_loop().time()
 
-            # 将bytes转换为int16数组，然后归一化到-1.0到1.0的float32范围
-            int16_array = np.frombuffer(data_bytes, dtype=np.int16)
-            float32_array = int16_array.astype(np.float32) / 32767.0
+            if context.stream_format.pcm_encoding == AudioEncoding.FLOAT32:
+                float32_array = np.frombuffer(data_bytes, dtype=np.float32)
+            else:
+                # 将bytes转换为int16数组，然后归一化到-1.0到1.0的float32范围
+                int16_array = np.frombuffer(data_bytes, dtype=np.int16)
+                float32_array = int16_array.astype(np.float32) / 32767.0
 
             # 记录音频解码耗时
             decode_end_time = asyncio.get_running_loop().time()
@@ -55,8 +113,8 @@ async def run_decode_vad_appender(context: Context) -> None:
             # VAD输入开始计时
             vad_input_start_time = asyncio.get_running_loop().time()
 
-            # 直接推送到VAD处理器，跳过中间队列
-            context.VADProcessor.append_audio(float32_array)
+            # 直接推送到VAD处理器，跳过中间队列（chunk 队列满时按溢出策略丢弃或等待）
+            await context.VADProcessor.append_audio(float32_array)
 
             # 计算VAD输入耗时
             vad_input_end_time = asyncio.get_running_loop().time()
@@ -78,6 +136,10 @@ async def run_vad_processor(context: Context) -> None:
 
             result = await context.VADProcessor.process_chunk()
             speech_segments = context.VADProcessor.process_result(result)
+            get_capacity_planner().record_vad(
+                context.VADProcessor.last_inference_seconds,
+                context.VADProcessor.chunk_size_samples / context.VADProcessor.sample_rate,
+            )
 
             end_time = asyncio.get_running_loop().time()
             duration = end_time - start_time
@@ -87,10 +149,11 @@ async def run_vad_processor(context: Context) -> None:
                 logger.debug("[性能指标] VAD处理耗时: {duration:.4f}s", duration=duration)
 
             for segment in speech_segments:
-                start, end, audio_data = segment
-                logger.info("[VAD] 检测到语音段: {start:.2f}s - {end:.2f}s, 长度: {length:.2f}s", start=start / 1000, end=end / 1000,
-                            length=len(audio_data) / 16000)
-                await context.audio_segment_queue.put(audio_data)
+                start, end, audio_data, trace = segment
+                trace.attributes["context_id"] = context.context_id
+                logger.info("[VAD] 检测到语音段: {start:.2f}s - {end:.2f}s, 长度: {length:.2f}s, trace={trace_id}", start=start / 1000, end=end / 1000,
+                            length=len(audio_data) / 16000, trace_id=trace.trace_id)
+                await put_traced(context.audio_segment_queue, "audio_segment", audio_data, trace)
         except Exception as e:
             logger.exception("VAD处理错误")
 
@@ -99,15 +162,22 @@ async def run_asr_processor(context: Context, websocket: WebSocket) -> None:
     """ASR处理逻辑代码"""
     logger.info("ASR处理器已启动")
     while True:
+        trace: Trace | None = None
         try:
             # 从VAD队列中获取分割好的语音片段
-            segment: npt[np.float32] = await context.audio_segment_queue.get()
+            segment, trace = await get_traced(context.audio_segment_queue, "audio_segment")
             # 使用ASR处理器处理音频数据
             start_time = asyncio.get_running_loop().time()
-            recognized_text = await asyncio.to_thread(dependencies.asr_processor.process_audio_data, segment)
+            with trace.span("asr.recognize") as span:
+                async with lease(dependencies.component_slots.get("asr"), dependencies.asr_processor) as asr_processor:
+                    with measure_compute() as compute:
+                        recognized_text = await run_in(WorkloadClass.ASR, asr_processor.process_audio_data, segment)
+                span["text.length"] = len(recognized_text or "")
 
             end_time = asyncio.get_running_loop().time()
             duration = end_time - start_time
+            # 容量估算只计模型计算耗时；duration 含租约与执行器排队，只用于延迟指标
+            get_capacity_planner().record_asr(compute[0], len(segment) / context.VADProcessor.sample_rate)
             # 记录性能指标
             dependencies.metrics_manager.record(MetricType.ASR_RECOGNIZE, duration, context.context_id)
             logger.info("[性能指标] ASR识别耗时: {duration:.3f}s", duration=duration)
@@ -125,10 +195,14 @@ async def run_asr_processor(context: Context, websocket: WebSocket) -> None:
                 except Exception as e:
                     logger.warning(f"发送ASR结果失败: {e}")
                 
-                await context.asr_output_queue.put(recognized_text)
+                await put_traced(context.asr_output_queue, "asr_output", recognized_text, trace)
+            else:
+                trace.finish("empty")
 
         except Exception as e:
             logger.exception("[ASR错误]")
+            if trace is not None:
+                trace.finish("error")
             # 可以选择是否继续处理或退出
             # break
 
@@ -137,29 +211,17 @@ async def run_llm_rag_processor(context: Context, websocket: WebSocket) -> None:
     """LLM/RAG处理逻辑代码"""
     logger.info("LLM/RAG处理器已启动")
 
-    # 导入MetadataType用于分类检索
-    from src.module.rag.base_rag_processor import MetadataType
-
     while True:
+        trace: Trace | None = None
         try:
-            recognized_text = await context.asr_output_queue.get()
+            recognized_text, trace = await get_traced(context.asr_output_queue, "asr_output")
 
             # 开始RAG检索计时
             rag_start_time = asyncio.get_running_loop().time()
 
-            # 从配置中获取分类检索的 top_k 值
-            rag_settings = dependencies.rag_processor.settings
-            # 分别检索每种类型的文档
-            door_docs = []
-            # door_docs = await dependencies.rag_processor.retrieve_context(
-            #     recognized_text, metadata_types=[MetadataType.DOOR], top_k=rag_settings.door_top_k
-            # )
-            video_docs = await dependencies.rag_processor.retrieve_context(
-                recognized_text, metadata_types=[MetadataType.MEDIA], top_k=rag_settings.media_top_k
-            )
-            device_docs = await dependencies.rag_processor.retrieve_context(
-                recognized_text, metadata_types=[MetadataType.DEVICE], top_k=rag_settings.device_top_k
-            )
+            # 分类检索文档（设备优先在用户所在区域内检索）
+            with trace.span("rag.retrieve"):
+                retrieved_docs_by_type = await retrieve_docs_by_type(recognized_text, context.location)
 
             # 记录RAG检索耗时
             rag_end_time = asyncio.get_running_loop().time()
@@ -167,13 +229,6 @@ async def run_llm_rag_processor(context: Context, websocket: WebSocket) -> None:
             dependencies.metrics_manager.record(MetricType.RAG_RETRIEVE, rag_duration, context.context_id)
             logger.info("[性能指标] RAG检索耗时: {duration:.3f}s", duration=rag_duration)
 
-            # 构建分类后的RAG文档字典
-            retrieved_docs_by_type = {
-                "door": door_docs,
-                "video": video_docs,
-                "device": device_docs
-            }
-
             # LLM生成开始计时
             llm_start_time = asyncio.get_running_loop().time()
 
@@ -181,12 +236,15 @@ async def run_llm_rag_processor(context: Context, websocket: WebSocket) -> None:
             chat_history_messages = context.chat_history
 
             # 执行指令重试，获取AI消息和命令列表
-            ai_message, commands, tool_messages = await dependencies.llm_processor.get_response_with_retries(
-                user_input=recognized_text,
-                rag_docs=retrieved_docs_by_type,
-                user_location=context.location,
-                chat_history=chat_history_messages
-            )
+            with trace.span("llm.generate") as span:
+                async with lease(dependencies.component_slots.get("llm"), dependencies.llm_processor) as llm_processor:
+                    ai_message, commands, tool_messages = await llm_processor.get_response_with_retries(
+                        user_input=recognized_text,
+                        rag_docs=retrieved_docs_by_type,
+                        user_location=context.location,
+                        chat_history=chat_history_messages
+                    )
+                span["commands"] = len(commands)
 
             # 计算LLM生成耗时
             llm_end_time = asyncio.get_running_loop().time()
@@ -212,13 +270,16 @@ async def run_llm_rag_processor(context: Context, websocket: WebSocket) -> None:
                 }, ensure_ascii=False)
                 await websocket.send_text(no_command_payload)
                 logger.info("[提示] 未识别到有效指令，已通知用户")
+                trace.finish("no_command")
                 continue
 
             # 将命令列表放入队列，由执行器异步处理
-            await context.command_queue.put(commands)
+            await put_traced(context.command_queue, "command", commands, trace)
 
         except Exception as e:
             logger.exception("[LLM/RAG错误]")
+            if trace is not None:
+                trace.finish("error")
             # 可以选择是否继续处理或退出
             # break
 
@@ -227,11 +288,13 @@ async def run_command_executor(context: Context, websocket: WebSocket) -> None:
     """异步执行命令：本地执行或发送到前端"""
     logger.info("命令执行器已启动")
     while True:
+        trace: Trace | None = None
         try:
-            commands: list[ExhibitionCommand] = await context.command_queue.get()
+            commands, trace = await get_traced(context.command_queue, "command")
             user_id = context.context_id
 
             start_time = asyncio.get_running_loop().time()
+            start_ns = time.time_ns()
             execution_results: list[dict] = []
 
             # 1. 先执行本地命令（仅 update_location 在本地执行）
@@ -256,7 +319,9 @@ async def run_command_executor(context: Context, websocket: WebSocket) -> None:
             for cmd in remote_commands:
                 logger.info("[AEP命令] {cmd}", cmd=cmd.model_dump())
 
-                aep_result = await _execute_aep_command(cmd, context, websocket, user_id)
+                with trace.span("aep.command", action=cmd.action, device=cmd.device_name) as span:
+                    aep_result = await _execute_aep_command(cmd, context, websocket, user_id)
+                    span["success"] = bool(aep_result.get("success"))
                 execution_results.append(aep_result)
                 logger.info("[AEP命令结果] {result}", result=aep_result)
 
@@ -280,9 +345,14 @@ async def run_command_executor(context: Context, websocket: WebSocket) -> None:
             # 记录性能指标
             dependencies.metrics_manager.record(MetricType.CMD_EXECUTE, duration, context.context_id)
             logger.info("[性能指标] 命令执行耗时: {duration:.4f}s", duration=duration)
+            trace.add_span("cmd.execute", start_ns, time.time_ns(), commands=len(commands))
+            trace.finish("ok")
+            logger.info("[链路] {trace_id} 端到端耗时 {duration:.3f}s", trace_id=trace.trace_id, duration=trace.duration)
 
         except Exception as e:
             logger.exception("[命令执行错误]")
+            if trace is not None:
+                trace.finish("error")
 
 
 async def _execute_local_command(cmd: ExhibitionCommand, context: Context) -> dict:
@@ -0,0 +1,232 @@
+"""
+SQLite storage backend for the exhibition catalog.
+
+The store is the durable source of truth when `data.backend = "sqlite"`; DataService
+still serves every read from its in-memory snapshot and only touches the store on
+reload and on writes. Each section is one table keyed by name, with secondary
+indexes for area/type lookups and an FTS5 index over names, aliases and
+descriptions. The database runs in WAL mode so an export or an external reader
+never blocks a writer.
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Iterable
+
+from loguru import logger
+
+
+# section -> (columns, list-valued columns, indexed columns, full-text columns)
+SECTION_SCHEMAS: dict[str, tuple[list[str], tuple[str, ...], tuple[str, ...], tuple[str, ...]]] = {
+    "devices": (
+        ["name", "type", "subType", "command", "area", "view", "aliases", "description"],
+        ("command", "view"),
+        ("area", "type"),
+        ("name", "aliases", "description"),
+    ),
+    "areas": (
+        ["name", "aliases", "description"],
+        (),
+        (),
+        ("name", "aliases", "description"),
+    ),
+    "media": (
+        ["name", "type", "aliases", "description"],
+        (),
+        ("type",),
+        ("name", "aliases", "description"),
+    ),
+    "doors": (
+        ["name", "type", "area1", "area2", "location"],
+        (),
+        ("type", "area1", "area2"),
+        ("name", "location"),
+    ),
+}
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SQLiteCatalogStore:
+    """
+    Catalog persistence in a single SQLite file.
+
+    Row order follows the rowid, so an upsert of an existing name keeps the item's
+    position exactly like the CSV "later rows win" merge does. All methods are
+    blocking and meant to be called from a worker thread; a lock serializes access
+    to the shared connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.fts_enabled = self._create_schema()
+        logger.info(f"Opened SQLite catalog store {path} (fts={'on' if self.fts_enabled else 'off'})")
+
+    def _create_schema(self) -> bool:
+        """Create tables, indexes and FTS triggers if missing. Returns whether FTS5 is available."""
+        with self._conn:
+            for section, (columns, _, indexed, _) in SECTION_SCHEMAS.items():
+                column_defs = ", ".join(
+                    f"{_quote(col)} TEXT PRIMARY KEY" if col == "name" else f"{_quote(col)} TEXT NOT NULL DEFAULT ''"
+                    for col in columns
+                )
+                self._conn.execute(f"CREATE TABLE IF NOT EXISTS {section} ({column_defs})")
+                for col in indexed:
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{section}_{col} ON {section} ({_quote(col)})"
+                    )
+
+        try:
+            with self._conn:
+                for section, (_, _, _, fts_columns) in SECTION_SCHEMAS.items():
+                    self._create_fts(section, fts_columns)
+            return True
+        except sqlite3.OperationalError as e:
+            # FTS5 (or its trigram tokenizer, SQLite >= 3.34) is compiled out; search falls back to a scan
+            logger.warning(f"SQLite FTS5 unavailable, catalog search will scan the snapshot: {e}")
+            return False
+
+    def _create_fts(self, section: str, columns: tuple[str, ...]) -> None:
+        """External-content FTS5 table kept in sync by triggers; trigram tokens also match inside CJK text."""
+        fts = f"{section}_fts"
+        cols = ", ".join(_quote(c) for c in columns)
+        new_values = ", ".join(f"new.{_quote(c)}" for c in columns)
+        old_values = ", ".join(f"old.{_quote(c)}" for c in columns)
+        self._conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, "
+            f"content='{section}', content_rowid='rowid', tokenize='trigram')"
+        )
+        self._conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {section}_ai AFTER INSERT ON {section} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END"
+        )
+        self._conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {section}_ad AFTER DELETE ON {section} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); END"
+        )
+        self._conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {section}_au AFTER UPDATE ON {section} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def is_empty(self) -> bool:
+        """True when no section holds any row (used to trigger the one-time CSV import)."""
+        with self._lock:
+            return not any(
+                self._conn.execute(f"SELECT 1 FROM {section} LIMIT 1").fetchone()
+                for section in SECTION_SCHEMAS
+            )
+
+    def load_section(self, section: str) -> dict[str, dict[str, Any]]:
+        """Read a whole section as name -> item dict, list columns decoded, in insertion order."""
+        columns, list_columns, _, _ = SECTION_SCHEMAS[section]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_quote(c) for c in columns)} FROM {section} ORDER BY rowid"
+            ).fetchall()
+        list_indexes = [columns.index(c) for c in list_columns]
+        items: dict[str, dict[str, Any]] = {}
+        for row in rows:
+            values = list(row)
+            for i in list_indexes:
+                values[i] = json.loads(values[i]) if values[i] else []
+            items[values[0]] = dict(zip(columns, values))
+        return items
+
+    def _encode_rows(self, section: str, items: Iterable[dict[str, Any]]) -> list[tuple[str, ...]]:
+        columns = SECTION_SCHEMAS[section][0]
+        return [
+            tuple(
+                json.dumps(list(value), ensure_ascii=False) if isinstance(value, (list, tuple))
+                else "" if value is None else str(value)
+                for value in (item.get(col) for col in columns)
+            )
+            for item in items
+        ]
+
+    def upsert(self, section: str, items: Iterable[dict[str, Any]]) -> int:
+        """Insert or update items by name in one transaction. Returns the number of rows written."""
+        columns = SECTION_SCHEMAS[section][0]
+        rows = self._encode_rows(section, items)
+        if not rows:
+            return 0
+        quoted = [_quote(c) for c in columns]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in quoted[1:])
+        sql = (
+            f"INSERT INTO {section} ({', '.join(quoted)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(name) DO UPDATE SET {updates}"
+        )
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+        return len(rows)
+
+    def delete(self, section: str, names: Iterable[str]) -> list[str]:
+        """Delete items by name. Returns the names that actually existed."""
+        names = list(dict.fromkeys(names))
+        if not names:
+            return []
+        deleted: list[str] = []
+        with self._lock, self._conn:
+            for name in names:
+                if self._conn.execute(f"DELETE FROM {section} WHERE name = ?", (name,)).rowcount:
+                    deleted.append(name)
+        return deleted
+
+    def clear(self, section: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {section}")
+
+    def replace_section(self, section: str, items: Iterable[dict[str, Any]]) -> int:
+        """Atomically replace a section's contents (used by the CSV import)."""
+        columns = SECTION_SCHEMAS[section][0]
+        rows = self._encode_rows(section, items)
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {section}")
+            self._conn.executemany(
+                f"INSERT INTO {section} ({', '.join(_quote(c) for c in columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                rows,
+            )
+        return len(rows)
+
+    def search(self, text: str, section: str, limit: int = 20) -> list[str]:
+        """
+        Full-text search in one section, best matches first. Returns item names.
+
+        The trigram tokenizer needs at least three characters per term; shorter
+        queries use a LIKE scan over the same columns.
+        """
+        fts_columns = SECTION_SCHEMAS[section][3]
+        text = text.strip()
+        if not text:
+            return []
+        with self._lock:
+            if self.fts_enabled and len(text) >= 3:
+                query = '"' + text.replace('"', '""') + '"'
+                rows = self._conn.execute(
+                    f"SELECT t.name FROM {section}_fts f JOIN {section} t ON t.rowid = f.rowid "
+                    f"WHERE {section}_fts MATCH ? ORDER BY f.rank LIMIT ?",
+                    (query, limit),
+                ).fetchall()
+            else:
+                pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                condition = " OR ".join(f"{_quote(c)} LIKE ? ESCAPE '\\'" for c in fts_columns)
+                rows = self._conn.execute(
+                    f"SELECT name FROM {section} WHERE {condition} ORDER BY rowid LIMIT ?",
+                    (*([pattern] * len(fts_columns)), limit),
+                ).fetchall()
+        return [row[0] for row in rows]
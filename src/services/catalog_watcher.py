@@ -0,0 +1,180 @@
+"""
+目录 CSV 文件监听与增量热更新
+
+监听 DataSettings 中配置的 CSV 文件，去抖合并一批写入后只重新加载变化的文件，
+对比新旧快照得到差异，再把差异同步给 RAG 向量库（按名称增量删除/添加）、ASR 热词
+以及注册的变更监听器（推理服务用它向各工作进程发布目录变更）。优先使用 watchfiles（inotify 等系统通知），不可用时退化为轮询。
+重新加载在线程中执行，所有同步都在后台任务里进行，不阻塞在线会话。
+"""
+import asyncio
+import inspect
+import os
+import time
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from src.config.config import DataSettings
+from src.core import dependencies
+from src.core.executors import WorkloadClass, run_in
+from src.services.data_service import DataService, SectionDelta, diff_snapshots
+
+ChangeListener = Callable[[dict[str, SectionDelta]], Awaitable[None] | None]
+
+# 数据分区 -> RAG 文档类型
+SECTION_DOC_TYPES = {
+    "devices": "device",
+    "areas": "area",
+    "media": "media",
+    "doors": "door",
+}
+
+
+class CatalogWatcher:
+    """后台监听目录 CSV 文件并增量传播变化"""
+
+    def __init__(self, data_service: DataService, settings: DataSettings) -> None:
+        self.data_service = data_service
+        self.settings = settings
+        self._listeners: list[ChangeListener] = []
+        self._task: asyncio.Task | None = None
+        self._stop_event = asyncio.Event()
+        self._change_lock = asyncio.Lock()
+        self.mode: str | None = None  # "notify" 或 "polling"
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """注册变更监听器（如推理服务的目录变更发布），参数为 {分区: SectionDelta}"""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stop_event.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stop_event.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _sections_for(self, changed_paths: set[str]) -> list[str]:
+        paths = self.data_service.section_paths()
+        return [section for section, path in paths.items() if path in changed_paths]
+
+    async def _run(self) -> None:
+        try:
+            from watchfiles import awatch
+        except ImportError:
+            awatch = None
+
+        if awatch is not None:
+            try:
+                await self._watch_notify(awatch)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"文件系统通知不可用，改用轮询监听数据文件: {e}")
+        await self._watch_polling()
+
+    async def _watch_notify(self, awatch) -> None:
+        paths = set(self.data_service.section_paths().values())
+        # 监听所在目录：编辑器和 _write_atomic 都是写临时文件后 rename 替换
+        directories = sorted({os.path.dirname(path) for path in paths if os.path.isdir(os.path.dirname(path))})
+        if not directories:
+            raise FileNotFoundError("数据文件目录不存在")
+
+        self.mode = "polling" if self.settings.watch_force_polling else "notify"
+        logger.info(f"开始监听数据文件 ({self.mode}): {sorted(paths)}")
+        async for changes in awatch(
+            *directories,
+            watch_filter=lambda _, path: os.path.abspath(path) in paths,
+            debounce=self.settings.watch_debounce_ms,
+            recursive=False,
+            force_polling=self.settings.watch_force_polling or None,
+            poll_delay_ms=int(self.settings.watch_poll_interval * 1000),
+            stop_event=self._stop_event,
+        ):
+            await self.handle_change(self._sections_for({os.path.abspath(path) for _, path in changes}))
+
+    async def _watch_polling(self) -> None:
+        """按 (mtime, size) 轮询；签名连续一个去抖窗口不再变化后才重新加载"""
+        self.mode = "polling"
+        paths = self.data_service.section_paths()
+        logger.info(f"开始轮询数据文件: {sorted(paths.values())}")
+        last = {section: self._signature(path) for section, path in paths.items()}
+        pending: set[str] = set()
+        changed_at = 0.0
+        debounce = self.settings.watch_debounce_ms / 1000
+
+        while not self._stop_event.is_set():
+            await asyncio.sleep(self.settings.watch_poll_interval)
+            current = {section: self._signature(path) for section, path in paths.items()}
+            changed = {section for section in current if current[section] != last[section]}
+            last = current
+            if changed:
+                pending |= changed
+                changed_at = time.monotonic()
+            elif pending and time.monotonic() - changed_at >= debounce:
+                sections, pending = sorted(pending), set()
+                await self.handle_change(sections)
+
+    @staticmethod
+    def _signature(path: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def handle_change(self, sections: list[str]) -> dict[str, SectionDelta]:
+        """重新加载变化的分区，计算差异并传播；返回差异（无变化时为空）"""
+        if not sections:
+            return {}
+        # 文件通知与工作进程的同步请求可能同时到达，串行处理，每次差异都基于上一次发布的快照
+        async with self._change_lock:
+            old = self.data_service.snapshot
+            if not await run_in(WorkloadClass.MAINTENANCE, self.data_service.reload, sections):
+                logger.error(f"数据文件重新加载失败，保留当前数据: {sections}")
+                return {}
+            deltas = diff_snapshots(old, self.data_service.snapshot)
+            if not deltas:
+                # 通过接口写入的变化已经同步过，这里只会看到相同的数据
+                logger.debug(f"数据文件已变化但内容无差异: {sections}")
+                return {}
+
+            logger.info("数据文件热更新: {summary}", summary={
+                section: {"upserted": len(delta.upserted), "deleted": len(delta.deleted)}
+                for section, delta in deltas.items()
+            })
+            await self._propagate(deltas)
+            return deltas
+
+    async def _propagate(self, deltas: dict[str, SectionDelta]) -> None:
+        rag_processor = dependencies.rag_processor
+        if rag_processor is not None:
+            from src.module.rag.base_rag_processor import RAGStatus
+            if rag_processor.status == RAGStatus.READY:
+                for section, delta in deltas.items():
+                    try:
+                        await rag_processor.apply_delta(SECTION_DOC_TYPES[section], list(delta.upserted), list(delta.deleted))
+                    except Exception as e:
+                        logger.exception(f"RAG 增量同步 {section} 失败: {e}")
+            else:
+                logger.info("RAG 处理器未就绪，跳过增量同步（初始化时会加载最新数据）")
+
+        asr_processor = dependencies.asr_processor
+        if asr_processor is not None:
+            asr_processor.update_hotwords(self.data_service.get_all_hotwords())
+
+        for listener in self._listeners:
+            try:
+                result = listener(deltas)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.exception(f"数据变更监听器执行失败: {e}")
@@ -1,19 +1,136 @@
+import csv
+import io
 import os
 import shutil
+import tempfile
 import threading
-import pandas as pd
-from typing import Any
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Mapping
 from loguru import logger
 from pydantic import BaseModel
 from langchain_core.documents import Document
 
 from src.config.config import get_settings
+from src.core.executors import WorkloadClass, run_in
 from src.api.schemas import DeviceItem, AreaItem, MediaItem, DoorItem
+from src.services.catalog_store import SECTION_SCHEMAS, SQLiteCatalogStore
+
+# pandas is imported only when CSV data is parsed, keeping it off the app import path
+if TYPE_CHECKING:
+    import pandas as pd
+
+def _freeze_item(item: Mapping[str, Any]) -> Mapping[str, Any]:
+    """Convert a catalog item to a read-only mapping; list fields become tuples."""
+    if isinstance(item, MappingProxyType):
+        return item
+    return MappingProxyType({k: tuple(v) if isinstance(v, list) else v for k, v in item.items()})
+
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Immutable view of the whole catalog.
+
+    A new snapshot is built off to the side on every change and published by a
+    single reference assignment, so readers never lock or copy. `generation`
+    increases with every published snapshot and can be used as a cache key.
+    """
+    generation: int = 0
+    media: Mapping[str, Mapping[str, Any]] = _EMPTY
+    doors: Mapping[str, Mapping[str, Any]] = _EMPTY
+    devices: Mapping[str, Mapping[str, Any]] = _EMPTY
+    areas: Mapping[str, Mapping[str, Any]] = _EMPTY
+    # Derived indexes
+    media_items: tuple[Mapping[str, Any], ...] = ()
+    door_items: tuple[Mapping[str, Any], ...] = ()
+    device_items: tuple[Mapping[str, Any], ...] = ()
+    area_items: tuple[Mapping[str, Any], ...] = ()
+    devices_by_area: Mapping[str, tuple[Mapping[str, Any], ...]] = _EMPTY
+    area_aliases: Mapping[str, str] = _EMPTY
+    area_aliases_by_length: tuple[tuple[str, str], ...] = field(default=())
+
+    @classmethod
+    def build(
+        cls,
+        generation: int,
+        media: Mapping[str, Mapping[str, Any]],
+        doors: Mapping[str, Mapping[str, Any]],
+        devices: Mapping[str, Mapping[str, Any]],
+        areas: Mapping[str, Mapping[str, Any]],
+    ) -> "CatalogSnapshot":
+        """Build a snapshot from plain or already frozen item dicts."""
+        media = MappingProxyType({k: _freeze_item(v) for k, v in media.items()})
+        doors = MappingProxyType({k: _freeze_item(v) for k, v in doors.items()})
+        devices = MappingProxyType({k: _freeze_item(v) for k, v in devices.items()})
+        areas = MappingProxyType({k: _freeze_item(v) for k, v in areas.items()})
+
+        # Area name/alias lookup
+        area_aliases: dict[str, str] = {}
+        for name, area in areas.items():
+            area_aliases[name] = name
+            for alias in str(area.get("aliases", "")).split(","):
+                alias = alias.strip()
+                if alias and alias != "nan":
+                    area_aliases.setdefault(alias, name)
+
+        # Per-area device subsets
+        devices_by_area: dict[str, list[Mapping[str, Any]]] = {}
+        for device in devices.values():
+            area = device.get("area", "")
+            if area:
+                devices_by_area.setdefault(area_aliases.get(area, area), []).append(device)
+
+        return cls(
+            generation=generation,
+            media=media,
+            doors=doors,
+            devices=devices,
+            areas=areas,
+            media_items=tuple(media.values()),
+            door_items=tuple(doors.values()),
+            device_items=tuple(devices.values()),
+            area_items=tuple(areas.values()),
+            devices_by_area=MappingProxyType({k: tuple(v) for k, v in devices_by_area.items()}),
+            area_aliases=MappingProxyType(area_aliases),
+            area_aliases_by_length=tuple(sorted(area_aliases.items(), key=lambda kv: len(kv[0]), reverse=True)),
+        )
+
+
+@dataclass(frozen=True)
+class SectionDelta:
+    """Items added or changed (`upserted`) and names removed (`deleted`) in one section between two snapshots."""
+    upserted: tuple[Mapping[str, Any], ...] = ()
+    deleted: tuple[str, ...] = ()
+
+
+def diff_snapshots(old: CatalogSnapshot, new: CatalogSnapshot) -> dict[str, SectionDelta]:
+    """
+    Compare two snapshots section by section; only sections with changes are returned.
+    Sections reused by reference between snapshots are skipped without comparing items.
+    """
+    deltas: dict[str, SectionDelta] = {}
+    for section in ("media", "doors", "devices", "areas"):
+        before, after = getattr(old, section), getattr(new, section)
+        if before is after:
+            continue
+        upserted = tuple(item for name, item in after.items() if before.get(name) != item)
+        deleted = tuple(name for name in before if name not in after)
+        if upserted or deleted:
+            deltas[section] = SectionDelta(upserted=upserted, deleted=deleted)
+    return deltas
+
 
 class DataService:
     """
     Data Service for managing exhibition data (media, devices, areas, doors).
     Replaces CSVLoader and provides write capabilities.
+
+    The durable source is either the CSV files (`data.backend = "csv"`) or a
+    SQLite store (`"sqlite"`); in both cases reads are served from the snapshot.
     """
     _instance = None
     _lock = threading.Lock()
@@ -29,45 +146,64 @@ class DataService:
         if hasattr(self, '_initialized'):
             return
 
+        # Serializes writers only; readers use the published snapshot without locking
         self._data_lock = threading.Lock()
-        self._media_cache: dict[str, dict[str, Any]] = {}
-        self._doors_cache: dict[str, dict[str, Any]] = {}
-        self._devices_cache: dict[str, dict[str, Any]] = {}
-        self._areas_cache: dict[str, dict[str, Any]] = {}
+        self._snapshot = CatalogSnapshot()
+        self._store: SQLiteCatalogStore | None = None
+        data_settings = get_settings().data
+        if data_settings.backend == "sqlite":
+            self._store = SQLiteCatalogStore(data_settings.sqlite_path)
+        elif data_settings.backend != "csv":
+            raise ValueError(f"Unknown data backend: {data_settings.backend}")
         self._initialized = True
         
         self.reload()
 
-    def reload(self) -> bool:
-        """Reload data from CSV files."""
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """The current immutable catalog snapshot."""
+        return self._snapshot
+
+    @property
+    def generation(self) -> int:
+        """Generation number of the current snapshot, bumped on every change."""
+        return self._snapshot.generation
+
+    def _publish(self, media=None, doors=None, devices=None, areas=None) -> CatalogSnapshot:
+        """Build the next snapshot (unchanged sections are reused) and swap it in. Caller holds _data_lock."""
+        current = self._snapshot
+        snapshot = CatalogSnapshot.build(
+            generation=current.generation + 1,
+            media=current.media if media is None else media,
+            doors=current.doors if doors is None else doors,
+            devices=current.devices if devices is None else devices,
+            areas=current.areas if areas is None else areas,
+        )
+        self._snapshot = snapshot
+        return snapshot
+
+    @property
+    def backend(self) -> str:
+        return "csv" if self._store is None else "sqlite"
+
+    def reload(self, sections: list[str] | None = None) -> bool:
+        """
+        Reload data from the configured backend. With the CSV backend, `sections`
+        limits the reload to those files; the other sections are reused as-is.
+        """
         try:
-            settings = get_settings()
-            # Use settings paths directly from DataSettings
-            media_path = settings.data.media_data_path
-            devices_path = settings.data.devices_data_path
-            areas_path = settings.data.areas_data_path
-            doors_path = settings.data.doors_data_path
-
             with self._data_lock:
-                if os.path.exists(media_path):
-                    media_df = self._load_csv_file(media_path)
-                    self._media_cache = self._process_media_data(media_df)
-                    logger.info(f"Loaded {len(self._media_cache)} media items from {media_path}")
-
-                if os.path.exists(doors_path):
-                    doors_df = self._load_csv_file(doors_path)
-                    self._doors_cache = self._process_doors_data(doors_df)
-                    logger.info(f"Loaded {len(self._doors_cache)} doors from {doors_path}")
-
-                if os.path.exists(devices_path):
-                    devices_df = self._load_csv_file(devices_path)
-                    self._devices_cache = self._process_devices_data(devices_df)
-                    logger.info(f"Loaded {len(self._devices_cache)} devices from {devices_path}")
-
-                if os.path.exists(areas_path):
-                    areas_df = self._load_csv_file(areas_path)
-                    self._areas_cache = self._process_areas_data(areas_df)
-                    logger.info(f"Loaded {len(self._areas_cache)} areas from {areas_path}")
+                if self._store is None:
+                    loaded = self._load_csv_sections(sections)
+                else:
+                    if self._store.is_empty():
+                        self._import_csv_locked()
+                    loaded = {section: self._store.load_section(section) for section in self._SECTIONS}
+                    logger.info("Loaded catalog from {path}: {counts}", path=self._store.path,
+                                counts={section: len(items) for section, items in loaded.items()})
+
+                snapshot = self._publish(**loaded)
+                logger.info(f"Published catalog snapshot generation {snapshot.generation}")
 
             return True
 
@@ -75,187 +211,224 @@ class DataService:
             logger.exception(f"Failed to reload data: {e}")
             return False
 
-    def _load_csv_file(self, file_path: str) -> pd.DataFrame:
+    def _load_csv_sections(self, only: list[str] | None = None) -> dict[str, dict[str, dict[str, Any]]]:
+        """Parse every existing section CSV; missing files are left out so the current section is kept."""
+        sections = {}
+        for section in ("media", "doors", "devices", "areas"):
+            if only is not None and section not in only:
+                continue
+            file_path = self._section_path(section)
+            if os.path.exists(file_path):
+                sections[section] = self._process_section(section, self._load_csv_file(file_path))
+                logger.info(f"Loaded {len(sections[section])} {section} items from {file_path}")
+        return sections
+
+    def close(self) -> None:
+        """Close the SQLite store, if any."""
+        if self._store is not None:
+            self._store.close()
+
+    def _load_csv_file(self, file_path: str) -> "pd.DataFrame":
+        import pandas as pd
+
         try:
-            return pd.read_csv(file_path)
+            self._rollback_torn_append(file_path)
+            # Read every column as text and keep empty cells as "" so no per-row NaN handling is needed
+            return pd.read_csv(file_path, dtype=str, keep_default_na=False, na_filter=False)
         except Exception as e:
             logger.error(f"Failed to read CSV file '{file_path}': {e}")
             return pd.DataFrame()
 
-    def _process_media_data(self, df: pd.DataFrame) -> dict[str, dict[str, Any]]:
-        media_dict = {}
-        if df.empty: return media_dict
-        for _, row in df.iterrows():
-            name = str(row.get("name", "")).strip()
-            if not name: continue
-            media_dict[name] = {
-                "name": name,
-                "type": str(row.get("type", "video")),
-                "aliases": str(row.get("aliases", "")),
-                "description": str(row.get("description", ""))
-            }
-        return media_dict
-
-    def _process_doors_data(self, df: pd.DataFrame) -> dict[str, dict[str, Any]]:
-        doors_dict = {}
-        if df.empty: return doors_dict
-        for _, row in df.iterrows():
-            name = str(row.get("name", "")).strip()
-            if not name: continue
-            doors_dict[name] = {
-                "name": name,
-                "type": str(row.get("type", "")).strip(),
-                "area1": str(row.get("area1", "")).strip(),
-                "area2": str(row.get("area2", "")).strip(),
-                "location": str(row.get("location", "")).strip()
-            }
-        return doors_dict
-
-    def _process_areas_data(self, df: pd.DataFrame) -> dict[str, dict[str, Any]]:
-        areas_dict = {}
-        if df.empty: return areas_dict
-        for _, row in df.iterrows():
-            name = str(row.get("name", "")).strip()
-            if not name: continue
-            areas_dict[name] = {
-                "name": name,
-                "aliases": str(row.get("aliases", "")),
-                "description": str(row.get("description", ""))
-            }
-        return areas_dict
-
-    def _process_devices_data(self, df: pd.DataFrame) -> dict[str, dict[str, Any]]:
+    @staticmethod
+    def _column(df: "pd.DataFrame", name: str, default: str = "", strip: bool = True) -> list[str]:
+        """Return a column as a list of str, vectorized; missing columns are filled with the default."""
+        if name not in df.columns:
+            return [default] * len(df)
+        column = df[name].astype(str)
+        if strip:
+            column = column.str.strip()
+        return column.tolist()
+
+    @staticmethod
+    def _parse_list_column(values: list[str], field_name: str) -> list[list]:
+        """
+        Parse a column of JSON list strings in one json.loads call.
+        Empty cells become []. Falls back to per-value parsing only to report the offending value.
+        """
         import json
-        devices_dict = {}
-        if df.empty: return devices_dict
-        
-        def get_str_value(row, key, default=""):
-            """获取字符串值，处理NaN情况"""
-            val = row.get(key, default)
-            if pd.isna(val):
-                return default
-            return str(val).strip()
-        
-        def parse_list_field(raw_value, field_name=""):
-            """解析列表字段：仅支持JSON格式，非JSON格式会报错"""
-            if not raw_value or pd.isna(raw_value):
-                return []
-            if isinstance(raw_value, list):
-                return raw_value
-            if isinstance(raw_value, str) and raw_value.strip():
+        present = [i for i, v in enumerate(values) if v]
+        result: list[list] = [[] for _ in values]
+        if not present:
+            return result
+        try:
+            parsed = json.loads("[" + ",".join(values[i] for i in present) + "]")
+            if len(parsed) != len(present):
+                raise ValueError("length mismatch")
+        except ValueError:
+            # Locate the bad value for a precise error message
+            for i in present:
                 try:
-                    parsed = json.loads(raw_value)
-                    if isinstance(parsed, list):
-                        return parsed
-                    raise ValueError(f"字段 '{field_name}' 解析结果不是列表: {raw_value}")
+                    json.loads(values[i])
                 except json.JSONDecodeError as e:
-                    raise ValueError(f"字段 '{field_name}' 不是有效的JSON格式: {raw_value}") from e
-            return []
-        
-        for _, row in df.iterrows():
-            name = get_str_value(row, "name")
-            if not name: continue
-            
-            devices_dict[name] = {
-                "name": name,
-                "type": get_str_value(row, "type"),
-                "subType": get_str_value(row, "subType"),
-                "command": parse_list_field(row.get("command", ""), "command"),
-                "area": get_str_value(row, "area"),
-                "view": parse_list_field(row.get("view", ""), "view"),
-                "aliases": get_str_value(row, "aliases"),
-                "description": get_str_value(row, "description")
-            }
-        return devices_dict
+                    raise ValueError(f"字段 '{field_name}' 不是有效的JSON格式: {values[i]}") from e
+            raise ValueError(f"字段 '{field_name}' 包含无效的JSON值")
+        for i, value in zip(present, parsed):
+            if not isinstance(value, list):
+                raise ValueError(f"字段 '{field_name}' 解析结果不是列表: {values[i]}")
+            result[i] = value
+        return result
+
+    @staticmethod
+    def _rows_to_dict(names: list[str], columns: dict[str, list]) -> dict[str, dict[str, Any]]:
+        """Build name -> item dicts from column arrays; rows without a name are skipped, later rows win."""
+        keys = list(columns)
+        return {
+            name: dict(zip(keys, row))
+            for name, *row in zip(names, *columns.values())
+            if name
+        }
+
+    def _process_media_data(self, df: "pd.DataFrame") -> dict[str, dict[str, Any]]:
+        if df.empty: return {}
+        names = self._column(df, "name")
+        return self._rows_to_dict(names, {
+            "name": names,
+            "type": self._column(df, "type", "video", strip=False),
+            "aliases": self._column(df, "aliases", strip=False),
+            "description": self._column(df, "description", strip=False),
+        })
+
+    def _process_doors_data(self, df: "pd.DataFrame") -> dict[str, dict[str, Any]]:
+        if df.empty: return {}
+        names = self._column(df, "name")
+        return self._rows_to_dict(names, {
+            "name": names,
+            "type": self._column(df, "type"),
+            "area1": self._column(df, "area1"),
+            "area2": self._column(df, "area2"),
+            "location": self._column(df, "location"),
+        })
+
+    def _process_areas_data(self, df: "pd.DataFrame") -> dict[str, dict[str, Any]]:
+        if df.empty: return {}
+        names = self._column(df, "name")
+        return self._rows_to_dict(names, {
+            "name": names,
+            "aliases": self._column(df, "aliases", strip=False),
+            "description": self._column(df, "description", strip=False),
+        })
+
+    def _process_devices_data(self, df: "pd.DataFrame") -> dict[str, dict[str, Any]]:
+        if df.empty: return {}
+        names = self._column(df, "name")
+        return self._rows_to_dict(names, {
+            "name": names,
+            "type": self._column(df, "type"),
+            "subType": self._column(df, "subType"),
+            "command": self._parse_list_column(self._column(df, "command"), "command"),
+            "area": self._column(df, "area"),
+            "view": self._parse_list_column(self._column(df, "view"), "view"),
+            "aliases": self._column(df, "aliases"),
+            "description": self._column(df, "description"),
+        })
 
     # --- Read Methods ---
+    # Each method reads self._snapshot once; the returned objects are immutable.
 
     def media_exists(self, name: str) -> bool:
-        with self._data_lock:
-            return name in self._media_cache
+        return name in self._snapshot.media
 
     def door_exists(self, name: str) -> bool:
-        with self._data_lock:
-            return name in self._doors_cache
+        return name in self._snapshot.doors
 
-    def get_media_info(self, name: str) -> dict[str, Any] | None:
-        with self._data_lock:
-            return self._media_cache.get(name)
+    def get_media_info(self, name: str) -> Mapping[str, Any] | None:
+        return self._snapshot.media.get(name)
 
-    def get_door_info(self, name: str) -> dict[str, Any] | None:
-        with self._data_lock:
-            return self._doors_cache.get(name)
+    def get_door_info(self, name: str) -> Mapping[str, Any] | None:
+        return self._snapshot.doors.get(name)
 
-    def get_all_media(self) -> list[str]:
-        with self._data_lock:
-            return list(self._media_cache.keys())
+    def get_all_media(self) -> tuple[str, ...]:
+        return tuple(self._snapshot.media)
 
-    def get_all_doors(self) -> list[str]:
-        with self._data_lock:
-            return list(self._doors_cache.keys())
+    def get_all_doors(self) -> tuple[str, ...]:
+        return tuple(self._snapshot.doors)
 
     def area_exists(self, name: str) -> bool:
-        with self._data_lock:
-            return name in self._areas_cache
+        return name in self._snapshot.areas
 
-    def get_area_info(self, name: str) -> dict[str, Any] | None:
-        with self._data_lock:
-            return self._areas_cache.get(name)
+    def get_area_info(self, name: str) -> Mapping[str, Any] | None:
+        return self._snapshot.areas.get(name)
 
-    def get_all_areas(self) -> list[str]:
-        with self._data_lock:
-            return list(self._areas_cache.keys())
+    def get_all_areas(self) -> tuple[str, ...]:
+        return tuple(self._snapshot.areas)
 
     def device_exists(self, name: str) -> bool:
-        with self._data_lock:
-            return name in self._devices_cache
+        return name in self._snapshot.devices
 
-    def get_device_info(self, name: str) -> dict[str, Any] | None:
-        with self._data_lock:
-            return self._devices_cache.get(name)
+    def get_device_info(self, name: str) -> Mapping[str, Any] | None:
+        return self._snapshot.devices.get(name)
 
-    def get_all_devices(self) -> list[str]:
-        with self._data_lock:
-            return list(self._devices_cache.keys())
+    def get_all_devices(self) -> tuple[str, ...]:
+        return tuple(self._snapshot.devices)
 
-    def get_all_doors_data(self) -> list[dict[str, Any]]:
-        with self._data_lock:
-            return list(self._doors_cache.values())
+    def get_all_doors_data(self) -> tuple[Mapping[str, Any], ...]:
+        return self._snapshot.door_items
 
-    def get_all_media_data(self) -> list[dict[str, Any]]:
-        with self._data_lock:
-            return list(self._media_cache.values())
+    def get_all_media_data(self) -> tuple[Mapping[str, Any], ...]:
+        return self._snapshot.media_items
 
-    def get_all_devices_data(self) -> list[dict[str, Any]]:
-        with self._data_lock:
-            return list(self._devices_cache.values())
+    def get_all_devices_data(self) -> tuple[Mapping[str, Any], ...]:
+        return self._snapshot.device_items
 
-    def get_all_areas_data(self) -> list[dict[str, Any]]:
-        with self._data_lock:
-            return list(self._areas_cache.values())
+    def get_all_areas_data(self) -> tuple[Mapping[str, Any], ...]:
+        return self._snapshot.area_items
+
+    def resolve_area(self, name: str | None) -> str | None:
+        """Map an area name or alias to its canonical area name."""
+        if not name:
+            return None
+        return self._snapshot.area_aliases.get(name.strip())
+
+    def find_areas_in_text(self, text: str) -> list[str]:
+        """Return canonical areas whose name or alias appears in the text (longest match wins on overlap)."""
+        if not text:
+            return []
+        found: list[str] = []
+        remaining = text
+        for alias, area in self._snapshot.area_aliases_by_length:
+            if alias in remaining:
+                remaining = remaining.replace(alias, " ")
+                if area not in found:
+                    found.append(area)
+        return found
+
+    def get_devices_in_area(self, area: str) -> tuple[Mapping[str, Any], ...]:
+        """Get all devices located in the given area (name or alias)."""
+        snapshot = self._snapshot
+        return snapshot.devices_by_area.get(snapshot.area_aliases.get(area, area), ())
 
     def get_all_hotwords(self) -> list[str]:
         """Get all hotwords from unique values in data caches."""
         hotwords = set()
-        with self._data_lock:
-            # Media: name, aliases
-            for item in self._media_cache.values():
-                if item.get("name"): hotwords.add(item["name"])
-                if item.get("aliases"): hotwords.add(item["aliases"])
-            
-            # Devices: name, aliases
-            for item in self._devices_cache.values():
-                if item.get("name"): hotwords.add(item["name"])
-                if item.get("aliases"): hotwords.add(item["aliases"])
-
-            # Areas: name, aliases
-            for item in self._areas_cache.values():
-                if item.get("name"): hotwords.add(item["name"])
-                if item.get("aliases"): hotwords.add(item["aliases"])
-
-            # Doors: name
-            for item in self._doors_cache.values():
-                if item.get("name"): hotwords.add(item["name"])
+        snapshot = self._snapshot
+        # Media: name, aliases
+        for item in snapshot.media_items:
+            if item.get("name"): hotwords.add(item["name"])
+            if item.get("aliases"): hotwords.add(item["aliases"])
+
+        # Devices: name, aliases
+        for item in snapshot.device_items:
+            if item.get("name"): hotwords.add(item["name"])
+            if item.get("aliases"): hotwords.add(item["aliases"])
+
+        # Areas: name, aliases
+        for item in snapshot.area_items:
+            if item.get("name"): hotwords.add(item["name"])
+            if item.get("aliases"): hotwords.add(item["aliases"])
+
+        # Doors: name
+        for item in snapshot.door_items:
+            if item.get("name"): hotwords.add(item["name"])
 
         # Merging static hotwords from config
         settings = get_settings()
@@ -266,110 +439,293 @@ class DataService:
         return [w for w in hotwords if w and w.strip()]
 
     # --- Write Methods ---
+    # Writes run on the I/O executor (bulk CSV import/export on the maintenance one),
+    # append only the new rows and publish an incrementally updated snapshot instead
+    # of reloading every file.
+
+    _SECTIONS: dict[str, tuple[str, list[str]]] = {
+        "devices": ("devices_data_path", ['name', 'type', 'subType', 'command', 'area', 'view', 'aliases', 'description']),
+        "areas": ("areas_data_path", ['name', 'aliases', 'description']),
+        "media": ("media_data_path", ['name', 'type', 'aliases', 'description']),
+        "doors": ("doors_data_path", ['name', 'type', 'area1', 'area2', 'location']),
+    }
 
     async def add_devices(self, items: list[DeviceItem]) -> None:
-        settings = get_settings()
-        await self._append_to_csv(settings.data.devices_data_path, items, ['name', 'type', 'subType', 'command', 'area', 'view', 'aliases', 'description'])
-        self.reload()
+        await run_in(WorkloadClass.IO, self._append_items, "devices", items)
 
     async def add_areas(self, items: list[AreaItem]) -> None:
-        settings = get_settings()
-        await self._append_to_csv(settings.data.areas_data_path, items, ['name', 'aliases', 'description'])
-        self.reload()
+        await run_in(WorkloadClass.IO, self._append_items, "areas", items)
 
     async def add_media(self, items: list[MediaItem]) -> None:
-        settings = get_settings()
-        await self._append_to_csv(settings.data.media_data_path, items, ['name', 'type', 'aliases', 'description'])
-        self.reload()
+        await run_in(WorkloadClass.IO, self._append_items, "media", items)
 
     async def add_doors(self, items: list[DoorItem]) -> None:
-        settings = get_settings()
-        await self._append_to_csv(settings.data.doors_data_path, items, ['name', 'type', 'area1', 'area2', 'location'])
-        self.reload()
-
-    async def _append_to_csv(self, file_path: str, items: list[BaseModel], columns: list[str]) -> None:
-        import json as json_module
-        try:
-            new_data = [item.model_dump() for item in items]
-            new_df = pd.DataFrame(new_data)
-            
-            # 将列表字段序列化为JSON格式
-            for col in new_df.columns:
-                new_df[col] = new_df[col].apply(
-                    lambda x: json_module.dumps(x, ensure_ascii=False) if isinstance(x, list) else x
-                )
-            
-            # Ensure columns
-            for col in columns:
-                if col not in new_df.columns:
-                    new_df[col] = None
-            new_df = new_df[columns]
-
-            # Backup
-            backup_path = file_path + '.backup'
-            if os.path.exists(file_path):
-                shutil.copy2(file_path, backup_path)
-                existing_df = pd.read_csv(file_path)
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            else:
-                combined_df = new_df
-
-            combined_df.to_csv(file_path, index=False, quoting=1)
-            
-            # Remove backup if successful
-            if os.path.exists(backup_path):
-                os.remove(backup_path)
-                
-        except Exception as e:
-            logger.error(f"Error appending to CSV {file_path}: {e}")
-            # Restore backup if exists
-            if os.path.exists(file_path + '.backup'):
-                shutil.move(file_path + '.backup', file_path)
-            raise e
+        await run_in(WorkloadClass.IO, self._append_items, "doors", items)
+
+    async def upsert_items(self, section: str, items: list[BaseModel]) -> None:
+        """
+        Insert or update items by name. With the SQLite backend this is a keyed upsert;
+        with CSV it appends, and the later row wins on reload.
+        """
+        await run_in(WorkloadClass.IO, self._append_items, section, items)
+
+    async def delete_items(self, section: str, names: list[str]) -> list[str]:
+        """
+        Delete single items by name and return the names that existed. SQLite deletes
+        the rows in place; CSV has to rewrite the section file.
+        """
+        return await run_in(WorkloadClass.IO, self._delete_items, section, names)
 
     async def clear_devices(self) -> None:
         """Clear all device data."""
-        settings = get_settings()
-        await self._clear_csv_file(settings.data.devices_data_path, ['name', 'type', 'subType', 'command', 'area', 'view', 'aliases', 'description'])
-        self.reload()
+        await run_in(WorkloadClass.IO, self._clear_section, "devices")
 
     async def clear_areas(self) -> None:
         """Clear all area data."""
-        settings = get_settings()
-        await self._clear_csv_file(settings.data.areas_data_path, ['name', 'aliases', 'description'])
-        self.reload()
+        await run_in(WorkloadClass.IO, self._clear_section, "areas")
 
     async def clear_media(self) -> None:
         """Clear all media data."""
-        settings = get_settings()
-        await self._clear_csv_file(settings.data.media_data_path, ['name', 'type', 'aliases', 'description'])
-        self.reload()
+        await run_in(WorkloadClass.IO, self._clear_section, "media")
 
     async def clear_doors(self) -> None:
         """Clear all door data."""
-        settings = get_settings()
-        await self._clear_csv_file(settings.data.doors_data_path, ['name', 'type', 'area1', 'area2', 'location'])
-        self.reload()
+        await run_in(WorkloadClass.IO, self._clear_section, "doors")
+
+    async def import_csv(self) -> dict[str, int]:
+        """Replace the SQLite store contents with the configured CSV files. Returns item counts."""
+        if self._store is None:
+            raise RuntimeError("CSV import requires the sqlite backend")
+        return await run_in(WorkloadClass.MAINTENANCE, self._import_csv)
+
+    async def export_csv(self) -> dict[str, str]:
+        """
+        Write the current snapshot to the configured CSV paths. Returns section -> written path.
+        """
+        return await run_in(WorkloadClass.MAINTENANCE, self._export_csv)
+
+    def search(self, text: str, section: str = "devices", limit: int = 20) -> tuple[Mapping[str, Any], ...]:
+        """
+        Find items whose name, aliases or description contain the text. Uses the FTS5
+        index with the SQLite backend and a snapshot scan otherwise; items come from the snapshot.
+        """
+        snapshot = self._snapshot
+        items = getattr(snapshot, section)
+        if self._store is not None:
+            return tuple(items[name] for name in self._store.search(text, section, limit) if name in items)
+        text = text.strip()
+        if not text:
+            return ()
+        columns = SECTION_SCHEMAS[section][3]
+        matches = (item for item in items.values() if any(text in str(item.get(col, "")) for col in columns))
+        return tuple(item for _, item in zip(range(limit), matches))
+
+    def section_paths(self) -> dict[str, str]:
+        """Absolute CSV path of every section."""
+        return {section: os.path.abspath(self._section_path(section)) for section in self._SECTIONS}
+
+    def _section_path(self, section: str) -> str:
+        return getattr(get_settings().data, self._SECTIONS[section][0])
+
+    def _process_section(self, section: str, df: "pd.DataFrame") -> dict[str, dict[str, Any]]:
+        return getattr(self, f"_process_{section}_data")(df)
+
+    @staticmethod
+    def _to_row(data: Mapping[str, Any], header: list[str]) -> list[str]:
+        import json
+        return [
+            json.dumps(list(value), ensure_ascii=False) if isinstance(value, (list, tuple))
+            else "" if value is None else str(value)
+            for value in (data.get(col) for col in header)
+        ]
+
+    def _append_items(self, section: str, items: list[BaseModel]) -> None:
+        """Persist items (CSV append or SQLite upsert) and merge them into the current snapshot."""
+        import pandas as pd
+
+        file_path = self._section_path(section)
+        columns = self._SECTIONS[section][1]
+
+        with self._data_lock:
+            header = (self._read_header(file_path) if self._store is None else None) or columns
+            rows = [self._to_row(item.model_dump(), header) for item in items]
+
+            # Parse the new rows exactly as reload() would, then merge (later rows win)
+            new_items = self._process_section(section, pd.DataFrame(rows, columns=header, dtype=str))
+            if self._store is None:
+                self._append_rows(file_path, header, rows)
+                target = file_path
+            else:
+                self._store.upsert(section, new_items.values())
+                target = self._store.path
+            merged = dict(getattr(self._snapshot, section))
+            merged.update(new_items)
+            snapshot = self._publish(**{section: merged})
+        logger.info(f"Wrote {len(rows)} {section} rows to {target}, snapshot generation {snapshot.generation}")
+
+    def _delete_items(self, section: str, names: list[str]) -> list[str]:
+        with self._data_lock:
+            current = getattr(self._snapshot, section)
+            if self._store is not None:
+                deleted = self._store.delete(section, names)
+            else:
+                deleted = [name for name in dict.fromkeys(names) if name in current]
+            if not deleted:
+                return []
+
+            removed = set(deleted)
+            remaining = {name: item for name, item in current.items() if name not in removed}
+            if self._store is None:
+                columns = self._SECTIONS[section][1]
+                self._write_atomic(self._section_path(section), columns,
+                                   [self._to_row(item, columns) for item in remaining.values()])
+            snapshot = self._publish(**{section: remaining})
+        logger.info(f"Deleted {len(deleted)} {section} items, snapshot generation {snapshot.generation}")
+        return deleted
+
+    def _clear_section(self, section: str) -> None:
+        """Empty the section in the backend and publish an empty section."""
+        with self._data_lock:
+            if self._store is None:
+                file_path = self._section_path(section)
+                self._write_atomic(file_path, self._SECTIONS[section][1], rows=[])
+            else:
+                file_path = self._store.path
+                self._store.clear(section)
+            snapshot = self._publish(**{section: {}})
+        logger.info(f"Cleared {section} data in {file_path}, snapshot generation {snapshot.generation}")
 
-    async def _clear_csv_file(self, file_path: str, columns: list[str]) -> None:
-        """Clear a CSV file by writing only headers."""
-        backup_path = file_path + '.backup'
+    def _import_csv(self) -> dict[str, int]:
+        with self._data_lock:
+            counts = self._import_csv_locked()
+            sections = {section: self._store.load_section(section) for section in self._SECTIONS}
+            self._publish(**sections)
+        return counts
+
+    def _import_csv_locked(self) -> dict[str, int]:
+        """Copy every existing section CSV into the store, one transaction per section. Caller holds _data_lock."""
+        counts = {
+            section: self._store.replace_section(section, items.values())
+            for section, items in self._load_csv_sections().items()
+        }
+        logger.info(f"Imported CSV catalog into {self._store.path}: {counts}")
+        return counts
+
+    def _export_csv(self) -> dict[str, str]:
+        snapshot = self._snapshot
+        written = {}
+        for section, (_, columns) in self._SECTIONS.items():
+            file_path = self._section_path(section)
+            rows = [self._to_row(item, columns) for item in getattr(snapshot, section).values()]
+            self._write_atomic(file_path, columns, rows)
+            written[section] = file_path
+        logger.info(f"Exported catalog snapshot generation {snapshot.generation} as CSV: {written}")
+        return written
+
+    @staticmethod
+    def _read_header(file_path: str) -> list[str] | None:
+        """Read the header row of an existing CSV file, or None if the file is missing or empty."""
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, newline="", encoding="utf-8-sig") as f:
+            header = next(csv.reader(f), None)
+        return [col.strip() for col in header] if header else None
+
+    @staticmethod
+    def _encode_rows(rows: list[list[str]], header: list[str] | None = None) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        if header is not None:
+            writer.writerow(header)
+        writer.writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _journal_path(file_path: str) -> str:
+        return file_path + ".append-journal"
+
+    @staticmethod
+    def _append_rows(file_path: str, header: list[str], rows: list[list[str]]) -> None:
+        """
+        Append rows in place with a single write, then fsync. Cost depends only on the new rows,
+        not on the file size. Missing or empty files are created atomically with a header instead.
+
+        The pre-append size is fsync'd to a journal file first and the journal is removed once the
+        rows are durable. If the process dies mid-write, the journal survives and the torn tail is
+        truncated away before the next load or append (see _rollback_torn_append).
+        """
+        DataService._rollback_torn_append(file_path)
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            DataService._write_atomic(file_path, header, rows)
+            return
+        with open(file_path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(-1, os.SEEK_END)
+            separator = b"" if f.read(1) in (b"\n", b"\r") else b"\n"
+        journal_path = DataService._journal_path(file_path)
+        with open(journal_path, "w", encoding="ascii") as journal:
+            journal.write(str(size))
+            journal.flush()
+            os.fsync(journal.fileno())
+        DataService._fsync_directory(os.path.dirname(os.path.abspath(file_path)))
+        with open(file_path, "ab") as f:
+            f.write(separator + DataService._encode_rows(rows))
+            f.flush()
+            os.fsync(f.fileno())
+        os.remove(journal_path)
+
+    @staticmethod
+    def _rollback_torn_append(file_path: str) -> None:
+        """Truncate a file back to the size recorded by an append that never completed."""
+        journal_path = DataService._journal_path(file_path)
+        if not os.path.exists(journal_path):
+            return
+        with open(journal_path, encoding="ascii") as journal:
+            size = int(journal.read().strip() or 0)
+        if os.path.exists(file_path) and os.path.getsize(file_path) > size:
+            with open(file_path, "r+b") as f:
+                f.truncate(size)
+                f.flush()
+                os.fsync(f.fileno())
+            logger.warning(f"Rolled back an incomplete append to {file_path} (truncated to {size} bytes)")
+        os.remove(journal_path)
+
+    @staticmethod
+    def _write_atomic(file_path: str, header: list[str], rows: list[list[str]]) -> None:
+        """
+        Rewrite the whole file (deletes, clears, exports) through a temp file in the same
+        directory: write, fsync, then atomically replace the original. A crash at any point
+        leaves either the old or the new file, never a partial one.
+        """
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(file_path) + ".", suffix=".tmp", dir=directory)
         try:
-            # Backup existing file
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(DataService._encode_rows(rows, header))
+                tmp.flush()
+                os.fsync(tmp.fileno())
             if os.path.exists(file_path):
-                shutil.copy2(file_path, backup_path)
-            
-            # Write empty DataFrame with headers
-            empty_df = pd.DataFrame(columns=columns)
-            empty_df.to_csv(file_path, index=False, quoting=1)
-            
-            # Remove backup if successful
-            if os.path.exists(backup_path):
-                os.remove(backup_path)
-                
+                shutil.copymode(file_path, tmp_path)
+            os.replace(tmp_path, file_path)
+            DataService._fsync_directory(directory)
+            # The rewrite supersedes any unfinished append; its journal no longer applies
+            journal_path = DataService._journal_path(file_path)
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
         except Exception as e:
-            logger.error(f"Error clearing CSV file {file_path}: {e}")
-            # Restore backup if exists
-            if os.path.exists(backup_path):
-                shutil.move(backup_path, file_path)
-            raise e
+            logger.error(f"Error writing CSV {file_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _fsync_directory(directory: str) -> None:
+        """Persist the rename itself (not supported on Windows)."""
+        if os.name == "nt":
+            return
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
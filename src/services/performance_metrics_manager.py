@@ -1,14 +1,20 @@
 """
 性能指标管理器
 
-收集并保留最近 N 分钟的音频处理管道各阶段耗时数据。
-支持线程安全的并发写入和读取。
+按时间片滚动的对数分桶直方图记录音频处理管道各阶段耗时，保留最近 N 分钟。
+记录为 O(1)，查询为 O(时间片 × 桶数)，内存占用与流量无关；每个序列独立加锁，
+写入互不阻塞。支持分位数（p50/p90/p99/p999）、吞吐量，以及按来源和按连接的统计。
+每个序列另外维护自进程启动以来的累计桶计数，供 Prometheus 直方图导出。
 """
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from collections import deque
-from enum import Enum
+import math
 import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from enum import Enum
+
+import numpy as np
 
 
 class MetricType(str, Enum):
@@ -49,40 +55,249 @@ class MetricType(str, Enum):
         return labels.get(self, self.value)
 
 
-@dataclass
-class MetricDataPoint:
-    """单个性能指标数据点"""
-    timestamp: datetime
-    duration: float  # 耗时（秒）
-    context_id: str | None = None
+# 对数分桶：每个二进制数量级 16 个子桶（相对误差约 3%），覆盖 1µs ~ 2^31µs（约 36 分钟）
+SUB_BUCKETS = 16
+MAX_EXPONENT = 31
+NUM_BUCKETS = 1 + MAX_EXPONENT * SUB_BUCKETS
+
+
+def bucket_index(seconds: float) -> int:
+    """耗时（秒）所在的桶；桶 0 为不足 1µs"""
+    micros = seconds * 1e6
+    if micros < 1.0:
+        return 0
+    mantissa, exponent = math.frexp(micros)  # micros = mantissa * 2**exponent, mantissa ∈ [0.5, 1)
+    index = 1 + (exponent - 1) * SUB_BUCKETS + int((mantissa * 2 - 1) * SUB_BUCKETS)
+    return min(index, NUM_BUCKETS - 1)
+
+
+def _bucket_values() -> np.ndarray:
+    """各桶的代表值（桶中点，秒）"""
+    values = np.empty(NUM_BUCKETS, dtype=np.float64)
+    values[0] = 0.5e-6
+    index = np.arange(NUM_BUCKETS - 1)
+    exponent, sub = index // SUB_BUCKETS, index % SUB_BUCKETS
+    values[1:] = np.exp2(exponent) * (1 + (sub + 0.5) / SUB_BUCKETS) * 1e-6
+    return values
+
+
+BUCKET_VALUES = _bucket_values()
+
+
+class RollingHistogram:
+    """
+    按时间片滚动的直方图。
+
+    num_slots 个时间片构成环形数组，每片 slot_seconds 秒；写入时若所在行属于过期的时间片则先清零。
+    失败调用只计数，不进入耗时分布。累计计数（lifetime_*）从不清零。
+    """
+
+    def __init__(self, slot_seconds: float, num_slots: int) -> None:
+        self.slot_seconds = slot_seconds
+        self.num_slots = num_slots
+        self.lock = threading.Lock()
+        # 扁平的 int64 数组：写入时按下标自增（比 numpy 标量运算快），查询时零拷贝视为 numpy 矩阵
+        self._counts = array("q", bytes(8 * num_slots * NUM_BUCKETS))
+        self.counts = np.frombuffer(self._counts, dtype=np.int64).reshape(num_slots, NUM_BUCKETS)
+        # 每个时间片的标量同样使用 Python 列表
+        self.slot_ids = [-1] * num_slots
+        self.totals = [0] * num_slots
+        self.errors = [0] * num_slots
+        self.sums = [0.0] * num_slots
+        self.mins = [math.inf] * num_slots
+        self.maxs = [-math.inf] * num_slots
+        self.latest: float | None = None
+        self.first_record_at: float | None = None
+        self.last_record_at = 0.0
+        # 自创建以来的累计值（单调递增）
+        self._lifetime_counts = array("q", bytes(8 * NUM_BUCKETS))
+        self.lifetime_sum = 0.0
+        self.lifetime_total = 0
+        self.lifetime_errors = 0
+
+    def record(self, duration: float, success: bool = True, now: float | None = None, bucket: int | None = None) -> None:
+        now = time.time() if now is None else now
+        if bucket is None:
+            bucket = bucket_index(duration)
+        slot_id = int(now // self.slot_seconds)
+        row = slot_id % self.num_slots
+        with self.lock:
+            if self.slot_ids[row] != slot_id:
+                self.slot_ids[row] = slot_id
+                self.counts[row] = 0
+                self.totals[row] = self.errors[row] = 0
+                self.sums[row] = 0.0
+                self.mins[row], self.maxs[row] = math.inf, -math.inf
+            self.totals[row] += 1
+            self.lifetime_total += 1
+            if success:
+                self._counts[row * NUM_BUCKETS + bucket] += 1
+                self._lifetime_counts[bucket] += 1
+                self.lifetime_sum += duration
+                self.sums[row] += duration
+                if duration < self.mins[row]:
+                    self.mins[row] = duration
+                if duration > self.maxs[row]:
+                    self.maxs[row] = duration
+                self.latest = duration
+            else:
+                self.errors[row] += 1
+                self.lifetime_errors += 1
+            self.last_record_at = now
+            if self.first_record_at is None:
+                self.first_record_at = now
+
+    def _rows(self, window_seconds: float, now: float) -> list[int]:
+        """窗口内时间片的行号，按时间先后排序"""
+        first_slot = int((now - window_seconds) // self.slot_seconds) + 1
+        return sorted((row for row in range(self.num_slots) if self.slot_ids[row] >= first_slot),
+                      key=self.slot_ids.__getitem__)
+
+    def summary(self, window_seconds: float, percents: tuple[float, ...], now: float | None = None) -> dict:
+        """窗口内的计数、错误、平均/最小/最大值、分位数和吞吐量（次/秒）"""
+        now = time.time() if now is None else now
+        with self.lock:
+            rows = self._rows(window_seconds, now)
+            counts = self.counts[rows].sum(axis=0)
+            total = sum(self.totals[row] for row in rows)
+            errors = sum(self.errors[row] for row in rows)
+            duration_sum = sum(self.sums[row] for row in rows)
+            low = min((self.mins[row] for row in rows), default=math.inf)
+            high = max((self.maxs[row] for row in rows), default=-math.inf)
+            latest = self.latest
+        # 数据不足一个窗口时按首次记录以来的时长计算吞吐量
+        first = now if self.first_record_at is None else self.first_record_at
+        span = max(min(window_seconds, now - first), 1.0)
+        return {
+            "count": total,
+            "errors": errors,
+            "throughput": round(total / span, 4),
+            "latest": round(latest, 4) if latest is not None and total else None,
+            **_distribution(counts, duration_sum, low, high, percents),
+        }
+
+    def cumulative(self, bounds: np.ndarray) -> dict:
+        """
+        累计分布：每个上界（秒，升序）以内的成功次数，以及总和、成功数、失败数。
+
+        上界按桶代表值归属，误差在一个桶宽（约 3%）以内。
+        """
+        with self.lock:
+            counts = np.frombuffer(self._lifetime_counts, dtype=np.int64).copy()
+            duration_sum, total, errors = self.lifetime_sum, self.lifetime_total, self.lifetime_errors
+        cumulative = np.cumsum(counts)
+        ends = np.searchsorted(BUCKET_VALUES, bounds, side="right")
+        return {
+            "buckets": [int(cumulative[end - 1]) if end else 0 for end in ends],
+            "sum": duration_sum,
+            "count": int(cumulative[-1]),
+            "errors": errors,
+            "total": total,
+        }
+
+    def series(self, window_seconds: float, now: float | None = None) -> list[dict]:
+        """每个时间片的聚合点，供前端绘制时序图"""
+        now = time.time() if now is None else now
+        points = []
+        with self.lock:
+            rows = self._rows(window_seconds, now)
+            for row in rows:
+                counts = self.counts[row]
+                if not counts.any():
+                    continue
+                stats = _distribution(counts, self.sums[row], self.mins[row], self.maxs[row], (50, 99))
+                points.append({
+                    "timestamp": datetime.fromtimestamp(self.slot_ids[row] * self.slot_seconds).isoformat(),
+                    "duration": stats["avg"],
+                    "p50": stats["p50"],
+                    "p99": stats["p99"],
+                    "count": self.totals[row],
+                })
+        return points
+
+
+def _percentile_key(percent: float) -> str:
+    return "p" + f"{percent:g}".replace(".", "")
+
+
+def _distribution(counts: np.ndarray, duration_sum: float, low: float, high: float, percents: tuple[float, ...]) -> dict:
+    """由桶计数计算平均值和分位数（最近秩法），结果限制在实际最小/最大值之间"""
+    n = int(counts.sum())
+    keys = [_percentile_key(p) for p in percents]
+    if n == 0:
+        return {"avg": None, "min": None, "max": None, **{key: None for key in keys}}
+    cumulative = np.cumsum(counts)
+    ranks = np.maximum(1, np.ceil(np.asarray(percents) / 100 * n))
+    values = np.clip(BUCKET_VALUES[np.searchsorted(cumulative, ranks)], low, high)
+    return {
+        "avg": round(duration_sum / n, 4),
+        "min": round(low, 4),
+        "max": round(high, 4),
+        **{key: round(float(value), 4) for key, value in zip(keys, values)},
+    }
 
 
 class PerformanceMetricsManager:
     """
     性能指标管理器
     
-    收集并保留最近 5 分钟的各阶段处理耗时数据。
-    线程安全设计，支持并发写入和读取。
+    收集并保留最近 5 分钟的各阶段处理耗时分布。
+    每个序列一个锁，并发写入只在同一序列上竞争。
     """
     
     RETENTION_MINUTES = 5
-    MAX_POINTS_PER_METRIC = 1000  # 防止内存溢出
+    SLOT_SECONDS = 5  # 阶段汇总与来源序列的时间片长度
+    CONTEXT_SLOT_SECONDS = 60  # 按连接统计的时间片更粗，控制每个连接的内存
+    MAX_CONTEXTS = 256  # 超出后淘汰最久未写入的连接
+    PERCENTILES = (50, 90, 99, 99.9)
     
     def __init__(self):
-        self._lock = threading.Lock()
-        self._metrics: dict[str, deque[MetricDataPoint]] = {
-            metric.value: deque(maxlen=self.MAX_POINTS_PER_METRIC)
+        self._registry_lock = threading.Lock()
+        self._metrics: dict[str, RollingHistogram] = {
+            metric.value: self._new_histogram(self.SLOT_SECONDS)
             for metric in MetricType
         }
+        # 按来源（如 LLM 提供方）拆分的独立序列，不计入阶段汇总，避免与管道级数据重复计数
+        self._source_metrics: dict[tuple[str, str], RollingHistogram] = {}
+        # 连接ID -> {指标: 序列}
+        self._context_metrics: OrderedDict[str, dict[str, RollingHistogram]] = OrderedDict()
+
+    def _new_histogram(self, slot_seconds: float) -> RollingHistogram:
+        return RollingHistogram(slot_seconds, math.ceil(self.RETENTION_MINUTES * 60 / slot_seconds) + 1)
+
+    def _context_series(self, context_id: str, key: str) -> RollingHistogram:
+        series = self._context_metrics.get(context_id, {}).get(key)
+        if series is not None:
+            return series
+        with self._registry_lock:
+            metrics = self._context_metrics.get(context_id)
+            if metrics is None:
+                if len(self._context_metrics) >= self.MAX_CONTEXTS:
+                    oldest = min(
+                        self._context_metrics,
+                        key=lambda c: max(h.last_record_at for h in self._context_metrics[c].values()),
+                    )
+                    del self._context_metrics[oldest]
+                metrics = self._context_metrics[context_id] = {}
+            return metrics.setdefault(key, self._new_histogram(self.CONTEXT_SLOT_SECONDS))
     
-    def record(self, metric_type: MetricType | str, duration: float, context_id: str | None = None) -> None:
+    def record(
+        self,
+        metric_type: MetricType | str,
+        duration: float,
+        context_id: str | None = None,
+        source: str | None = None,
+        success: bool = True
+    ) -> None:
         """
         记录一个性能指标数据点
         
         Args:
             metric_type: 指标类型（MetricType 枚举或字符串值）
             duration: 耗时（秒）
-            context_id: 可选的上下文ID（用于关联到特定用户连接）
+            context_id: 可选的上下文ID（同时计入该连接的独立统计）
+            source: 可选的来源标识（如 LLM 提供方名称），指定时记录到该来源的独立序列
+            success: 本次调用是否成功
         """
         # 支持传入枚举或字符串
         key = metric_type.value if isinstance(metric_type, MetricType) else metric_type
@@ -90,98 +305,134 @@ class PerformanceMetricsManager:
         if key not in self._metrics:
             return
         
-        data_point = MetricDataPoint(
-            timestamp=datetime.now(),
-            duration=duration,
-            context_id=context_id
-        )
-        
-        with self._lock:
-            self._metrics[key].append(data_point)
+        now = time.time()
+        bucket = bucket_index(duration)
+        if source is None:
+            self._metrics[key].record(duration, success, now, bucket)
+            if context_id is not None:
+                self._context_series(context_id, key).record(duration, success, now, bucket)
+        else:
+            series = self._source_metrics.get((key, source))
+            if series is None:
+                with self._registry_lock:
+                    series = self._source_metrics.setdefault((key, source), self._new_histogram(self.SLOT_SECONDS))
+            series.record(duration, success, now, bucket)
     
     def get_metrics(self, minutes: int = 5) -> dict:
         """
-        获取最近 N 分钟的所有指标数据
+        获取最近 N 分钟的各指标时序数据（每个时间片一个聚合点）
         
         Args:
             minutes: 获取最近多少分钟的数据，默认5分钟
             
         Returns:
-            包含各指标时序数据的字典
+            包含各指标时序数据的字典，每个点含 timestamp、duration（平均）、p50、p99、count
         """
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
-        
-        # 从枚举生成 labels
-        labels = {m.value: m.label for m in MetricType}
-        
-        result = {
-            "labels": labels,
-            "metrics": {}
+        window = min(minutes, self.RETENTION_MINUTES) * 60
+        now = time.time()
+        return {
+            "labels": {m.value: m.label for m in MetricType},
+            "metrics": {key: series.series(window, now) for key, series in self._metrics.items()},
         }
-        
-        with self._lock:
-            for metric_key, points in self._metrics.items():
-                # 过滤出时间范围内的数据点
-                filtered_points = [
-                    {
-                        "timestamp": p.timestamp.isoformat(),
-                        "duration": round(p.duration, 4),
-                        "context_id": p.context_id
-                    }
-                    for p in points
-                    if p.timestamp >= cutoff_time
-                ]
-                result["metrics"][metric_key] = filtered_points
-        
-        return result
     
     def get_stats(self) -> dict:
         """
-        获取统计摘要（平均值、最大值、最小值、计数）
+        获取统计摘要（计数、平均/最大/最小值、分位数、吞吐量）
         
         Returns:
             各指标的统计信息
         """
-        cutoff_time = datetime.now() - timedelta(minutes=self.RETENTION_MINUTES)
+        window = self.RETENTION_MINUTES * 60
+        now = time.time()
+        labels = {m.value: m.label for m in MetricType}
         stats = {}
+        for metric_key, series in self._metrics.items():
+            stats[metric_key] = {
+                "label": labels.get(metric_key, metric_key),
+                **series.summary(window, self.PERCENTILES, now),
+            }
+        return stats
+
+    def get_context_stats(self, context_id: str | None = None) -> dict:
+        """
+        获取按连接拆分的统计摘要，只包含窗口内有数据的指标
         
-        # 从枚举获取 label
-        labels = {m.value: m.label for m in MetricType}
+        Args:
+            context_id: 指定连接；为 None 时返回所有连接
+            
+        Returns:
+            {连接ID: {指标: 统计信息}}
+        """
+        window = self.RETENTION_MINUTES * 60
+        now = time.time()
+        with self._registry_lock:
+            # 清理窗口内没有任何数据的连接
+            for expired in [
+                c for c, metrics in self._context_metrics.items()
+                if max(h.last_record_at for h in metrics.values()) < now - window
+            ]:
+                del self._context_metrics[expired]
+            contexts = {
+                c: dict(metrics) for c, metrics in self._context_metrics.items()
+                if context_id is None or c == context_id
+            }
+        result = {}
+        for c, metrics in contexts.items():
+            summaries = {key: series.summary(window, self.PERCENTILES, now) for key, series in metrics.items()}
+            result[c] = {key: summary for key, summary in summaries.items() if summary["count"]}
+        return result
+    
+    def get_source_stats(self, metric_type: MetricType | str, source: str, minutes: int = RETENTION_MINUTES) -> dict:
+        """
+        获取指定来源最近 N 分钟的延迟分位数与错误率
         
-        with self._lock:
-            for metric_key, points in self._metrics.items():
-                # 过滤出时间范围内的数据点
-                durations = [
-                    p.duration for p in points
-                    if p.timestamp >= cutoff_time
-                ]
-                
-                label = labels.get(metric_key, metric_key)
-                
-                if durations:
-                    stats[metric_key] = {
-                        "label": label,
-                        "count": len(durations),
-                        "avg": round(sum(durations) / len(durations), 4),
-                        "max": round(max(durations), 4),
-                        "min": round(min(durations), 4),
-                        "latest": round(durations[-1], 4) if durations else None
-                    }
-                else:
-                    stats[metric_key] = {
-                        "label": label,
-                        "count": 0,
-                        "avg": None,
-                        "max": None,
-                        "min": None,
-                        "latest": None
-                    }
+        Args:
+            metric_type: 指标类型
+            source: 来源标识（与 record 时传入的 source 一致）
+            minutes: 统计窗口（分钟）
+            
+        Returns:
+            包含 count、errors、error_rate、avg、p50、p95、p99 的字典；无数据时延迟字段为 None
+        """
+        key = metric_type.value if isinstance(metric_type, MetricType) else metric_type
+        series = self._source_metrics.get((key, source))
+        if series is None:
+            return {"count": 0, "errors": 0, "error_rate": 0.0, "avg": None, "p50": None, "p95": None, "p99": None}
         
-        return stats
+        # 延迟分位数只统计成功的调用，失败调用体现在错误率中
+        summary = series.summary(min(minutes, self.RETENTION_MINUTES) * 60, (50, 95, 99))
+        count, errors = summary["count"], summary["errors"]
+        return {
+            "count": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "avg": summary["avg"],
+            "p50": summary["p50"],
+            "p95": summary["p95"],
+            "p99": summary["p99"],
+        }
     
+    def get_cumulative(self, bounds: np.ndarray) -> dict:
+        """
+        各阶段和各来源自启动以来的累计分布（Prometheus 直方图导出用）
+
+        Returns:
+            {"stages": {指标: 累计分布}, "sources": {(指标, 来源): 累计分布}}
+        """
+        with self._registry_lock:
+            stages = dict(self._metrics)
+            sources = dict(self._source_metrics)
+        return {
+            "stages": {key: series.cumulative(bounds) for key, series in stages.items()},
+            "sources": {key: series.cumulative(bounds) for key, series in sources.items()},
+        }
+
     def clear(self) -> None:
         """清空所有指标数据"""
-        with self._lock:
-            for metric in MetricType:
-                self._metrics[metric.value].clear()
-
+        with self._registry_lock:
+            self._metrics = {
+                metric.value: self._new_histogram(self.SLOT_SECONDS)
+                for metric in MetricType
+            }
+            self._source_metrics.clear()
+            self._context_metrics.clear()
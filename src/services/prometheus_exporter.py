@@ -0,0 +1,250 @@
+"""
+Prometheus 文本格式（exposition format 0.0.4）导出
+
+所有数值都取自已有的聚合结构：阶段耗时直方图的累计桶计数、队列的 qsize、组件状态、
+缓存与链路计数器，生成一次的开销与请求量无关，只与阶段数、连接数成正比。
+
+多工作进程部署时所有工作进程共用一个端口，抓取会随机落到其中一个进程。因此各进程定期把
+自己的指标族上报给共享推理服务（见 worker_stats），处理抓取的进程合并所有进程的指标，
+每个样本带 worker（进程号）标签。其他进程的数据最多滞后一个上报周期。
+"""
+import math
+from collections import defaultdict
+from typing import Iterable
+
+import numpy as np
+
+from src.core import dependencies
+from src.core.admission import get_admission_controller
+from src.core.capacity import get_capacity_planner
+from src.core.executors import get_executors
+from src.core.model_cache import get_model_cache
+from src.core.startup import COMPONENTS, component_status
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+NAMESPACE = "cmcc"
+
+# 直方图上界（秒），覆盖 VAD 的毫秒级到 LLM 的数十秒
+LATENCY_BOUNDS = np.array([0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0])
+LOOP_LAG_BOUNDS = np.array([0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0])
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+class _Writer:
+    """按指标族累积样本；族的结构可序列化为 JSON，便于跨进程合并"""
+
+    def __init__(self) -> None:
+        # 族名 -> {"type", "help", "samples": [[样本名, 标签, 值], ...]}
+        self.families: dict[str, dict] = {}
+        self._current: list | None = None
+
+    def family(self, name: str, metric_type: str, help_text: str) -> str:
+        full_name = f"{NAMESPACE}_{name}"
+        self.families[full_name] = {"type": metric_type, "help": help_text, "samples": []}
+        self._current = self.families[full_name]["samples"]
+        return full_name
+
+    def sample(self, name: str, value: float, labels: dict[str, str] | None = None) -> None:
+        self._current.append([name, labels or {}, value])
+
+    def histogram(self, name: str, bounds: Iterable[float], cumulative: dict, labels: dict[str, str]) -> None:
+        for bound, count in zip(bounds, cumulative["buckets"]):
+            self.sample(f"{name}_bucket", count, {**labels, "le": _number(float(bound))})
+        self.sample(f"{name}_bucket", cumulative["count"], {**labels, "le": "+Inf"})
+        self.sample(f"{name}_sum", float(cumulative["sum"]), labels)
+        self.sample(f"{name}_count", cumulative["count"], labels)
+
+
+def _write_stage_metrics(writer: _Writer) -> None:
+    cumulative = dependencies.metrics_manager.get_cumulative(LATENCY_BOUNDS)
+
+    name = writer.family("stage_duration_seconds", "histogram", "Pipeline stage latency of successful calls.")
+    for stage, data in cumulative["stages"].items():
+        writer.histogram(name, LATENCY_BOUNDS, data, {"stage": stage})
+
+    name = writer.family("stage_errors_total", "counter", "Failed pipeline stage calls.")
+    for stage, data in cumulative["stages"].items():
+        writer.sample(name, data["errors"], {"stage": stage})
+
+    if cumulative["sources"]:
+        name = writer.family("source_duration_seconds", "histogram", "Stage latency split by upstream source.")
+        for (stage, source), data in cumulative["sources"].items():
+            writer.histogram(name, LATENCY_BOUNDS, data, {"stage": stage, "source": source})
+        name = writer.family("source_errors_total", "counter", "Failed calls split by upstream source.")
+        for (stage, source), data in cumulative["sources"].items():
+            writer.sample(name, data["errors"], {"stage": stage, "source": source})
+
+
+def _write_session_metrics(writer: _Writer) -> None:
+    contexts = list(dependencies.active_contexts.values())
+    name = writer.family("active_connections", "gauge", "Active audio WebSocket sessions.")
+    writer.sample(name, len(contexts))
+
+    # 按队列汇总所有连接，避免以连接 ID 为标签造成高基数
+    depth: dict[str, int] = defaultdict(int)
+    queued_bytes: dict[str, int] = defaultdict(int)
+    max_fill: dict[str, float] = defaultdict(float)
+    for context in contexts:
+        for queue, stats in context.get_queue_stats().items():
+            if not isinstance(stats, dict):
+                continue
+            depth[queue] += stats["current"]
+            # 按内存限额的队列以字节占用计算填充率
+            if stats.get("max_bytes"):
+                queued_bytes[queue] += stats["bytes"]
+                fill = stats["bytes"] / stats["max_bytes"]
+            else:
+                fill = stats["current"] / stats["max"] if stats["max"] else 0.0
+            max_fill[queue] = max(max_fill[queue], fill)
+
+    name = writer.family("queue_depth", "gauge", "Items waiting in pipeline queues, summed over sessions.")
+    for queue, value in depth.items():
+        writer.sample(name, value, {"queue": queue})
+    name = writer.family("queue_bytes", "gauge", "Bytes buffered in audio queues, summed over sessions.")
+    for queue, value in queued_bytes.items():
+        writer.sample(name, value, {"queue": queue})
+    name = writer.family("queue_fill_ratio_max", "gauge", "Fullest session's queue fill ratio.")
+    for queue, value in max_fill.items():
+        writer.sample(name, round(value, 4), {"queue": queue})
+
+    name = writer.family("admission_decisions_total", "counter", "New session admission decisions.")
+    for decision, count in get_admission_controller().decisions.items():
+        writer.sample(name, count, {"decision": decision})
+    name = writer.family("degraded_sessions", "gauge", "Active sessions admitted in degraded mode.")
+    writer.sample(name, sum(1 for context in contexts if context.degraded))
+
+    planner = get_capacity_planner()
+    name = writer.family("session_capacity", "gauge", "Effective concurrent session capacity.")
+    writer.sample(name, planner.capacity())
+    name = writer.family("session_cost_cores", "gauge", "Estimated CPU cores consumed per streaming session.")
+    writer.sample(name, float(planner.session_cost()))
+    name = writer.family("sessions_queued", "gauge", "Sessions waiting for a free slot.")
+    writer.sample(name, planner.queued)
+    name = writer.family("sessions_rejected_total", "counter", "Sessions refused for lack of capacity.")
+    writer.sample(name, planner.rejected)
+
+
+def _write_executor_metrics(writer: _Writer) -> None:
+    status = get_executors().get_status()
+    classes = status["classes"]
+    name = writer.family("executor_workers", "gauge", "Worker threads per workload class.")
+    for workload, data in classes.items():
+        writer.sample(name, data["workers"], {"class": workload})
+    name = writer.family("executor_running", "gauge", "Blocking calls currently running per workload class.")
+    for workload, data in classes.items():
+        writer.sample(name, data["running"], {"class": workload})
+    name = writer.family("executor_queued", "gauge", "Blocking calls waiting for a worker thread.")
+    for workload, data in classes.items():
+        writer.sample(name, data["queued"], {"class": workload})
+    name = writer.family("executor_tasks_total", "counter", "Finished blocking calls by workload class and result.")
+    for workload, data in classes.items():
+        writer.sample(name, data["completed"], {"class": workload, "result": "ok"})
+        writer.sample(name, data["failed"], {"class": workload, "result": "error"})
+    name = writer.family("executor_wait_seconds_total", "counter", "Time blocking calls spent waiting for a worker thread.")
+    for workload, data in classes.items():
+        writer.sample(name, float(data["wait_seconds_total"]), {"class": workload})
+    name = writer.family("maintenance_throttled_seconds_total", "counter", "Pause inserted into maintenance jobs while sessions were live.")
+    writer.sample(name, float(status["maintenance"]["throttled_seconds"]))
+
+
+def _write_component_metrics(writer: _Writer) -> None:
+    statuses = {component: component_status(component) for component in COMPONENTS}
+    name = writer.family("component_ready", "gauge", "Whether a component is ready to serve (1) or not (0).")
+    for component, status in statuses.items():
+        writer.sample(name, int(status["ready"]), {"component": component})
+    name = writer.family("component_status", "gauge", "Current component status as a label.")
+    for component, status in statuses.items():
+        writer.sample(name, 1, {"component": component, "status": status["status"]})
+
+
+def _write_cache_metrics(writer: _Writer) -> None:
+    model_cache = get_model_cache()
+    name = writer.family("model_cache_requests_total", "counter", "Model weight loads by cache result.")
+    writer.sample(name, model_cache.hits, {"result": "hit"})
+    writer.sample(name, model_cache.misses, {"result": "miss"})
+
+    name = writer.family("utterances_total", "counter", "Completed utterance traces by final status.")
+    for status, count in dict(dependencies.trace_store.status_counts).items():
+        writer.sample(name, count, {"status": status})
+
+
+def _write_loop_metrics(writer: _Writer) -> None:
+    monitor = dependencies.loop_monitor
+    if monitor is None:
+        return
+    name = writer.family("event_loop_lag_seconds", "histogram", "Event loop scheduling delay samples.")
+    writer.histogram(name, LOOP_LAG_BOUNDS, monitor.histogram.cumulative(LOOP_LAG_BOUNDS), {})
+    name = writer.family("event_loop_lag_latest_seconds", "gauge", "Most recent event loop scheduling delay.")
+    writer.sample(name, float(monitor.latest))
+
+    detector = dependencies.blocking_detector
+    if detector is not None:
+        name = writer.family("event_loop_blocked_total", "counter", "Callbacks that blocked the loop past the threshold.")
+        writer.sample(name, detector.blocked_count)
+        name = writer.family("event_loop_blocked_seconds_total", "counter", "Time the loop spent blocked past the threshold.")
+        writer.sample(name, float(detector.blocked_seconds))
+
+
+def collect_metrics() -> dict[str, dict]:
+    """收集当前进程的全部指标族"""
+    writer = _Writer()
+    _write_stage_metrics(writer)
+    _write_session_metrics(writer)
+    _write_executor_metrics(writer)
+    _write_component_metrics(writer)
+    _write_cache_metrics(writer)
+    _write_loop_metrics(writer)
+    return writer.families
+
+
+def render_families(workers: dict[str | None, dict[str, dict]]) -> str:
+    """
+    把一个或多个进程的指标族渲染为文本；同名族只输出一次 HELP/TYPE，样本连续排列。
+
+    Args:
+        workers: 进程标识 -> 指标族；标识为 None 时样本不加 worker 标签
+    """
+    merged: dict[str, dict] = {}
+    for worker, families in workers.items():
+        for name, family in families.items():
+            target = merged.setdefault(name, {"type": family["type"], "help": family["help"], "samples": []})
+            for sample_name, labels, value in family["samples"]:
+                if worker is not None:
+                    labels = {"worker": worker, **labels}
+                target["samples"].append((sample_name, labels, value))
+
+    lines = []
+    for name, family in merged.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        lines.extend(f"{sample_name}{_labels(labels)} {_number(value)}" for sample_name, labels, value in family["samples"])
+    return "\n".join(lines) + "\n"
+
+
+def render_metrics(workers: dict[str, dict[str, dict]] | None = None) -> str:
+    """
+    生成指标文本。
+
+    Args:
+        workers: 多进程部署时各工作进程上报的指标族（进程号 -> 指标族）；为空时只导出当前进程
+    """
+    if workers is None:
+        return render_families({None: collect_metrics()})
+    return render_families(workers)
@@ -0,0 +1,42 @@
+"""
+管道共用的 RAG 分类检索
+
+音频管道和文本管道都通过这里按类型检索文档，再交给 LLM 处理器。
+"""
+import asyncio
+
+from langchain_core.documents import Document
+
+from src.core import dependencies
+from src.core.hot_swap import lease
+from src.module.rag.base_rag_processor import MetadataType
+
+
+async def retrieve_docs_by_type(query: str, location: str | None) -> dict[str, list[Document]]:
+    """
+    并发检索媒体和设备文档，设备检索优先限定在用户所在区域。
+
+    Args:
+        query: 用户语句
+        location: 用户当前所在区域
+
+    Returns:
+        按类型分类的RAG文档字典 {"door": [...], "video": [...], "device": [...]}
+    """
+    async with lease(dependencies.component_slots.get("rag"), dependencies.rag_processor) as rag_processor:
+        rag_settings = rag_processor.settings
+
+        # 门文档暂不检索
+        # door_docs = await rag_processor.retrieve_context(
+        #     query, metadata_types=[MetadataType.DOOR], top_k=rag_settings.door_top_k
+        # )
+        video_docs, device_docs = await asyncio.gather(
+            rag_processor.retrieve_context(query, metadata_types=[MetadataType.MEDIA], top_k=rag_settings.media_top_k),
+            rag_processor.retrieve_devices_for_location(query, location, top_k=rag_settings.device_top_k),
+        )
+
+    return {
+        "door": [],
+        "video": video_docs,
+        "device": device_docs
+    }
@@ -5,10 +5,11 @@ from langchain_core.messages import HumanMessage
 
 from src.api.context import Context
 from src.core import dependencies
+from src.core.hot_swap import lease
 from src.module.input.stream_decoder import StreamDecoder
 from src.module.llm.tool.definitions import ExhibitionCommand, CommandAction
 from src.services.aep_client import get_aep_client
-from src.module.rag.base_rag_processor import MetadataType
+from src.services.rag_retrieval import retrieve_docs_by_type
 
 class TextPipelineService:
     """
@@ -52,41 +53,20 @@ class TextPipelineService:
         
         context = await TextPipelineService.get_context(client_id)
         
-        # 1. RAG Retrieval
-        rag_settings = dependencies.rag_processor.settings
-        
-        # Execute retrievals in parallel
-        # door_docs_task = dependencies.rag_processor.retrieve_context(
-        #     text, metadata_types=[MetadataType.DOOR], top_k=rag_settings.door_top_k
-        # )
-        media_docs_task = dependencies.rag_processor.retrieve_context(
-            text, metadata_types=[MetadataType.MEDIA], top_k=rag_settings.media_top_k
-        )
-        device_docs_task = dependencies.rag_processor.retrieve_context(
-            text, metadata_types=[MetadataType.DEVICE], top_k=rag_settings.device_top_k
-        )
-        
-        video_docs, device_docs = await asyncio.gather(
-            media_docs_task, device_docs_task
-        )
-        door_docs = []
-        
-        retrieved_docs_by_type = {
-            "door": door_docs,
-            "video": video_docs,
-            "device": device_docs
-        }
+        # 1. RAG Retrieval (devices are searched in the user's area first)
+        retrieved_docs_by_type = await retrieve_docs_by_type(text, context.location)
         
         # 2. LLM Processing
         chat_history_messages = context.chat_history
         
         # Use existing method to get response and commands
-        ai_message, commands, tool_messages = await dependencies.llm_processor.get_response_with_retries(
-            user_input=text,
-            rag_docs=retrieved_docs_by_type,
-            user_location=context.location,
-            chat_history=chat_history_messages
-        )
+        async with lease(dependencies.component_slots.get("llm"), dependencies.llm_processor) as llm_processor:
+            ai_message, commands, tool_messages = await llm_processor.get_response_with_retries(
+                user_input=text,
+                rag_docs=retrieved_docs_by_type,
+                user_location=context.location,
+                chat_history=chat_history_messages
+            )
         
         # Update chat history
         context.chat_history.append(HumanMessage(content=text))
@@ -0,0 +1,204 @@
+"""
+单句语音端到端链路追踪
+
+VAD 完成一个语音段时创建 Trace（一个 trace_id 对应一句话），随语音段经
+audio_segment_queue → ASR → asr_output_queue → RAG/LLM → command_queue → 命令执行传递。
+每个阶段记录处理 span（开始/结束），队列记录等待 span（入队/出队），链路结束后存入
+有界的 TraceStore，可按耗时排序查询或导出为 OpenTelemetry (OTLP/JSON) 格式。
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator, NamedTuple
+
+
+def _new_id(num_bytes: int) -> str:
+    return os.urandom(num_bytes).hex()
+
+
+@dataclass
+class Span:
+    """链路中的一个阶段或一次队列等待"""
+    name: str
+    start_ns: int
+    end_ns: int
+    span_id: str = field(default_factory=lambda: _new_id(8))
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+@dataclass
+class Trace:
+    """一句话从 VAD 分段到命令执行完成的链路"""
+    attributes: dict[str, Any] = field(default_factory=dict)
+    trace_id: str = field(default_factory=lambda: _new_id(16))
+    root_span_id: str = field(default_factory=lambda: _new_id(8))
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    status: str = "in_progress"
+    spans: list[Span] = field(default_factory=list)
+    _enqueued: dict[str, int] = field(default_factory=dict, repr=False)
+
+    @property
+    def duration(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, **attributes: Any) -> Span:
+        span = Span(name=name, start_ns=start_ns, end_ns=end_ns, attributes=attributes)
+        self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+        """记录一个处理阶段；产出的字典可在阶段内补充属性"""
+        start_ns = time.time_ns()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = repr(e)
+            raise
+        finally:
+            self.add_span(name, start_ns, time.time_ns(), **attributes)
+
+    def enqueued(self, queue_name: str) -> None:
+        self._enqueued[queue_name] = time.time_ns()
+
+    def dequeued(self, queue_name: str) -> None:
+        start_ns = self._enqueued.pop(queue_name, None)
+        if start_ns is not None:
+            self.add_span(f"queue.{queue_name}", start_ns, time.time_ns(), queue=queue_name)
+
+    def finish(self, status: str = "ok") -> None:
+        """结束链路并存入全局 TraceStore（重复调用无效）"""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.status = status
+        from src.core import dependencies
+        dependencies.trace_store.add(self)
+
+    def summary(self) -> dict:
+        """按阶段汇总的耗时（秒），同名 span 累加"""
+        stages: dict[str, float] = {}
+        for span in self.spans:
+            stages[span.name] = round(stages.get(span.name, 0.0) + span.duration, 4)
+        return {
+            "trace_id": self.trace_id,
+            "status": self.status,
+            "start_time": self.start_ns / 1e9,
+            "duration": round(self.duration, 4),
+            "attributes": self.attributes,
+            "stages": stages,
+        }
+
+
+class TracedItem(NamedTuple):
+    """在管道队列中随数据传递的链路"""
+    payload: Any
+    trace: Trace
+
+
+async def put_traced(queue: asyncio.Queue, queue_name: str, payload: Any, trace: Trace) -> None:
+    trace.enqueued(queue_name)
+    await queue.put(TracedItem(payload, trace))
+
+
+async def get_traced(queue: asyncio.Queue, queue_name: str) -> TracedItem:
+    item: TracedItem = await queue.get()
+    item.trace.dequeued(queue_name)
+    return item
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class TraceStore:
+    """
+    已完成链路的有界存储
+
+    保留最近 MAX_TRACES 条，内存占用与流量无关。
+    """
+
+    MAX_TRACES = 1000
+    SERVICE_NAME = "cmcc-voice-assistant"
+
+    def __init__(self, max_traces: int = MAX_TRACES) -> None:
+        self._lock = threading.Lock()
+        self._traces: deque[Trace] = deque(maxlen=max_traces)
+        # 按结束状态的累计链路数（不随淘汰减少）
+        self.status_counts: dict[str, int] = {}
+
+    def add(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces.append(trace)
+            self.status_counts[trace.status] = self.status_counts.get(trace.status, 0) + 1
+
+    def _snapshot(self) -> list[Trace]:
+        with self._lock:
+            return list(self._traces)
+
+    def get(self, trace_id: str) -> Trace | None:
+        return next((t for t in self._snapshot() if t.trace_id == trace_id), None)
+
+    def get_recent(self, limit: int = 50) -> list[Trace]:
+        return self._snapshot()[-limit:][::-1]
+
+    def get_slowest(self, n: int = 10, context_id: str | None = None) -> list[Trace]:
+        traces = [t for t in self._snapshot() if context_id is None or t.attributes.get("context_id") == context_id]
+        return sorted(traces, key=lambda t: t.duration, reverse=True)[:n]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+    def export_otlp(self, traces: list[Trace]) -> dict:
+        """导出为 OTLP/JSON（ExportTraceServiceRequest），根 span 为 utterance，各阶段为其子 span"""
+        spans = []
+        for trace in traces:
+            spans.append({
+                "traceId": trace.trace_id,
+                "spanId": trace.root_span_id,
+                "name": "utterance",
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(trace.start_ns),
+                "endTimeUnixNano": str(trace.end_ns or time.time_ns()),
+                "attributes": _otlp_attributes({**trace.attributes, "utterance.status": trace.status}),
+                "status": {"code": 2 if trace.status == "error" else 1},
+            })
+            for span in trace.spans:
+                spans.append({
+                    "traceId": trace.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": trace.root_span_id,
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": _otlp_attributes(span.attributes),
+                    "status": {"code": 2 if "error" in span.attributes else 1},
+                })
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }]
+        }
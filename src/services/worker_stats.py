@@ -0,0 +1,64 @@
+"""
+多工作进程部署下的监控数据汇总
+
+uvicorn 的各工作进程共用一个端口，/metrics、/monitoring/capacity、/monitoring/admission、
+/monitoring/traces 的请求会随机落到其中一个进程，只能看到该进程的数据。各工作进程定期把
+自己的指标族、容量、准入状态和最近的链路摘要上报给共享推理服务，处理请求的进程取回所有
+进程的快照（自己的一份替换为实时数据）后合并返回。单进程部署时直接返回本进程数据。
+"""
+import asyncio
+import os
+
+from loguru import logger
+
+from src.config.config import get_settings
+from src.core import dependencies
+from src.core.admission import get_admission_controller
+from src.core.capacity import get_capacity_planner
+
+# 每次上报的链路摘要条数
+TRACE_LIMIT = 200
+
+
+def local_worker_stats() -> dict:
+    """当前进程的监控快照"""
+    from src.services.prometheus_exporter import collect_metrics
+
+    return {
+        "metrics": collect_metrics(),
+        "capacity": get_capacity_planner().get_status(),
+        "admission": get_admission_controller().get_status(),
+        "traces": [trace.summary() for trace in dependencies.trace_store.get_recent(TRACE_LIMIT)],
+    }
+
+
+async def gather_worker_stats() -> dict[str, dict] | None:
+    """
+    所有工作进程的监控快照（进程号 -> 快照）；单进程部署时返回 None。
+
+    推理服务不可用时只返回当前进程的快照。
+    """
+    client = dependencies.inference_client
+    if client is None:
+        return None
+    stats: dict[str, dict] = {}
+    try:
+        stats = await client.request("cluster_stats")
+    except Exception as e:
+        logger.warning(f"获取其他工作进程的监控数据失败，只返回本进程数据: {e}")
+    stats[str(os.getpid())] = local_worker_stats()
+    return stats
+
+
+async def publish_worker_stats() -> None:
+    """后台任务：定期把当前进程的快照上报给推理服务"""
+    interval = get_settings().monitoring.worker_stats_interval
+    while True:
+        await asyncio.sleep(interval)
+        client = dependencies.inference_client
+        if client is None or not client.connected:
+            continue
+        try:
+            await client.request("worker_stats", pid=str(os.getpid()), stats=local_worker_stats())
+        except Exception as e:
+            logger.debug(f"上报监控数据失败: {e}")
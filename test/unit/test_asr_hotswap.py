@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.module.asr.base_asr_processor import ASRStatus, BaseASRProcessor
+
+
+class StubASRProcessor(BaseASRProcessor):
+    def __init__(self):
+        super().__init__(device="cpu")
+        self.settings = SimpleNamespace(hotwords=["主屏幕"])
+        self.loads = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def _load_model(self):
+        self.release.wait(timeout=5)
+        self.loads += 1
+        return f"model-{self.loads}"
+
+    def process_audio_data(self, audio_data):
+        return self.model if self.is_ready() else None
+
+    def process_audio(self, audio_data):
+        return []
+
+    def process_audio_file(self, file_path):
+        return None
+
+
+def test_update_hotwords_swaps_list_without_reload():
+    processor = StubASRProcessor()
+    before = processor.settings.hotwords
+
+    assert processor.update_hotwords(["主屏幕", " 投影 ", "", "投影"])
+    assert processor.settings.hotwords == ["主屏幕", "投影"]
+    assert before == ["主屏幕"]
+    assert not processor.update_hotwords(["投影", "主屏幕"])
+    assert processor.loads == 0
+
+
+@pytest.mark.asyncio
+async def test_reinitialize_keeps_serving_old_model_until_swap():
+    processor = StubASRProcessor()
+    await processor.initialize()
+    assert processor.process_audio_data(None) == "model-1"
+
+    processor.release.clear()
+    reload_task = asyncio.create_task(processor.initialize())
+    await asyncio.sleep(0.05)
+
+    assert processor.status == ASRStatus.READY
+    assert processor.process_audio_data(None) == "model-1"
+
+    processor.release.set()
+    await reload_task
+    assert processor.process_audio_data(None) == "model-2"
+
+
+@pytest.mark.asyncio
+async def test_failed_standby_load_keeps_current_model():
+    processor = StubASRProcessor()
+    await processor.initialize()
+
+    def fail():
+        raise RuntimeError("load failed")
+
+    processor._load_model = fail
+    with pytest.raises(RuntimeError):
+        await processor.initialize()
+
+    assert processor.status == ASRStatus.READY
+    assert processor.model == "model-1"
@@ -0,0 +1,82 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.core import admission
+from src.core.admission import AdmissionController, AdmissionDecision
+from src.core.backpressure import ByteBoundedQueue, OverflowPolicy
+from src.config.config import BackpressureSettings
+
+
+def _chunk(value: float, samples: int = 100) -> np.ndarray:
+    return np.full(samples, value, dtype=np.float32)  # 400 字节
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_keeps_newest_within_byte_limit():
+    queue = ByteBoundedQueue("q", max_bytes=1200, policy=OverflowPolicy.DROP_OLDEST)
+    for value in range(5):
+        assert await queue.put(_chunk(value))
+
+    assert queue.nbytes == 1200 and queue.dropped_items == 2
+    assert [float((await queue.get())[0]) for _ in range(3)] == [2.0, 3.0, 4.0]
+
+
+@pytest.mark.asyncio
+async def test_drop_newest_rejects_overflow():
+    queue = ByteBoundedQueue("q", max_bytes=800, policy=OverflowPolicy.DROP_NEWEST)
+    results = [await queue.put(_chunk(value)) for value in range(3)]
+
+    assert results == [True, True, False]
+    assert float((await queue.get())[0]) == 0.0
+    assert queue.stats()["dropped_bytes"] == 400
+
+
+@pytest.mark.asyncio
+async def test_signal_pauses_at_high_watermark_and_blocks_when_full():
+    events = []
+    queue = ByteBoundedQueue(
+        "q", max_bytes=1200, policy=OverflowPolicy.SIGNAL,
+        high_watermark=0.6, low_watermark=0.4, on_pressure=lambda name, paused: events.append(paused),
+    )
+    await queue.put(_chunk(0))
+    await queue.put(_chunk(1))
+    assert events == [True]
+
+    await queue.put(_chunk(2))
+    blocked = asyncio.create_task(queue.put(_chunk(3)))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    await queue.get()
+    await asyncio.wait_for(blocked, 1.0)
+    assert queue.dropped_items == 0
+
+    await queue.get()
+    await queue.get()
+    assert events == [True, False]
+
+
+class _FakeContext:
+    degraded = False
+
+    def __init__(self, queued: int) -> None:
+        self.queued = queued
+
+    def queued_bytes(self) -> int:
+        return self.queued
+
+
+def test_admission_thresholds(monkeypatch):
+    settings = BackpressureSettings(degrade_queue_bytes=1000, reject_queue_bytes=2000, degrade_cpu=2.0, reject_cpu=2.0)
+    controller = AdmissionController(settings)
+    contexts = {}
+    monkeypatch.setattr(admission.dependencies, "active_contexts", contexts)
+
+    assert controller.admit("a") == AdmissionDecision.ACCEPT
+    contexts["a"] = _FakeContext(1500)
+    assert controller.admit("b") == AdmissionDecision.DEGRADE
+    contexts["b"] = _FakeContext(600)
+    assert controller.admit("c") == AdmissionDecision.REJECT
+    assert controller.decisions == {"accept": 1, "degrade": 1, "reject": 1}
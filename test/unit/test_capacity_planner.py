@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.config.config import CapacitySettings
+from src.core.capacity import CapacityPlanner, compute_section, intra_op_threads, measure_compute
+from src.core.executors import WorkloadClass, run_in
+
+
+def _burn(seconds: float) -> None:
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+def _planner(**overrides) -> CapacityPlanner:
+    settings = CapacitySettings(**{"cpu_cores": 4, "target_utilization": 0.5, "min_audio_seconds": 10, **overrides})
+    return CapacityPlanner(settings)
+
+
+def test_capacity_follows_measured_session_cost():
+    planner = _planner()
+    assert planner.capacity() == 20  # 默认成本 0.1 核: 4 * 0.5 / 0.1
+
+    # VAD 每音频秒 0.02 秒，语音占 25%，ASR 每语音秒 0.1 秒 → 单会话 0.045 核
+    for _ in range(100):
+        planner.record_vad(0.004, 0.2)
+    planner.record_asr(0.5, 5.0)
+
+    assert planner.measured
+    assert planner.session_cost() == pytest.approx(0.045)
+    assert planner.capacity() == 44
+    assert _planner(max_sessions=3).capacity() == 3
+
+
+def test_workers_split_host_cores_and_session_limit():
+    planner = _planner(workers=2)
+    assert planner.cpu_cores == 2
+    assert planner.capacity() == 10  # 每个工作进程 2 核: 2 * 0.5 / 0.1
+    assert _planner(max_sessions=5, workers=2).capacity() == 3
+
+
+@pytest.mark.asyncio
+async def test_compute_time_excludes_lock_and_executor_wait():
+    lock = threading.Lock()
+
+    def generate():
+        with lock, compute_section():
+            _burn(0.02)
+            time.sleep(0.05)  # 不占用 CPU 的等待不计入成本
+
+    lock.acquire()
+    with measure_compute() as compute:
+        task = asyncio.create_task(run_in(WorkloadClass.ASR, generate))
+        await asyncio.sleep(0.2)  # 模型调用在锁上等待，这段时间不计入成本
+        lock.release()
+        await task
+    assert 0.02 <= compute[0] / intra_op_threads() < 0.05
+
+
+@pytest.mark.asyncio
+async def test_sessions_beyond_capacity_queue_in_order():
+    planner = _planner(max_sessions=1, queue_timeout=1.0)
+    positions = []
+
+    async def on_queued(position):
+        positions.append(position)
+
+    assert await planner.acquire("a")
+    second = asyncio.create_task(planner.acquire("b", on_queued))
+    third = asyncio.create_task(planner.acquire("c", on_queued))
+    await asyncio.sleep(0.01)
+    assert positions == [1, 2] and planner.queued == 2
+
+    planner.release("a")
+    assert await second is True and not third.done()
+    planner.release("b")
+    assert await third is True
+    assert planner.active == {"c"}
+
+
+@pytest.mark.asyncio
+async def test_reject_when_full_or_queue_times_out():
+    rejecting = _planner(max_sessions=1, overflow="reject")
+    assert await rejecting.acquire("a")
+    assert not await rejecting.acquire("b")
+
+    queueing = _planner(max_sessions=1, queue_timeout=0.05)
+    assert await queueing.acquire("a")
+    assert not await queueing.acquire("b")
+    assert queueing.queued == 0 and queueing.rejected == 1
+    queueing.release("a")
+    assert queueing.active == set()
@@ -0,0 +1,93 @@
+import pytest
+
+from src.api.schemas import DeviceItem
+from src.config.config import get_settings
+from src.services.catalog_store import SQLiteCatalogStore
+from src.services.data_service import DataService
+
+
+DEVICES_CSV = '''"name","type","subType","command","area","view","aliases","description"
+"主屏幕","player","","[""打开"",""关闭""]","展厅","","大屏","展厅正中的拼接大屏幕"
+"灯光","light","","","展厅","","",""
+'''
+
+
+@pytest.fixture
+def data_settings(tmp_path, monkeypatch):
+    data = get_settings().data
+    for attr, content in (
+        ("devices_data_path", DEVICES_CSV),
+        ("areas_data_path", 'name,aliases,description\n"展厅","大厅",""\n'),
+        ("media_data_path", '"name","type","aliases","description"\n'),
+        ("doors_data_path", "name,type,area1,area2,location\n"),
+    ):
+        path = tmp_path / f"{attr}.csv"
+        path.write_text(content, encoding="utf-8")
+        monkeypatch.setattr(data, attr, str(path))
+    monkeypatch.setattr(data, "sqlite_path", str(tmp_path / "catalog.db"))
+    monkeypatch.setattr(DataService, "_instance", None)
+    return data
+
+
+@pytest.fixture
+def sqlite_service(data_settings, monkeypatch):
+    monkeypatch.setattr(data_settings, "backend", "sqlite")
+    service = DataService()
+    yield service
+    service.close()
+
+
+def test_first_start_imports_csv(sqlite_service, data_settings):
+    assert sqlite_service.backend == "sqlite"
+    assert sqlite_service.get_all_devices() == ("主屏幕", "灯光")
+    assert sqlite_service.get_device_info("主屏幕")["command"] == ("打开", "关闭")
+    assert sqlite_service.resolve_area("大厅") == "展厅"
+
+    store = SQLiteCatalogStore(data_settings.sqlite_path)
+    assert store.load_section("devices")["主屏幕"]["command"] == ["打开", "关闭"]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_upsert_and_delete_are_durable(sqlite_service, data_settings):
+    await sqlite_service.upsert_items("devices", [
+        DeviceItem(name="主屏幕", type="player", area="大厅", command=["播放"]),
+        DeviceItem(name="投影", type="player", area="展厅"),
+    ])
+    assert await sqlite_service.delete_items("devices", ["灯光", "不存在"]) == ["灯光"]
+
+    # CSV files are untouched; the store is the source of truth
+    with open(data_settings.devices_data_path, encoding="utf-8") as f:
+        assert f.read() == DEVICES_CSV
+    assert sqlite_service.reload()
+    assert sqlite_service.get_all_devices() == ("主屏幕", "投影")
+    assert sqlite_service.get_device_info("主屏幕")["command"] == ("播放",)
+
+
+def test_search_uses_full_text_index(sqlite_service):
+    assert [d["name"] for d in sqlite_service.search("拼接大屏")] == ["主屏幕"]
+    assert [d["name"] for d in sqlite_service.search("大屏")] == ["主屏幕"]
+    assert sqlite_service.search("不存在的设备") == ()
+
+
+@pytest.mark.asyncio
+async def test_export_round_trips_through_csv(sqlite_service, data_settings):
+    await sqlite_service.upsert_items("devices", [DeviceItem(name="投影", type="player", area="展厅", view=["左"])])
+
+    written = await sqlite_service.export_csv()
+
+    assert written["devices"] == data_settings.devices_data_path
+
+    exported = sqlite_service._process_devices_data(sqlite_service._load_csv_file(written["devices"]))
+    assert list(exported) == ["主屏幕", "灯光", "投影"]
+    assert exported["投影"]["view"] == ["左"]
+
+
+@pytest.mark.asyncio
+async def test_csv_backend_delete_rewrites_file(data_settings):
+    service = DataService()
+
+    assert await service.delete_items("devices", ["主屏幕"]) == ["主屏幕"]
+    assert service.get_all_devices() == ("灯光",)
+    assert service.reload()
+    assert service.get_all_devices() == ("灯光",)
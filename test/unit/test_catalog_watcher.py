@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.config.config import get_settings
+from src.core import dependencies
+from src.module.asr.base_asr_processor import BaseASRProcessor
+from src.module.rag.base_rag_processor import RAGStatus
+from src.services.catalog_watcher import CatalogWatcher
+from src.services.data_service import DataService, diff_snapshots
+
+
+class StubASRProcessor(BaseASRProcessor):
+    def __init__(self):
+        super().__init__(device="cpu")
+        self.settings = SimpleNamespace(hotwords=[])
+
+    def _load_model(self):
+        return object()
+
+    def process_audio_data(self, audio_data):
+        return None
+
+    def process_audio(self, audio_data):
+        return []
+
+    def process_audio_file(self, file_path):
+        return None
+
+
+HEADER = '"name","type","subType","command","area","view","aliases","description"\n'
+
+
+@pytest.fixture
+def data_service(tmp_path, monkeypatch):
+    data = get_settings().data
+    for attr, content in (
+        ("devices_data_path", HEADER + '"主屏幕","player","","","展厅","","",""\n"灯光","light","","","展厅","","",""\n'),
+        ("areas_data_path", 'name,aliases,description\n"展厅","",""\n'),
+        ("media_data_path", '"name","type","aliases","description"\n'),
+        ("doors_data_path", "name,type,area1,area2,location\n"),
+    ):
+        path = tmp_path / f"{attr}.csv"
+        path.write_text(content, encoding="utf-8")
+        monkeypatch.setattr(data, attr, str(path))
+    monkeypatch.setattr(DataService, "_instance", None)
+    return DataService()
+
+
+@pytest.fixture
+def processors(monkeypatch):
+    rag = SimpleNamespace(status=RAGStatus.READY, apply_delta=AsyncMock())
+    asr = StubASRProcessor()
+    monkeypatch.setattr(dependencies, "rag_processor", rag)
+    monkeypatch.setattr(dependencies, "asr_processor", asr)
+    return rag, asr
+
+
+def write_devices(rows: str) -> None:
+    with open(get_settings().data.devices_data_path, "w", encoding="utf-8") as f:
+        f.write(HEADER + rows)
+
+
+def test_diff_reports_only_changed_items(data_service):
+    old = data_service.snapshot
+    write_devices('"主屏幕","player","","","大厅","","",""\n"投影","player","","","展厅","","",""\n')
+    assert data_service.reload(["devices"])
+
+    deltas = diff_snapshots(old, data_service.snapshot)
+
+    assert list(deltas) == ["devices"]
+    assert [item["name"] for item in deltas["devices"].upserted] == ["主屏幕", "投影"]
+    assert deltas["devices"].deleted == ("灯光",)
+
+
+@pytest.mark.asyncio
+async def test_change_propagates_deltas(data_service, processors):
+    rag, asr = processors
+    watcher = CatalogWatcher(data_service, get_settings().data)
+    seen = []
+    watcher.add_listener(seen.append)
+
+    write_devices('"主屏幕","player","","","展厅","","",""\n"投影","player","","","展厅","","",""\n')
+    await watcher.handle_change(["devices"])
+
+    doc_type, upserted, deleted = rag.apply_delta.call_args.args
+    assert doc_type == "device"
+    assert [item["name"] for item in upserted] == ["投影"]
+    assert deleted == ["灯光"]
+    assert "投影" in asr.settings.hotwords and "灯光" not in asr.settings.hotwords
+    assert list(seen[0]) == ["devices"]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_content_is_a_no_op(data_service, processors):
+    rag, _ = processors
+    watcher = CatalogWatcher(data_service, get_settings().data)
+
+    assert await watcher.handle_change(["devices"]) == {}
+    rag.apply_delta.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_polling_fallback_debounces_writes(data_service, processors, monkeypatch):
+    settings = get_settings().data.model_copy(update={"watch_poll_interval": 0.02, "watch_debounce_ms": 100})
+    watcher = CatalogWatcher(data_service, settings)
+    calls = []
+    monkeypatch.setattr(watcher, "handle_change", AsyncMock(side_effect=calls.append))
+
+    task = asyncio.create_task(watcher._watch_polling())
+    await asyncio.sleep(0.05)
+    write_devices('"主屏幕","player","","","展厅","","",""\n')
+    await asyncio.sleep(0.03)
+    write_devices('"主屏幕","player","","","展厅","","","大屏"\n')
+    await asyncio.sleep(0.3)
+    watcher._stop_event.set()
+    await task
+
+    assert calls == [["devices"]]
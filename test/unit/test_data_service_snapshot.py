@@ -0,0 +1,133 @@
+import os
+import pytest
+
+from src.config.config import get_settings
+from src.services.data_service import DataService
+
+
+DEVICES_CSV = '''"name","type","subType","command","area","view","aliases","description"
+"主屏幕","player","","[""打开"",""关闭""]","展厅","[""左"",""右""]","大屏",""
+'''
+AREAS_CSV = '''name,aliases,description
+"展厅","大厅",""
+'''
+
+
+@pytest.fixture
+def data_service(tmp_path, monkeypatch):
+    data = get_settings().data
+    for attr, content in (
+        ("devices_data_path", DEVICES_CSV),
+        ("areas_data_path", AREAS_CSV),
+        ("media_data_path", '"name","type","aliases","description"\n'),
+        ("doors_data_path", "name,type,area1,area2,location\n"),
+    ):
+        path = tmp_path / f"{attr}.csv"
+        path.write_text(content, encoding="utf-8")
+        monkeypatch.setattr(data, attr, str(path))
+    monkeypatch.setattr(DataService, "_instance", None)
+    return DataService()
+
+
+def test_reads_return_immutable_objects(data_service):
+    device = data_service.get_device_info("主屏幕")
+
+    assert device["command"] == ("打开", "关闭")
+    with pytest.raises(TypeError):
+        device["area"] = "别处"
+    assert data_service.get_all_devices_data() is data_service.get_all_devices_data()
+
+
+def test_reload_publishes_new_generation_without_touching_old_snapshot(data_service):
+    before = data_service.snapshot
+
+    assert data_service.reload()
+
+    assert data_service.generation == before.generation + 1
+    assert data_service.snapshot is not before
+    assert before.devices["主屏幕"]["area"] == "展厅"
+
+
+def test_area_indexes_are_part_of_snapshot(data_service):
+    assert data_service.resolve_area("大厅") == "展厅"
+    assert [d["name"] for d in data_service.get_devices_in_area("大厅")] == ["主屏幕"]
+
+
+def test_list_columns_are_parsed_in_bulk():
+    values = ['["a","b"]', "", '["c"]']
+
+    assert DataService._parse_list_column(values, "command") == [["a", "b"], [], ["c"]]
+
+
+def test_invalid_list_value_is_reported():
+    with pytest.raises(ValueError, match="not-json"):
+        DataService._parse_list_column(['["a"]', "not-json"], "command")
+    with pytest.raises(ValueError, match="不是列表"):
+        DataService._parse_list_column(['{"a": 1}'], "view")
+
+
+@pytest.mark.asyncio
+async def test_add_appends_rows_and_updates_snapshot_incrementally(data_service, monkeypatch):
+    from src.api.schemas import DeviceItem
+    path = get_settings().data.devices_data_path
+    monkeypatch.setattr(data_service, "reload", lambda: pytest.fail("add_* must not reload"))
+    generation = data_service.generation
+    inode = os.stat(path).st_ino
+
+    await data_service.add_devices([DeviceItem(name="副屏幕", type="player", area="展厅", command=["打开"])])
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[:2] == DEVICES_CSV.splitlines()
+    assert lines[2].startswith('"副屏幕","player"')
+    assert os.stat(path).st_ino == inode  # 原地追加，不复制重写整个文件
+    assert data_service.generation == generation + 1
+    assert data_service.get_device_info("副屏幕")["command"] == ("打开",)
+    assert data_service.device_exists("主屏幕")
+    assert [d["name"] for d in data_service.get_devices_in_area("展厅")] == ["主屏幕", "副屏幕"]
+
+
+@pytest.mark.asyncio
+async def test_torn_append_is_rolled_back_on_reload(data_service, monkeypatch):
+    from src.api.schemas import DeviceItem
+    path = get_settings().data.devices_data_path
+    encode_rows = DataService._encode_rows
+    fsync = os.fsync
+    calls = []
+
+    def crash_on_data_fsync(fd):
+        calls.append(fd)
+        if len(calls) == 3:  # 日志文件与目录之后的数据文件 fsync：模拟写到一半时进程退出
+            raise OSError("simulated crash")
+        fsync(fd)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(DataService, "_encode_rows",
+                      staticmethod(lambda rows, header=None: encode_rows(rows, header)[:9]))
+        patch.setattr(os, "fsync", crash_on_data_fsync)
+        with pytest.raises(OSError):
+            await data_service.add_devices([DeviceItem(name="副屏幕", type="player", area="展厅")])
+    with open(path, "rb") as f:
+        assert f.read() == DEVICES_CSV.encode("utf-8") + '"副屏幕","'.encode("utf-8")[:9]  # 残缺的行
+
+    assert data_service.reload()
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == DEVICES_CSV
+    assert not data_service.device_exists("副屏幕")
+
+    await data_service.add_devices([DeviceItem(name="投影仪", type="player", area="展厅")])
+    assert data_service.reload()
+    assert [d["name"] for d in data_service.get_all_devices_data()] == ["主屏幕", "投影仪"]
+
+
+@pytest.mark.asyncio
+async def test_clear_keeps_header_only(data_service):
+    path = get_settings().data.devices_data_path
+
+    await data_service.clear_devices()
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read().splitlines() == ['"name","type","subType","command","area","view","aliases","description"']
+    assert data_service.get_all_devices_data() == ()
+    assert data_service.reload()
+    assert data_service.get_all_devices_data() == ()
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from src.config.config import VADSettings
+from src.module.vad.energy_gate import EnergyGate
+from src.module.vad.vad_processor import VADProcessor
+
+SAMPLE_RATE = 16000
+CHUNK = SAMPLE_RATE // 5  # 200ms
+
+
+def _tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return (1e-4 * np.random.default_rng(0).standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+class FakeVADCore:
+    """按能量判定语音的流式 VAD，时间戳基于自身收到的采样数（与 FSMN-VAD 一样）"""
+
+    chunk_size = 200
+    sample_rate = SAMPLE_RATE
+
+    def __init__(self):
+        self.calls = 0
+        self.samples = 0
+        self.speaking = False
+
+    async def aprocess_chunk(self, chunk, cache):
+        self.calls += 1
+        now_ms = self.samples * 1000 // SAMPLE_RATE
+        self.samples += len(chunk)
+        loud = float(np.abs(chunk).mean()) > 0.01
+        if loud and not self.speaking:
+            self.speaking = True
+            return [[now_ms, -1]]
+        if not loud and self.speaking:
+            self.speaking = False
+            return [[-1, now_ms]]
+        return []
+
+
+def test_gate_skips_silence_but_keeps_speech_and_fricatives():
+    gate = EnergyGate(VADSettings(), chunk_ms=200)
+    assert gate.is_silent(_silence(0.2))
+    assert not gate.is_silent(_tone(0.2))
+    # 低能量的高频噪声（类似清辅音）不视为静音
+    hiss = (0.003 * np.random.default_rng(1).standard_normal(CHUNK)).astype(np.float32)
+    assert not gate.is_silent(hiss)
+
+
+@pytest.mark.asyncio
+async def test_skipped_chunks_keep_segment_timestamps_on_the_stream_timeline():
+    core = FakeVADCore()
+    processor = VADProcessor(core, VADSettings(save_audio_segments=False, gate_hangover_ms=600))
+    await processor.append_audio(np.concatenate([_silence(5.0), _tone(1.0), _silence(5.0)]))
+
+    segments = []
+    while not processor.chunk_queue.empty():
+        segments.extend(processor.process_result(await processor.process_chunk()))
+
+    assert len(segments) == 1
+    start_ms, end_ms, audio, _ = segments[0]
+    assert (start_ms, end_ms) == (5000, 6000)
+    np.testing.assert_array_equal(audio, _tone(1.0))
+    # 55 个块中只有语音段、其前一个块和结束后的 hangover 送入模型
+    assert core.calls == 10
+    assert processor.gate.skipped == 45
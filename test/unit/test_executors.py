@@ -0,0 +1,83 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from src.config.config import ExecutorSettings
+from src.core.executors import WorkloadClass, WorkloadExecutors
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def _executors(live_sessions=0, **overrides) -> WorkloadExecutors:
+    settings = ExecutorSettings(**{"maintenance_workers": 1, "maintenance_pause": 0.05, **overrides})
+    return WorkloadExecutors(settings, live_sessions=lambda: live_sessions)
+
+
+@pytest.mark.asyncio
+async def test_busy_maintenance_pool_does_not_delay_realtime_work():
+    executors = _executors()
+    release = threading.Event()
+    try:
+        background = asyncio.create_task(executors.run(WorkloadClass.MAINTENANCE, release.wait))
+        queued = asyncio.create_task(executors.run(WorkloadClass.MAINTENANCE, lambda: None))
+        await asyncio.sleep(0.05)
+
+        request_id.set("client-1")
+        start = time.perf_counter()
+        assert await executors.run(WorkloadClass.REALTIME, request_id.get) == "client-1"
+        assert time.perf_counter() - start < 0.5
+
+        status = executors.get_status()["classes"]
+        assert status["maintenance"]["running"] == 1
+        assert status["maintenance"]["queued"] == 1
+        assert status["realtime"]["completed"] == 1
+    finally:
+        release.set()
+    await asyncio.gather(background, queued)
+    executors.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_batched_maintenance_is_throttled_only_while_sessions_are_live():
+    batches = []
+
+    idle = _executors(live_sessions=0)
+    await idle.run_batched(batches.append, list(range(10)), batch_size=4)
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert idle.throttled_batches == 0
+
+    busy = _executors(live_sessions=2)
+    start = time.perf_counter()
+    await busy.run_batched(batches.append, list(range(10)), batch_size=4)
+    assert busy.throttled_batches == 2
+    assert time.perf_counter() - start >= 0.1
+    assert busy.get_status()["classes"]["maintenance"]["completed"] == 3
+
+    idle.shutdown()
+    busy.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_batched_maintenance_waits_for_realtime_backlog_without_sessions():
+    executors = _executors(live_sessions=0, realtime_workers=1)
+    release = threading.Event()
+    busy = asyncio.create_task(executors.run(WorkloadClass.REALTIME, release.wait))
+    queued = asyncio.create_task(executors.run(WorkloadClass.REALTIME, lambda: None))
+    await asyncio.sleep(0.02)
+    assert executors.live_backlog() == 1
+
+    # 推理服务进程中没有会话，只能依据实时任务排队判断是否让位
+    asyncio.get_running_loop().call_later(0.2, release.set)
+    batches = []
+    start = time.perf_counter()
+    await executors.run_batched(batches.append, list(range(8)), batch_size=4)
+    assert len(batches) == 2
+    assert executors.throttled_batches == 1
+    assert time.perf_counter() - start >= 0.2
+    assert executors.live_backlog() == 0
+
+    await asyncio.gather(busy, queued)
+    executors.shutdown()
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import av
+import numpy as np
+import pytest
+from fastapi import WebSocketDisconnect
+
+from src.api.schemas import WebSocketConfig
+from src.config.config import ServerSettings
+from src.module.input.frame_protocol import (
+    AudioEncoding,
+    FrameProtocolError,
+    FrameReceiver,
+    FrameType,
+    StreamFormat,
+    negotiate,
+    pack_frame,
+)
+from src.services.audio_pipeline import receive_loop
+
+
+def test_negotiation_keeps_legacy_clients_and_falls_back_to_supported_encoding():
+    settings = ServerSettings(ws_client_vad=True, ws_opus=False)
+
+    legacy = negotiate(WebSocketConfig(type="config", format="pcm", sampleRate=16000), settings, 16000)
+    assert legacy.protocol == 1
+
+    ack = negotiate(
+        WebSocketConfig(type="config", protocol=2, encoding="opus", frameMs=500, clientVad=True), settings, 16000
+    ).ack()
+    assert ack == {"type": "config_ack", "protocol": 2, "encoding": "int16", "sampleRate": 16000,
+                   "frameMs": 200, "clientVad": True}
+
+    no_client_vad = negotiate(WebSocketConfig(type="config", protocol=2, encoding="float32", clientVad=True),
+                              ServerSettings(ws_client_vad=False), 16000)
+    assert no_client_vad.encoding == AudioEncoding.FLOAT32 and not no_client_vad.client_vad
+
+
+def test_receiver_fills_gaps_drops_duplicates_and_closes_utterances():
+    fmt = StreamFormat(protocol=2, frame_ms=20, client_vad=True)
+    receiver = FrameReceiver(fmt, speech_end_silence_ms=100, max_gap_ms=40)
+    audio = np.arange(320, dtype=np.int16).tobytes()
+
+    assert receiver.feed(pack_frame(FrameType.SPEECH_START, 0, 0)) == []
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 1, 0, audio)) == [audio]
+    # 丢了 3 帧，最多补 40ms（2 帧）静音
+    gap, payload = receiver.feed(pack_frame(FrameType.AUDIO, 5, 80, audio))
+    assert gap == bytes(2 * 640) and payload == audio
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 3, 40, audio)) == []
+    assert receiver.feed(pack_frame(FrameType.SPEECH_END, 6, 100)) == [bytes(3200)]
+
+    assert receiver.stats() == {"frames": 4, "audio_bytes": 1280, "lost_frames": 3,
+                                "discarded_frames": 1, "reordered_frames": 0, "utterances": 1}
+    with pytest.raises(FrameProtocolError):
+        receiver.feed(pack_frame(FrameType.AUDIO, 7, 120, b"\x00"))
+    with pytest.raises(FrameProtocolError):
+        receiver.feed(b"\x01\x01")
+
+
+def test_jitter_buffer_reorders_late_frames_within_tolerance():
+    fmt = StreamFormat(protocol=2, frame_ms=20)
+    receiver = FrameReceiver(fmt, speech_end_silence_ms=0, max_gap_ms=1000, jitter_ms=40)
+    frames = [np.full(320, i, dtype=np.int16).tobytes() for i in range(6)]
+
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 0, 0, frames[0])) == [frames[0]]
+    # 1 迟到：2 先缓存，1 到达后按顺序输出
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 2, 40, frames[2])) == []
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 1, 20, frames[1])) == [frames[1], frames[2]]
+    # 3 丢失：等满 40ms（到 5）后补一帧静音
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 4, 80, frames[4])) == []
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 5, 100, frames[5])) == [bytes(640), frames[4], frames[5]]
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 3, 60, frames[3])) == []
+    assert receiver.stats()["reordered_frames"] == 1
+    assert receiver.stats()["lost_frames"] == 1
+
+
+
+def test_jitter_window_expires_by_arrival_time_when_stream_goes_idle():
+    fmt = StreamFormat(protocol=2, frame_ms=20)
+    receiver = FrameReceiver(fmt, speech_end_silence_ms=0, max_gap_ms=1000, jitter_ms=60)
+    frames = [np.full(320, i, dtype=np.int16).tobytes() for i in range(3)]
+
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 0, 0, frames[0]), now=0.0) == [frames[0]]
+    # 1 丢失后客户端不再发送：2 一直缓存，直到 60ms 容限按到达时间到期
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 2, 40, frames[2]), now=0.04) == []
+    assert receiver.expire_in(now=0.05) == pytest.approx(0.05)
+    assert receiver.expire(now=0.07) == []
+    assert receiver.expire(now=0.10) == [bytes(640), frames[2]]
+    assert receiver.expire_in() is None
+
+
+def test_gap_before_speech_end_is_not_held_back():
+    fmt = StreamFormat(protocol=2, frame_ms=20, client_vad=True)
+    receiver = FrameReceiver(fmt, speech_end_silence_ms=100, max_gap_ms=1000, jitter_ms=200)
+    audio = np.arange(320, dtype=np.int16).tobytes()
+
+    receiver.feed(pack_frame(FrameType.SPEECH_START, 0, 0))
+    receiver.feed(pack_frame(FrameType.AUDIO, 1, 0, audio))
+    # 2 丢失，随后的 3 在容限内等待；SPEECH_END 到达后立即输出，不等客户端的下一段语音
+    assert receiver.feed(pack_frame(FrameType.AUDIO, 3, 40, audio), now=0.0) == []
+    assert receiver.feed(pack_frame(FrameType.SPEECH_END, 4, 60), now=0.0) == [bytes(640), audio, bytes(3200)]
+    assert receiver.stats()["lost_frames"] == 1
+
+
+@pytest.mark.asyncio
+async def test_receive_loop_expires_held_frames_while_connection_is_idle():
+    fmt = StreamFormat(protocol=2, frame_ms=20)
+    audio = np.arange(320, dtype=np.int16).tobytes()
+    incoming = asyncio.Queue()
+    for seq in (0, 2):
+        incoming.put_nowait(pack_frame(FrameType.AUDIO, seq, seq * 20, audio))
+    context = SimpleNamespace(
+        frame_receiver=FrameReceiver(fmt, speech_end_silence_ms=0, max_gap_ms=1000, jitter_ms=60),
+        audio_input_queue=asyncio.Queue(),
+    )
+    task = asyncio.create_task(receive_loop(SimpleNamespace(receive_bytes=incoming.get), context))
+    try:
+        chunks = [await asyncio.wait_for(context.audio_input_queue.get(), 1.0) for _ in range(3)]
+    finally:
+        task.cancel()
+    assert chunks == [audio, bytes(640), audio]
+
+
+@pytest.mark.asyncio
+async def test_disconnect_flush_decodes_off_the_event_loop():
+    threads = []
+
+    def flush():
+        threads.append(threading.current_thread().name)
+        return [b"tail"]
+
+    async def disconnected():
+        raise WebSocketDisconnect(code=1000)
+
+    receiver = SimpleNamespace(decodes=True, expire_in=lambda: None, flush=flush)
+    context = SimpleNamespace(frame_receiver=receiver, audio_input_queue=asyncio.Queue())
+    await receive_loop(SimpleNamespace(receive_bytes=disconnected), context)
+
+    # Opus 会话断开时冲刷抖动缓冲仍需解码，与 feed/expire 一样在实时线程池中执行
+    assert threads and threads[0].startswith("cmcc-realtime")
+    assert context.audio_input_queue.get_nowait() == b"tail"
+
+
+def test_opus_frames_are_decoded_to_float32_pcm():
+    ack = negotiate(WebSocketConfig(type="config", protocol=2, encoding="opus", frameMs=30),
+                    ServerSettings(ws_opus=True), 16000).ack()
+    assert ack["encoding"] == "opus" and ack["frameMs"] == 20
+
+    encoder = av.CodecContext.create("libopus", "w")
+    encoder.sample_rate, encoder.layout, encoder.format = 16000, "mono", "s16"
+    encoder.bit_rate, encoder.options = 24000, {"frame_duration": "20"}
+    t = np.arange(16000) / 16000
+    tone = (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    packets = []
+    for i in range(0, len(tone), 320):
+        frame = av.AudioFrame.from_ndarray(tone[i:i + 320].reshape(1, -1), format="s16", layout="mono")
+        frame.sample_rate, frame.pts = 16000, i
+        packets.extend(bytes(p) for p in encoder.encode(frame))
+
+    fmt = StreamFormat(protocol=2, encoding=AudioEncoding.OPUS, frame_ms=20)
+    receiver = FrameReceiver(fmt, speech_end_silence_ms=0, max_gap_ms=1000)
+    pcm = b"".join(chunk for seq, packet in enumerate(packets)
+                   for chunk in receiver.feed(pack_frame(FrameType.AUDIO, seq, seq * 20, packet)))
+    decoded = np.frombuffer(pcm, dtype=np.float32)
+
+    assert sum(map(len, packets)) < len(tone) * 2 / 8
+    assert abs(len(decoded) - len(packets) * 320) <= 320
+    assert abs(np.sqrt(np.mean(decoded[1600:] ** 2)) - 8000 / 32767 / np.sqrt(2)) < 0.05
+    assert receiver.stats()["decode_errors"] == 0
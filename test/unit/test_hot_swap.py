@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from src.core.hot_swap import HotSwapSlot, SwapError, lease
+
+
+class Component:
+    def __init__(self, name, healthy=True):
+        self.name = name
+        self.healthy = healthy
+        self.ready = False
+        self.closed = False
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def initialize(self):
+        await self.gate.wait()
+        self.ready = True
+
+    async def smoke_test(self):
+        return self.ready and self.healthy
+
+    async def close(self):
+        self.closed = True
+
+
+def make_slot(*candidates):
+    published = []
+    pending = list(candidates)
+    slot = HotSwapSlot("test", lambda: pending.pop(0), published.append, current=Component("old"))
+    return slot, published
+
+
+@pytest.mark.asyncio
+async def test_swap_keeps_old_instance_until_new_one_is_ready():
+    new = Component("new")
+    new.gate.clear()
+    slot, published = make_slot(new)
+    old = slot.current
+
+    task = asyncio.create_task(slot.swap())
+    await asyncio.sleep(0.01)
+    assert slot.current is old and slot.swapping
+
+    new.gate.set()
+    assert await task is new
+    assert slot.current is new
+    assert published == [new]
+
+
+@pytest.mark.asyncio
+async def test_failed_smoke_test_keeps_current_instance():
+    bad = Component("bad", healthy=False)
+    slot, published = make_slot(bad)
+    old = slot.current
+
+    with pytest.raises(SwapError):
+        await slot.swap()
+
+    assert slot.current is old
+    assert published == []
+    assert bad.closed and not old.closed
+    assert slot.last_swap["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_old_instance_is_closed_after_in_flight_calls_finish():
+    slot, _ = make_slot(Component("new"))
+    old = slot.current
+
+    async with lease(slot, None) as instance:
+        assert instance is old
+        await slot.swap()
+        await asyncio.sleep(0.1)
+        assert not old.closed
+
+    await asyncio.sleep(0.1)
+    assert old.closed
+
+
+@pytest.mark.asyncio
+async def test_lease_without_slot_uses_given_instance():
+    instance = Component("plain")
+
+    async with lease(None, instance) as leased:
+        assert leased is instance
+
+
+class FakeVADCore(Component):
+    chunk_size = 200
+    sample_rate = 16000
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.calls = 0
+        self.released = []
+
+    async def aprocess_chunk(self, chunk, cache):
+        self.calls += 1
+        cache.setdefault("owner", self.name)
+        await self.gate.wait()
+        return []
+
+    async def release_cache(self, cache):
+        self.released.append(cache)
+
+
+@pytest.mark.asyncio
+async def test_vad_session_leases_core_and_moves_to_the_swapped_instance():
+    import numpy as np
+    from src.config.config import VADSettings
+    from src.module.vad.vad_processor import VADProcessor
+
+    old, new = FakeVADCore("old"), FakeVADCore("new")
+    slot = HotSwapSlot("VAD", lambda: new, lambda _: None, current=old)
+    processor = VADProcessor(old, VADSettings(energy_gate=False, save_audio_segments=False), slot=slot)
+    chunk = np.zeros(3200, dtype=np.float32)
+
+    old.gate.clear()
+    await processor.append_audio(chunk)
+    inference = asyncio.create_task(processor.process_chunk())
+    await asyncio.sleep(0.01)
+    await slot.swap()
+    await asyncio.sleep(0.1)
+    assert not old.closed  # 推理进行中，旧实例不能被关闭
+
+    old.gate.set()
+    await inference
+    await asyncio.sleep(0.1)
+    assert old.closed
+
+    await processor.append_audio(chunk)
+    await processor.process_chunk()
+    assert processor.vad_core is new and new.calls == 1
+    assert processor.cache == {"owner": "new"} and old.released == [{"owner": "old"}]
+    assert processor._to_stream_ms(0) == 200  # 新模型时间轴对齐到音频流当前位置
+
+
+@pytest.mark.asyncio
+async def test_swapped_llm_handler_stops_receiving_tool_updates():
+    from unittest.mock import MagicMock
+    from src.config.config import LLMSettings
+    from src.module.llm.base_llm_handler import BaseLLMHandler
+
+    class StubLLMHandler(BaseLLMHandler):
+        def _create_model(self):
+            return MagicMock()
+
+        async def probe(self):
+            return True
+
+    settings = LLMSettings(keepalive_interval=0)
+    old = StubLLMHandler(settings)
+    await old.initialize()
+    slot = HotSwapSlot("LLM", lambda: StubLLMHandler(settings), lambda _: None, current=old)
+
+    new = await slot.swap()
+    await asyncio.sleep(0.1)
+
+    callbacks = old._dynamic_manager._callbacks
+    assert old._on_tools_updated not in callbacks
+    assert new._on_tools_updated in callbacks
+    await new.close()
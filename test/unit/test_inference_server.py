@@ -0,0 +1,214 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from src.config.config import InferenceSettings, get_settings
+from src.core.capacity import compute_section, intra_op_threads, measure_compute
+from src.module.asr.base_asr_processor import ASRStatus
+from langchain_core.documents import Document
+
+from src.module.inference.client import (
+    InferenceClient, InferenceError, RemoteASRProcessor, RemoteRAGProcessor, RemoteVADCore,
+)
+from src.module.inference.server import InferenceServer
+from src.module.rag.base_rag_processor import MetadataType, RAGStatus
+from src.module.vad.base_vad_processor import VADStatus
+
+
+class StubVAD:
+    status = VADStatus.READY
+    error_message = None
+
+    def process_chunk(self, chunk, cache):
+        cache["chunks"] = cache.get("chunks", 0) + 1
+        return [[cache["chunks"], len(chunk)]]
+
+
+class StubASR:
+    status = ASRStatus.READY
+    error_message = None
+
+    def __init__(self):
+        self.hotwords = []
+
+    def process_audio_data(self, audio):
+        with compute_section():
+            end = time.thread_time() + 0.01
+            while time.thread_time() < end:
+                pass
+        return f"{len(audio)}:{audio.dtype}"
+
+    def process_audio(self, batch):
+        return [str(len(audio)) for audio in batch]
+
+    def update_hotwords(self, hotwords):
+        self.hotwords = hotwords
+        return True
+
+
+class StubRAG:
+    status = RAGStatus.READY
+    error_message = None
+
+    async def retrieve_context(self, query, metadata_types=None, top_k=None, adaptive=None, where=None):
+        return [Document(page_content=query, metadata={"type": t.value, "top_k": top_k}) for t in metadata_types]
+
+    async def close(self):
+        pass
+
+
+class StubCatalogWatcher:
+    def __init__(self, publish):
+        self.publish = publish
+
+    async def handle_change(self, sections):
+        deltas = {section: object() for section in sections}
+        await self.publish(deltas)
+        return deltas
+
+    async def stop(self):
+        pass
+
+
+@pytest_asyncio.fixture
+async def server(tmp_path, monkeypatch):
+    settings = get_settings().model_copy(update={
+        "inference": InferenceSettings(socket_path=str(tmp_path / "inference.sock"), connect_timeout=2.0),
+    })
+    server = InferenceServer(settings)
+    server.vad_core, server.asr_processor = StubVAD(), StubASR()
+    server.rag_processor = StubRAG()
+    server.catalog_watcher = StubCatalogWatcher(server._publish_catalog)
+
+    async def no_models():
+        pass
+
+    monkeypatch.setattr(server, "_load_models", no_models)
+    await server.start()
+    yield server
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_vad_sessions_keep_separate_state_on_server(server):
+    vad = RemoteVADCore(get_settings().vad, InferenceClient(server.settings.inference))
+    await vad.initialize()
+    assert vad.status == VADStatus.READY
+
+    first, second = {}, {}
+    chunk = np.zeros(3200, dtype=np.float32)
+    assert await vad.aprocess_chunk(chunk, first) == [(1, 3200)]
+    assert await vad.aprocess_chunk(chunk, first) == [(2, 3200)]
+    assert await vad.aprocess_chunk(chunk, second) == [(1, 3200)]
+    assert server.get_status()["vad_sessions"] == 2
+
+    await vad.release_cache(first)
+    assert server.get_status()["vad_sessions"] == 1
+    await vad.client.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_asr_runs_from_worker_threads(server):
+    asr = RemoteASRProcessor(get_settings().asr.model_copy(update={"hotwords": ["主屏幕"]}),
+                             InferenceClient(server.settings.inference))
+    await asr.initialize()
+    assert server.asr_processor.hotwords == ["主屏幕"]
+
+    pcm = np.zeros(1600, dtype=np.int16)
+    results = await asyncio.gather(*(asyncio.to_thread(asr.process_audio_data, pcm) for _ in range(4)))
+    assert results == ["1600:float32"] * 4
+    assert await asyncio.to_thread(asr.process_audio, [np.zeros(10, np.float32), np.zeros(20, np.float32)]) == ["10", "20"]
+    await asr.client.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_compute_time_is_reported_to_caller(server):
+    asr = RemoteASRProcessor(get_settings().asr, InferenceClient(server.settings.inference))
+    await asr.initialize()
+
+    def recognize():
+        with measure_compute() as compute:
+            asr.process_audio_data(np.zeros(1600, dtype=np.float32))
+        return compute[0]
+
+    # 服务端只回报模型调用本身的耗时，调用方所在线程的上下文收到该值
+    assert 0.01 <= await asyncio.to_thread(recognize) / intra_op_threads() < 0.5
+    await asr.client.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_rag_retrieves_through_server(server):
+    rag = RemoteRAGProcessor(get_settings().rag, InferenceClient(server.settings.inference))
+    await rag.initialize()
+    assert rag.status == RAGStatus.READY
+
+    docs = await rag.retrieve_context("主屏幕", [MetadataType.DEVICE, MetadataType.DOOR], top_k=3)
+    assert [(doc.page_content, doc.metadata) for doc in docs] == [
+        ("主屏幕", {"type": "device", "top_k": 3}),
+        ("主屏幕", {"type": "door", "top_k": 3}),
+    ]
+    await rag.client.close()
+
+
+@pytest.mark.asyncio
+async def test_catalog_changes_are_published_to_every_worker(server):
+    writer = RemoteRAGProcessor(get_settings().rag, InferenceClient(server.settings.inference))
+    other = InferenceClient(server.settings.inference)
+    await writer.initialize()
+    await other.connect()
+    received = []
+    event = asyncio.Event()
+
+    async def on_catalog(header):
+        received.append(header["sections"])
+        event.set()
+
+    other.add_event_listener("catalog", on_catalog)
+    # 工作进程写入目录后只通知推理服务，由它同步向量库并向所有工作进程发布
+    await writer.batch_add_devices([])
+    await asyncio.wait_for(event.wait(), timeout=2.0)
+    assert received == [["devices"]]
+    # 推送的事件帧不影响同一连接上的请求响应
+    assert (await writer.client.request("status"))["rag"] == "READY"
+    await writer.client.close()
+    await other.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_stats_are_gathered_through_server(server, monkeypatch):
+    from src.core import dependencies
+    from src.services import worker_stats
+
+    other = InferenceClient(server.settings.inference)
+    await other.request("worker_stats", pid="1", stats={"capacity": {"capacity": 3}})
+    client = InferenceClient(server.settings.inference)
+    monkeypatch.setattr(dependencies, "inference_client", client)
+    monkeypatch.setattr(worker_stats, "local_worker_stats", lambda: {"capacity": {"capacity": 5}})
+
+    # 处理请求的进程看到所有进程上报的快照，自己的一份为实时数据
+    stats = await worker_stats.gather_worker_stats()
+    assert stats == {"1": {"capacity": {"capacity": 3}}, str(os.getpid()): {"capacity": {"capacity": 5}}}
+    await client.close()
+    await other.close()
+
+
+@pytest.mark.asyncio
+async def test_server_errors_are_returned_to_caller(server):
+    client = InferenceClient(server.settings.inference)
+    with pytest.raises(InferenceError, match="未知的推理操作"):
+        await client.request("unknown")
+    # 连接在错误后仍可用
+    assert (await client.request("status"))["vad"] == "READY"
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_connect_times_out_without_server(tmp_path):
+    client = InferenceClient(InferenceSettings(socket_path=str(tmp_path / "missing.sock")))
+    with pytest.raises(InferenceError):
+        await client.connect(timeout=0.1)
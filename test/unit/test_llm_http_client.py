@@ -0,0 +1,60 @@
+import httpx
+import pytest
+
+from src.config.config import LLMSettings
+from src.module.llm import http_client
+from src.module.llm.dashscope_llm_handler import DashScopeLLMHandler
+
+
+@pytest.fixture(autouse=True)
+def reset_clients(monkeypatch):
+    monkeypatch.setattr(http_client, "_clients", {})
+
+
+def install_mock_transport(base_url, handler):
+    http_client._clients[base_url] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_client_is_shared_per_base_url():
+    settings = LLMSettings()
+    first = http_client.get_async_http_client("https://a.example/v1", settings)
+
+    assert http_client.get_async_http_client("https://a.example/v1", settings) is first
+    assert http_client.get_async_http_client("https://b.example/v1", settings) is not first
+
+
+@pytest.mark.asyncio
+async def test_probe_uses_models_endpoint_without_generation():
+    settings = LLMSettings()
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"data": []})
+
+    install_mock_transport(settings.dashscope_base_url, handler)
+    llm = DashScopeLLMHandler(settings)
+
+    assert await llm.probe() is True
+    assert requests[0].method == "GET"
+    assert requests[0].url.path.endswith("/models")
+    assert requests[0].headers["Authorization"].startswith("Bearer ")
+
+
+@pytest.mark.asyncio
+async def test_probe_reports_auth_failure():
+    settings = LLMSettings()
+    install_mock_transport(settings.dashscope_base_url, lambda request: httpx.Response(401))
+
+    assert await DashScopeLLMHandler(settings).probe() is False
+
+
+@pytest.mark.asyncio
+async def test_warmup_opens_configured_connections():
+    settings = LLMSettings(warmup_connections=3)
+    requests = []
+    install_mock_transport(settings.dashscope_base_url, lambda request: requests.append(request) or httpx.Response(200))
+
+    await DashScopeLLMHandler(settings).warmup()
+
+    assert len(requests) == 3
@@ -0,0 +1,124 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from langchain_core.messages import AIMessage
+
+from src.config.config import LLMSettings
+from src.core import dependencies
+from src.module.llm.base_llm_handler import BaseLLMHandler, LLMStatus
+from src.module.llm.llm_router import LLMRouter, is_transient_error
+from src.services.performance_metrics_manager import MetricType, PerformanceMetricsManager
+
+
+class StubLLMHandler(BaseLLMHandler):
+    def _create_model(self):
+        return MagicMock()
+
+
+def make_provider(settings, reply=None, error=None):
+    handler = StubLLMHandler(settings)
+    handler.status = LLMStatus.READY
+    handler._invoke_chain = AsyncMock(return_value=reply, side_effect=error)
+    return handler
+
+
+@pytest.fixture
+def settings():
+    return LLMSettings(router_min_samples=2)
+
+
+@pytest.fixture(autouse=True)
+def metrics(monkeypatch):
+    manager = PerformanceMetricsManager()
+    monkeypatch.setattr(dependencies, "metrics_manager", manager)
+    return manager
+
+
+def test_rank_prefers_lower_latency(settings, metrics):
+    router = LLMRouter(settings, {"slow": make_provider(settings), "fast": make_provider(settings)})
+    for _ in range(3):
+        metrics.record(MetricType.LLM_GENERATE, 2.0, source="slow")
+        metrics.record(MetricType.LLM_GENERATE, 0.5, source="fast")
+
+    ranking = router.rank_providers()
+
+    assert [s.provider for s in ranking] == ["fast", "slow"]
+    assert ranking[0].p50 == 0.5
+
+
+def test_rank_penalizes_errors_and_explores_cold_providers(settings, metrics):
+    router = LLMRouter(settings, {"flaky": make_provider(settings), "cold": make_provider(settings)})
+    metrics.record(MetricType.LLM_GENERATE, 0.1, source="flaky")
+    metrics.record(MetricType.LLM_GENERATE, 0.1, source="flaky", success=False)
+
+    ranking = router.rank_providers()
+
+    assert ranking[0].provider == "cold"
+    assert ranking[1].error_rate == 0.5
+
+
+def test_source_metrics_do_not_leak_into_stage_stats(metrics):
+    metrics.record(MetricType.LLM_GENERATE, 1.0, source="a")
+
+    assert metrics.get_stats()[MetricType.LLM_GENERATE.value]["count"] == 0
+    assert metrics.get_source_stats(MetricType.LLM_GENERATE, "a")["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failover_on_transient_error(settings, metrics):
+    reply = AIMessage(content="ok")
+    primary = make_provider(settings, error=httpx.ConnectTimeout("timeout"))
+    backup = make_provider(settings, reply=reply)
+    router = LLMRouter(settings, {"primary": primary, "backup": backup})
+    router.status = LLMStatus.READY
+
+    result = await router._invoke_chain({"chat_history": []})
+
+    assert result is reply
+    decision = router.get_decisions(1)[0]
+    assert decision["selected"] == "backup"
+    assert [a["success"] for a in decision["attempts"]] == [False, True]
+    assert metrics.get_source_stats(MetricType.LLM_GENERATE, "primary")["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_non_transient_error_is_not_retried(settings):
+    primary = make_provider(settings, error=ValueError("tool_call ids did not have response tool messages"))
+    backup = make_provider(settings, reply=AIMessage(content="ok"))
+    router = LLMRouter(settings, {"primary": primary, "backup": backup})
+
+    with pytest.raises(ValueError):
+        await router._invoke_chain({"chat_history": []})
+    backup._invoke_chain.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_skips_providers_that_are_not_ready(settings):
+    down = make_provider(settings, reply=AIMessage(content="down"))
+    down.status = LLMStatus.ERROR
+    up = make_provider(settings, reply=AIMessage(content="up"))
+    router = LLMRouter(settings, {"down": down, "up": up})
+
+    result = await router._invoke_chain({})
+
+    assert result.content == "up"
+    down._invoke_chain.assert_not_awaited()
+
+
+def test_is_transient_error():
+    assert is_transient_error(TimeoutError())
+    assert is_transient_error(httpx.ReadTimeout("slow"))
+    assert not is_transient_error(ValueError("bad request"))
+
+
+@pytest.mark.asyncio
+async def test_router_owns_no_model_and_close_unregisters_tool_callbacks(settings):
+    provider = make_provider(settings)
+    router = LLMRouter(settings, {"only": provider})
+    callbacks = router._dynamic_manager._callbacks
+    assert not hasattr(router, "model")
+    assert router._on_tools_updated in callbacks and provider._on_tools_updated in callbacks
+
+    await router.close()
+
+    assert router._on_tools_updated not in callbacks and provider._on_tools_updated not in callbacks
@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from langchain_core.documents import Document
+
+from src.config.config import RAGSettings
+from src.module.rag.base_rag_processor import BaseRAGProcessor, RAGStatus
+from src.services.data_service import CatalogSnapshot, DataService
+
+
+class StubRAGProcessor(BaseRAGProcessor):
+    def _create_embedding_model(self):
+        return MagicMock()
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def data_service(monkeypatch):
+    service = DataService()
+    snapshot = CatalogSnapshot.build(
+        generation=service.generation + 1,
+        media={},
+        doors={},
+        devices={
+            "三分左": {"name": "三分左", "area": "Cave空间"},
+            "三分右": {"name": "三分右", "area": "洞穴"},
+            "贵宾屏": {"name": "贵宾屏", "area": "VIP室"},
+        },
+        areas={
+            "Cave空间": {"name": "Cave空间", "aliases": "洞穴,沉浸空间", "description": ""},
+            "VIP室": {"name": "VIP室", "aliases": "", "description": ""},
+        },
+    )
+    monkeypatch.setattr(service, "_snapshot", snapshot)
+    return service
+
+
+def make_processor(distance, **overrides):
+    processor = StubRAGProcessor(RAGSettings(location_confidence_distance=0.5, **overrides))
+    processor.status = RAGStatus.READY
+    hit = (Document(page_content="三分左", metadata={"type": "device", "name": "三分左"}), distance)
+    processor.vector_store = MagicMock()
+    processor.vector_store.asimilarity_search_with_score = AsyncMock(return_value=[hit])
+    return processor
+
+
+def search_filters(processor):
+    return [call.kwargs.get("filter") for call in processor.vector_store.asimilarity_search_with_score.call_args_list]
+
+
+def test_area_indexes_resolve_aliases(data_service):
+    assert data_service.resolve_area("沉浸空间") == "Cave空间"
+    assert sorted(d["name"] for d in data_service.get_devices_in_area("Cave空间")) == ["三分右", "三分左"]
+    assert data_service.find_areas_in_text("去VIP室看看洞穴") == ["VIP室", "Cave空间"]
+
+
+@pytest.mark.asyncio
+async def test_confident_hit_stays_in_current_area(data_service):
+    processor = make_processor(0.2)
+
+    docs = await processor.retrieve_devices_for_location("打开左边的屏幕", "洞穴")
+
+    assert len(docs) == 1
+    assert search_filters(processor) == [
+        {"$and": [{"type": {"$in": ["device"]}}, {"area": {"$in": ["Cave空间", "洞穴"]}}]}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_widens_to_all_areas(data_service):
+    processor = make_processor(0.8)
+
+    await processor.retrieve_devices_for_location("打开左边的屏幕", "Cave空间")
+
+    filters = search_filters(processor)
+    assert len(filters) == 2
+    assert filters[1] == {"type": {"$in": ["device"]}}
+
+
+@pytest.mark.asyncio
+async def test_mentioning_another_area_searches_all_areas(data_service):
+    processor = make_processor(0.2)
+
+    await processor.retrieve_devices_for_location("打开VIP室的屏幕", "Cave空间")
+
+    assert search_filters(processor) == [{"type": {"$in": ["device"]}}]
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+from src.core.loop_monitor import BlockingDetector
+
+
+def _blocking_helper():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_detector_captures_stack_of_blocking_call():
+    detector = BlockingDetector(threshold=0.05)
+    detector.start()
+    try:
+        await asyncio.sleep(0.1)
+        _blocking_helper()
+        await asyncio.sleep(0.1)
+    finally:
+        await asyncio.to_thread(detector.stop)
+
+    status = detector.get_status()
+    assert status["blocked_count"] == 1
+    location = status["locations"][0]
+    assert location["location"].startswith("test/unit/test_loop_monitor.py")
+    assert location["location"].endswith("_blocking_helper")
+    assert 0.2 <= location["max_seconds"] < 1.0
+    assert any("_blocking_helper" in line for line in status["reports"][0]["stack"])
+
+
+@pytest.mark.asyncio
+async def test_detector_ignores_short_callbacks():
+    detector = BlockingDetector(threshold=0.1)
+    detector.start()
+    try:
+        for _ in range(10):
+            time.sleep(0.005)
+            await asyncio.sleep(0.01)
+    finally:
+        await asyncio.to_thread(detector.stop)
+
+    assert detector.get_status()["blocked_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reset_endpoint_clears_results_and_keeps_detector_running(monkeypatch):
+    from src.api.routers.monitoring import reset_blocking_calls
+    from src.core import dependencies
+
+    detector = BlockingDetector(threshold=0.05)
+    monkeypatch.setattr(dependencies, "blocking_detector", detector)
+    detector.start()
+    try:
+        await asyncio.sleep(0.1)
+        _blocking_helper()
+        await asyncio.sleep(0.1)
+        assert detector.get_status()["blocked_count"] == 1
+
+        status = await reset_blocking_calls()
+
+        assert status["blocked_count"] == 0 and status["locations"] == [] and status["reports"] == []
+        assert detector.running
+    finally:
+        await asyncio.to_thread(detector.stop)
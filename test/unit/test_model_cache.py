@@ -0,0 +1,68 @@
+import os
+
+import pytest
+import torch
+
+from src.config.config import ModelCacheSettings
+from src.core.model_cache import ModelCache, load_mmap_checkpoint
+
+
+def make_model():
+    return torch.nn.Sequential(torch.nn.Linear(4, 3), torch.nn.Linear(3, 2))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ModelCache(ModelCacheSettings(cache_dir=str(tmp_path / "cache")))
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    path = tmp_path / "model"
+    path.mkdir()
+    torch.save(make_model().state_dict(), path / "model.pt")
+    return path
+
+
+def test_stored_checkpoint_loads_via_mmap(cache, model_dir):
+    source = make_model()
+    entry = cache.store("m@v1", str(model_dir), str(model_dir / "model.pt"), source)
+
+    target = make_model()
+    load_mmap_checkpoint(entry["checkpoint"], target)
+
+    for expected, actual in zip(source.state_dict().values(), target.state_dict().values()):
+        assert torch.equal(expected, actual)
+    assert cache.get_entry("m@v1") == entry
+
+
+def test_entry_invalidated_when_source_weights_change(cache, model_dir):
+    cache.store("m@v1", str(model_dir), str(model_dir / "model.pt"), make_model())
+
+    torch.save(make_model().state_dict(), model_dir / "model.pt")
+    os.utime(model_dir / "model.pt", ns=(1, 1))
+
+    assert cache.get_entry("m@v1") is None
+    assert cache.get_entry("other@v1") is None
+
+
+def test_load_auto_model_uses_local_path_after_first_load(cache, model_dir, monkeypatch):
+    calls = []
+
+    class FakeAutoModel:
+        def __init__(self, **kwargs):
+            calls.append(kwargs)
+            self.kwargs = {"model_path": str(model_dir)}
+            self.model = make_model()
+
+    import funasr
+    monkeypatch.setattr(funasr, "AutoModel", FakeAutoModel)
+    monkeypatch.setattr("src.core.model_cache._install_mmap_loader", lambda: None)
+
+    cache.load_auto_model("vad", model="fsmn-vad", model_revision="v2.0.4")
+    cache.load_auto_model("vad", model="fsmn-vad", model_revision="v2.0.4")
+
+    assert calls[0] == {"model": "fsmn-vad", "model_revision": "v2.0.4"}
+    assert calls[1]["model"] == str(model_dir)
+    assert calls[1]["init_param"].endswith(".mmap.pt")
+    assert cache.get_status()["models"]["vad"]["source"] == "mmap"
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from src.services.performance_metrics_manager import (
+    BUCKET_VALUES,
+    MetricType,
+    PerformanceMetricsManager,
+    RollingHistogram,
+    bucket_index,
+)
+
+
+def test_bucket_relative_error_is_bounded():
+    for seconds in (2e-6, 0.0013, 0.05, 0.5, 3.7, 120.0):
+        assert abs(BUCKET_VALUES[bucket_index(seconds)] - seconds) / seconds < 0.04
+
+
+def test_percentiles_track_exact_values():
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(-3, 1) for _ in range(10000))
+    histogram = RollingHistogram(slot_seconds=5, num_slots=61)
+    for value in values:
+        histogram.record(value, now=1000.0)
+
+    summary = histogram.summary(300, (50, 99, 99.9), now=1000.0)
+
+    assert summary["count"] == 10000
+    for key, percent in (("p50", 50), ("p99", 99), ("p999", 99.9)):
+        exact = values[int(percent / 100 * len(values)) - 1]
+        assert summary[key] == pytest.approx(exact, rel=0.04)
+    assert summary["max"] == round(values[-1], 4)
+
+
+def test_old_slots_expire_and_memory_is_fixed():
+    histogram = RollingHistogram(slot_seconds=5, num_slots=61)
+    size = histogram.counts.nbytes
+    for second in range(0, 3000, 1):
+        histogram.record(0.1, now=float(second))
+
+    assert histogram.counts.nbytes == size
+    summary = histogram.summary(300, (50,), now=2999.0)
+    assert summary["count"] == 300
+    assert summary["throughput"] == pytest.approx(1.0)
+
+
+def test_errors_are_counted_but_excluded_from_latency():
+    histogram = RollingHistogram(slot_seconds=5, num_slots=61)
+    histogram.record(0.2, now=10.0)
+    histogram.record(9.0, success=False, now=10.0)
+
+    summary = histogram.summary(300, (50,), now=10.0)
+    assert summary["count"] == 2 and summary["errors"] == 1
+    assert summary["max"] == 0.2
+
+
+def test_manager_reports_per_context_and_bounds_contexts(monkeypatch):
+    monkeypatch.setattr(PerformanceMetricsManager, "MAX_CONTEXTS", 2)
+    manager = PerformanceMetricsManager()
+    for context in ("a", "b", "c"):
+        manager.record(MetricType.ASR_RECOGNIZE, 0.3, context_id=context)
+
+    stats = manager.get_stats()[MetricType.ASR_RECOGNIZE.value]
+    assert stats["count"] == 3 and stats["p99"] == 0.3 and stats["latest"] == 0.3
+
+    contexts = manager.get_context_stats()
+    assert sorted(contexts) == ["b", "c"]
+    assert contexts["c"][MetricType.ASR_RECOGNIZE.value]["p50"] == 0.3
+
+    series = manager.get_metrics(1)["metrics"][MetricType.ASR_RECOGNIZE.value]
+    assert sum(point["count"] for point in series) == 3
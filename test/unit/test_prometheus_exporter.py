@@ -0,0 +1,80 @@
+import asyncio
+import re
+import time
+
+import pytest
+
+from src.core import dependencies
+from src.core.loop_monitor import LoopLagMonitor
+from src.services.performance_metrics_manager import MetricType, PerformanceMetricsManager
+from src.services.prometheus_exporter import collect_metrics, render_metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    manager = PerformanceMetricsManager()
+    monkeypatch.setattr(dependencies, "metrics_manager", manager)
+    monkeypatch.setattr(dependencies, "active_contexts", {})
+    monkeypatch.setattr(dependencies, "loop_monitor", None)
+    return manager
+
+
+def _samples(text: str, prefix: str) -> dict[str, float]:
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line.startswith(prefix)
+    }
+
+
+def test_stage_histogram_is_cumulative(fresh_metrics):
+    for duration in (0.004, 0.02, 0.3, 3.0):
+        fresh_metrics.record(MetricType.ASR_RECOGNIZE, duration)
+    fresh_metrics.record(MetricType.ASR_RECOGNIZE, 9.0, success=False)
+
+    text = render_metrics()
+    buckets = _samples(text, 'cmcc_stage_duration_seconds_bucket{stage="asr_recognize"')
+
+    assert list(buckets.values()) == sorted(buckets.values())
+    assert buckets['cmcc_stage_duration_seconds_bucket{stage="asr_recognize",le="0.005"}'] == 1
+    assert buckets['cmcc_stage_duration_seconds_bucket{stage="asr_recognize",le="0.5"}'] == 3
+    assert buckets['cmcc_stage_duration_seconds_bucket{stage="asr_recognize",le="+Inf"}'] == 4
+    assert 'cmcc_stage_duration_seconds_count{stage="asr_recognize"} 4' in text
+    assert 'cmcc_stage_errors_total{stage="asr_recognize"} 1' in text
+    assert text.count("# TYPE cmcc_stage_duration_seconds histogram") == 1
+
+
+def test_every_sample_line_is_well_formed():
+    text = render_metrics()
+    for line in text.splitlines():
+        if not line.startswith("#"):
+            assert re.fullmatch(r'cmcc_[a-z_]+(\{[^}]*\})? [-+0-9.eInf]+', line), line
+
+
+def test_workers_are_merged_under_one_family_header(fresh_metrics):
+    fresh_metrics.record(MetricType.ASR_RECOGNIZE, 0.02)
+    first = collect_metrics()
+    fresh_metrics.record(MetricType.ASR_RECOGNIZE, 0.02)
+    second = collect_metrics()
+
+    text = render_metrics({"101": first, "102": second})
+    assert text.count("# TYPE cmcc_stage_duration_seconds histogram") == 1
+    assert 'cmcc_stage_duration_seconds_count{worker="101",stage="asr_recognize"} 1' in text
+    assert 'cmcc_stage_duration_seconds_count{worker="102",stage="asr_recognize"} 2' in text
+    # 同一族的样本连续排列
+    families = [line.split()[2] for line in text.splitlines() if line.startswith("# TYPE")]
+    assert len(families) == len(set(families))
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_measures_blocking_call(monkeypatch):
+    monitor = LoopLagMonitor(interval=0.01)
+    monkeypatch.setattr(dependencies, "loop_monitor", monitor)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    time.sleep(0.1)  # 阻塞事件循环
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    assert monitor.get_status()["max"] >= 0.05
+    assert "cmcc_event_loop_lag_seconds_count " in render_metrics()
@@ -0,0 +1,105 @@
+import json
+
+from langchain_core.documents import Document
+
+from src.config.config import LLMSettings
+from src.module.llm.prompt_assembler import PromptAssembler, estimate_tokens
+
+
+def device_doc(name, area="5G先锋体验区", description="一块用于展示的大屏幕"):
+    return Document(page_content=name, metadata={
+        "type": "device",
+        "name": name,
+        "device_type": "screen",
+        "sub_type": "",
+        "area": area,
+        "command": json.dumps(["打开", "关闭"], ensure_ascii=False),
+        "view": "[]",
+        "aliases": "",
+        "description": description,
+    })
+
+
+def media_doc(name, description="宣传片"):
+    return Document(page_content=name, metadata={"type": "video", "name": name, "description": description})
+
+
+def make_assembler(**overrides):
+    return PromptAssembler(LLMSettings(**overrides))
+
+
+def test_estimate_tokens_counts_cjk_per_char():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("屏幕") == 2
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_compact_json_with_parsed_lists_and_common_fields():
+    assembly = make_assembler(prompt_token_budget=0).assemble(
+        {"device": [device_doc("主屏幕"), device_doc("副屏幕")]}, []
+    )
+
+    text = assembly.sections["DEVICES_INFO"]
+    assert "\n" not in text
+    payload = json.loads(text)
+    assert payload["common"]["area"] == "5G先锋体验区"
+    assert payload["common"]["command"] == ["打开", "关闭"]
+    assert [item["name"] for item in payload["items"]] == ["主屏幕", "副屏幕"]
+
+
+def test_descriptions_are_truncated():
+    assembly = make_assembler(prompt_token_budget=0, prompt_description_max_chars=4).assemble(
+        {"video": [media_doc("城市宣传片", description="智慧城市建设成果展示")]}, []
+    )
+
+    assert json.loads(assembly.sections["VIDEOS_INFO"])[0]["description"] == "智慧城市…"
+    assert assembly.stats["VIDEOS_INFO"].truncated == 1
+
+
+def test_budget_drops_lowest_ranked_documents_first():
+    devices = [device_doc(f"屏幕{i}", area=f"区域{i}") for i in range(10)]
+    videos = [media_doc(f"视频{i}") for i in range(2)]
+    assembler = make_assembler(prompt_token_budget=120)
+
+    assembly = assembler.assemble({"device": devices, "video": videos}, [])
+
+    payload = json.loads(assembly.sections["DEVICES_INFO"])
+    kept = [item["name"] for item in payload["items"]]
+    assert kept == [f"屏幕{i}" for i in range(len(kept))]
+    assert 1 <= len(kept) < 10
+    assert assembly.stats["VIDEOS_INFO"].items_kept >= 1
+    assert assembly.total_tokens <= 120
+
+
+def test_budget_keeps_the_most_relevant_documents_regardless_of_list_order():
+    devices = [device_doc(f"屏幕{i}", area=f"区域{i}") for i in range(10)]
+    for i, doc in enumerate(devices):
+        doc.metadata["distance"] = (10 - i) / 10  # 列表末尾的文档最相关
+    assembler = make_assembler(prompt_token_budget=120)
+
+    payload = json.loads(assembler.assemble({"device": devices}, []).sections["DEVICES_INFO"])
+
+    kept = [item["name"] for item in payload["items"]]
+    assert 1 <= len(kept) < 10
+    assert kept == [f"屏幕{i}" for i in range(9, 9 - len(kept), -1)]
+
+
+def test_user_context_template_explains_hoisted_common_fields():
+    settings = LLMSettings()
+    rendered = settings.user_context_template.format(
+        AREAS_INFO="[]", DEVICES_INFO="[]", DOORS_INFO="[]", VIDEOS_INFO="[]",
+        USER_LOCATION="", ACTIVE_DEVICE="", USER_INPUT="",
+    )
+    assert '{"common": {...}, "items": [...]}' in rendered
+
+
+def test_stats_report_per_section_tokens():
+    assembler = make_assembler()
+    assembler.assemble({"device": [device_doc("主屏幕")]}, [{"name": "展厅", "aliases": "", "description": "入口"}])
+
+    stats = assembler.get_stats()
+
+    assert stats["count"] == 1
+    assert stats["sections"]["DEVICES_INFO"]["avg_items_kept"] == 1
+    assert stats["sections"]["AREAS_INFO"]["max_tokens"] > 0
+    assert stats["sections"]["DOORS_INFO"]["avg_tokens"] == 1
@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from langchain_core.documents import Document
+
+from src.config.config import RAGSettings
+from src.module.rag.base_rag_processor import BaseRAGProcessor, MetadataType, RAGStatus
+
+
+class StubRAGProcessor(BaseRAGProcessor):
+    def _create_embedding_model(self):
+        return MagicMock()
+
+    async def close(self):
+        pass
+
+
+def make_processor(distances, **overrides):
+    processor = StubRAGProcessor(RAGSettings(**overrides))
+    processor.status = RAGStatus.READY
+    hits = [(Document(page_content=f"doc{i}", metadata={"type": "device", "name": f"doc{i}"}), d)
+            for i, d in enumerate(distances)]
+    processor.vector_store = MagicMock()
+    processor.vector_store.asimilarity_search_with_score = AsyncMock(return_value=hits)
+    return processor
+
+
+@pytest.mark.asyncio
+async def test_cuts_off_after_distance_gap():
+    processor = make_processor([0.10, 0.12, 0.20, 0.50, 0.55], adaptive_distance_gap=0.2, adaptive_min_k=1)
+
+    docs = await processor.retrieve_context("打开主屏幕", [MetadataType.DEVICE], top_k=5)
+
+    assert [d.metadata["name"] for d in docs] == ["doc0", "doc1", "doc2"]
+    assert docs[0].metadata["distance"] == 0.1
+
+
+@pytest.mark.asyncio
+async def test_keeps_min_k_even_when_gap_is_large():
+    processor = make_processor([0.1, 0.9, 1.0, 1.1], adaptive_distance_gap=0.2, adaptive_min_k=2)
+
+    docs = await processor.retrieve_context("打开主屏幕", top_k=4)
+
+    assert len(docs) == 2
+
+
+@pytest.mark.asyncio
+async def test_adaptive_can_be_disabled():
+    processor = make_processor([0.1, 0.9, 1.0], adaptive_min_k=1)
+
+    docs = await processor.retrieve_context("打开主屏幕", top_k=3, adaptive=False)
+
+    assert len(docs) == 3
+
+
+@pytest.mark.asyncio
+async def test_retrieval_stats_report_kept_documents():
+    processor = make_processor([0.1, 0.15, 0.9, 1.0], adaptive_distance_gap=0.2, adaptive_min_k=1)
+
+    await processor.retrieve_context("打开主屏幕", [MetadataType.DEVICE], top_k=4)
+
+    stats = processor.get_retrieval_stats()["types"]["device"]
+    assert stats["queries"] == 1
+    assert stats["avg_candidates"] == 4
+    assert stats["avg_kept"] == 2
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.config.config import RAGSettings
+from src.module.rag.base_rag_processor import BaseRAGProcessor, RAGStatus
+from src.module.rag.helper import convert_devices_to_documents
+
+
+class StubRAGProcessor(BaseRAGProcessor):
+    documents: list[Document] = []
+
+    def _create_embedding_model(self):
+        return DeterministicFakeEmbedding(size=8)
+
+    def _load_all_documents(self):
+        return list(self.documents)
+
+    async def close(self):
+        pass
+
+
+def _devices(*names):
+    return convert_devices_to_documents([{"name": name, "type": "screen", "area": "大厅"} for name in names])
+
+
+@pytest.mark.asyncio
+async def test_refresh_builds_aside_and_keeps_serving_old_index(tmp_path):
+    processor = StubRAGProcessor(RAGSettings(chroma_db_dir=str(tmp_path / "chroma")))
+    processor.documents = _devices("主屏幕", "副屏幕")
+    await processor.initialize()
+
+    create_staging = processor._create_staging_store
+    counts_during_build = []
+
+    def staging_store():
+        staging = create_staging()
+        add_documents = staging.add_documents
+
+        def add_and_check(documents):
+            # 暂存集合构建期间，检索仍使用完整的旧索引
+            counts_during_build.append(processor.vector_store._collection.count())
+            return add_documents(documents)
+
+        staging.add_documents = add_and_check
+        return staging
+
+    processor._create_staging_store = staging_store
+    processor.documents = _devices("主屏幕", "副屏幕", "投影仪")
+    assert await processor.refresh_database()
+
+    assert counts_during_build and set(counts_during_build) == {2}
+    assert processor.status == RAGStatus.READY
+    assert processor.vector_store._collection.count() == 3
+    reloaded = Chroma(persist_directory=str(tmp_path / "chroma"), embedding_function=processor.embedding_model)
+    assert reloaded._collection.count() == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_leaves_old_index_in_place(tmp_path):
+    processor = StubRAGProcessor(RAGSettings(chroma_db_dir=str(tmp_path / "chroma")))
+    processor.documents = _devices("主屏幕")
+    await processor.initialize()
+    old_store = processor.vector_store
+
+    def fail():
+        raise ValueError("从CSV加载的文档为空")
+
+    processor._load_all_documents = fail
+    assert not await processor.refresh_database()
+    assert processor.vector_store is old_store
+    assert processor.status == RAGStatus.READY
+    assert old_store._collection.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_apply_delta_writes_new_vectors_before_deleting_old(tmp_path):
+    processor = StubRAGProcessor(RAGSettings(chroma_db_dir=str(tmp_path / "chroma")))
+    processor.documents = _devices("主屏幕", "投影仪")
+    await processor.initialize()
+
+    collection = processor.vector_store._collection
+    counts_before_delete = []
+    delete = collection.delete
+
+    def delete_and_check(**kwargs):
+        counts_before_delete.append(
+            len(collection.get(where={"name": "主屏幕"}, include=[])["ids"]))
+        return delete(**kwargs)
+
+    collection.delete = delete_and_check
+    await processor.apply_delta("device", [{"name": "主屏幕", "type": "screen", "area": "二楼"}], ["投影仪"])
+
+    # 删除旧向量时新向量已写入，同步期间检索不会缺少被修改的条目
+    assert counts_before_delete == [2]
+    remaining = collection.get(include=["metadatas"])["metadatas"]
+    assert [(m["name"], m["area"]) for m in remaining] == [("主屏幕", "二楼")]
+
+
+@pytest.mark.asyncio
+async def test_deltas_during_refresh_are_not_lost(tmp_path):
+    processor = StubRAGProcessor(RAGSettings(chroma_db_dir=str(tmp_path / "chroma")))
+    processor.documents = _devices("主屏幕")
+    await processor.initialize()
+
+    load_all = processor._load_all_documents
+    loading = asyncio.Event()
+
+    def slow_load():
+        loading.set()
+        time.sleep(0.1)
+        return load_all()
+
+    processor._load_all_documents = slow_load
+    refreshes = [asyncio.create_task(processor.refresh_database()) for _ in range(2)]
+    await loading.wait()
+    # 重建进行中到达的增量在重建完成后写入新集合，不会随旧集合一起被删除
+    await processor.apply_delta("device", [{"name": "投影仪", "type": "screen", "area": "大厅"}], [])
+
+    assert await asyncio.gather(*refreshes) == [True, True]
+    names = sorted(m["name"] for m in processor.vector_store._collection.get(include=["metadatas"])["metadatas"])
+    assert names == ["主屏幕", "投影仪"]
+    collections = [c.name for c in processor.vector_store._client.list_collections()]
+    assert collections == [processor.vector_store._collection_name]
@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import dependencies
+from src.core.startup import StageStatus, StartupGraph, component_status, wait_until_ready
+from src.module.rag.base_rag_processor import RAGStatus
+
+
+def stage(log, name, delay=0.05, fail=False):
+    async def run():
+        log.append(f"{name}:start")
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        log.append(f"{name}:end")
+    return run
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_run_in_parallel_and_respect_dependencies():
+    log = []
+    graph = StartupGraph()
+    graph.add("data", stage(log, "data"))
+    graph.add("vad", stage(log, "vad"))
+    graph.add("asr", stage(log, "asr"), depends_on=("data",))
+
+    await graph.run()
+
+    assert log.index("vad:start") < log.index("data:end")
+    assert log.index("asr:start") > log.index("data:end")
+    assert all(s.status == StageStatus.READY for s in graph.stages.values())
+    assert graph.stages["asr"].started_at >= graph.stages["data"].duration
+
+
+@pytest.mark.asyncio
+async def test_failed_dependency_skips_dependents():
+    log = []
+    graph = StartupGraph()
+    graph.add("data", stage(log, "data", fail=True))
+    graph.add("rag", stage(log, "rag"), depends_on=("data",))
+    graph.add("llm", stage(log, "llm"))
+
+    await graph.run()
+
+    assert graph.stages["data"].status == StageStatus.FAILED
+    assert graph.stages["rag"].status == StageStatus.SKIPPED
+    assert graph.stages["llm"].status == StageStatus.READY
+    assert "rag:start" not in log
+    assert not await graph.wait_for(["rag"], timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_times_out_while_stage_is_running():
+    graph = StartupGraph()
+    graph.add("asr", stage([], "asr", delay=1))
+    graph.start()
+
+    assert not await graph.wait_for(["asr"], timeout=0.05)
+    assert graph.get_status()["stages"]["asr"]["status"] == "RUNNING"
+    await graph.close()
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_unfinished_stages_and_report():
+    graph = StartupGraph()
+    graph.add("asr", stage([], "asr", delay=10))
+    graph.start()
+    report = graph._report_task
+
+    await graph.close()
+
+    assert report.cancelled()
+    assert all(task.done() for task in graph._tasks)
+    assert graph.finished_at is None
+
+
+@pytest.mark.asyncio
+async def test_wait_until_ready_reflects_component_status(monkeypatch):
+    rag = SimpleNamespace(status=RAGStatus.INITIALIZING, error_message=None)
+    monkeypatch.setattr(dependencies, "startup_graph", None)
+    monkeypatch.setattr(dependencies, "rag_processor", rag)
+    monkeypatch.setattr(dependencies, "llm_processor", None)
+
+    assert component_status("llm")["status"] == "UNINITIALIZED"
+    assert not await wait_until_ready(["rag"], timeout=0.01)
+
+    rag.status = RAGStatus.READY
+    assert await wait_until_ready(["rag"], timeout=0.01)
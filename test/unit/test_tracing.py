@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from src.core import dependencies
+from src.services.tracing import Trace, TraceStore, get_traced, put_traced
+
+
+@pytest.fixture(autouse=True)
+def fresh_store(monkeypatch):
+    store = TraceStore(max_traces=3)
+    monkeypatch.setattr(dependencies, "trace_store", store)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_trace_follows_payload_through_queues(fresh_store):
+    queue: asyncio.Queue = asyncio.Queue()
+    trace = Trace(attributes={"context_id": "ctx-1"})
+
+    await put_traced(queue, "audio_segment", b"audio", trace)
+    payload, received = await get_traced(queue, "audio_segment")
+    with received.span("asr.recognize") as span:
+        span["text.length"] = 4
+    received.finish("ok")
+    received.finish("error")  # 重复结束无效
+
+    assert payload == b"audio" and received is trace
+    assert [s.name for s in trace.spans] == ["queue.audio_segment", "asr.recognize"]
+    assert trace.spans[1].attributes == {"text.length": 4}
+    assert trace.status == "ok"
+    assert fresh_store.get(trace.trace_id) is trace
+
+
+def test_span_records_error_and_reraises():
+    trace = Trace()
+    with pytest.raises(ValueError):
+        with trace.span("llm.generate"):
+            raise ValueError("boom")
+    assert "boom" in trace.spans[0].attributes["error"]
+
+
+def test_otlp_export_nests_stages_under_utterance():
+    trace = Trace(attributes={"context_id": "ctx-1"}, start_ns=1_000)
+    trace.add_span("rag.retrieve", 2_000, 5_000, top_k=3)
+    trace.end_ns, trace.status = 9_000, "ok"
+
+    spans = TraceStore().export_otlp([trace])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+    root, child = spans
+    assert root["name"] == "utterance" and "parentSpanId" not in root
+    assert child["parentSpanId"] == root["spanId"]
+    assert child["traceId"] == root["traceId"] == trace.trace_id
+    assert (child["startTimeUnixNano"], child["endTimeUnixNano"]) == ("2000", "5000")
+    assert {"key": "top_k", "value": {"intValue": "3"}} in child["attributes"]
+
+
+def test_store_is_bounded_and_sorts_slowest(fresh_store):
+    for context_id, duration in (("a", 5), ("b", 1), ("a", 3), ("b", 4)):
+        trace = Trace(attributes={"context_id": context_id}, start_ns=0)
+        trace.end_ns = duration * 1_000_000_000
+        fresh_store.add(trace)
+
+    assert len(fresh_store.get_recent(10)) == 3
+    assert [t.duration for t in fresh_store.get_slowest(2)] == [4.0, 3.0]
+    assert [t.duration for t in fresh_store.get_slowest(5, context_id="a")] == [3.0]
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.config.config import VADSettings
+from src.module.vad.base_vad_processor import VADStatus
+from src.module.vad.vad_core import VADCore
+
+
+class SharedStateModel:
+    """模拟 AutoModel：generate 期间把调用方的 cache 放在共享的 kwargs 中"""
+
+    def __init__(self):
+        self.kwargs = {}
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def generate(self, input, cache, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.kwargs["cache"] = cache
+        time.sleep(0.005)
+        owner = self.kwargs["cache"] is cache
+        with self.lock:
+            self.active -= 1
+        return [{"value": [[int(owner), len(input)]]}]
+
+
+def test_concurrent_sessions_do_not_share_streaming_state():
+    core = VADCore(VADSettings())
+    core.model, core.status = SharedStateModel(), VADStatus.READY
+    chunk = np.zeros(3200, dtype=np.float32)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: core.process_chunk(chunk, {}), range(16)))
+
+    assert all(segments == [[1, 3200]] for segments in results)
+    assert core.model.max_active == 1
+
+
+@pytest.mark.asyncio
+async def test_async_chunks_wait_for_model_lock_off_the_event_loop():
+    core = VADCore(VADSettings())
+    core.model, core.status = SharedStateModel(), VADStatus.READY
+    chunk = np.zeros(3200, dtype=np.float32)
+
+    # 模拟冒烟测试持有模型锁：会话等待锁时事件循环仍能处理其他任务
+    core._generate_lock.acquire()
+    pending = asyncio.create_task(core.aprocess_chunk(chunk, {}))
+    start = time.perf_counter()
+    await asyncio.sleep(0.05)
+    assert time.perf_counter() - start < 0.5
+    assert not pending.done()
+
+    core._generate_lock.release()
+    assert await pending == [[1, 3200]]